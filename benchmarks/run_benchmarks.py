@@ -0,0 +1,316 @@
+"""
+Headless benchmark harness for the PermitMinder data layer.
+
+Times the hot paths (load, severity computation, every filter combination,
+permit summary, chart aggregation, the daily diff and alert fan-out) on
+synthetic datasets and stores the results per commit so runs can be compared.
+
+Usage:
+    python -m benchmarks.run_benchmarks                       # 100k rows
+    python -m benchmarks.run_benchmarks --rows 100000 --rows 1000000 --rows 10000000
+    python -m benchmarks.run_benchmarks --only filter
+    python -m benchmarks.run_benchmarks --compare results/a.json results/b.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from utils.synthetic_data import generate_exceedances
+
+RESULTS_DIR = os.path.join(PROJECT_ROOT, 'benchmarks', 'results')
+DEFAULT_ROWS = [100_000]
+
+# Number of subscribers and permits per subscriber for the alert fan-out benchmark
+FANOUT_SUBSCRIBERS = 1000
+FANOUT_PERMITS_PER_SUBSCRIBER = 5
+
+
+def _quiet(func: Callable[[], Any]) -> Callable[[], Any]:
+    """Wrap a benchmark so the code under test cannot print to the console."""
+    def run() -> Any:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return func()
+    return run
+
+
+def time_call(func: Callable[[], Any], repeats: int) -> Dict[str, float]:
+    """
+    Time a callable several times.
+
+    Args:
+        func (Callable): Zero-argument function to time.
+        repeats (int): Number of timed runs (after one warm-up run).
+
+    Returns:
+        Dict[str, float]: min, median and mean seconds plus the repeat count.
+    """
+    func()
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    return {
+        'min': min(timings),
+        'median': statistics.median(timings),
+        'mean': statistics.mean(timings),
+        'repeats': repeats,
+    }
+
+
+def build_suite(workdir: str, n_rows: int) -> List[Tuple[str, Callable[[], Any]]]:
+    """
+    Prepare synthetic data and return the benchmarks for one dataset size.
+
+    Args:
+        workdir (str): Scratch directory for generated files.
+        n_rows (int): Number of synthetic exceedance records.
+
+    Returns:
+        List[Tuple[str, Callable]]: (benchmark name, zero-argument callable) pairs.
+    """
+    import streamlit as st
+    from utils.database import load_data, filter_exceedances
+    from permitminder.core import filtering
+    from permitminder.core.aggregation import summarize_permits
+    from permitminder.core.schema import calculate_severity
+    from utils.charts import PermitCharts
+    from check_new_exceedances import NewExceedanceDetector, DailyAlertSystem
+    from utils.alert_routing import route_exceedances
+
+    raw = generate_exceedances(n_rows)
+    raw = raw[raw['Is_Violation']].reset_index(drop=True)
+    csv_path = os.path.join(workdir, 'pa_exceedances_launch_ready.csv')
+    raw.to_csv(csv_path, index=False)
+
+    def load() -> pd.DataFrame:
+        st.cache_data.clear()
+        return load_data(primary_file=csv_path)
+
+    df = _quiet(load)()
+    county = df['COUNTY_NAME'].mode()[0]
+    facility = df['PF_NAME'].mode()[0]
+    parameter = df['PARAMETER'].mode()[0]
+    top_counties = df['COUNTY_NAME'].value_counts().index[:5].tolist()
+    top_parameters = df['PARAMETER'].value_counts().index[:3].tolist()
+    date_range = {'start_date': datetime(2022, 1, 1), 'end_date': datetime(2022, 12, 31)}
+
+    filter_combinations = {
+        'county': {'county': county},
+        'facility': {'facility': facility},
+        'parameter': {'parameter': parameter},
+        'date_range': date_range,
+        'severity': {'severity': 'High'},
+        'county+parameter': {'county': county, 'parameter': parameter},
+        'county+date_range': {'county': county, **date_range},
+        'counties+parameters': {'county': top_counties, 'parameter': top_parameters},
+        'all': {
+            'county': county, 'facility': facility.split()[0], 'parameter': parameter,
+            'severity': 'High', **date_range
+        },
+    }
+
+    suite = [
+        ('load', load),
+        ('severity', lambda: calculate_severity(df)),
+    ]
+    for label, kwargs in filter_combinations.items():
+        suite.append((f'filter[{label}]', lambda kwargs=kwargs: filtering.filter_exceedances(df, **kwargs)))
+    # Page rerun with an unchanged search (served from the result cache)
+    suite.append(('filter_rerun[all]', lambda: filter_exceedances(df, **filter_combinations['all'])))
+
+    suite += [
+        ('permit_summary', lambda: summarize_permits(df)),
+        ('chart[severity_distribution]', lambda: PermitCharts.severity_distribution(df)),
+        ('chart[compliance_trend_by_parameter]', lambda: PermitCharts.compliance_trend_by_parameter(df.copy())),
+        ('chart[county_exceedance_heatmap]', lambda: PermitCharts.county_exceedance_heatmap(df)),
+    ]
+
+    # Daily diff: today's extract vs. yesterday's with 1% of rows new
+    detector = NewExceedanceDetector(data_dir=os.path.join(workdir, 'data'))
+    recent = raw.copy()
+    recent_dates = datetime.now() - pd.to_timedelta(np.arange(len(recent)) % 25, unit='D')
+    recent['NON_COMPLIANCE_DATE'] = recent_dates.strftime('%m/%d/%Y')
+    recent.to_csv(detector.get_today_filename(), index=False)
+    recent.iloc[: int(len(recent) * 0.99)].to_csv(detector.get_yesterday_filename(), index=False)
+    suite.append(('daily_diff', lambda: detector.find_new_exceedances(recent_days=30)))
+
+    # Alert fan-out: route 1% new exceedances to every subscriber's permits
+    rng = np.random.default_rng(0)
+    permits = raw['PERMIT_NUMBER'].unique()
+    subscribers = [
+        rng.choice(permits, FANOUT_PERMITS_PER_SUBSCRIBER).tolist()
+        for _ in range(FANOUT_SUBSCRIBERS)
+    ]
+    new_exceedances = raw.sample(frac=0.01, random_state=0)
+    alert_system = DailyAlertSystem()
+    suite.append((
+        'alert_fanout',
+        lambda: [alert_system.filter_exceedances_for_subscriber(new_exceedances, p) for p in subscribers]
+    ))
+
+    # Same fan-out with per-subscription options, routed per permit group
+    severity_options = [None, 'Critical|High', 'Critical']
+    subscriptions = pd.DataFrame([
+        {
+            'subscription_id': subscription_id,
+            'permit_number': permit,
+            'severities': severity_options[subscription_id % len(severity_options)],
+            'parameters': None,
+            'min_percent': 50.0 if subscription_id % 4 == 0 else None,
+        }
+        for subscription_id, subscriber_permits in enumerate(subscribers)
+        for permit in subscriber_permits
+    ])
+    suite.append(('alert_routing', lambda: route_exceedances(new_exceedances, subscriptions)))
+
+    return [(name, _quiet(func)) for name, func in suite]
+
+
+def run(row_counts: List[int], only: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Run the benchmark suite for each dataset size.
+
+    Args:
+        row_counts (List[int]): Dataset sizes to benchmark.
+        only (str, optional): Only run benchmarks whose name contains this text.
+
+    Returns:
+        Dict[str, Any]: Run metadata and timings keyed by "name@rows".
+    """
+    results: Dict[str, Any] = {}
+    original_dir = os.getcwd()
+
+    for n_rows in row_counts:
+        repeats = 5 if n_rows <= 100_000 else 3 if n_rows <= 1_000_000 else 1
+        with tempfile.TemporaryDirectory() as workdir:
+            # load_data also looks in the working directory, so run from the scratch dir
+            os.chdir(workdir)
+            try:
+                print(f"\nPreparing {n_rows:,} rows...")
+                for name, func in build_suite(workdir, n_rows):
+                    if only and only not in name:
+                        continue
+                    timing = time_call(func, repeats)
+                    results[f'{name}@{n_rows}'] = timing
+                    print(f"  {name:<40} median {timing['median'] * 1000:>10.1f} ms")
+            finally:
+                os.chdir(original_dir)
+
+    return {
+        'commit': _git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'results': results,
+    }
+
+
+def _git_commit() -> str:
+    """Short hash of the checked-out commit, marked '-dirty' with local changes."""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ['git', 'status', '--porcelain', '--untracked-files=no'],
+            cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        return f"{commit}-dirty" if dirty else commit
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def save_results(report: Dict[str, Any]) -> str:
+    """
+    Write a benchmark report to the results directory.
+
+    Args:
+        report (Dict[str, Any]): Report from ``run``.
+
+    Returns:
+        str: Path of the written JSON file.
+    """
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    path = os.path.join(RESULTS_DIR, f"{stamp}_{report['commit']}.json")
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    return path
+
+
+def compare_results(baseline_path: str, candidate_path: str) -> None:
+    """
+    Print median timings of two saved reports side by side.
+
+    Args:
+        baseline_path (str): Report to compare against.
+        candidate_path (str): Report being evaluated.
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    with open(candidate_path) as f:
+        candidate = json.load(f)
+
+    print(f"{'benchmark':<50} {baseline['commit']:>12} {candidate['commit']:>12} {'change':>8}")
+    for name, timing in candidate['results'].items():
+        before = baseline['results'].get(name)
+        after_ms = timing['median'] * 1000
+        if before is None:
+            print(f"{name:<50} {'-':>12} {after_ms:>10.1f}ms {'new':>8}")
+            continue
+        before_ms = before['median'] * 1000
+        change = after_ms / before_ms if before_ms else float('inf')
+        print(f"{name:<50} {before_ms:>10.1f}ms {after_ms:>10.1f}ms {change:>7.2f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="PermitMinder data layer benchmarks")
+    parser.add_argument('--rows', type=int, action='append', help="Dataset size (repeatable)")
+    parser.add_argument('--only', help="Only run benchmarks whose name contains this text")
+    parser.add_argument('--no-save', action='store_true', help="Do not write a results file")
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CANDIDATE'),
+                        help="Compare two saved result files instead of running")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare_results(*args.compare)
+        return
+
+    # Streamlit warns about running without a server and pandas about chained
+    # assignment in the code under test; neither matters for timing
+    import streamlit  # noqa: F401 - registers the streamlit loggers
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith('streamlit'):
+            logging.getLogger(name).setLevel(logging.ERROR)
+    warnings.simplefilter('ignore')
+
+    report = run(args.rows or DEFAULT_ROWS, only=args.only)
+    if not args.no_save:
+        print(f"\nSaved results to {save_results(report)}")
+
+
+if __name__ == "__main__":
+    main()
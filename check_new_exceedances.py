@@ -5,6 +5,9 @@ import os
 from datetime import datetime, timedelta
 import hashlib
 
+from permitminder.core import filter_by_permits, filter_recent, read_exceedances, record_keys
+from utils.event_log import get_event_log
+
 class NewExceedanceDetector:
     def __init__(self, data_dir="./data"):
         self.data_dir = data_dir
@@ -34,12 +37,12 @@ class NewExceedanceDetector:
     def load_exceedances_file(self, filename):
         """Load exceedances CSV and add hash column"""
         try:
-            df = pd.read_csv(filename)
+            df = read_exceedances(filename)
             if df.empty:
                 return df
             
-            # Add hash column for comparison
-            df['exceedance_hash'] = df.apply(self.create_exceedance_hash, axis=1)
+            # Add hash column for comparison (same hash as create_exceedance_hash)
+            df['exceedance_hash'] = record_keys(df)
             return df
         except FileNotFoundError:
             print(f"File not found: {filename}")
@@ -48,11 +51,11 @@ class NewExceedanceDetector:
             print(f"Error loading {filename}: {e}")
             return pd.DataFrame()
     
-    def find_new_exceedances(self, recent_days=30):
+    def find_new_exceedances(self, recent_days=30, today_file=None):
         """Find exceedances that are new compared to yesterday"""
         
         # Load today's and yesterday's data
-        today_file = self.get_today_filename()
+        today_file = today_file or self.get_today_filename()
         yesterday_file = self.get_yesterday_filename()
         
         print(f"Checking for new exceedances...")
@@ -89,13 +92,7 @@ class NewExceedanceDetector:
         if df.empty:
             return df
         
-        cutoff_date = datetime.now() - timedelta(days=recent_days)
-        
-        # Convert date column to datetime
-        df['date_check'] = pd.to_datetime(df['NON_COMPLIANCE_DATE'], errors='coerce')
-        
-        # Filter to recent exceedances
-        recent_df = df[df['date_check'] >= cutoff_date].copy()
+        recent_df = filter_recent(df, recent_days)
         
         print(f"Filtered to {len(recent_df)} recent exceedances (last {recent_days} days)")
         return recent_df
@@ -110,12 +107,12 @@ class NewExceedanceDetector:
         print(f"Saved {len(new_exceedances_df)} new exceedances to {filename}")
         return filename
     
-    def run_daily_check(self):
+    def run_daily_check(self, today_file=None):
         """Main function to run daily new exceedance detection"""
         print(f"\n=== Daily Exceedance Check - {datetime.now().strftime('%Y-%m-%d %H:%M')} ===")
         
         # Find new exceedances
-        new_exceedances = self.find_new_exceedances()
+        new_exceedances = self.find_new_exceedances(today_file=today_file)
         
         if new_exceedances.empty:
             print("No new exceedances detected today")
@@ -124,6 +121,10 @@ class NewExceedanceDetector:
         # Save new exceedances file
         new_exceedances_file = self.save_new_exceedances(new_exceedances)
         
+        # Emit them to the event log so the alert worker can send immediate alerts
+        emitted = get_event_log().emit(new_exceedances, source=new_exceedances_file)
+        print(f"Emitted {emitted} new-exceedance events")
+        
         # Log summary
         print(f"\n=== Summary ===")
         print(f"New exceedances: {len(new_exceedances)}")
@@ -137,6 +138,7 @@ class NewExceedanceDetector:
         return new_exceedances_file
 
 # daily_scraper.py - Runs your existing scraper and saves with date
+import argparse
 import subprocess
 import sys
 from datetime import datetime
@@ -184,143 +186,134 @@ class DailyScraper:
             return None
 
 # daily_alerts.py - Send alerts for new exceedances only
-import csv
+from permitminder.core import load_exceedances
+from permitminder.pipeline import DEFAULT_STATE_DIR, Pipeline, Step
+from utils.alert_rendering import AlertRenderer
+from utils.alert_routing import RoutingColumns, rule_key
+from utils.alert_worker import AlertWorker
+from utils.facility_directory import DEFAULT_DIRECTORY_PATH, load_facility_directory, save_facility_directory
+from utils.mailer import send_email
+from utils.similarity import DEFAULT_INDEX_DIR, FacilitySimilarityIndex
+from utils.subscription_store import get_subscription_store, join_values
 
 class DailyAlertSystem:
     def __init__(self, gmail_email=None, gmail_password=None):
         self.gmail_email = gmail_email
         self.gmail_password = gmail_password
+        self.renderer = AlertRenderer()
         
     def load_subscriptions(self):
-        """Load email subscriptions from Streamlit app"""
+        """Load active email subscriptions from the subscription store"""
         subscriptions = {}
         
-        try:
-            with open('alert_subscriptions.csv', 'r') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    email = row['email']
-                    permits = row['permits'].split(',')
-                    
-                    if email not in subscriptions:
-                        subscriptions[email] = {
-                            'permits': [],
-                            'frequency': row.get('frequency', 'daily')
-                        }
-                    
-                    subscriptions[email]['permits'].extend(permits)
-            
-            print(f"Loaded {len(subscriptions)} email subscriptions")
-            return subscriptions
-            
-        except FileNotFoundError:
-            print("No subscriptions file found")
-            return {}
-    
-    def filter_exceedances_for_subscriber(self, exceedances_df, subscriber_permits):
-        """Filter exceedances to only those for subscribed permits"""
-        if exceedances_df.empty:
-            return exceedances_df
+        active = get_subscription_store().active_permits()
+        for email, rows in active.groupby('email'):
+            subscriptions[email] = {
+                'permits': rows['permit_number'].unique().tolist(),
+                'frequency': rows['frequency'].iloc[0]
+            }
         
-        return exceedances_df[exceedances_df['PERMIT_NUMBER'].isin(subscriber_permits)]
+        print(f"Loaded {len(subscriptions)} email subscriptions")
+        return subscriptions
     
-    def send_daily_alerts(self, new_exceedances_file):
-        """Send alerts for today's new exceedances"""
-        if not new_exceedances_file or not os.path.exists(new_exceedances_file):
-            print("No new exceedances file to process")
-            return
-        
-        # Load new exceedances
-        new_exceedances = pd.read_csv(new_exceedances_file)
-        if new_exceedances.empty:
-            print("No new exceedances to alert on")
-            return
-        
-        # Load subscriptions
-        subscriptions = self.load_subscriptions()
-        if not subscriptions:
-            print("No subscriptions - no alerts to send")
-            return
-        
-        print(f"Processing alerts for {len(new_exceedances)} new exceedances")
-        
-        # Send alerts to each subscriber
-        alerts_sent = 0
-        for email, settings in subscriptions.items():
-            
-            # Filter exceedances for this subscriber's permits
-            subscriber_exceedances = self.filter_exceedances_for_subscriber(
-                new_exceedances, settings['permits']
-            )
-            
-            if not subscriber_exceedances.empty:
-                success = self.send_exceedance_alert(email, subscriber_exceedances)
-                if success:
-                    alerts_sent += 1
-                    
-        print(f"Sent {alerts_sent} alert emails")
+    def filter_exceedances_for_subscriber(self, exceedances_df, subscriber_permits,
+                                          severities=None, parameters=None, min_percent=None):
+        """Filter exceedances to a subscriber's permits and alert options"""
+        permit_exceedances = filter_by_permits(exceedances_df, subscriber_permits)
+        if permit_exceedances.empty or not (severities or parameters or min_percent):
+            return permit_exceedances
+        
+        rule = rule_key(join_values(severities), join_values(parameters), min_percent)
+        return permit_exceedances[RoutingColumns(permit_exceedances).mask(None, rule)]
     
-    def send_exceedance_alert(self, email, exceedances_df):
+    def send_daily_alerts(self, now=None):
+        """Send every alert that is due for the new exceedances in the event log"""
+        # The detector has already emitted today's new exceedances; the worker routes
+        # them through each subscription's alert options (severities, parameters,
+        # minimum %) and flushes the digests that are due
+        worker = AlertWorker(self.send_exceedance_alert)
+        result = worker.run_once(now)
+        print(f"Routed {result['consumed']} events, sent {result['sent']} alert emails")
+        return result
+    
+    def send_exceedance_alert(self, email, exceedances_df, attachment=None, idempotency_key=None, include_summary=True):
         """Send individual exceedance alert email"""
-        # Import your existing alert system
-        from exceedance_alerts import ExceedanceAlertSystem
-        
-        alert_system = ExceedanceAlertSystem(self.gmail_email, self.gmail_password)
-        
-        # Convert DataFrame to exceedance format
-        exceedances_list = []
-        for _, row in exceedances_df.iterrows():
-            exceedances_list.append({
-                'permit': row['PERMIT_NUMBER'],
-                'facility': row['PF_NAME'],
-                'county': row['COUNTY_NAME'],
-                'date': row['NON_COMPLIANCE_DATE'],
-                'parameter': row['PARAMETER'],
-                'exceedance_percent': row.get('Percent_Over_Limit', 'N/A'),
-                'severity': row.get('Severity', 'Unknown'),
-                'sample_value': row.get('SAMPLE_VALUE', 'N/A'),
-                'permit_value': row.get('PERMIT_VALUE', 'N/A'),
-                'unit': row.get('UNIT_OF_MEASURE', 'N/A')
-            })
-        
-        # Format and send email
-        subject, body = alert_system.format_alert_email(exceedances_list, email)
-        if subject and body:
-            return alert_system.send_email(email, subject, body)
-        
-        return False
+        # Permit sections are cached by the renderer and shared between subscribers
+        rendered = self.renderer.render(email, exceedances_df, include_summary=include_summary)
+        attachments = []
+        if attachment is not None:
+            attachments.append((f"exceedances_{datetime.now().strftime('%Y_%m_%d')}.csv", attachment))
+        return send_email(self.gmail_email, self.gmail_password, email, rendered.subject, rendered.html,
+                          attachments, message_id=idempotency_key, text=rendered.text)
 
 # main.py - Orchestrates the daily monitoring process
-def main():
+def scrape_step(inputs):
+    """Run the scraper; fails the step if it produced no data"""
+    data_file = DailyScraper().run_scraper()
+    if not data_file:
+        raise RuntimeError("Scraper produced no data file")
+    return data_file
+
+def detect_step(inputs):
+    """Detect new exceedances in today's scrape vs yesterday and emit them to the event log"""
+    return NewExceedanceDetector().run_daily_check(inputs['scrape'])
+
+def alert_step(inputs):
+    """Route the detected events and send the digests that are due"""
+    # (weekly and monthly digests can be due on a day with nothing new)
+    alert_system = DailyAlertSystem(os.environ.get('GMAIL_EMAIL'), os.environ.get('GMAIL_PASSWORD'))
+    return alert_system.send_daily_alerts()
+
+def directory_step(inputs):
+    """Rebuild the facility directory artifact from today's scrape"""
+    directory = load_facility_directory(path='', data_path=inputs['scrape'])
+    save_facility_directory(directory, DEFAULT_DIRECTORY_PATH)
+    return DEFAULT_DIRECTORY_PATH
+
+def similarity_step(inputs):
+    """Rebuild the facility similarity index from today's scrape"""
+    data = load_exceedances(inputs['scrape'])
+    if data.empty:
+        raise RuntimeError(f"No data in {inputs['scrape']} - similarity index not rebuilt")
+    FacilitySimilarityIndex.build(data).save(DEFAULT_INDEX_DIR)
+    return DEFAULT_INDEX_DIR
+
+def build_pipeline(state_dir=DEFAULT_STATE_DIR):
+    """Daily monitoring DAG: scrape fans out to detect -> alert and the artifact rebuilds"""
+    return Pipeline([
+        Step('scrape', scrape_step, retries=1, retry_delay=60),
+        Step('detect', detect_step, requires=['scrape']),
+        Step('alert', alert_step, requires=['detect'], retries=2, retry_delay=30),
+        # Independent of alerting: a failed rebuild does not hold back alerts
+        Step('directory', directory_step, requires=['scrape']),
+        Step('similarity', similarity_step, requires=['scrape']),
+    ], name='daily_monitoring', state_dir=state_dir)
+
+def main(argv=None):
     """Main daily monitoring process"""
+    parser = argparse.ArgumentParser(description='PermitMinder daily monitoring')
+    parser.add_argument('--run-id', help="Run to start or resume (default: today's date)")
+    parser.add_argument('--rerun', action='append', default=[], metavar='STEP',
+                        help='Run a finished step (and everything after it) again')
+    parser.add_argument('--state-dir', default=DEFAULT_STATE_DIR, help='Directory for run state')
+    args = parser.parse_args(argv)
+    
     print(f"\n{'='*60}")
     print(f"PERMITMINDER DAILY MONITORING")
     print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print(f"{'='*60}")
     
-    # Step 1: Run scraper to get today's data
-    scraper = DailyScraper()
-    scraper_result = scraper.run_scraper()
+    # Finished steps of an earlier attempt today are skipped, so a crash
+    # during alerting does not re-run the scrape
+    state = build_pipeline(args.state_dir).run(args.run_id, rerun=args.rerun)
+    print(f"\n{state.summary()}")
     
-    if not scraper_result:
-        print("❌ Scraper failed - aborting daily check")
+    if not state.succeeded:
+        print("❌ Daily monitoring incomplete - run again to resume from the failed step")
         return False
     
-    # Step 2: Detect new exceedances vs yesterday
-    detector = NewExceedanceDetector()
-    new_exceedances_file = detector.run_daily_check()
-    
-    # Step 3: Send alerts for new exceedances
-    if new_exceedances_file:
-        # Get email credentials from environment variables
-        gmail_email = os.environ.get('GMAIL_EMAIL')
-        gmail_password = os.environ.get('GMAIL_PASSWORD')
-        
-        alert_system = DailyAlertSystem(gmail_email, gmail_password)
-        alert_system.send_daily_alerts(new_exceedances_file)
-    
     print(f"\n✅ Daily monitoring completed at {datetime.now().strftime('%H:%M:%S')}")
     return True
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(0 if main() else 1)
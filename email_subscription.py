@@ -8,6 +8,13 @@ import pandas as pd
 import os
 from datetime import datetime
 
+from utils.facility_directory import get_facility_directory, get_facility_list, permit_parameters
+from utils.facility_search import FacilitySearchIndex
+from utils.subscription_store import get_subscription_store, split_facility_label, split_values
+
+# Number of facility matches offered in the picker
+MAX_FACILITY_OPTIONS = 25
+
 # Page config
 st.set_page_config(
     page_title="PermitMinder - Email Alerts",
@@ -64,43 +71,49 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Load data
-@st.cache_data
 def load_facilities():
+    """Facilities from the shared facility directory"""
     try:
-        df = pd.read_csv('pa_exceedances_launch_ready.csv')
-        # Get unique facilities with their permit numbers
-        facilities = df.groupby(['PF_NAME', 'PERMIT_NUMBER', 'COUNTY_NAME']).size().reset_index()
-        facilities = facilities[['PF_NAME', 'PERMIT_NUMBER', 'COUNTY_NAME']]
-        return facilities.sort_values('PF_NAME')
-    except:
+        return get_facility_list()
+    except Exception:
         return pd.DataFrame()
 
-def load_subscriptions():
-    """Load existing subscriptions from CSV"""
-    if os.path.exists('email_subscriptions.csv'):
-        return pd.read_csv('email_subscriptions.csv')
-    else:
-        return pd.DataFrame(columns=['email', 'facilities', 'frequency', 'created_date', 'status'])
+@st.cache_resource
+def get_store():
+    """Open the shared subscription store (imports email_subscriptions.csv on first run)"""
+    return get_subscription_store()
 
-def save_subscription(email, facilities, frequency):
-    """Save subscription to CSV"""
-    subscriptions = load_subscriptions()
-    
-    # Create new subscription record
-    new_sub = pd.DataFrame([{
-        'email': email,
-        'facilities': '|'.join(facilities),  # Store as pipe-separated string
-        'frequency': frequency,
-        'created_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-        'status': 'active'
-    }])
-    
-    # Append to existing or create new
-    subscriptions = pd.concat([subscriptions, new_sub], ignore_index=True)
-    subscriptions.to_csv('email_subscriptions.csv', index=False)
-    
+@st.cache_resource
+def get_facility_search_index():
+    """Build the facility typeahead index once, shared by all sessions"""
+    return FacilitySearchIndex(load_facilities())
+
+def load_subscriptions(email):
+    """Load existing subscriptions for an email address"""
+    return get_store().get_subscriptions(email)
+
+def save_subscription(email, facilities, frequency, severities=None, parameters=None,
+                      min_percent=None, include_summary=True, include_csv=False):
+    """Save subscription and its alert options to the subscription store"""
+    get_store().add_subscription(
+        email, facilities, frequency,
+        severities=severities,
+        parameters=parameters,
+        min_percent=min_percent,
+        include_summary=include_summary,
+        include_csv=include_csv
+    )
     return True
 
+def selected_parameters(facility_labels):
+    """Parameters with past exceedances at the selected facilities"""
+    directory = get_facility_directory()
+    parameters = set()
+    for label in facility_labels:
+        _, permit, _ = split_facility_label(label)
+        parameters.update(permit_parameters(directory, permit))
+    return sorted(parameters)
+
 def main():
     # Header
     st.markdown("""
@@ -130,10 +143,10 @@ def main():
         st.error("Unable to load facility data")
         return
     
-    # Subscription form
+    # Subscription form (plain widgets so the facility search updates as you type)
     st.markdown("### 🔔 Set Up Your Alerts")
     
-    with st.form("subscription_form"):
+    with st.container():
         # Email input
         col1, col2 = st.columns([2, 1])
         
@@ -164,30 +177,25 @@ def main():
         with col4:
             search_term = st.text_input("Search Facilities", placeholder="Enter facility name...")
         
-        # Apply filters
-        filtered_facilities = facilities_df.copy()
-        
-        if filter_county != 'All Counties':
-            filtered_facilities = filtered_facilities[filtered_facilities['COUNTY_NAME'] == filter_county]
-        
-        if search_term:
-            filtered_facilities = filtered_facilities[
-                filtered_facilities['PF_NAME'].str.contains(search_term, case=False, na=False)
-            ]
-        
-        # Create facility display strings
-        filtered_facilities['display'] = (
-            filtered_facilities['PF_NAME'] + ' - ' + 
-            filtered_facilities['PERMIT_NUMBER'] + ' (' + 
-            filtered_facilities['COUNTY_NAME'] + ')'
+        # Ranked matches from the shared typeahead index
+        matches = get_facility_search_index().search(
+            search_term, county=filter_county, limit=MAX_FACILITY_OPTIONS
         )
         
+        # Keep earlier picks selectable while the search term changes
+        if 'selected_facility_labels' not in st.session_state:
+            st.session_state.selected_facility_labels = []
+        picked = st.session_state.selected_facility_labels
+        options = picked + [label for label in matches['display'] if label not in picked]
+        
         # Multi-select for facilities
         selected_facilities = st.multiselect(
             "Select facilities (choose multiple)",
-            options=filtered_facilities['display'].tolist(),
+            options=options,
+            default=picked,
             help="Select one or more facilities to monitor for violations"
         )
+        st.session_state.selected_facility_labels = selected_facilities
         
         st.divider()
         
@@ -219,14 +227,27 @@ def main():
                 help="Only receive alerts for selected severity levels"
             )
         
+            parameter_filter = st.multiselect(
+                "Only alert for these parameters",
+                options=selected_parameters(selected_facilities),
+                help="Leave empty to be alerted for every parameter"
+            )
+        
         with col6:
+            min_percent = st.number_input(
+                "Minimum % over limit",
+                min_value=0.0,
+                value=0.0,
+                step=10.0,
+                help="Only alert when a sample exceeds its limit by at least this much (0 for any exceedance)"
+            )
             include_summary = st.checkbox("Include violation summary in email", value=True)
             include_csv = st.checkbox("Attach CSV with violation details", value=False)
         
         st.divider()
         
         # Submit button
-        submitted = st.form_submit_button("💾 Save Subscription", type="primary", use_container_width=True)
+        submitted = st.button("💾 Save Subscription", type="primary", use_container_width=True)
         
         if submitted:
             # Validation
@@ -238,10 +259,18 @@ def main():
                 st.error("Please select at least one facility to monitor")
             else:
                 # Save subscription
-                success = save_subscription(email, selected_facilities, frequency)
+                success = save_subscription(
+                    email, selected_facilities, frequency,
+                    severities=severity_filter,
+                    parameters=parameter_filter,
+                    min_percent=min_percent or None,
+                    include_summary=include_summary,
+                    include_csv=include_csv
+                )
                 
                 if success:
                     st.session_state.subscription_saved = True
+                    st.session_state.selected_facility_labels = []
                     st.rerun()
     
     # Show success message outside form
@@ -265,36 +294,39 @@ def main():
     st.markdown("---")
     st.markdown("### 📋 Manage Existing Subscriptions")
     
-    subscriptions = load_subscriptions()
-    
-    if not subscriptions.empty:
+    if not get_store().is_empty():
         # Email lookup
         lookup_email = st.text_input("Enter email to view subscriptions", placeholder="your.email@example.com")
         
         if lookup_email:
-            user_subs = subscriptions[subscriptions['email'] == lookup_email]
+            user_subs = load_subscriptions(lookup_email)
             
             if not user_subs.empty:
                 st.success(f"Found {len(user_subs)} subscription(s) for {lookup_email}")
                 
-                for idx, sub in user_subs.iterrows():
-                    with st.expander(f"Subscription created {sub['created_date']}", expanded=True):
-                        facilities = sub['facilities'].split('|')
-                        st.write(f"**Monitoring {len(facilities)} facilities**")
-                        st.write(f"**Frequency:** {sub['frequency']}")
-                        st.write(f"**Status:** {sub['status']}")
+                for sub in user_subs.itertuples(index=False):
+                    with st.expander(f"Subscription created {sub.created_date}", expanded=True):
+                        st.write(f"**Monitoring {sub.facility_count} facilities**")
+                        st.write(f"**Frequency:** {sub.frequency}")
+                        severities = split_values(sub.severities)
+                        if severities:
+                            st.write(f"**Severities:** {', '.join(severities)}")
+                        parameters = split_values(sub.parameters)
+                        if parameters:
+                            st.write(f"**Parameters:** {', '.join(parameters)}")
+                        if pd.notna(sub.min_percent):
+                            st.write(f"**Minimum:** {sub.min_percent:g}% over limit")
+                        st.write(f"**Status:** {sub.status}")
                         
                         col1, col2 = st.columns(2)
                         with col1:
-                            if st.button(f"Pause", key=f"pause_{idx}"):
-                                subscriptions.loc[idx, 'status'] = 'paused'
-                                subscriptions.to_csv('email_subscriptions.csv', index=False)
+                            if st.button(f"Pause", key=f"pause_{sub.id}"):
+                                get_store().set_status(sub.id, 'paused')
                                 st.rerun()
                         
                         with col2:
-                            if st.button(f"Delete", key=f"delete_{idx}", type="secondary"):
-                                subscriptions = subscriptions.drop(idx)
-                                subscriptions.to_csv('email_subscriptions.csv', index=False)
+                            if st.button(f"Delete", key=f"delete_{sub.id}", type="secondary"):
+                                get_store().delete_subscription(sub.id)
                                 st.rerun()
             else:
                 st.info(f"No subscriptions found for {lookup_email}")
@@ -1,12 +1,29 @@
+import argparse
+import functools
 import pandas as pd
 import numpy as np
 from datetime import datetime
 
-def prepare_launch_ready_dmr(df):
+from permitminder.core.quality import LAUNCH_READY_QUALITY_COLUMN, compute_quality_flags
+from permitminder.pipeline.partitioned import COUNTY, PARTITION_MODES, default_workers, map_partitions
+from utils.entity_resolution import assign_facility_ids
+from utils.facility_directory import build_facility_directory, save_facility_directory
+from utils.laundering_features import build_candidate_features, parameter_classes, save_candidates
+
+def row_hashes(df, columns=None):
+    """Stable 64-bit hash of each row's raw columns (same value in every process and run)"""
+    columns = list(df.columns) if columns is None else columns
+    return pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+
+def prepare_launch_ready_dmr(df, ingested_at=None):
     """
     Add only the essential columns needed for PermitMinder launch.
     Following ChatGPT's lightweight approach for Airtable/Softr.
+    
+    Every added column depends only on its own row, so partitions of an
+    extract can be prepared separately (see prepare_launch_ready_partitioned).
     """
+    raw_columns = list(df.columns)
     
     # 1. EFFECTIVE RESULT (handle < and ND values)
     def calculate_effective_result(row):
@@ -98,22 +115,10 @@ def prepare_launch_ready_dmr(df):
     
     df['Severity'] = df.apply(categorize_severity, axis=1)
     
-    # 5. DATA QUALITY FLAGS
-    def check_data_quality(row):
-        issues = []
-        
-        if pd.isna(row.get('PERMIT_VALUE')) or row.get('PERMIT_VALUE', 0) == 0:
-            issues.append('No permit limit')
-        
-        if pd.isna(row['Effective_Result']):
-            issues.append('Invalid result')
-            
-        if pd.isna(row.get('UNIT_OF_MEASURE')) or str(row.get('UNIT_OF_MEASURE')).strip() == '':
-            issues.append('Missing units')
-            
-        return '; '.join(issues) if issues else ''
-    
-    df['Data_Quality_Flag'] = df.apply(check_data_quality, axis=1)
+    # 5. DATA QUALITY FLAGS (bitmask; decode_quality_flags gives "No permit limit; Missing units")
+    df[LAUNCH_READY_QUALITY_COLUMN] = compute_quality_flags(
+        df.get('PERMIT_VALUE'), df['Effective_Result'], df.get('UNIT_OF_MEASURE')
+    )
     
     # 6. TIME GROUPINGS
     if 'MONITORING_PERIOD_BEGIN_DATE' in df.columns:
@@ -133,40 +138,68 @@ def prepare_launch_ready_dmr(df):
     
     # 8. PROVENANCE FIELDS
     df['Source_File'] = 'PA_DMR_Data'  # Update this based on your file
-    df['Ingested_At'] = datetime.now().isoformat()
-    df['Row_Hash'] = df.apply(lambda x: hash(str(x.to_dict())), axis=1)
+    df['Ingested_At'] = ingested_at or datetime.now().isoformat()
+    df['Row_Hash'] = row_hashes(df, raw_columns)
     
     return df
 
+def prepare_launch_ready_partitioned(df, workers=None, partition_by=COUNTY):
+    """
+    prepare_launch_ready_dmr over partitions of the extract in parallel processes.
+    
+    The output matches prepare_launch_ready_dmr on the whole frame: rows
+    come back in their original order, every row gets the same Ingested_At,
+    and Row_Hash is computed here from the raw columns.
+    """
+    raw_hashes = row_hashes(df)
+    prepare = functools.partial(prepare_launch_ready_dmr, ingested_at=datetime.now().isoformat())
+    prepared = map_partitions(df, prepare, by=partition_by, workers=workers)
+    prepared['Row_Hash'] = raw_hashes
+    return prepared
+
 def add_chemical_laundering_flags(df):
     """
     Add basic chemical laundering detection flags
-    """
-    # Industrial parameters that indicate chemical laundering
-    industrial_params = [
-        'Aluminum, Total', 'Iron, Total', 'Manganese, Total',
-        'Chromium', 'Lead', 'Mercury', 'Cadmium', 'Copper', 'Zinc',
-        'Cyanide', 'Phenols', 'PCB', 'Benzene', 'Toluene'
-    ]
-    
-    # Check if facility monitors industrial parameters
-    df['Has_Industrial_Parameters'] = df['PARAMETER'].isin(industrial_params)
     
-    # For each permit, flag if it has ANY industrial parameters
-    permit_has_industrial = df[df['Has_Industrial_Parameters']]['PERMIT_NUMBER'].unique()
-    df['Chemical_Laundering_Candidate'] = df['PERMIT_NUMBER'].isin(permit_has_industrial)
+    The ranked, feature-based candidates are built by
+    utils.laundering_features.build_candidate_features.
+    """
+    # Classify each distinct parameter once (see INDUSTRIAL_PARAMETERS)
+    parameter_codes, industrial, _ = parameter_classes(df['PARAMETER'])
+    has_industrial = industrial[parameter_codes]
+    df['Has_Industrial_Parameters'] = has_industrial
+    
+    # For each permit, flag if it has ANY industrial parameters (missing permits never are)
+    permit_codes, permits = pd.factorize(df['PERMIT_NUMBER'])
+    permit_has_industrial = np.bincount(permit_codes[has_industrial & (permit_codes >= 0)],
+                                        minlength=len(permits) + 1) > 0
+    permit_has_industrial[-1] = False
+    df['Chemical_Laundering_Candidate'] = permit_has_industrial[permit_codes]
     
     return df
 
 # Example usage
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Prepare the launch-ready eDMR extract')
+    parser.add_argument('--input', default='trimmed_pa_violations_2020_2024.csv', help='Raw eDMR extract')
+    parser.add_argument('--workers', type=int, default=default_workers(),
+                        help='Worker processes (default: PERMITMINDER_WORKERS or the CPU count)')
+    parser.add_argument('--partition-by', choices=PARTITION_MODES, default=COUNTY,
+                        help='Split the extract by county or by permit')
+    args = parser.parse_args()
+    
     # Load your PA violations data
-    raw_dmr = pd.read_csv('trimmed_pa_violations_2020_2024.csv')
+    raw_dmr = pd.read_csv(args.input)
     
-    # Process for launch
-    launch_ready = prepare_launch_ready_dmr(raw_dmr)
+    # Process for launch (partitions are prepared in parallel processes)
+    launch_ready = prepare_launch_ready_partitioned(raw_dmr, workers=args.workers, partition_by=args.partition_by)
     launch_ready = add_chemical_laundering_flags(launch_ready)
     
+    # Resolve facilities across name variants and permits (FACILITY_ID on every row)
+    launch_ready = assign_facility_ids(launch_ready)
+    print(f"🏭 Resolved {launch_ready['FACILITY_ID'].max() + 1} facilities "
+          f"from {launch_ready['PERMIT_NUMBER'].nunique()} permits")
+    
     # Show violations summary
     violations = launch_ready[launch_ready['Is_Violation']]
     print(f"🚨 Found {len(violations)} violations")
@@ -174,14 +207,22 @@ if __name__ == "__main__":
     print(f"   High: {len(violations[violations['Severity']=='High'])}")
     print(f"   Moderate: {len(violations[violations['Severity']=='Moderate'])}")
     
-    # Show chemical laundering candidates
-    laundering_candidates = launch_ready[launch_ready['Chemical_Laundering_Candidate']]['PERMIT_NUMBER'].nunique()
-    print(f"💧 Chemical laundering candidates: {laundering_candidates} permits")
+    # Rank chemical laundering candidates from permit-level features
+    candidates = build_candidate_features(launch_ready)
+    save_candidates(candidates)
+    print(f"💧 Chemical laundering candidates: {len(candidates)} permits (ranked table saved)")
+    for _, row in candidates.head(5).iterrows():
+        print(f"   #{row['Rank']} {row['PERMIT_NUMBER']} {row['PF_NAME']}: score {row['Laundering_Score']:.2f}")
     
     # Save launch-ready data
     launch_ready.to_csv('pa_violations_launch_ready.csv', index=False)
     print("✅ Launch-ready data saved as 'pa_violations_launch_ready.csv'!")
     
+    # Facility directory shared by the app pages and batch jobs (reuses FACILITY_ID)
+    facility_directory = build_facility_directory(launch_ready)
+    save_facility_directory(facility_directory)
+    print(f"📇 Facility directory saved for {len(facility_directory)} permits")
+    
     # Quick preview of top violations
     print("\n🚨 TOP 10 WORST VIOLATIONS:")
     top_violations = launch_ready[launch_ready['Is_Violation']].nlargest(10, 'Percent_Over_Limit')
@@ -1,5 +1,101 @@
+"""
+Dashboard page module for PermitMinder application.
+
+Shows recent exceedances for the facilities covered by active email alerts.
+"""
+
 import streamlit as st
+import pandas as pd
+from datetime import datetime
+from typing import Optional
+
+from permitminder.core.loading import dataset_version, find_data_file
+from utils.database import load_data
+from utils.dashboard_data import DashboardData
+from utils.subscription_store import SubscriptionStore, get_subscription_store
+
+@st.cache_resource
+def _cached_dashboard_data(version: Optional[str]) -> DashboardData:
+    """Build the per-permit dashboard buckets once per data file version."""
+    return DashboardData(load_data())
 
-def show_dashboard_page():  # <- Added "_page" to match what main.py expects
+def get_dashboard_data() -> DashboardData:
+    """Dashboard buckets, rebuilt when the data file changes."""
+    path = find_data_file()
+    return _cached_dashboard_data(dataset_version(path) if path else None)
+
+@st.cache_resource
+def get_store() -> SubscriptionStore:
+    """Open the shared subscription store."""
+    return get_subscription_store()
+
+def show_dashboard_page() -> None:
+    """
+    Render the multi-facility dashboard for monitored facilities.
+    """
     st.header("📊 Multi-Facility Dashboard")
-    st.info("Dashboard view coming soon. This will show aggregate compliance data across multiple facilities.")
\ No newline at end of file
+
+    data = get_dashboard_data()
+    if data.df.empty:
+        st.info("No exceedance data available.")
+        return
+
+    store = get_store()
+    active_count = store.active_subscription_count()
+    # Watching one permit of a resolved facility covers all of its permits
+    permit_ids = data.facility_permits(data.resolve_permits(store.active_permits()['permit_number']))
+
+    # Metrics
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Active Alerts", active_count)
+    col2.metric("Monitored Facilities", data.facility_count(permit_ids))
+    col3.metric("Exceedances This Week", data.recent_count(permit_ids, 7))
+    col4.metric("Exceedances This Month", data.recent_count(permit_ids, 30))
+
+    if len(permit_ids) == 0:
+        st.info("No facilities monitored yet. Set up email alerts to start monitoring.")
+        return
+
+    col_left, col_right = st.columns([2, 1])
+
+    with col_left:
+        st.markdown("### 🚨 Recent Exceedances")
+        recent = data.recent_exceedances(permit_ids)
+
+        if recent.empty:
+            st.info("No exceedances found for monitored facilities.")
+        else:
+            display = pd.DataFrame({
+                'Facility': recent['PF_NAME'],
+                'Permit': recent['PERMIT_NUMBER'],
+                'Parameter': recent['PARAMETER'],
+                'Severity': recent[data.severity_column] if data.severity_column else 'Unknown',
+                'County': recent['COUNTY_NAME'],
+                'Date': recent['Date'].dt.strftime('%b %d, %Y'),
+            })
+            st.dataframe(display, use_container_width=True, hide_index=True)
+
+    with col_right:
+        st.markdown("### 📋 Monitored Facilities")
+        facilities = data.facilities(permit_ids)
+        st.success(f"Tracking {data.facility_count(permit_ids)} facilities")
+
+        # Options are row positions, so the pick maps back without parsing labels
+        choice = st.selectbox(
+            "Open facility", range(len(facilities)), key="dashboard_facility",
+            format_func=lambda i: f"{facilities['PF_NAME'].iloc[i]} - {facilities['PERMIT_NUMBER'].iloc[i]}"
+        )
+        if st.button("View Details", use_container_width=True):
+            selected = facilities.iloc[choice]
+            st.session_state.selected_permit = selected['PERMIT_NUMBER']
+            st.session_state.selected_facility = selected['PF_NAME']
+            st.session_state.current_page = 'details'
+            st.rerun()
+
+        st.download_button(
+            "📥 Export Dashboard Data",
+            data.exceedances_for(permit_ids).to_csv(index=False),
+            file_name=f"exceedances_{datetime.now().strftime('%Y%m%d')}.csv",
+            mime="text/csv",
+            use_container_width=True
+        )
@@ -5,9 +5,34 @@ Permit Details page module for PermitMinder application.
 import streamlit as st
 import pandas as pd
 import io
+import os
 from datetime import datetime, timedelta
+from typing import Optional
 import plotly.express as px
+from permitminder.core.loading import dataset_version, find_data_file
+from permitminder.core.quality import QUALITY_COLUMN, decode_quality_flags
 from utils.database import load_data
+from utils.similarity import DEFAULT_INDEX_DIR, FacilitySimilarityIndex
+
+@st.cache_resource
+def _cached_similarity_index(saved: bool, version: Optional[str]) -> Optional[FacilitySimilarityIndex]:
+    """Load the precomputed similarity index, building it in memory if missing."""
+    if saved:
+        return FacilitySimilarityIndex.load(DEFAULT_INDEX_DIR)
+
+    df = load_data()
+    if df.empty:
+        return None
+    return FacilitySimilarityIndex.build(df)
+
+def get_similarity_index() -> Optional[FacilitySimilarityIndex]:
+    """Similarity index, reloaded whenever the saved index or the data file changes."""
+    vectors_path = os.path.join(DEFAULT_INDEX_DIR, 'vectors.npy')
+    if os.path.exists(vectors_path):
+        return _cached_similarity_index(True, str(os.stat(vectors_path).st_mtime_ns))
+
+    path = find_data_file()
+    return _cached_similarity_index(False, dataset_version(path) if path else None)
 
 def create_details_header(facility_name: str, permit_num: str) -> None:
     """Create the branded header."""
@@ -30,14 +55,24 @@ def create_overview_tab(permit_df: pd.DataFrame) -> None:
     
     # Similar Facilities
     st.subheader("Similar Facilities")
-    st.write("• Allegheny Industrial - 82% Compliance")
-    st.write("• Pittsburgh Chemical - 75% Compliance")
+    index = get_similarity_index()
+    similar = pd.DataFrame()
+    if index is not None and not permit_df.empty:
+        similar = index.query(permit_df['PERMIT_NUMBER'].iloc[0], k=5)
+
+    if similar.empty:
+        st.caption("No comparable facilities found.")
+    for row in similar.itertuples(index=False):
+        st.write(f"• {row.PF_NAME} ({row.COUNTY_NAME}) - {row.SIMILARITY:.0%} similar")
 
 def create_exceedance_history_tab(permit_df: pd.DataFrame) -> None:
     """Render Exceedance History tab."""
     st.subheader("Exceedance History")
     if not permit_df.empty:
-        st.dataframe(permit_df[['NON_COMPLIANCE_DATE', 'PARAMETER', 'Percent_Over_Limit']], use_container_width=True)
+        history = permit_df[['NON_COMPLIANCE_DATE', 'PARAMETER', 'Percent_Over_Limit']].copy()
+        if QUALITY_COLUMN in permit_df.columns:
+            history['Data Quality'] = decode_quality_flags(permit_df[QUALITY_COLUMN])
+        st.dataframe(history, use_container_width=True)
 
 def create_enforcement_timeline_tab(permit_df: pd.DataFrame) -> None:
     """Render Enforcement Timeline."""
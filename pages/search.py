@@ -5,15 +5,82 @@ Handles the search functionality for permit exceedance records.
 """
 
 import streamlit as st
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
-from typing import Optional, Tuple
+from typing import Any, Dict, List
 
-from utils.database import (
-    load_data, 
-    filter_exceedances, 
-    get_unique_values
-)
+from permitminder.core.aggregation import available_values, facet_counts, summarize_permits
+from permitminder.core.filtering import available_months, month_range
+from permitminder.core.quality import QUALITY_COLUMN, QUALITY_FLAGS, flag_mask
+from permitminder.core.query import Condition, FlagsClear
+from utils.database import load_data, filter_row_ids, get_unique_values
+
+# Values listed per facet in the results breakdown
+FACET_PANEL_SIZE = 10
+
+def search_filters(months: List[pd.Period]) -> Dict[str, Any]:
+    """
+    Search filters from the filter widgets' session state.
+
+    Before the widgets are drawn this is the search of the previous run,
+    which is what the option counts are based on.
+
+    Args:
+        months (List[pd.Period]): Months offered by the date range slider.
+
+    Returns:
+        Dict[str, Any]: Keyword arguments for ``filter_row_ids``.
+    """
+    state = st.session_state
+    filters: Dict[str, Any] = {
+        'county': state.get('county_filter'),
+        'facility': state.get('facility_filter') or None,
+        'parameter': state.get('parameter_filter'),
+        'severity': state.get('severity_filter'),
+    }
+    if months:
+        start_month, end_month = state.get('date_filter', (months[0], months[-1]))
+        # Whole-month date range (resolved from the month-bucket date index)
+        filters['start_date'], filters['end_date'] = month_range(start_month, end_month)
+    conditions = []
+    excluded_severities = state.get('severity_exclude_filter')
+    if excluded_severities:
+        conditions.append(Condition('SEVERITY', excluded_severities, negate=True))
+    # Hiding flagged rows is one integer AND against the data-quality bitmask
+    hidden_flags = flag_mask(state.get('quality_exclude_filter'))
+    if hidden_flags:
+        conditions.append(FlagsClear(QUALITY_COLUMN, hidden_flags))
+    if conditions:
+        filters['conditions'] = conditions
+    return filters
+
+def format_option(value: str, counts: pd.Series) -> str:
+    """Selectbox label with the number of matching records, e.g. "Allegheny (1,204)"."""
+    if value not in counts.index:
+        return value
+    return f"{value} ({counts[value]:,})"
+
+def show_facet_panel(df: pd.DataFrame, rows: np.ndarray) -> None:
+    """
+    Sidebar breakdown of the current results by county, parameter, severity and year.
+
+    Args:
+        df (pd.DataFrame): Exceedance records from ``load_data``.
+        rows (np.ndarray): Row positions of the current results.
+    """
+    st.sidebar.markdown("---")
+    st.sidebar.markdown("### 📊 Results Breakdown")
+    if len(rows) == 0:
+        st.sidebar.caption("No matching records.")
+        return
+
+    titles = {'county': "County", 'parameter': "Parameter", 'severity': "Severity", 'year': "Year"}
+    for name, counts in facet_counts(df, rows).items():
+        with st.sidebar.expander(f"{titles[name]} ({len(counts)})", expanded=name in ('severity', 'year')):
+            table = counts.head(FACET_PANEL_SIZE).rename_axis(titles[name]).reset_index(name='Records')
+            st.dataframe(table, hide_index=True, use_container_width=True)
+            if len(counts) > FACET_PANEL_SIZE:
+                st.caption(f"+ {len(counts) - FACET_PANEL_SIZE} more")
 
 def show_search_page() -> None:
     """
@@ -38,33 +105,42 @@ def show_search_page() -> None:
     """, unsafe_allow_html=True)
     
     # Prepare filter options
-    counties = get_unique_values(df, 'COUNTY_NAME')
-    parameters = get_unique_values(df, 'PARAMETER')
+    counties = get_unique_values(df, 'COUNTY_NAME', include_all=False)
+    parameters = get_unique_values(df, 'PARAMETER', include_all=False)
     severity_options = get_unique_values(df, 'SEVERITY')
+    months = available_months(df)
+    
+    # Record counts per option, given the rest of the current search
+    current_filters = search_filters(months)
+    county_counts = available_values(df, 'county', **current_filters)
+    parameter_counts = available_values(df, 'parameter', **current_filters)
+    severity_counts = available_values(df, 'severity', **current_filters)
     
     # Create filter columns
     col1, col2, col3, col4 = st.columns([2, 2, 2, 1])
     
     with col1:
-        selected_county = st.selectbox(
+        st.multiselect(
             "County", 
             counties, 
-            index=0, 
+            placeholder="All County Names",
+            format_func=lambda county: format_option(county, county_counts),
             key="county_filter"
         )
     
     with col2:
-        facility_search = st.text_input(
+        st.text_input(
             "Facility Name", 
             placeholder="Enter facility name", 
             key="facility_filter"
         )
     
     with col3:
-        selected_parameter = st.selectbox(
+        st.multiselect(
             "Parameter", 
             parameters, 
-            index=0, 
+            placeholder="All Parameters",
+            format_func=lambda parameter: format_option(parameter, parameter_counts),
             key="parameter_filter"
         )
     
@@ -74,86 +150,49 @@ def show_search_page() -> None:
     # Advanced filters expander
     with st.expander("Advanced Filters"):
         # Date range selection
-        col5, col6, col7, col8 = st.columns(4)
-        
-        with col5:
-            start_month = st.selectbox(
-                "From Month", 
-                ['January', 'February', 'March', 'April', 'May', 'June', 
-                 'July', 'August', 'September', 'October', 'November', 'December'],
-                index=0
-            )
-        
-        with col6:
-            start_year = st.selectbox(
-                "From Year", 
-                list(range(2020, datetime.now().year + 1)),
-                index=0
-            )
-        
-        with col7:
-            end_month = st.selectbox(
-                "To Month", 
-                ['January', 'February', 'March', 'April', 'May', 'June', 
-                 'July', 'August', 'September', 'October', 'November', 'December'],
-                index=datetime.now().month - 1
-            )
-        
-        with col8:
-            end_year = st.selectbox(
-                "To Year", 
-                list(range(2020, datetime.now().year + 1)),
-                index=list(range(2020, datetime.now().year + 1)).index(datetime.now().year)
+        if months:
+            st.select_slider(
+                "Date Range",
+                options=months,
+                value=(months[0], months[-1]),
+                format_func=lambda month: month.strftime('%b %Y'),
+                key="date_filter"
             )
         
         # Severity filter
-        selected_severity = st.selectbox(
+        st.selectbox(
             "Severity Level", 
             severity_options, 
-            index=0
+            index=0,
+            format_func=lambda severity: format_option(severity, severity_counts),
+            key="severity_filter"
         )
+        
+        # Exclusions
+        st.multiselect(
+            "Exclude Severity Levels",
+            severity_options[1:],
+            key="severity_exclude_filter"
+        )
+        
+        if QUALITY_COLUMN in df.columns:
+            st.multiselect(
+                "Hide Rows With Data-Quality Flags",
+                list(QUALITY_FLAGS.values()),
+                key="quality_exclude_filter"
+            )
     
-    # Prepare date range
-    month_to_num = {
-        'January': 1, 'February': 2, 'March': 3, 'April': 4, 
-        'May': 5, 'June': 6, 'July': 7, 'August': 8, 
-        'September': 9, 'October': 10, 'November': 11, 'December': 12
-    }
-    
-    # Convert selected months to dates
-    start_date = datetime(start_year, month_to_num[start_month], 1)
-    
-    # Get last day of end month
-    if month_to_num[end_month] == 12:
-        end_date = datetime(end_year, 12, 31)
-    else:
-        end_date = datetime(end_year, month_to_num[end_month] + 1, 1) - timedelta(days=1)
-    
-    # Filtering logic
-    filtered_df = filter_exceedances(
-        df,
-        county=selected_county if selected_county != 'All County Names' else None,
-        facility=facility_search if facility_search else None,
-        parameter=selected_parameter if selected_parameter != 'All Parameters' else None,
-        start_date=start_date,
-        end_date=end_date,
-        severity=selected_severity if selected_severity != 'All Severities' else None
-    )
+    # Filtering logic (the row positions are shared with the facet panel)
+    result_rows = filter_row_ids(df, **search_filters(months))
+    filtered_df = df.take(result_rows)
+    show_facet_panel(df, result_rows)
     
     # Display results
     st.markdown(f"### 📊 Search Results ({len(filtered_df):,} records)")
     
     if len(filtered_df) > 0:
         # Prepare summary for display
-        permit_summary = filtered_df.groupby('PERMIT_NUMBER').agg({
-            'PF_NAME': 'first',
-            'COUNTY_NAME': 'first',
-            'NON_COMPLIANCE_DATE': 'count',
-            'SEVERITY': lambda x: x.value_counts().index[0] if len(x) > 0 else 'Unknown',
-            'PERCENT_OVER_LIMIT': 'max'
-        }).reset_index()
-        
-        permit_summary.columns = ['Permit Number', 'Facility', 'County', 'Exceedances', 'Top Severity', 'Max % Over']
+        permit_summary = summarize_permits(filtered_df)
         
         # Format percentage column
         permit_summary['Max % Over'] = permit_summary['Max % Over'].apply(
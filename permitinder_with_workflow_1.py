@@ -3,6 +3,14 @@ import pandas as pd
 import io
 from datetime import datetime, timedelta
 from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode
+from utils.dashboard_data import DashboardData
+from utils.facility_directory import get_facility_list
+from utils.facility_search import FacilitySearchIndex
+from utils.subscription_store import get_subscription_store
+from permitminder.core.aggregation import unique_values
+from permitminder.core.loading import dataset_version, tag_dataset
+from permitminder.core.query import Condition, Contains, DateRange, compile_query
+from permitminder.core.result_cache import filter_signature, get_result_cache, normalize_filters
 
 # Page config
 st.set_page_config(
@@ -223,9 +231,39 @@ else:
 st.sidebar.markdown("---")
 
 # Load data
+DATA_FILE = 'pa_exceedances_launch_ready.csv'
+
 @st.cache_data
 def load_data():
-    return pd.read_csv('pa_exceedances_launch_ready.csv')
+    df = pd.read_csv(DATA_FILE)
+    # Parse dates once here instead of on every search, and keep records in
+    # date order so date ranges are contiguous row slices
+    df['Date_Filter'] = pd.to_datetime(df['NON_COMPLIANCE_DATE'], errors='coerce')
+    df = df.sort_values('Date_Filter', kind='stable', na_position='last', ignore_index=True)
+    return tag_dataset(df, DATA_FILE, dataset_version(DATA_FILE))
+
+def search_row_ids(df, county=(), facility=(), parameter=(),
+                   start_date=None, end_date=None, severity=(), conditions=()):
+    """Row positions matching normalized search filters (see normalize_filters)."""
+    clauses = list(conditions)
+    if county:
+        clauses.append(Condition('COUNTY_NAME', county))
+    if facility:
+        clauses.append(Contains('PF_NAME', facility))
+    if parameter:
+        clauses.append(Condition('PARAMETER', parameter))
+    if start_date is not None and end_date is not None:
+        clauses.append(DateRange('Date_Filter', start_date, end_date))
+    if severity:
+        clauses.append(Condition('Severity', severity))
+    return compile_query(df, clauses).execute()
+
+def cached_search(df, **filters):
+    """Search results, reused across reruns and sessions while the filters and data are unchanged."""
+    normalized = normalize_filters(**filters)
+    key = ('workflow_search', df.attrs.get('dataset_version'), filter_signature(**normalized))
+    rows = get_result_cache().get_or_compute(key, lambda: search_row_ids(df, **normalized))
+    return df.take(rows)
 
 # SEARCH PAGE
 def show_search_page():
@@ -287,7 +325,7 @@ def show_search_page():
     col1, col2, col3, col4 = st.columns([2, 2, 2, 1])
     
     with col1:
-        counties = ['All Counties'] + sorted(df['COUNTY_NAME'].unique().tolist())
+        counties = ['All Counties'] + unique_values(df, 'COUNTY_NAME', include_all=False)
         selected_county = st.selectbox("County", counties, label_visibility="collapsed", 
                                       placeholder="Select County")
     
@@ -296,8 +334,7 @@ def show_search_page():
                                        label_visibility="collapsed")
     
     with col3:
-        param_list = df['PARAMETER'].dropna().astype(str).unique().tolist()
-        parameters = ['All Parameters'] + sorted(param_list)
+        parameters = ['All Parameters'] + unique_values(df, 'PARAMETER', include_all=False)
         selected_parameter = st.selectbox("Parameter", parameters, label_visibility="collapsed",
                                          placeholder="Select Parameter")
     
@@ -354,7 +391,7 @@ def show_search_page():
                                    index=list(range(2020, datetime.now().year + 1)).index(datetime.now().year))
         
         st.markdown("**Additional Filters**")
-        severity_options = ['All Severities'] + sorted(df['Severity'].dropna().unique().tolist())
+        severity_options = ['All Severities'] + unique_values(df, 'Severity', include_all=False)
         selected_severity = st.selectbox("Severity Level", severity_options)
     
     # Convert month names to dates for filtering
@@ -369,32 +406,19 @@ def show_search_page():
     # Apply filters only when search button is clicked
     if search_button or st.session_state.get('search_triggered', False):
         st.session_state.search_triggered = True
-        filtered_df = df.copy()
-        
-        if selected_county != 'All Counties':
-            filtered_df = filtered_df[filtered_df['COUNTY_NAME'] == selected_county]
-        
-        if facility_search:
-            filtered_df = filtered_df[filtered_df['PF_NAME'].str.contains(facility_search, case=False, na=False)]
-        
-        if selected_parameter != 'All Parameters':
-            filtered_df = filtered_df[filtered_df['PARAMETER'] == selected_parameter]
-        
-        filtered_df['Date_Filter'] = pd.to_datetime(filtered_df['NON_COMPLIANCE_DATE'], errors='coerce')
-        filtered_df = filtered_df[(filtered_df['Date_Filter'] >= pd.to_datetime(start_date)) & 
-                                 (filtered_df['Date_Filter'] <= pd.to_datetime(end_date))]
-        
-        if selected_severity != 'All Severities':
-            filtered_df = filtered_df[filtered_df['Severity'] == selected_severity]
+        filtered_df = cached_search(
+            df, county=selected_county, facility=facility_search, parameter=selected_parameter,
+            start_date=start_date, end_date=end_date, severity=selected_severity
+        )
     else:
         # Show all data initially or use cached results
-        filtered_df = st.session_state.get('search_results', df.copy())
+        filtered_df = st.session_state.get('search_results', df)
     
     # Store results
     st.session_state.search_results = filtered_df
     
     # Apply tier restrictions
-    restricted_df = filtered_df.copy()
+    restricted_df = filtered_df
     if not st.session_state.is_paid_user and len(restricted_df) > 20:
         restricted_df = restricted_df.head(20)
         st.warning(f"🔒 Free tier: Showing 20 of {len(filtered_df):,} results. Upgrade for full access.")
@@ -917,6 +941,10 @@ def show_details_page():
         """)
 
 # EMAIL ALERTS PAGE
+@st.cache_resource
+def get_facility_search_index():
+    return FacilitySearchIndex(get_facility_list())
+
 def show_email_page():
     import os
     
@@ -933,37 +961,32 @@ def show_email_page():
     </div>
     """, unsafe_allow_html=True)
     
-    # Load facilities
-    df = load_data()
-    facilities_df = df.groupby(['PF_NAME', 'PERMIT_NUMBER', 'COUNTY_NAME']).size().reset_index()
-    facilities_df = facilities_df[['PF_NAME', 'PERMIT_NUMBER', 'COUNTY_NAME']]
+    # Shared typeahead index over all facilities
+    facility_index = get_facility_search_index()
     
-    with st.form("subscription_form"):
+    with st.container():
         email = st.text_input("📧 Email Address", placeholder="your.email@example.com")
         
         st.divider()
         st.markdown("#### 🏭 Select Facilities to Monitor")
         
-        # Filter by county
-        counties = ['All Counties'] + sorted(facilities_df['COUNTY_NAME'].unique().tolist())
-        filter_county = st.selectbox("Filter by County", counties)
-        
-        if filter_county != 'All Counties':
-            filtered_facilities = facilities_df[facilities_df['COUNTY_NAME'] == filter_county]
-        else:
-            filtered_facilities = facilities_df
+        col1, col2 = st.columns(2)
+        with col1:
+            counties = ['All Counties'] + sorted(facility_index.facilities['COUNTY_NAME'].unique().tolist())
+            filter_county = st.selectbox("Filter by County", counties)
+        with col2:
+            search_term = st.text_input("Search Facilities", placeholder="Facility name or permit number")
         
-        # Create display strings
-        filtered_facilities['display'] = (
-            filtered_facilities['PF_NAME'] + ' - ' + 
-            filtered_facilities['PERMIT_NUMBER'] + ' (' + 
-            filtered_facilities['COUNTY_NAME'] + ')'
-        )
+        matches = facility_index.search(search_term, county=filter_county, limit=50)
         
+        # Keep earlier picks selectable while the search term changes
+        picked = st.session_state.get('selected_facility_labels', [])
         selected_facilities = st.multiselect(
             "Select facilities",
-            options=filtered_facilities['display'].tolist()[:50]  # Limit to 50 for performance
+            options=picked + [label for label in matches['display'] if label not in picked],
+            default=picked
         )
+        st.session_state.selected_facility_labels = selected_facilities
         
         st.divider()
         frequency = st.radio(
@@ -972,26 +995,30 @@ def show_email_page():
             index=1
         )
         
-        submitted = st.form_submit_button("💾 Save Subscription", type="primary", use_container_width=True)
+        submitted = st.button("💾 Save Subscription", type="primary", use_container_width=True)
         
         if submitted and email and selected_facilities:
-            # Save to CSV
-            sub_data = pd.DataFrame([{
-                'email': email,
-                'facilities': '|'.join(selected_facilities),
-                'frequency': frequency,
-                'created_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                'status': 'active'
-            }])
-            
-            if os.path.exists('email_subscriptions.csv'):
-                existing = pd.read_csv('email_subscriptions.csv')
-                sub_data = pd.concat([existing, sub_data], ignore_index=True)
-            
-            sub_data.to_csv('email_subscriptions.csv', index=False)
+            get_subscription_store_resource().add_subscription(email, selected_facilities, frequency)
+            st.session_state.selected_facility_labels = []
             st.success("✅ Subscription saved successfully!")
 
 # DASHBOARD PAGE
+@st.cache_resource
+def cached_dashboard_data(data_mtime):
+    # Read the file directly: load_data() is cached without a version and
+    # could hand back the previous extract
+    return DashboardData(pd.read_csv('pa_exceedances_launch_ready.csv'))
+
+def get_dashboard_data():
+    import os
+
+    # Keyed by the data file's mtime so a refreshed extract rebuilds the buckets
+    return cached_dashboard_data(os.path.getmtime('pa_exceedances_launch_ready.csv'))
+
+@st.cache_resource
+def get_subscription_store_resource():
+    return get_subscription_store()
+
 def show_dashboard_page():
     import os
     
@@ -1008,56 +1035,28 @@ def show_dashboard_page():
     </div>
     """, unsafe_allow_html=True)
     
-    # Load data
-    exceedances_df = load_data()
-    exceedances_df['Date'] = pd.to_datetime(exceedances_df['NON_COMPLIANCE_DATE'], errors='coerce')
+    # Precomputed per-permit buckets (dates are parsed once per process)
+    dashboard_data = get_dashboard_data()
     
-    # Load subscriptions
-    if os.path.exists('email_subscriptions.csv'):
-        subs_df = pd.read_csv('email_subscriptions.csv')
-        active_subs = subs_df[subs_df['status'] == 'active']
-        
-        if len(active_subs) > 0:
-            # Get monitored facilities
-            all_facilities = []
-            for facilities_str in active_subs['facilities']:
-                facilities = facilities_str.split('|')
-                all_facilities.extend([f.split(' - ')[0] for f in facilities])
-            
-            monitored_facilities = list(set(all_facilities))
-            monitored_exceedances = exceedances_df[exceedances_df['PF_NAME'].isin(monitored_facilities)]
-        else:
-            monitored_facilities = []
-            monitored_exceedances = pd.DataFrame()
-    else:
-        monitored_facilities = []
-        monitored_exceedances = pd.DataFrame()
-        subs_df = pd.DataFrame()
+    # Resolve active subscriptions to permit ids, covering every permit of each resolved facility
+    store = get_subscription_store_resource()
+    active_count = store.active_subscription_count()
+    monitored_ids = dashboard_data.facility_permits(dashboard_data.resolve_permits(store.active_permits()['permit_number']))
     
     # Metrics
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Active Alerts", len(subs_df[subs_df['status'] == 'active']) if not subs_df.empty else 0)
+        st.metric("Active Alerts", active_count)
     
     with col2:
-        st.metric("Monitored Facilities", len(monitored_facilities))
+        st.metric("Monitored Facilities", dashboard_data.facility_count(monitored_ids))
     
     with col3:
-        if not monitored_exceedances.empty:
-            week_ago = datetime.now() - timedelta(days=7)
-            recent = len(monitored_exceedances[monitored_exceedances['Date'] >= week_ago])
-            st.metric("Exceedances This Week", recent)
-        else:
-            st.metric("Exceedances This Week", 0)
+        st.metric("Exceedances This Week", dashboard_data.recent_count(monitored_ids, 7))
     
     with col4:
-        if not monitored_exceedances.empty:
-            month_ago = datetime.now() - timedelta(days=30)
-            monthly = len(monitored_exceedances[monitored_exceedances['Date'] >= month_ago])
-            st.metric("Exceedances This Month", monthly)
-        else:
-            st.metric("Exceedances This Month", 0)
+        st.metric("Exceedances This Month", dashboard_data.recent_count(monitored_ids, 30))
     
     # Main content
     col_left, col_right = st.columns([2, 1])
@@ -1066,41 +1065,22 @@ def show_dashboard_page():
         # Recent Exceedances Section
         st.markdown("### 🚨 Recent Exceedances")
         
-        if not monitored_exceedances.empty:
-            recent = monitored_exceedances.nlargest(10, 'Date')
+        recent = dashboard_data.recent_exceedances(monitored_ids, 10)
+        
+        if not recent.empty:
+            severity_icons = {'Critical': '🔴', 'High': '🟠'}
+            percent_over = recent['Percent_Over_Limit'].fillna(0)
             
-            for idx, row in recent.iterrows():
-                severity_icon = "🔴" if row['Severity'] == 'Critical' else "🟠" if row['Severity'] == 'High' else "🟡"
-                
-                with st.container():
-                    col1, col2, col3, col4 = st.columns([3, 2, 1.5, 1])
-                    
-                    with col1:
-                        # Make facility name clickable
-                        if st.button(f"{severity_icon} **{row['PF_NAME'][:35]}**", key=f"dash_facility_{idx}"):
-                            st.session_state.selected_permit = row['PERMIT_NUMBER']
-                            st.session_state.selected_facility = row['PF_NAME']
-                            st.session_state.current_page = 'details'
-                            st.session_state.current_view = 'search'
-                            st.rerun()
-                        st.caption(f"Parameter: {row['PARAMETER']}")
-                    
-                    with col2:
-                        st.write(f"Permit: {row['PERMIT_NUMBER']}")
-                        percent_over = row.get('Percent_Over_Limit', 0)
-                        if percent_over > 0:
-                            st.caption(f"**{percent_over:.0f}% over limit**")
-                        else:
-                            st.caption("Within limits")
-                    
-                    with col3:
-                        st.write(f"{row['Severity']}")
-                        st.caption(row['COUNTY_NAME'])
-                    
-                    with col4:
-                        st.write(row['Date'].strftime('%b %d, %Y'))
-                
-                st.divider()
+            recent_display = pd.DataFrame({
+                'Facility': recent['Severity'].map(severity_icons).fillna('🟡') + ' ' + recent['PF_NAME'].str[:35],
+                'Parameter': recent['PARAMETER'],
+                'Permit': recent['PERMIT_NUMBER'],
+                'Over Limit': percent_over.map(lambda x: f"{x:.0f}% over limit" if x > 0 else "Within limits"),
+                'Severity': recent['Severity'],
+                'County': recent['COUNTY_NAME'],
+                'Date': recent['Date'].dt.strftime('%b %d, %Y')
+            })
+            st.dataframe(recent_display, use_container_width=True, hide_index=True)
         else:
             st.info("No exceedances found for monitored facilities. Set up email alerts to start monitoring.")
     
@@ -1108,24 +1088,23 @@ def show_dashboard_page():
         # Monitored Facilities List
         st.markdown("### 📋 Monitored Facilities")
         
-        if monitored_facilities:
-            st.success(f"Tracking {len(monitored_facilities)} facilities")
+        if len(monitored_ids) > 0:
+            st.success(f"Tracking {dashboard_data.facility_count(monitored_ids)} facilities")
             
-            # Show facilities with scroll if many
-            with st.container():
-                for i, facility in enumerate(monitored_facilities[:10]):
-                    if st.button(f"• {facility[:28]}", key=f"mon_fac_{i}"):
-                        # Find permit number for this facility
-                        facility_df = exceedances_df[exceedances_df['PF_NAME'] == facility]
-                        if not facility_df.empty:
-                            st.session_state.selected_permit = facility_df.iloc[0]['PERMIT_NUMBER']
-                            st.session_state.selected_facility = facility
-                            st.session_state.current_page = 'details'
-                            st.session_state.current_view = 'search'
-                            st.rerun()
-                
-                if len(monitored_facilities) > 10:
-                    st.caption(f"...and {len(monitored_facilities) - 10} more")
+            # Options are row positions, so the pick maps back without parsing labels
+            monitored = dashboard_data.facilities(monitored_ids)
+            selected_position = st.selectbox(
+                "Open facility", range(len(monitored)), key="dash_facility",
+                format_func=lambda i: f"{monitored['PF_NAME'].iloc[i][:28]} - {monitored['PERMIT_NUMBER'].iloc[i]}"
+            )
+            
+            if st.button("View Facility Details", use_container_width=True):
+                selected = monitored.iloc[selected_position]
+                st.session_state.selected_permit = selected['PERMIT_NUMBER']
+                st.session_state.selected_facility = selected['PF_NAME']
+                st.session_state.current_page = 'details'
+                st.session_state.current_view = 'search'
+                st.rerun()
         else:
             st.info("No facilities monitored yet")
         
@@ -1143,15 +1122,15 @@ def show_dashboard_page():
             st.session_state.current_view = 'email'
             st.rerun()
         
-        if st.button("📥 Export Dashboard Data", use_container_width=True):
-            if not monitored_exceedances.empty:
-                csv = monitored_exceedances.to_csv(index=False)
-                st.download_button(
-                    "Download CSV",
-                    csv,
-                    file_name=f"exceedances_{datetime.now().strftime('%Y%m%d')}.csv",
-                    mime="text/csv"
-                )
+        if len(monitored_ids) > 0:
+            csv = dashboard_data.exceedances_for(monitored_ids).to_csv(index=False)
+            st.download_button(
+                "📥 Export Dashboard Data",
+                csv,
+                file_name=f"exceedances_{datetime.now().strftime('%Y%m%d')}.csv",
+                mime="text/csv",
+                use_container_width=True
+            )
 
 # Main app
 def main():
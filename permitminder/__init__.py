@@ -0,0 +1,6 @@
+"""
+PermitMinder application package.
+
+Streamlit-independent code shared by the app pages, nightly batch jobs and
+the API. The Streamlit pages live in ``pages/`` and ``utils/``.
+"""
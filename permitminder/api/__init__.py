@@ -0,0 +1,20 @@
+"""
+Read-only HTTP query API for PermitMinder.
+
+``app`` serves the exceedance extract found by ``permitminder.core``. Set
+PERMITMINDER_API_KEYS to a comma-separated list of keys to require an
+X-API-Key header:
+
+    uvicorn permitminder.api:app --workers 4
+"""
+
+import os
+
+from permitminder.api.app import QueryAPI, create_app
+
+API_KEYS_ENV = 'PERMITMINDER_API_KEYS'
+
+_keys = os.environ.get(API_KEYS_ENV)
+app = create_app(api_keys={key.strip() for key in _keys.split(',') if key.strip()} if _keys else None)
+
+__all__ = ['QueryAPI', 'create_app', 'app']
@@ -0,0 +1,383 @@
+"""
+Read-only HTTP query API over the PermitMinder exceedance dataset.
+
+A plain ASGI application (no web framework) built on ``permitminder.core``,
+so it uses the same filtering as the Streamlit search page. Run it with any
+ASGI server, e.g. ``uvicorn permitminder.api:app``, or call it directly
+from an ASGI test client.
+
+Endpoints (all GET):
+    /health                      Dataset version and record count
+    /v1/exceedances              Filtered exceedance records
+    /v1/permits/{permit_number}  One facility and its exceedance records
+    /v1/facilities               Facility directory, optionally filtered
+    /v1/aggregates               Record counts grouped by county, parameter,
+                                 severity, permit, month or year
+
+Exceedance filters: county, facility, parameter, severity, start_date and
+end_date (YYYY-MM-DD). county, facility, parameter and severity can be
+repeated to match any of several values, and not_county, not_facility,
+not_parameter and not_severity exclude values. hide_flags (repeatable; a
+data-quality flag label such as "No permit limit", or its bit value)
+drops records with that flag. List endpoints take ``limit`` and ``cursor``; the
+response's ``next_cursor`` fetches the next page. Responses carry an ETag
+keyed by the dataset version, are gzip-compressed when the client accepts
+it. Record endpoints stream Arrow IPC (``format=arrow`` or ``Accept:
+application/vnd.apache.arrow.stream``) or Parquet (``format=parquet``)
+straight from the shared Arrow copy of the dataset.
+"""
+
+import math
+import re
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Set
+
+import numpy as np
+import pandas as pd
+
+from permitminder.api.dataset import GROUP_COLUMNS, DatasetProvider, QueryDataset
+from permitminder.api.http import HTTPError, Request, Response, etag_matches, make_etag
+from permitminder.api.pagination import paginate
+from permitminder.api.ratelimit import TokenBucketLimiter
+from permitminder.core import arrow
+from permitminder.core.arrow import ARROW_STREAM_TYPE, PARQUET_TYPE
+from permitminder.core.normalization import canonical_parameters
+from permitminder.core.quality import QUALITY_COLUMN, flag_mask
+from permitminder.core.query import Condition, Contains, FlagsClear
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+MAX_BULK_PAGE_SIZE = 1_000_000
+
+DEFAULT_RATE = 50.0
+DEFAULT_BURST = 100
+
+# Dates used when only one end of a date range is given
+EARLIEST_DATE = datetime(1900, 1, 1)
+LATEST_DATE = datetime(2100, 12, 31)
+
+FILTER_PARAMETERS = ['county', 'facility', 'parameter', 'severity']
+FILTER_COLUMNS = {
+    'county': 'COUNTY_NAME', 'facility': 'PF_NAME', 'parameter': 'PARAMETER', 'severity': 'SEVERITY'
+}
+
+
+def _parse_date(request: Request, name: str) -> Optional[datetime]:
+    """Optional YYYY-MM-DD query parameter."""
+    value = request.query.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        raise HTTPError(400, f"{name} must be a date in YYYY-MM-DD format")
+
+
+def _parse_limit(request: Request, maximum: int) -> int:
+    """Page size from the ``limit`` query parameter."""
+    value = request.query.get('limit', str(DEFAULT_PAGE_SIZE))
+    try:
+        limit = int(value)
+    except ValueError:
+        raise HTTPError(400, "limit must be an integer")
+    if not 1 <= limit <= maximum:
+        raise HTTPError(400, f"limit must be between 1 and {maximum}")
+    return limit
+
+
+def _bulk_format(request: Request) -> Optional[str]:
+    """'arrow' or 'parquet' if the client asked for a binary record stream."""
+    requested = request.query.get('format')
+    if requested in ('arrow', 'parquet'):
+        return requested
+    if request.accepts(ARROW_STREAM_TYPE):
+        return 'arrow'
+    if request.accepts(PARQUET_TYPE):
+        return 'parquet'
+    return None
+
+
+def _filters(request: Request) -> Dict[str, Any]:
+    """Exceedance filter keyword arguments from the query string."""
+    filters: Dict[str, Any] = {
+        name: request.query_values(name) for name in FILTER_PARAMETERS if request.query_values(name)
+    }
+    exclusions = []
+    for name in FILTER_PARAMETERS:
+        excluded = request.query_values(f'not_{name}')
+        if excluded:
+            if name == 'parameter':
+                excluded = list(canonical_parameters(excluded))
+            clause = Contains if name == 'facility' else Condition
+            exclusions.append(clause(FILTER_COLUMNS[name], excluded, negate=True))
+    try:
+        hidden_flags = flag_mask(request.query_values('hide_flags'))
+    except ValueError as error:
+        raise HTTPError(400, str(error))
+    if hidden_flags:
+        exclusions.append(FlagsClear(QUALITY_COLUMN, hidden_flags))
+    if exclusions:
+        filters['conditions'] = exclusions
+    start_date = _parse_date(request, 'start_date')
+    end_date = _parse_date(request, 'end_date')
+    if start_date or end_date:
+        filters['start_date'] = start_date or EARLIEST_DATE
+        filters['end_date'] = end_date or LATEST_DATE
+    return filters
+
+
+def _records_json(records: pd.DataFrame) -> str:
+    """Records as a JSON array, serialized by pandas without per-value Python objects."""
+    return records.to_json(orient='records', date_format='iso', date_unit='s')
+
+
+def _record_page(
+    request: Request,
+    dataset: QueryDataset,
+    rows: np.ndarray,
+    extra: Optional[Dict[str, Any]] = None
+) -> Response:
+    """Paginated records as JSON (with metadata), Arrow IPC or Parquet."""
+    bulk = _bulk_format(request)
+    limit = _parse_limit(request, MAX_BULK_PAGE_SIZE if bulk else MAX_PAGE_SIZE)
+    page, next_cursor = paginate(rows, limit, request.query.get('cursor'), dataset.version)
+
+    if bulk:
+        headers = {'x-total-count': str(len(rows))}
+        if next_cursor:
+            headers['x-next-cursor'] = next_cursor
+        schema = dataset.record_schema()
+        batches = dataset.record_batches(page)
+        if bulk == 'parquet':
+            return Response(b'', content_type=PARQUET_TYPE, headers=headers,
+                            chunks=arrow.iter_parquet(batches, schema))
+        return Response(b'', content_type=ARROW_STREAM_TYPE, headers=headers,
+                        chunks=arrow.iter_ipc_stream(batches, schema))
+
+    records = dataset.records(page)
+
+    metadata = {
+        'dataset_version': dataset.version,
+        'total': int(len(rows)),
+        'count': int(len(page)),
+        'next_cursor': next_cursor,
+        **(extra or {}),
+    }
+    # Splice the pandas-serialized records into the envelope
+    envelope = Response.json(metadata).body[:-1]
+    return Response(envelope + b',"data":' + _records_json(records).encode() + b'}')
+
+
+class QueryAPI:
+    """
+    ASGI application serving the read-only query endpoints.
+
+    Args:
+        provider (DatasetProvider): Source of the current dataset.
+        api_keys (Set[str], optional): Accepted API keys. If None, anonymous
+                                       access is allowed and rate limited per client address.
+        rate (float, optional): Sustained requests per second per key. Defaults to DEFAULT_RATE.
+        burst (int, optional): Burst size per key. Defaults to DEFAULT_BURST.
+    """
+
+    def __init__(
+        self,
+        provider: DatasetProvider,
+        api_keys: Optional[Set[str]] = None,
+        rate: float = DEFAULT_RATE,
+        burst: int = DEFAULT_BURST
+    ) -> None:
+        self.provider = provider
+        self.api_keys = api_keys
+        self.limiter = TokenBucketLimiter(rate, burst)
+        self.routes: List[tuple] = [
+            (re.compile(r'^/health$'), self.health),
+            (re.compile(r'^/v1/exceedances$'), self.exceedances),
+            (re.compile(r'^/v1/permits/(?P<permit>[^/]+)$'), self.permit),
+            (re.compile(r'^/v1/facilities$'), self.facilities),
+            (re.compile(r'^/v1/aggregates$'), self.aggregates),
+        ]
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        request = Request(scope)
+        try:
+            response = self.handle(request)
+        except HTTPError as e:
+            response = Response.json({'error': e.message}, status=e.status, headers=e.headers)
+
+        await send({'type': 'http.response.start', 'status': response.status, 'headers': response.raw_headers()})
+        if response.chunks is None or request.method == 'HEAD':
+            await send({'type': 'http.response.body', 'body': b'' if request.method == 'HEAD' else response.body})
+            return
+
+        for chunk in response.chunks:
+            if chunk:
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def _lifespan(self, receive: Callable, send: Callable) -> None:
+        """Load the dataset at startup so the first request doesn't pay for it."""
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                self.provider.get()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def handle(self, request: Request) -> Response:
+        """
+        Route and answer one request.
+
+        Args:
+            request (Request): The request.
+
+        Returns:
+            Response: The response (errors are raised as HTTPError).
+        """
+        if request.method not in ('GET', 'HEAD'):
+            raise HTTPError(405, "Only GET requests are supported", {'allow': 'GET, HEAD'})
+
+        self._check_rate_limit(request)
+
+        for pattern, handler in self.routes:
+            match = pattern.match(request.path)
+            if match:
+                break
+        else:
+            raise HTTPError(404, f"Unknown endpoint: {request.path}")
+
+        dataset = self.provider.get()
+        etag = make_etag(dataset.version, request)
+        if etag_matches(request, etag):
+            return Response(b'', status=304, headers={'etag': etag})
+
+        response = handler(request, dataset, **match.groupdict())
+        response.headers['etag'] = etag
+        response.headers['cache-control'] = 'no-cache'
+        return response.compress(request)
+
+    def _check_rate_limit(self, request: Request) -> None:
+        """Authenticate the caller and take a token from its bucket."""
+        api_key = request.header('x-api-key') or request.query.get('api_key', '')
+        if self.api_keys is not None and api_key not in self.api_keys:
+            raise HTTPError(401, "A valid API key is required (X-API-Key header)")
+
+        allowed, retry_after = self.limiter.acquire(f"key:{api_key}" if api_key else f"ip:{request.client_host}")
+        if not allowed:
+            raise HTTPError(429, "Rate limit exceeded", {'retry-after': str(math.ceil(retry_after))})
+
+    def health(self, request: Request, dataset: QueryDataset) -> Response:
+        """Dataset version and size."""
+        return Response.json({'status': 'ok', 'dataset_version': dataset.version, 'records': len(dataset)})
+
+    def exceedances(self, request: Request, dataset: QueryDataset) -> Response:
+        """Exceedance records matching the search filters."""
+        rows = dataset.filter_rows(**_filters(request))
+        return _record_page(request, dataset, rows)
+
+    def permit(self, request: Request, dataset: QueryDataset, permit: str) -> Response:
+        """One facility's directory entry and its exceedance records."""
+        directory = dataset.directory
+        match = directory[directory['PERMIT_NUMBER'] == permit]
+        if match.empty:
+            raise HTTPError(404, f"Unknown permit: {permit}")
+
+        facility = match.iloc[0].to_dict()
+        facility['PARAMETERS'] = facility['PARAMETERS'].split('|') if facility['PARAMETERS'] else []
+        facility = {
+            key: (value.isoformat() if isinstance(value, pd.Timestamp) else value)
+            for key, value in facility.items()
+        }
+        facility['EXCEEDANCE_COUNT'] = int(facility['EXCEEDANCE_COUNT'])
+        if 'FACILITY_ID' in facility:
+            facility['FACILITY_ID'] = int(facility['FACILITY_ID'])
+        return _record_page(request, dataset, dataset.permit_rows(permit), extra={'facility': facility})
+
+    def facilities(self, request: Request, dataset: QueryDataset) -> Response:
+        """Facility directory entries, optionally by name/permit text and county."""
+        directory = dataset.directory
+        mask = np.ones(len(directory), dtype=bool)
+
+        text = request.query.get('q', '').strip()
+        if text:
+            mask &= (
+                directory['PF_NAME'].str.contains(text, case=False, regex=False, na=False) |
+                directory['PERMIT_NUMBER'].str.startswith(text.upper(), na=False)
+            ).to_numpy()
+        if request.query.get('county'):
+            mask &= (directory['COUNTY_NAME'] == request.query['county']).to_numpy()
+
+        limit = _parse_limit(request, MAX_PAGE_SIZE)
+        page, next_cursor = paginate(np.flatnonzero(mask), limit, request.query.get('cursor'), dataset.version)
+
+        entries = directory.take(page).copy()
+        entries['PARAMETERS'] = entries['PARAMETERS'].str.split('|')
+        metadata = Response.json({
+            'dataset_version': dataset.version,
+            'total': int(mask.sum()),
+            'count': int(len(page)),
+            'next_cursor': next_cursor,
+        }).body[:-1]
+        return Response(metadata + b',"data":' + _records_json(entries).encode() + b'}')
+
+    def aggregates(self, request: Request, dataset: QueryDataset) -> Response:
+        """Record counts and maximum percent over limit per group."""
+        group = request.query.get('group_by', '')
+        if group not in GROUP_COLUMNS:
+            raise HTTPError(400, f"group_by must be one of: {', '.join(GROUP_COLUMNS)}")
+
+        rows = dataset.filter_rows(**_filters(request))
+        codes, labels = dataset.group_codes(group)
+        row_codes = codes[rows]
+        valid = row_codes >= 0
+        counts = np.bincount(row_codes[valid], minlength=len(labels))
+
+        payload_columns = {'key': labels, 'count': counts}
+        if dataset.percent_over is not None:
+            percent = dataset.percent_over[rows][valid]
+            max_percent = np.full(len(labels), np.nan)
+            np.fmax.at(max_percent, row_codes[valid], percent)
+            payload_columns['max_percent_over'] = max_percent
+
+        result = pd.DataFrame(payload_columns)
+        result = result[result['count'] > 0].sort_values(['count', 'key'], ascending=[False, True], kind='stable')
+        if request.query.get('limit'):
+            result = result.head(_parse_limit(request, MAX_PAGE_SIZE))
+
+        metadata = Response.json({
+            'dataset_version': dataset.version,
+            'group_by': group,
+            'total': int(len(rows)),
+        }).body[:-1]
+        return Response(metadata + b',"data":' + _records_json(result).encode() + b'}')
+
+
+def create_app(
+    path: Optional[str] = None,
+    df: Optional[pd.DataFrame] = None,
+    api_keys: Optional[Set[str]] = None,
+    rate: float = DEFAULT_RATE,
+    burst: int = DEFAULT_BURST
+) -> QueryAPI:
+    """
+    Build the query API.
+
+    Args:
+        path (str, optional): Exceedance data file. Defaults to the file ``permitminder.core`` finds.
+        df (pd.DataFrame, optional): Prepared in-memory dataset to serve instead of a file.
+        api_keys (Set[str], optional): Accepted API keys; None allows anonymous access.
+        rate (float, optional): Sustained requests per second per key. Defaults to DEFAULT_RATE.
+        burst (int, optional): Burst size per key. Defaults to DEFAULT_BURST.
+
+    Returns:
+        QueryAPI: The ASGI application.
+    """
+    return QueryAPI(DatasetProvider(path=path, df=df), api_keys=api_keys, rate=rate, burst=burst)
@@ -0,0 +1,212 @@
+"""
+In-memory query indexes for the PermitMinder API.
+
+Wraps one loaded exceedance dataset with the lookups the endpoints need:
+row positions per permit, the facility directory and integer group codes
+for aggregates. The dataset reloads itself when the source file changes.
+"""
+
+import threading
+import time
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import pyarrow as pa
+
+from permitminder.core import arrow, loading, result_cache
+from permitminder.core.directory import build_facility_directory
+from permitminder.core.schema import CRITICAL_COLUMNS, parse_dates
+
+# Columns returned for exceedance records, in order (missing ones are skipped)
+RECORD_COLUMNS = [
+    'PERMIT_NUMBER', 'PF_NAME', 'COUNTY_NAME', 'MUNICIPALITY_NAME', 'PARAMETER',
+    'NON_COMPLIANCE_DATE', 'MONITORING_PERIOD_END_DATE', 'OUTFALL_NUMBER',
+    'SAMPLE_VALUE', 'PERMIT_VALUE', 'UNIT_OF_MEASURE', 'PERCENT_OVER_LIMIT', 'SEVERITY'
+]
+
+# Aggregate group names -> source columns
+GROUP_COLUMNS = {
+    'county': 'COUNTY_NAME',
+    'parameter': 'PARAMETER',
+    'severity': 'SEVERITY',
+    'permit': 'PERMIT_NUMBER',
+    'month': 'NON_COMPLIANCE_DATE',
+    'year': 'NON_COMPLIANCE_DATE',
+}
+
+# Seconds between checks of the source file for a new version
+RELOAD_CHECK_INTERVAL = 30.0
+
+
+def empty_dataset() -> pd.DataFrame:
+    """Prepared but empty exceedance records, used when no data file exists."""
+    df = pd.DataFrame(columns=CRITICAL_COLUMNS + ['SEVERITY'], dtype=object)
+    parse_dates(df)
+    return df
+
+
+class QueryDataset:
+    """
+    One version of the exceedance dataset with its query indexes.
+
+    Args:
+        df (pd.DataFrame): Prepared records from ``permitminder.core.load_data``.
+        version (str, optional): Dataset version. Defaults to ``df.attrs['dataset_version']``.
+    """
+
+    def __init__(self, df: pd.DataFrame, version: Optional[str] = None) -> None:
+        self.df = df if df.index.equals(pd.RangeIndex(len(df))) else df.reset_index(drop=True)
+        self.version = version or df.attrs.get('dataset_version', 'unversioned')
+        self.record_columns = [col for col in RECORD_COLUMNS if col in self.df.columns]
+        self._record_positions = [self.df.columns.get_loc(col) for col in self.record_columns]
+        self.percent_over = (
+            pd.to_numeric(self.df['PERCENT_OVER_LIMIT'], errors='coerce').to_numpy(dtype=float)
+            if 'PERCENT_OVER_LIMIT' in self.df.columns else None
+        )
+
+        self._permit_rows: Dict[str, np.ndarray] = (
+            self.df.groupby(self.df['PERMIT_NUMBER'].astype(str), sort=False).indices if len(self.df) else {}
+        )
+
+        self._result_key = loading.dataset_key(self.df)
+        self._directory: Optional[pd.DataFrame] = None
+        self._table: Optional[pa.Table] = None
+        self._group_codes: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def permit_rows(self, permit: str) -> np.ndarray:
+        """
+        Row positions of one permit's records.
+
+        Args:
+            permit (str): Permit number.
+
+        Returns:
+            np.ndarray: Sorted row positions (empty if the permit is unknown).
+        """
+        return self._permit_rows.get(permit, np.array([], dtype=np.int64))
+
+    def filter_rows(self, **filters) -> np.ndarray:
+        """
+        Row positions of records matching the search filters.
+
+        Args:
+            **filters: Keyword filters accepted by ``permitminder.core.filtering.filter_mask``.
+
+        Returns:
+            np.ndarray: Sorted row positions, from the shared result cache when
+                        the dataset was loaded from a file.
+        """
+        return result_cache.cached_filter_row_ids(self.df, dataset=self._result_key, **filters)
+
+    @property
+    def directory(self) -> pd.DataFrame:
+        """Facility directory built from this dataset version."""
+        if self._directory is None:
+            with self._lock:
+                if self._directory is None:
+                    self._directory = build_facility_directory(self.df)
+        return self._directory
+
+    def group_codes(self, group: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Integer codes and labels of an aggregate grouping.
+
+        Args:
+            group (str): Key of GROUP_COLUMNS.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Code per row (-1 for missing) and label per code.
+        """
+        if group not in self._group_codes:
+            column = self.df[GROUP_COLUMNS[group]]
+            if group == 'month':
+                column = column.dt.strftime('%Y-%m')
+            elif group == 'year':
+                column = column.dt.year.astype('Int64')
+            codes, labels = pd.factorize(column, sort=True)
+            self._group_codes[group] = (codes, np.asarray(labels.astype(str), dtype=object))
+        return self._group_codes[group]
+
+    @property
+    def table(self) -> pa.Table:
+        """Arrow copy of the API columns, converted once per dataset version."""
+        if self._table is None:
+            with self._lock:
+                if self._table is None:
+                    self._table = arrow.to_arrow_table(self.df[self.record_columns])
+        return self._table
+
+    def record_schema(self) -> pa.Schema:
+        """Arrow schema of ``record_batches``."""
+        return self.table.schema
+
+    def record_batches(self, rows: np.ndarray) -> Iterator[pa.RecordBatch]:
+        """
+        API columns of the given rows as Arrow record batches.
+
+        Args:
+            rows (np.ndarray): Ascending row positions.
+
+        Returns:
+            Iterator[pa.RecordBatch]: Slices of the shared table (gathered only for scattered rows).
+        """
+        return arrow.iter_record_batches(self.table, rows)
+
+    def records(self, rows: np.ndarray) -> pd.DataFrame:
+        """
+        API columns of the given rows.
+
+        Args:
+            rows (np.ndarray): Row positions.
+
+        Returns:
+            pd.DataFrame: The records, with RECORD_COLUMNS present in the dataset.
+        """
+        return self.df.iloc[rows, self._record_positions]
+
+
+class DatasetProvider:
+    """
+    Hands out the current QueryDataset, reloading when the data file changes.
+
+    Args:
+        path (str, optional): Data file. Defaults to the file ``permitminder.core`` finds.
+        df (pd.DataFrame, optional): Fixed in-memory dataset (no reloading), e.g. for tests.
+    """
+
+    def __init__(self, path: Optional[str] = None, df: Optional[pd.DataFrame] = None) -> None:
+        self.path = path
+        self._dataset: Optional[QueryDataset] = QueryDataset(df) if df is not None else None
+        self._static = df is not None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> QueryDataset:
+        """
+        The current dataset.
+
+        Returns:
+            QueryDataset: Dataset for the latest version of the data file.
+        """
+        if self._static:
+            return self._dataset
+
+        now = time.monotonic()
+        if self._dataset is not None and now - self._checked_at < RELOAD_CHECK_INTERVAL:
+            return self._dataset
+
+        with self._lock:
+            if self._dataset is None or now - self._checked_at >= RELOAD_CHECK_INTERVAL:
+                path = self.path or loading.find_data_file()
+                version = loading.dataset_version(path) if path else 'empty'
+                if self._dataset is None or self._dataset.version != version:
+                    df = loading.load_exceedances(path) if path else empty_dataset()
+                    self._dataset = QueryDataset(df, version)
+                self._checked_at = now
+        return self._dataset
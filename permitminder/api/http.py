@@ -0,0 +1,153 @@
+"""
+Minimal HTTP plumbing for the PermitMinder ASGI API.
+
+Request parsing, responses, gzip negotiation and ETag handling, kept
+framework-free so the API only depends on the data layer.
+"""
+
+import gzip
+import hashlib
+import json
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+# Responses smaller than this are not worth compressing
+GZIP_MIN_SIZE = 1024
+GZIP_LEVEL = 5
+
+JSON_TYPE = 'application/json'
+
+
+class HTTPError(Exception):
+    """
+    Error returned to the client as a JSON body.
+
+    Args:
+        status (int): HTTP status code.
+        message (str): Error message.
+        headers (Dict[str, str], optional): Extra response headers.
+    """
+
+    def __init__(self, status: int, message: str, headers: Optional[Dict[str, str]] = None) -> None:
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+
+class Request:
+    """
+    An incoming HTTP request built from the ASGI scope.
+
+    Args:
+        scope (Dict[str, Any]): ASGI HTTP connection scope.
+    """
+
+    def __init__(self, scope: Dict[str, Any]) -> None:
+        self.method = scope['method']
+        self.path = scope['path']
+        self.query_string = scope.get('query_string', b'').decode('latin-1')
+        self.query_lists = parse_qs(self.query_string)
+        self.query = {key: values[-1] for key, values in self.query_lists.items()}
+        self.headers = {
+            name.decode('latin-1').lower(): value.decode('latin-1')
+            for name, value in scope.get('headers', [])
+        }
+        client = scope.get('client')
+        self.client_host = client[0] if client else 'unknown'
+
+    def query_values(self, name: str) -> List[str]:
+        """Every non-empty value of a repeatable query parameter."""
+        return [value for value in self.query_lists.get(name, []) if value]
+
+    def header(self, name: str, default: str = '') -> str:
+        """Header value by lowercase name."""
+        return self.headers.get(name, default)
+
+    def accepts(self, media_type: str) -> bool:
+        """Whether the Accept header lists ``media_type``."""
+        return media_type in self.header('accept')
+
+    def accepts_gzip(self) -> bool:
+        """Whether the client accepts gzip-encoded responses."""
+        return 'gzip' in self.header('accept-encoding')
+
+
+class Response:
+    """
+    An HTTP response.
+
+    Args:
+        body (bytes): Response body.
+        status (int, optional): HTTP status code. Defaults to 200.
+        content_type (str, optional): Media type. Defaults to JSON_TYPE.
+        headers (Dict[str, str], optional): Extra response headers.
+        chunks (Iterable[bytes], optional): Body sent piece by piece instead of ``body``.
+    """
+
+    def __init__(
+        self,
+        body: bytes,
+        status: int = 200,
+        content_type: str = JSON_TYPE,
+        headers: Optional[Dict[str, str]] = None,
+        chunks: Optional[Iterable[bytes]] = None
+    ) -> None:
+        self.body = body
+        self.status = status
+        self.headers = {'content-type': content_type, **(headers or {})}
+        self.chunks = chunks
+
+    @classmethod
+    def json(cls, payload: Any, status: int = 200, headers: Optional[Dict[str, str]] = None) -> 'Response':
+        """Response with a JSON-encoded payload."""
+        body = json.dumps(payload, separators=(',', ':'), default=str).encode()
+        return cls(body, status=status, headers=headers)
+
+    def compress(self, request: Request) -> 'Response':
+        """Gzip the body in place if the client accepts it and it is large enough."""
+        if self.chunks is None and request.accepts_gzip() and len(self.body) >= GZIP_MIN_SIZE:
+            self.body = gzip.compress(self.body, compresslevel=GZIP_LEVEL)
+            self.headers['content-encoding'] = 'gzip'
+        self.headers['vary'] = 'Accept, Accept-Encoding'
+        return self
+
+    def raw_headers(self) -> List[Tuple[bytes, bytes]]:
+        """Headers in ASGI form, with the content length unless the body is streamed."""
+        headers = dict(self.headers)
+        if self.chunks is None:
+            headers['content-length'] = str(len(self.body))
+        return [(name.encode('latin-1'), value.encode('latin-1')) for name, value in headers.items()]
+
+
+def make_etag(dataset_version: str, request: Request) -> str:
+    """
+    ETag for a response that depends only on the dataset version and the request.
+
+    Args:
+        dataset_version (str): Version of the dataset the response was built from.
+        request (Request): The request (path, query and negotiated format).
+
+    Returns:
+        str: A weak ETag value.
+    """
+    parts = '|'.join([
+        dataset_version, request.path, request.query_string,
+        request.header('accept'), request.header('accept-encoding')
+    ])
+    return f'W/"{hashlib.sha1(parts.encode()).hexdigest()[:20]}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Whether the request's If-None-Match header already names ``etag``.
+
+    Args:
+        request (Request): The request.
+        etag (str): Current ETag.
+
+    Returns:
+        bool: True if a 304 Not Modified can be returned.
+    """
+    candidates = [tag.strip() for tag in request.header('if-none-match').split(',')]
+    return etag in candidates or '*' in candidates
@@ -0,0 +1,85 @@
+"""
+Cursor pagination for the PermitMinder API.
+
+Result rows are always in dataset order, so a cursor only records the
+last row position returned and the dataset version it belongs to. Cursors
+from an older dataset version are rejected rather than silently skipping
+or repeating rows.
+"""
+
+import base64
+from typing import Optional, Tuple
+
+import numpy as np
+
+from permitminder.api.http import HTTPError
+
+
+def encode_cursor(dataset_version: str, last_row: int) -> str:
+    """
+    Opaque cursor pointing after ``last_row``.
+
+    Args:
+        dataset_version (str): Version of the dataset being paged.
+        last_row (int): Last row position already returned.
+
+    Returns:
+        str: URL-safe cursor string.
+    """
+    raw = f"{dataset_version}:{last_row}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, dataset_version: str) -> int:
+    """
+    Row position a cursor points after.
+
+    Args:
+        cursor (str): Cursor from a previous response.
+        dataset_version (str): Current dataset version.
+
+    Returns:
+        int: Last row position already returned.
+
+    Raises:
+        HTTPError: 400 for a malformed cursor, 410 if the dataset has changed since.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        version, _, last_row = raw.rpartition(':')
+        position = int(last_row)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPError(400, "Invalid cursor")
+
+    if version != dataset_version:
+        raise HTTPError(410, "Cursor expired: the dataset has been updated, restart from the first page")
+    return position
+
+
+def paginate(
+    rows: np.ndarray,
+    limit: int,
+    cursor: Optional[str],
+    dataset_version: str
+) -> Tuple[np.ndarray, Optional[str]]:
+    """
+    One page of sorted row positions.
+
+    Args:
+        rows (np.ndarray): All matching row positions, ascending.
+        limit (int): Page size.
+        cursor (str, optional): Cursor from the previous page.
+        dataset_version (str): Current dataset version.
+
+    Returns:
+        Tuple[np.ndarray, Optional[str]]: Row positions of the page and the
+                                          cursor of the next page (None on the last page).
+    """
+    start = 0
+    if cursor:
+        start = int(np.searchsorted(rows, decode_cursor(cursor, dataset_version), side='right'))
+
+    page = rows[start:start + limit]
+    has_more = start + limit < len(rows)
+    next_cursor = encode_cursor(dataset_version, int(page[-1])) if has_more and len(page) else None
+    return page, next_cursor
@@ -0,0 +1,68 @@
+"""
+Per-key rate limiting for the PermitMinder API.
+
+A token bucket per API key (or client address for anonymous callers):
+each key may burst up to ``burst`` requests and then ``rate`` requests
+per second.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Tuple
+
+# Buckets idle this long are dropped so the table doesn't grow without bound
+IDLE_BUCKET_SECONDS = 600.0
+
+
+class TokenBucketLimiter:
+    """
+    Thread-safe token buckets keyed by caller.
+
+    Args:
+        rate (float): Sustained requests per second per key.
+        burst (int): Maximum requests in a burst.
+        clock (Callable[[], float], optional): Monotonic clock. Defaults to time.monotonic.
+    """
+
+    def __init__(self, rate: float, burst: int, clock: Callable[[], float] = time.monotonic) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self._last_sweep = clock()
+
+    def acquire(self, key: str) -> Tuple[bool, float]:
+        """
+        Take one token for ``key``.
+
+        Args:
+            key (str): API key or client address.
+
+        Returns:
+            Tuple[bool, float]: Whether the request is allowed, and the seconds
+                                until a token is available if it is not.
+        """
+        now = self.clock()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (float(self.burst), now))
+            tokens = min(float(self.burst), tokens + (now - updated) * self.rate)
+
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                allowed, retry_after = True, 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                allowed, retry_after = False, (1 - tokens) / self.rate
+
+            if now - self._last_sweep > IDLE_BUCKET_SECONDS:
+                self._sweep(now)
+        return allowed, retry_after
+
+    def _sweep(self, now: float) -> None:
+        """Drop buckets that have been idle long enough to be full again."""
+        self._buckets = {
+            key: bucket for key, bucket in self._buckets.items()
+            if now - bucket[1] < IDLE_BUCKET_SECONDS
+        }
+        self._last_sweep = now
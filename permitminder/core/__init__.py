@@ -0,0 +1,82 @@
+"""
+Streamlit-independent data layer for PermitMinder.
+
+Loading, schema, parameter/unit normalization, data-quality flags,
+facility resolution, indexed filtering and aggregation of exceedance
+records and the per-permit facility directory, with pluggable caching and
+reporting backends. The app reaches it through the Streamlit adapters in
+``utils/database.py``; batch jobs and the API import it directly.
+"""
+
+from permitminder.core.aggregation import (
+    available_values,
+    facet_counts,
+    summarize_permits,
+    unique_values,
+    value_catalog,
+)
+from permitminder.core.backends import (
+    CacheBackend,
+    LoggingReporter,
+    MemoryCache,
+    NullCache,
+    Reporter,
+    set_default_cache,
+    set_default_reporter,
+)
+from permitminder.core.directory import DIRECTORY_COLUMNS, build_facility_directory
+from permitminder.core.entity_resolution import FACILITY_ID_COLUMN, assign_facility_ids, resolve_facilities
+from permitminder.core.filtering import (
+    filter_by_permits,
+    filter_exceedances,
+    filter_mask,
+    filter_recent,
+    filter_row_ids,
+)
+from permitminder.core.loading import (
+    dataset_key,
+    dataset_version,
+    find_data_file,
+    load_data,
+    load_exceedances,
+    prepare_exceedances,
+    read_exceedances,
+)
+from permitminder.core.normalization import (
+    NormalizationCatalog,
+    canonical_parameters,
+    get_catalog,
+    normalize_exceedances,
+)
+from permitminder.core.quality import (
+    QUALITY_FLAGS,
+    decode_quality_flags,
+    flag_mask,
+    quality_flags,
+    without_flags,
+)
+from permitminder.core.query import AnyOf, Condition, Contains, DateRange, FlagsClear, QueryPlan, compile_query
+from permitminder.core.result_cache import (
+    ResultCache,
+    cached_filter_row_ids,
+    filter_signature,
+    get_result_cache,
+    normalize_filters,
+)
+from permitminder.core.schema import calculate_severity, parse_percent, record_keys
+
+__all__ = [
+    'CacheBackend', 'LoggingReporter', 'MemoryCache', 'NullCache', 'Reporter',
+    'set_default_cache', 'set_default_reporter',
+    'calculate_severity', 'parse_percent', 'record_keys',
+    'dataset_key', 'dataset_version', 'find_data_file', 'load_data', 'load_exceedances',
+    'prepare_exceedances', 'read_exceedances',
+    'DIRECTORY_COLUMNS', 'build_facility_directory',
+    'FACILITY_ID_COLUMN', 'assign_facility_ids', 'resolve_facilities',
+    'filter_by_permits', 'filter_exceedances', 'filter_mask', 'filter_recent', 'filter_row_ids',
+    'NormalizationCatalog', 'canonical_parameters', 'get_catalog', 'normalize_exceedances',
+    'QUALITY_FLAGS', 'decode_quality_flags', 'flag_mask', 'quality_flags', 'without_flags',
+    'AnyOf', 'Condition', 'Contains', 'DateRange', 'FlagsClear', 'QueryPlan', 'compile_query',
+    'ResultCache', 'cached_filter_row_ids', 'filter_signature', 'get_result_cache', 'normalize_filters',
+    'available_values', 'facet_counts', 'summarize_permits', 'unique_values', 'value_catalog',
+]
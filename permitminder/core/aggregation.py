@@ -0,0 +1,173 @@
+"""
+Exceedance aggregation for the PermitMinder data layer.
+
+Per-permit summaries, distinct-value catalogs with counts, faceted
+"available given the current filters" counts and result breakdowns used
+by the search page, batch jobs and the API.
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from permitminder.core.backends import Reporter, get_reporter
+from permitminder.core.filtering import VALUE_FILTERS
+from permitminder.core.query import dataset_index
+from permitminder.core.result_cache import cached_filter_row_ids, normalize_filters
+
+# Facet name -> (column, whether to count by year of a date column)
+FACETS = {
+    'county': ('COUNTY_NAME', False),
+    'parameter': ('PARAMETER', False),
+    'severity': ('SEVERITY', False),
+    'year': ('NON_COMPLIANCE_DATE', True),
+}
+
+SUMMARY_COLUMNS = ['Permit Number', 'Facility', 'County', 'Exceedances', 'Top Severity', 'Max % Over']
+
+
+def summarize_permits(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Summarize exceedance records per permit for the search results table.
+
+    The top severity is the most frequent severity of the permit's records
+    (ties go to the severity seen first).
+
+    Args:
+        df (pd.DataFrame): Filtered exceedance records.
+
+    Returns:
+        pd.DataFrame: One row per permit with Permit Number, Facility, County,
+                      Exceedances, Top Severity and Max % Over, ordered by permit.
+    """
+    if df.empty:
+        return pd.DataFrame(columns=SUMMARY_COLUMNS)
+
+    grouped = df.groupby('PERMIT_NUMBER', sort=True, observed=True)
+    summary = grouped[['PF_NAME', 'COUNTY_NAME']].first()
+    summary['Exceedances'] = grouped['NON_COMPLIANCE_DATE'].count()
+
+    severity_counts = (
+        df.groupby(['PERMIT_NUMBER', 'SEVERITY'], sort=False, observed=True)
+        .size()
+        .reset_index(name='count')
+        .sort_values('count', ascending=False, kind='stable')
+        .drop_duplicates('PERMIT_NUMBER')
+        .set_index('PERMIT_NUMBER')['SEVERITY']
+    )
+    summary['Top Severity'] = severity_counts
+
+    if 'PERCENT_OVER_LIMIT' in df.columns:
+        summary['Max % Over'] = grouped['PERCENT_OVER_LIMIT'].max()
+    else:
+        summary['Max % Over'] = np.nan
+
+    summary = summary.reset_index()
+    summary.columns = SUMMARY_COLUMNS
+    return summary
+
+
+def unique_values(
+    df: pd.DataFrame,
+    column: str,
+    include_all: bool = True,
+    reporter: Optional[Reporter] = None
+) -> List[str]:
+    """
+    Retrieves unique values for a given column.
+
+    Args:
+        df (pd.DataFrame): Input DataFrame.
+        column (str): Column to extract unique values from.
+        include_all (bool, optional): Whether to include 'All' option. Defaults to True.
+        reporter (Reporter, optional): Receives a warning if the column is missing.
+
+    Returns:
+        List[str]: Sorted unique values, optionally preceded by an 'All ...' option.
+                   Read from the dataset's value catalog.
+    """
+    if column not in df.columns:
+        get_reporter(reporter).warning(f"Column {column} not found in DataFrame")
+        return ['All Columns']
+
+    values = value_catalog(df, column).index.tolist()
+
+    if include_all:
+        values.insert(0, 'All ' + column.replace('_', ' ').title())
+
+    return values
+
+
+def value_catalog(df: pd.DataFrame, column: str) -> pd.Series:
+    """
+    Distinct values of a column with their record counts.
+
+    For a loaded dataset the catalog comes from the value index shared per
+    dataset version, so it is only built once.
+
+    Args:
+        df (pd.DataFrame): Exceedance records.
+        column (str): Column name.
+
+    Returns:
+        pd.Series: Count per value, indexed by value in ascending order (missing values excluded).
+    """
+    return dataset_index(df).value_index(df, column).value_counts()
+
+
+def available_values(df: pd.DataFrame, name: str, **filters) -> pd.Series:
+    """
+    Faceted counts: records per value of one filter, given the other filters.
+
+    The filter's own selection is ignored, so the counts show what each
+    option would return combined with the rest of the current search.
+
+    Args:
+        df (pd.DataFrame): Prepared exceedance records.
+        name (str): Filter name from ``filtering.VALUE_FILTERS`` ('county', 'parameter' or 'severity').
+        **filters: Current search filters (as for ``filtering.filter_exceedances``).
+
+    Returns:
+        pd.Series: Count per value of the filter's column, indexed by value in
+                   ascending order; values without matches count 0.
+    """
+    column = VALUE_FILTERS[name][0]
+    filters.pop(name, None)
+    rows = cached_filter_row_ids(df, **filters) if normalize_filters(**filters) else None
+    return dataset_index(df).value_index(df, column).value_counts(rows)
+
+
+def facet_counts(
+    df: pd.DataFrame,
+    rows: Optional[np.ndarray] = None,
+    facets: Optional[List[str]] = None
+) -> Dict[str, pd.Series]:
+    """
+    Breakdown of a result set by county, parameter, severity and year.
+
+    Each facet is one bincount of the result rows' value codes from the
+    dataset's index, so the cost grows with the result size, not the
+    dataset size.
+
+    Args:
+        df (pd.DataFrame): Prepared exceedance records the rows refer to.
+        rows (np.ndarray, optional): Row positions of the result (e.g. from
+                                     ``cached_filter_row_ids``). Defaults to every row.
+        facets (List[str], optional): Keys of FACETS. Defaults to all present in ``df``.
+
+    Returns:
+        Dict[str, pd.Series]: Non-zero counts per value for each facet,
+                              largest first (years in ascending order).
+    """
+    index = dataset_index(df)
+    counts = {}
+    for name in facets or list(FACETS):
+        column, by_year = FACETS[name]
+        if column not in df.columns:
+            continue
+        value_index = index.year_index(df, column) if by_year else index.value_index(df, column)
+        facet = value_index.value_counts(rows)
+        facet = facet[facet > 0]
+        counts[name] = facet if by_year else facet.sort_values(ascending=False, kind='stable')
+    return counts
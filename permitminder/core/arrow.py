@@ -0,0 +1,218 @@
+"""
+Arrow result transport for the PermitMinder data layer.
+
+The prepared dataset is converted to an Arrow table once per dataset
+version and shared. Filtered results are produced as record batches that
+slice that table: runs of consecutive row ids become zero-copy slices and
+only scattered rows are gathered. Batches can then be streamed as Arrow
+IPC or Parquet without turning every value into text.
+"""
+
+import io
+from typing import Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from permitminder.core.backends import CacheBackend, get_cache
+from permitminder.core.loading import dataset_key
+
+DEFAULT_BATCH_SIZE = 65_536
+
+# Use zero-copy slices when row ids form runs averaging at least this many rows
+MIN_SLICE_RUN = 32
+
+ARROW_STREAM_TYPE = 'application/vnd.apache.arrow.stream'
+PARQUET_TYPE = 'application/vnd.apache.parquet'
+
+
+def to_arrow_table(df: pd.DataFrame) -> pa.Table:
+    """
+    Convert records to an Arrow table (object columns become Arrow strings).
+
+    Args:
+        df (pd.DataFrame): Records.
+
+    Returns:
+        pa.Table: The records without the pandas index.
+    """
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def dataset_table(df: pd.DataFrame, cache: Optional[CacheBackend] = None) -> pa.Table:
+    """
+    Shared Arrow table of a loaded dataset, converted once per dataset version.
+
+    Derived frames (filtered, sorted, or anything else that keeps the
+    attrs but not the rows) are converted on every call.
+
+    Args:
+        df (pd.DataFrame): Prepared records from ``load_exceedances``.
+        cache (CacheBackend, optional): Cache for the table. Defaults to the process cache.
+
+    Returns:
+        pa.Table: Arrow table with the same rows and columns as ``df``.
+    """
+    dataset = dataset_key(df)
+    if dataset is None:
+        return to_arrow_table(df)
+    key = ('arrow', *dataset, tuple(df.columns))
+    return get_cache(cache).get_or_compute(key, lambda: to_arrow_table(df))
+
+
+def _runs(row_ids: np.ndarray) -> np.ndarray:
+    """Start positions (into ``row_ids``) of each run of consecutive ids, plus the end."""
+    breaks = np.flatnonzero(np.diff(row_ids) != 1) + 1
+    return np.concatenate(([0], breaks, [len(row_ids)]))
+
+
+def iter_record_batches(
+    table: pa.Table,
+    row_ids: Optional[np.ndarray] = None,
+    columns: Optional[List[str]] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE
+) -> Iterator[pa.RecordBatch]:
+    """
+    Record batches of selected rows of a shared table.
+
+    Args:
+        table (pa.Table): Shared dataset table.
+        row_ids (np.ndarray, optional): Ascending row positions; None for every row.
+        columns (List[str], optional): Columns to include. Defaults to all.
+        batch_size (int, optional): Maximum rows per batch. Defaults to DEFAULT_BATCH_SIZE.
+
+    Yields:
+        pa.RecordBatch: Batches in row order. Contiguous runs are zero-copy
+                        slices of ``table``; scattered rows are gathered.
+    """
+    if columns is not None:
+        table = table.select(columns)
+
+    if row_ids is None:
+        yield from table.to_batches(max_chunksize=batch_size)
+        return
+
+    row_ids = np.asarray(row_ids, dtype=np.int64)
+    if len(row_ids) == 0:
+        return
+
+    bounds = _runs(row_ids)
+    if len(row_ids) / (len(bounds) - 1) >= MIN_SLICE_RUN:
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            offset = int(row_ids[start])
+            for chunk_start in range(0, end - start, batch_size):
+                length = min(batch_size, end - start - chunk_start)
+                yield from table.slice(offset + chunk_start, length).to_batches()
+        return
+
+    for start in range(0, len(row_ids), batch_size):
+        yield from table.take(pa.array(row_ids[start:start + batch_size])).to_batches()
+
+
+def result_batches(
+    df: pd.DataFrame,
+    row_ids: Optional[np.ndarray] = None,
+    columns: Optional[List[str]] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    cache: Optional[CacheBackend] = None
+) -> Iterator[pa.RecordBatch]:
+    """
+    Record batches of a filtered view of a loaded dataset.
+
+    Args:
+        df (pd.DataFrame): Prepared records from ``load_exceedances``.
+        row_ids (np.ndarray, optional): Ascending row positions, e.g. from ``filter_row_ids``.
+        columns (List[str], optional): Columns to include. Defaults to all.
+        batch_size (int, optional): Maximum rows per batch. Defaults to DEFAULT_BATCH_SIZE.
+        cache (CacheBackend, optional): Cache for the shared table. Defaults to the process cache.
+
+    Yields:
+        pa.RecordBatch: The selected rows.
+    """
+    yield from iter_record_batches(dataset_table(df, cache), row_ids, columns, batch_size)
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object whose contents are drained after each write."""
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_ipc_stream(batches: Iterable[pa.RecordBatch], schema: pa.Schema) -> Iterator[bytes]:
+    """
+    Encode batches as an Arrow IPC stream, one chunk of bytes per batch.
+
+    Args:
+        batches (Iterable[pa.RecordBatch]): Batches to send.
+        schema (pa.Schema): Schema of the batches.
+
+    Yields:
+        bytes: Stream chunks; concatenated they form one valid IPC stream.
+    """
+    sink = _ChunkSink()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+            yield sink.drain()
+    yield sink.drain()
+
+
+def iter_parquet(batches: Iterable[pa.RecordBatch], schema: pa.Schema, compression: str = 'zstd') -> Iterator[bytes]:
+    """
+    Encode batches as a Parquet file, one chunk of bytes per row group.
+
+    Args:
+        batches (Iterable[pa.RecordBatch]): Batches to write (one row group each).
+        schema (pa.Schema): Schema of the batches.
+        compression (str, optional): Parquet compression codec. Defaults to 'zstd'.
+
+    Yields:
+        bytes: File chunks; concatenated they form one valid Parquet file.
+    """
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, schema, compression=compression) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+            yield sink.drain()
+    yield sink.drain()
+
+
+def ipc_bytes(batches: Iterable[pa.RecordBatch], schema: pa.Schema) -> bytes:
+    """Arrow IPC stream of ``batches`` as one bytes object."""
+    return b''.join(iter_ipc_stream(batches, schema))
+
+
+def parquet_bytes(batches: Iterable[pa.RecordBatch], schema: pa.Schema) -> bytes:
+    """Parquet file of ``batches`` as one bytes object."""
+    return b''.join(iter_parquet(batches, schema))
+
+
+def result_schema(df: pd.DataFrame, columns: Optional[List[str]] = None, cache: Optional[CacheBackend] = None) -> pa.Schema:
+    """
+    Arrow schema of a (column-selected) view of a loaded dataset.
+
+    Args:
+        df (pd.DataFrame): Prepared records from ``load_exceedances``.
+        columns (List[str], optional): Columns to include. Defaults to all.
+        cache (CacheBackend, optional): Cache for the shared table. Defaults to the process cache.
+
+    Returns:
+        pa.Schema: Schema of the batches from ``result_batches``.
+    """
+    schema = dataset_table(df, cache).schema
+    return pa.schema([schema.field(col) for col in columns]) if columns is not None else schema
@@ -0,0 +1,144 @@
+"""
+Pluggable caching and reporting backends for the PermitMinder data layer.
+
+Core functions never import Streamlit. They cache through a ``CacheBackend``
+and report problems through a ``Reporter``; the defaults are an in-process
+memory cache and the standard ``logging`` module, and the Streamlit
+adapters in ``utils/`` swap in ``st.cache_data`` and ``st.error``.
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger('permitminder')
+
+
+class CacheBackend:
+    """Cache interface used by the core data layer."""
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for ``key`` or None."""
+        raise NotImplementedError
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store ``value`` under ``key``."""
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        """Drop every cached value."""
+        raise NotImplementedError
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for ``key``, computing and storing it on a miss.
+
+        Args:
+            key (Hashable): Cache key.
+            compute (Callable): Zero-argument function producing the value.
+
+        Returns:
+            Any: The cached or freshly computed value.
+        """
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.set(key, value)
+        return value
+
+
+class NullCache(CacheBackend):
+    """Cache that never stores anything (for callers that cache themselves)."""
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        return None
+
+    def set(self, key: Hashable, value: Any) -> None:
+        pass
+
+    def clear(self) -> None:
+        pass
+
+
+class MemoryCache(CacheBackend):
+    """
+    Thread-safe in-process cache.
+
+    Args:
+        max_entries (int, optional): Oldest entries are dropped beyond this size. Defaults to 8.
+    """
+
+    def __init__(self, max_entries: int = 8) -> None:
+        self.max_entries = max_entries
+        self._values: Dict[Hashable, Any] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            return self._values.get(key)
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._values.pop(key, None)
+            self._values[key] = value
+            while len(self._values) > self.max_entries:
+                del self._values[next(iter(self._values))]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Reporter:
+    """Receives user-facing messages from the core data layer."""
+
+    def info(self, message: str) -> None:
+        raise NotImplementedError
+
+    def warning(self, message: str) -> None:
+        raise NotImplementedError
+
+    def error(self, message: str) -> None:
+        raise NotImplementedError
+
+
+class LoggingReporter(Reporter):
+    """Reporter that writes to the ``permitminder`` logger."""
+
+    def __init__(self, log: logging.Logger = logger) -> None:
+        self.log = log
+
+    def info(self, message: str) -> None:
+        self.log.info(message)
+
+    def warning(self, message: str) -> None:
+        self.log.warning(message)
+
+    def error(self, message: str) -> None:
+        self.log.error(message)
+
+
+_default_cache: CacheBackend = MemoryCache()
+_default_reporter: Reporter = LoggingReporter()
+
+
+def get_cache(cache: Optional[CacheBackend] = None) -> CacheBackend:
+    """Return ``cache`` or the process-wide default cache."""
+    return cache if cache is not None else _default_cache
+
+
+def get_reporter(reporter: Optional[Reporter] = None) -> Reporter:
+    """Return ``reporter`` or the process-wide default reporter."""
+    return reporter if reporter is not None else _default_reporter
+
+
+def set_default_cache(cache: CacheBackend) -> None:
+    """Replace the process-wide default cache."""
+    global _default_cache
+    _default_cache = cache
+
+
+def set_default_reporter(reporter: Reporter) -> None:
+    """Replace the process-wide default reporter."""
+    global _default_reporter
+    _default_reporter = reporter
@@ -0,0 +1,70 @@
+"""
+Facility directory builder for the PermitMinder data layer.
+
+One row per permit: resolved facility id, name, county, municipality,
+monitored parameters (canonical names) and first/last exceedance dates.
+The app stores it as a Parquet artifact (``utils.facility_directory``) and
+the API builds it once per dataset version.
+"""
+
+import pandas as pd
+
+from permitminder.core.entity_resolution import FACILITY_ID_COLUMN, resolve_facilities
+from permitminder.core.normalization import get_catalog
+
+DIRECTORY_COLUMNS = [
+    'PERMIT_NUMBER', FACILITY_ID_COLUMN, 'PF_NAME', 'COUNTY_NAME', 'MUNICIPALITY_NAME',
+    'PARAMETERS', 'FIRST_EXCEEDANCE', 'LAST_EXCEEDANCE', 'EXCEEDANCE_COUNT'
+]
+
+# Source columns needed to build the directory
+SOURCE_COLUMNS = {
+    'PERMIT_NUMBER', 'PF_NAME', 'COUNTY_NAME', 'MUNICIPALITY_NAME',
+    'MUNICIPALITY', 'PARAMETER', 'NON_COMPLIANCE_DATE', FACILITY_ID_COLUMN
+}
+
+
+def build_facility_directory(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Build the per-permit facility directory from exceedance records.
+
+    Args:
+        df (pd.DataFrame): Exceedance records (raw or loaded column names). Facility
+                           ids are resolved here unless the records carry FACILITY_ID.
+
+    Returns:
+        pd.DataFrame: One row per permit with DIRECTORY_COLUMNS, sorted by PF_NAME.
+    """
+    records = df[df['PERMIT_NUMBER'].notna()]
+    municipality = 'MUNICIPALITY_NAME' if 'MUNICIPALITY_NAME' in records.columns else 'MUNICIPALITY'
+
+    grouped = records.groupby(records['PERMIT_NUMBER'].astype(str), sort=False)
+    directory = grouped[['PF_NAME', 'COUNTY_NAME']].first()
+    facility_ids = (records[FACILITY_ID_COLUMN] if FACILITY_ID_COLUMN in records.columns
+                    else pd.Series(resolve_facilities(records), index=records.index))
+    directory[FACILITY_ID_COLUMN] = facility_ids.groupby(records['PERMIT_NUMBER'].astype(str)).first().astype('int64')
+    directory['MUNICIPALITY_NAME'] = (
+        grouped[municipality].first() if municipality in records.columns else ''
+    )
+
+    # Canonical parameter names, so spelling variants are listed once
+    parameters = pd.DataFrame({
+        'PERMIT_NUMBER': records['PERMIT_NUMBER'],
+        'PARAMETER': get_catalog().normalize_parameters(records['PARAMETER']).astype(object),
+    }).dropna().drop_duplicates()
+    directory['PARAMETERS'] = (
+        parameters.sort_values('PARAMETER')
+        .groupby(parameters['PERMIT_NUMBER'].astype(str))['PARAMETER']
+        .agg(lambda values: '|'.join(values.astype(str)))
+    )
+
+    dates = pd.to_datetime(records['NON_COMPLIANCE_DATE'], errors='coerce')
+    date_groups = dates.groupby(records['PERMIT_NUMBER'].astype(str))
+    directory['FIRST_EXCEEDANCE'] = date_groups.min()
+    directory['LAST_EXCEEDANCE'] = date_groups.max()
+    directory['EXCEEDANCE_COUNT'] = grouped.size()
+
+    directory = directory.rename_axis('PERMIT_NUMBER').reset_index()
+    directory['PARAMETERS'] = directory['PARAMETERS'].fillna('')
+    directory['COUNTY_NAME'] = directory['COUNTY_NAME'].astype('category')
+    return directory[DIRECTORY_COLUMNS].sort_values('PF_NAME', ignore_index=True)
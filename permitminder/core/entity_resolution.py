@@ -0,0 +1,244 @@
+"""
+Facility entity resolution for the PermitMinder data layer.
+
+The eDMR extract identifies facilities only by permit number and a free-text
+PF_NAME, so one facility shows up under several name spellings ("MILL CREEK
+TWP MUNI AUTH" / "Mill Creek Township Municipal Authority") and under every
+permit it holds. This module assigns a FACILITY_ID to every row during ingest:
+
+- names are reduced to normalized tokens (abbreviations expanded, legal
+  suffixes dropped)
+- name variants are blocked by county and only compared when they share a
+  token that is not too common in the county
+- candidate pairs are scored by an IDF-weighted token overlap that tolerates
+  misspelled tokens, and pairs above MATCH_THRESHOLD are merged
+- permits reported under several names, and names reported under several
+  permits, are merged transitively
+
+Ids are integers numbered by the smallest permit number in each facility,
+so they stay stable while the set of permits does not change.
+"""
+
+import re
+from collections import Counter, defaultdict
+from itertools import combinations
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from permitminder.core.text import normalize_text, trigrams
+
+FACILITY_ID_COLUMN = 'FACILITY_ID'
+
+# Minimum name similarity for two name variants in a county to be merged
+MATCH_THRESHOLD = 0.8
+
+# Minimum trigram similarity for two differing tokens to count as one misspelled token
+TOKEN_MATCH_THRESHOLD = 0.7
+
+# Tokens shared by more name variants than this in a county do not make
+# candidate pairs on their own (TOWNSHIP, AUTHORITY, ...)
+MAX_BLOCK_POSTINGS = 50
+
+# Multi-word forms collapsed to a single token before tokenizing
+NAME_PHRASES = [
+    (re.compile(r'\b(?:WASTE ?WATER|SEWAGE) TREATMENT (?:PLANT|FACILITY|FAC)\b'), 'WWTP'),
+    (re.compile(r'\bWATER TREATMENT (?:PLANT|FACILITY|FAC)\b'), 'WTP'),
+    (re.compile(r'\bPOWER (?:STATION|PLANT)\b'), 'POWER STATION'),
+]
+
+# Abbreviation -> spelled-out token
+NAME_ABBREVIATIONS = {
+    'TWP': 'TOWNSHIP', 'TOWNSHP': 'TOWNSHIP',
+    'BORO': 'BOROUGH', 'BOR': 'BOROUGH',
+    'AUTH': 'AUTHORITY', 'AUTHY': 'AUTHORITY',
+    'MUN': 'MUNICIPAL', 'MUNI': 'MUNICIPAL', 'MUNIC': 'MUNICIPAL',
+    'SAN': 'SANITARY', 'SANI': 'SANITARY',
+    'STP': 'WWTP', 'WWTF': 'WWTP', 'WPCP': 'WWTP',
+    'CNTY': 'COUNTY',
+    'MT': 'MOUNT', 'FT': 'FORT',
+    'N': 'NORTH', 'S': 'SOUTH', 'E': 'EAST', 'W': 'WEST',
+}
+
+# Tokens that never distinguish one facility from another
+NAME_STOPWORDS = {
+    'THE', 'OF', 'AND', 'AT', 'INC', 'LLC', 'LP', 'LTD', 'CORP', 'CORPORATION',
+    'COMPANY', 'INCORPORATED', 'FACILITY', 'FAC',
+}
+
+
+def name_tokens(name: str) -> Tuple[str, ...]:
+    """
+    Normalized tokens of a facility name.
+
+    Args:
+        name (str): Raw PF_NAME.
+
+    Returns:
+        Tuple[str, ...]: Distinct tokens, sorted (empty for a blank name).
+    """
+    if name is None or (isinstance(name, float) and np.isnan(name)):
+        return ()
+    text = normalize_text(name)
+    for pattern, replacement in NAME_PHRASES:
+        text = pattern.sub(replacement, text)
+    tokens = {NAME_ABBREVIATIONS.get(token, token) for token in text.split()}
+    return tuple(sorted(tokens - NAME_STOPWORDS))
+
+
+def _token_similarity(a: str, b: str) -> float:
+    """Dice similarity of two tokens' trigrams."""
+    grams_a, grams_b = set(trigrams(a)), set(trigrams(b))
+    return 2 * len(grams_a & grams_b) / (len(grams_a) + len(grams_b))
+
+
+def name_similarity(a: Sequence[str], b: Sequence[str], weights: Dict[str, float]) -> float:
+    """
+    Similarity of two normalized names.
+
+    Weighted overlap of the token sets (shared weight / combined weight),
+    where a token missing from one name can still match a misspelled
+    token of the other. Names with different numbers ("PLANT 1" and
+    "PLANT 2") never match.
+
+    Args:
+        a (Sequence[str]): Tokens from ``name_tokens``.
+        b (Sequence[str]): Tokens from ``name_tokens``.
+        weights (Dict[str, float]): Weight per token (rarer tokens weigh more).
+
+    Returns:
+        float: Similarity between 0 and 1.
+    """
+    a, b = set(a), set(b)
+    if {token for token in a if token.isdigit()} != {token for token in b if token.isdigit()}:
+        return 0.0
+
+    shared = sum(weights[token] for token in a & b)
+    combined = sum(weights[token] for token in a | b)
+    unmatched = sorted(b - a)
+    for token in sorted(a - b):
+        if not unmatched:
+            break
+        scores = [_token_similarity(token, other) for other in unmatched]
+        best = int(np.argmax(scores))
+        if scores[best] >= TOKEN_MATCH_THRESHOLD:
+            # Count the pair once, credited by how close the spellings are
+            pair_weight = (weights[token] + weights[unmatched[best]]) / 2
+            shared += pair_weight * scores[best]
+            combined -= pair_weight
+            unmatched.pop(best)
+    return shared / combined if combined > 0 else 0.0
+
+
+def _find(parent: np.ndarray, node: int) -> int:
+    """Root of a node in the union-find forest (with path halving)."""
+    while parent[node] != node:
+        parent[node] = parent[parent[node]]
+        node = parent[node]
+    return node
+
+
+def _union(parent: np.ndarray, a: int, b: int) -> None:
+    """Merge the sets containing ``a`` and ``b``."""
+    root_a, root_b = _find(parent, a), _find(parent, b)
+    if root_a != root_b:
+        parent[max(root_a, root_b)] = min(root_a, root_b)
+
+
+def _candidate_pairs(variant_tokens: List[Tuple[str, ...]], block: np.ndarray) -> set:
+    """Pairs of name variants in one county block that share an uncommon token."""
+    postings: Dict[str, List[int]] = defaultdict(list)
+    for variant in block:
+        for token in variant_tokens[variant]:
+            postings[token].append(int(variant))
+
+    pairs = set()
+    for variants in postings.values():
+        if 1 < len(variants) <= MAX_BLOCK_POSTINGS:
+            pairs.update(combinations(variants, 2))
+    return pairs
+
+
+def resolve_facilities(df: pd.DataFrame, threshold: float = MATCH_THRESHOLD) -> np.ndarray:
+    """
+    Facility id of every record.
+
+    Args:
+        df (pd.DataFrame): Records with PERMIT_NUMBER, PF_NAME and COUNTY_NAME.
+        threshold (float, optional): Minimum name similarity for merging two
+                                     name variants. Defaults to MATCH_THRESHOLD.
+
+    Returns:
+        np.ndarray: Facility id per row, numbered from 0; -1 for rows with
+                    neither a permit number nor a name.
+    """
+    n_rows = len(df)
+    permits = df['PERMIT_NUMBER']
+    names = df['PF_NAME'] if 'PF_NAME' in df.columns else pd.Series(np.nan, index=df.index)
+    counties = df['COUNTY_NAME'].fillna('').astype(str) if 'COUNTY_NAME' in df.columns \
+        else pd.Series('', index=df.index)
+
+    # Name variants: distinct (county, normalized name), tokenized once per raw spelling
+    name_codes, raw_names = pd.factorize(names)
+    raw_keys = [name_tokens(name) for name in raw_names]
+    key_codes, keys = pd.factorize(pd.Series(raw_keys + [()], dtype=object).to_numpy()[name_codes])
+    county_codes, _ = pd.factorize(counties)
+    has_name = np.array([len(key) > 0 for key in keys] + [False])[key_codes]
+    variant_codes, variants = pd.factorize(county_codes[has_name] * len(keys) + key_codes[has_name])
+    variant_county = variants // len(keys) if len(keys) else variants
+    variant_tokens = [keys[key] for key in variants % len(keys)] if len(keys) else []
+
+    # Records: one node per permit, or per name variant for records without a permit
+    has_permit = permits.notna().to_numpy()
+    permit_codes, permit_names = pd.factorize(permits[has_permit].astype(str))
+    n_permits, n_variants = len(permit_names), len(variants)
+    row_variant = np.full(n_rows, -1, dtype=np.int64)
+    row_variant[has_name] = variant_codes
+    row_node = np.full(n_rows, -1, dtype=np.int64)
+    row_node[has_permit] = permit_codes
+    row_node[~has_permit & has_name] = n_permits + row_variant[~has_permit & has_name]
+
+    # Nodes 0..n_permits-1 are permits, then one node per name variant
+    parent = np.arange(n_permits + n_variants)
+    links = np.unique(np.stack([permit_codes, row_variant[has_permit]], axis=1), axis=0)
+    for permit, variant in links:
+        if variant >= 0:
+            _union(parent, int(permit), n_permits + int(variant))
+
+    # Fuzzy matches between name variants, blocked by county
+    document_counts = Counter(token for tokens in variant_tokens for token in tokens)
+    weights = {token: float(np.log1p(n_variants / count)) for token, count in document_counts.items()}
+    _, block_codes = np.unique(variant_county, return_inverse=True)
+    order = np.argsort(block_codes, kind='stable')
+    for block in np.split(order, np.flatnonzero(np.diff(block_codes[order])) + 1):
+        for a, b in _candidate_pairs(variant_tokens, block):
+            if name_similarity(variant_tokens[a], variant_tokens[b], weights) >= threshold:
+                _union(parent, n_permits + a, n_permits + b)
+
+    roots = np.array([_find(parent, node) for node in range(len(parent))], dtype=np.int64)
+
+    # Number facilities by their smallest permit number (name-only facilities last)
+    sort_keys = np.array(list(permit_names) + ['\uffff' + ' '.join(tokens) for tokens in variant_tokens], dtype=object)
+    first_key = pd.Series(sort_keys).groupby(roots).min()
+    facility_ids = pd.Series(np.argsort(np.argsort(first_key.to_numpy(), kind='stable')), index=first_key.index)
+
+    ids = np.full(n_rows, -1, dtype=np.int64)
+    assigned = row_node >= 0
+    ids[assigned] = facility_ids.reindex(roots[row_node[assigned]]).to_numpy()
+    return ids
+
+
+def assign_facility_ids(df: pd.DataFrame, threshold: float = MATCH_THRESHOLD) -> pd.DataFrame:
+    """
+    Add the FACILITY_ID column to a set of records.
+
+    Args:
+        df (pd.DataFrame): Records with PERMIT_NUMBER, PF_NAME and COUNTY_NAME.
+        threshold (float, optional): See ``resolve_facilities``.
+
+    Returns:
+        pd.DataFrame: The same frame with FACILITY_ID.
+    """
+    df[FACILITY_ID_COLUMN] = resolve_facilities(df, threshold)
+    return df
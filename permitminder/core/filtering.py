@@ -0,0 +1,230 @@
+"""
+Exceedance filtering for the PermitMinder data layer.
+
+The search filters are compiled into an indexed query plan
+(``permitminder.core.query``): county, parameter and severity accept one
+value or a list, the facility filter one substring or several, and extra
+clauses (negations, OR groups) can be passed as ``conditions``. The
+"All ..." options used by the search page selectboxes mean "no filter".
+"""
+
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from permitminder.core.normalization import canonical_parameters
+from permitminder.core.query import Clause, Condition, Contains, DateRange, compile_query, dataset_index
+
+# Selectbox options that disable a filter
+ALL_COUNTIES = 'All County Names'
+ALL_PARAMETERS = 'All Parameters'
+ALL_SEVERITIES = 'All Severities'
+
+# Filter keyword -> (column, options meaning "no filter")
+VALUE_FILTERS = {
+    'county': ('COUNTY_NAME', {ALL_COUNTIES, 'All Counties'}),
+    'parameter': ('PARAMETER', {ALL_PARAMETERS}),
+    'severity': ('SEVERITY', {ALL_SEVERITIES, 'All Severity'}),
+}
+
+Values = Union[str, Sequence[str]]
+
+
+def selected_values(value: Optional[Values], all_options: Iterable[str] = ()) -> Tuple[str, ...]:
+    """
+    Canonical form of a single- or multi-value filter.
+
+    Args:
+        value (str or Sequence[str], optional): Selected value(s).
+        all_options (Iterable[str], optional): Options that disable the filter.
+
+    Returns:
+        Tuple[str, ...]: Sorted distinct values; empty when the filter is off.
+    """
+    values = [value] if isinstance(value, str) else list(value or [])
+    values = [item for item in values if item]
+    if any(item in all_options for item in values):
+        return ()
+    return tuple(sorted(set(values)))
+
+
+def build_clauses(
+    county: Optional[Values] = None,
+    facility: Optional[Values] = None,
+    parameter: Optional[Values] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    severity: Optional[Values] = None,
+    conditions: Iterable[Clause] = ()
+) -> List[Clause]:
+    """
+    Query clauses for the search filters.
+
+    Args:
+        county (str or Sequence[str], optional): County name(s).
+        facility (str or Sequence[str], optional): Case-insensitive substring(s) of the facility name.
+        parameter (str or Sequence[str], optional): Parameter name(s).
+        start_date (datetime, optional): First date (inclusive); needs ``end_date``.
+        end_date (datetime, optional): Last date (inclusive); needs ``start_date``.
+        severity (str or Sequence[str], optional): Severity level(s).
+        conditions (Iterable[Clause], optional): Extra clauses, e.g. negations or AnyOf groups.
+
+    Returns:
+        List[Clause]: Clauses that must all match.
+    """
+    clauses: List[Clause] = []
+    for name, value in (('county', county), ('parameter', parameter), ('severity', severity)):
+        column, all_options = VALUE_FILTERS[name]
+        values = selected_values(value, all_options)
+        if values and name == 'parameter':
+            # Prepared records hold canonical names; accept any spelling
+            values = canonical_parameters(values)
+        if values:
+            clauses.append(Condition(column, values))
+
+    texts = selected_values(facility)
+    if texts:
+        clauses.append(Contains('PF_NAME', texts))
+
+    if start_date and end_date:
+        clauses.append(DateRange('NON_COMPLIANCE_DATE', start_date, end_date))
+
+    clauses.extend(conditions)
+    return clauses
+
+
+def filter_row_ids(df: pd.DataFrame, **filters) -> np.ndarray:
+    """
+    Positions of records matching the filters.
+
+    Args:
+        df (pd.DataFrame): Prepared exceedance records.
+        **filters: Keyword filters accepted by ``build_clauses``.
+
+    Returns:
+        np.ndarray: Sorted integer row positions into ``df``.
+    """
+    return compile_query(df, build_clauses(**filters)).execute()
+
+
+def filter_mask(df: pd.DataFrame, **filters) -> np.ndarray:
+    """
+    Boolean mask of records matching every given filter.
+
+    Args:
+        df (pd.DataFrame): Prepared exceedance records.
+        **filters: Keyword filters accepted by ``build_clauses``.
+
+    Returns:
+        np.ndarray: One boolean per row of ``df``.
+    """
+    mask = np.zeros(len(df), dtype=bool)
+    mask[filter_row_ids(df, **filters)] = True
+    return mask
+
+
+def filter_exceedances(
+    df: pd.DataFrame,
+    county: Optional[Values] = None,
+    facility: Optional[Values] = None,
+    parameter: Optional[Values] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    severity: Optional[Values] = None,
+    conditions: Iterable[Clause] = ()
+) -> pd.DataFrame:
+    """
+    Apply the search filters to exceedance records.
+
+    Args:
+        df (pd.DataFrame): Prepared exceedance records.
+        county (str or Sequence[str], optional): County name(s).
+        facility (str or Sequence[str], optional): Case-insensitive substring(s) of the facility name.
+        parameter (str or Sequence[str], optional): Parameter name(s).
+        start_date (datetime, optional): First date (inclusive); needs ``end_date``.
+        end_date (datetime, optional): Last date (inclusive); needs ``start_date``.
+        severity (str or Sequence[str], optional): Severity level(s).
+        conditions (Iterable[Clause], optional): Extra clauses, e.g. negations or AnyOf groups.
+
+    Returns:
+        pd.DataFrame: Matching records (a new DataFrame).
+    """
+    rows = filter_row_ids(
+        df, county=county, facility=facility, parameter=parameter,
+        start_date=start_date, end_date=end_date, severity=severity, conditions=conditions
+    )
+    return df.take(rows)
+
+
+def available_months(df: pd.DataFrame, date_column: str = 'NON_COMPLIANCE_DATE') -> List[pd.Period]:
+    """
+    Months covered by the dataset, for month/year range pickers.
+
+    Args:
+        df (pd.DataFrame): Prepared exceedance records.
+        date_column (str, optional): Date column. Defaults to NON_COMPLIANCE_DATE.
+
+    Returns:
+        List[pd.Period]: Every month from the earliest to the latest date (empty without dates).
+    """
+    if date_column not in df.columns:
+        return []
+    return dataset_index(df).date_index(df, date_column).months()
+
+
+def month_range(start_month: pd.Period, end_month: pd.Period) -> Tuple[datetime, datetime]:
+    """
+    Date filter bounds covering whole months.
+
+    Args:
+        start_month (pd.Period): First month.
+        end_month (pd.Period): Last month (inclusive).
+
+    Returns:
+        Tuple[datetime, datetime]: First day of ``start_month`` and last day of ``end_month``.
+    """
+    return start_month.start_time.to_pydatetime(), end_month.end_time.normalize().to_pydatetime()
+
+
+def filter_by_permits(df: pd.DataFrame, permits: Iterable[str]) -> pd.DataFrame:
+    """
+    Records for the given permits.
+
+    Args:
+        df (pd.DataFrame): Exceedance records.
+        permits (Iterable[str]): Permit numbers.
+
+    Returns:
+        pd.DataFrame: Matching records.
+    """
+    if df.empty:
+        return df
+    return df[df['PERMIT_NUMBER'].isin(list(permits))]
+
+
+def filter_recent(
+    df: pd.DataFrame,
+    recent_days: int = 30,
+    date_column: str = 'NON_COMPLIANCE_DATE',
+    now: Optional[datetime] = None
+) -> pd.DataFrame:
+    """
+    Records dated within the last ``recent_days`` days.
+
+    Args:
+        df (pd.DataFrame): Exceedance records (dates parsed or as text).
+        recent_days (int, optional): Window length in days. Defaults to 30.
+        date_column (str, optional): Date column. Defaults to NON_COMPLIANCE_DATE.
+        now (datetime, optional): End of the window. Defaults to the current time.
+
+    Returns:
+        pd.DataFrame: Matching records.
+    """
+    if df.empty:
+        return df
+
+    cutoff_date = (now or datetime.now()) - timedelta(days=recent_days)
+    dates = pd.to_datetime(df[date_column], errors='coerce')
+    return df[(dates >= cutoff_date).to_numpy()]
@@ -0,0 +1,254 @@
+"""
+Exceedance data loading for the PermitMinder data layer.
+
+Finds the exceedance extract, reads it (CSV or Parquet) and prepares it for
+querying: standardized column names, parsed dates, data-quality flags,
+severity and rows sorted by date. Prepared frames are cached per file version and tagged
+with that version in ``df.attrs['dataset_version']`` so downstream caches
+can key on it.
+"""
+
+import os
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from permitminder.core.backends import CacheBackend, Reporter, get_cache, get_reporter
+from permitminder.core.normalization import normalize_exceedances
+from permitminder.core.quality import LEGACY_QUALITY_COLUMNS, QUALITY_COLUMN, quality_flags
+from permitminder.core.schema import calculate_severity, ensure_columns, parse_dates, standardize_columns
+
+# Environment variable pointing load_data at a specific exceedance file
+DATA_FILE_ENV = 'PERMITMINDER_DATA_FILE'
+
+# Prepared records are stored in this order
+SORT_COLUMN = 'NON_COMPLIANCE_DATE'
+
+# Rows and columns sampled to tell a loaded dataset from reordered copies of it
+FINGERPRINT_ROWS = 64
+FINGERPRINT_COLUMNS = ['PERMIT_NUMBER', 'PARAMETER', 'NON_COMPLIANCE_DATE']
+
+DEFAULT_DATA_PATHS = [
+    'pa_exceedances_launch_ready.csv',  # Root directory
+    'archive_2025_09_06_before_refactor/pa_exceedances_launch_ready.csv',  # Archive folder
+    'Launch_Ready/pa_exceedances_launch_ready.csv',  # Launch_Ready folder
+]
+
+
+def candidate_paths(extra_paths: Iterable[Optional[str]] = ()) -> List[str]:
+    """
+    Data file locations in the order they are tried.
+
+    Args:
+        extra_paths (Iterable[str], optional): Custom paths tried after the defaults.
+
+    Returns:
+        List[str]: The DATA_FILE_ENV override (if set), DEFAULT_DATA_PATHS, then ``extra_paths``.
+    """
+    paths = [os.environ.get(DATA_FILE_ENV)] + DEFAULT_DATA_PATHS + list(extra_paths)
+    return [path for path in paths if path]
+
+
+def find_data_file(extra_paths: Iterable[Optional[str]] = ()) -> Optional[str]:
+    """
+    Locate the exceedance extract.
+
+    Args:
+        extra_paths (Iterable[str], optional): Custom paths tried after the defaults.
+
+    Returns:
+        str: First existing path, or None if no file was found.
+    """
+    for path in candidate_paths(extra_paths):
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def dataset_version(path: str) -> str:
+    """
+    Identifier that changes whenever the file at ``path`` is replaced or modified.
+
+    Args:
+        path (str): Data file path.
+
+    Returns:
+        str: Size and modification time of the file, as hex.
+    """
+    stat = os.stat(path)
+    return f"{stat.st_size:x}-{stat.st_mtime_ns:x}"
+
+
+def row_fingerprint(df: pd.DataFrame) -> Tuple:
+    """
+    Values of a few key columns at FINGERPRINT_ROWS evenly spaced rows.
+
+    Args:
+        df (pd.DataFrame): Records.
+
+    Returns:
+        Tuple: Changes when rows are reordered, added or removed (almost always).
+    """
+    positions = np.linspace(0, len(df) - 1, min(len(df), FINGERPRINT_ROWS)).astype(int)
+    return tuple(
+        tuple(df[col].to_numpy()[positions].astype(str).tolist())
+        for col in FINGERPRINT_COLUMNS if col in df.columns
+    )
+
+
+def tag_dataset(df: pd.DataFrame, path: str, version: str) -> pd.DataFrame:
+    """
+    Mark a freshly loaded frame as one version of a data file.
+
+    Args:
+        df (pd.DataFrame): Records as loaded, with a RangeIndex.
+        path (str): Data file they were read from.
+        version (str): ``dataset_version(path)`` at load time.
+
+    Returns:
+        pd.DataFrame: ``df`` with the attrs ``dataset_key`` relies on.
+    """
+    df.attrs['dataset_version'] = version
+    df.attrs['source_path'] = path
+    df.attrs['dataset_rows'] = len(df)
+    df.attrs['dataset_fingerprint'] = row_fingerprint(df)
+    return df
+
+
+def dataset_key(df: pd.DataFrame) -> Optional[Tuple[str, str]]:
+    """
+    Identity of a full dataset returned by ``load_exceedances``.
+
+    Filtered, re-sorted or re-indexed frames keep the attrs of the dataset
+    they came from, so the row count, index and a sample of rows are
+    checked as well.
+
+    Args:
+        df (pd.DataFrame): Records.
+
+    Returns:
+        Tuple[str, str]: (source path, dataset version), or None if ``df`` is
+                         not an unmodified loaded dataset.
+    """
+    version = df.attrs.get('dataset_version')
+    if version is None or len(df) != df.attrs.get('dataset_rows') or not df.index.equals(pd.RangeIndex(len(df))):
+        return None
+    if df.attrs.get('dataset_fingerprint') != row_fingerprint(df):
+        return None
+    return df.attrs.get('source_path'), version
+
+
+def read_exceedances(path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Read an exceedance file as-is (raw column names, no processing).
+
+    Args:
+        path (str): CSV or Parquet file.
+        columns (List[str], optional): Only read these columns (missing ones are skipped).
+
+    Returns:
+        pd.DataFrame: The raw records.
+    """
+    if path.endswith('.parquet'):
+        if columns is not None:
+            import pyarrow.parquet as pq
+            available = set(pq.read_schema(path).names)
+            columns = [col for col in columns if col in available]
+        return pd.read_parquet(path, columns=columns)
+
+    usecols = (lambda col: col in columns) if columns is not None else None
+    return pd.read_csv(path, usecols=usecols, dtype={'PERMIT_NUMBER': str}, low_memory=False)
+
+
+def prepare_exceedances(df: pd.DataFrame, reporter: Optional[Reporter] = None) -> pd.DataFrame:
+    """
+    Prepare raw records for querying.
+
+    Records are stored sorted by NON_COMPLIANCE_DATE (undated records
+    last), so date ranges map to contiguous row ranges.
+
+    Args:
+        df (pd.DataFrame): Raw exceedance records (modified in place).
+        reporter (Reporter, optional): Receives warnings about missing columns.
+
+    Returns:
+        pd.DataFrame: Records with standardized columns, parsed dates,
+                      the DATA_QUALITY_FLAGS bitmask, canonical parameters
+                      and units (see ``normalize_exceedances``) and SEVERITY,
+                      sorted by date with a fresh RangeIndex.
+    """
+    standardize_columns(df)
+    ensure_columns(df, reporter)
+    parse_dates(df)
+    # Bitmask from the stored column, legacy flag text or the raw values (before unit normalization)
+    df[QUALITY_COLUMN] = quality_flags(df)
+    df.drop(columns=[column for column in LEGACY_QUALITY_COLUMNS if column in df.columns], inplace=True)
+    normalize_exceedances(df)
+    df['SEVERITY'] = calculate_severity(df)
+    return df.sort_values(SORT_COLUMN, kind='stable', na_position='last', ignore_index=True)
+
+
+def load_exceedances(
+    path: str,
+    cache: Optional[CacheBackend] = None,
+    reporter: Optional[Reporter] = None
+) -> pd.DataFrame:
+    """
+    Read and prepare one exceedance file, cached per file version.
+
+    Args:
+        path (str): CSV or Parquet file.
+        cache (CacheBackend, optional): Cache for prepared frames. Defaults to the process cache.
+        reporter (Reporter, optional): Receives loading errors and warnings.
+
+    Returns:
+        pd.DataFrame: Prepared records (empty if the file cannot be read). The
+                      frame may be shared through the cache; callers must not
+                      modify it in place.
+    """
+    reporter = get_reporter(reporter)
+    try:
+        version = dataset_version(path)
+    except OSError as e:
+        reporter.error(f"Error loading data from {path}: {e}")
+        return pd.DataFrame()
+
+    def load() -> pd.DataFrame:
+        try:
+            df = prepare_exceedances(read_exceedances(path), reporter)
+        except Exception as e:
+            reporter.error(f"Error loading data from {path}: {e}")
+            return pd.DataFrame()
+        return tag_dataset(df, path, version)
+
+    return get_cache(cache).get_or_compute(('exceedances', os.path.abspath(path), version), load)
+
+
+def load_data(
+    primary_file: Optional[str] = None,
+    backup_file: Optional[str] = None,
+    cache: Optional[CacheBackend] = None,
+    reporter: Optional[Reporter] = None
+) -> pd.DataFrame:
+    """
+    Find and load the exceedance extract.
+
+    Args:
+        primary_file (str, optional): Specific primary file path.
+        backup_file (str, optional): Specific backup file path.
+        cache (CacheBackend, optional): Cache for prepared frames. Defaults to the process cache.
+        reporter (Reporter, optional): Receives loading errors and warnings.
+
+    Returns:
+        pd.DataFrame: Prepared records, or an empty DataFrame if no file was found.
+    """
+    reporter = get_reporter(reporter)
+    path = find_data_file([primary_file, backup_file])
+    if path is None:
+        reporter.error("Could not find pa_exceedances_launch_ready.csv in any expected location!")
+        reporter.error(f"Searched in: {candidate_paths([primary_file, backup_file])}")
+        return pd.DataFrame()
+
+    reporter.info(f"Loading data from: {path}")
+    return load_exceedances(path, cache=cache, reporter=reporter)
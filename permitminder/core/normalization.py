@@ -0,0 +1,351 @@
+"""
+Parameter and unit normalization for the PermitMinder data layer.
+
+eDMR extracts spell the same parameter several ways ("Aluminum, Total",
+"Total Aluminum", "Aluminum, Total Recoverable") and report concentrations
+and loadings in mixed units (mg/L, ug/L, lbs/day, kg/day). This module holds
+a canonical parameter catalog with categories (industrial, conventional),
+alias and unit dictionaries, and compiled lookups applied per distinct
+value: a column is factorized once, each distinct spelling is resolved in
+Python, and the row codes are remapped with one array take. Rows never go
+through Python.
+
+Parameters that are not in the catalog keep their (whitespace-cleaned)
+reported name, so nothing is dropped.
+"""
+
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+INDUSTRIAL = 'industrial'
+CONVENTIONAL = 'conventional'
+OTHER = 'other'
+
+# Canonical parameter name -> category
+PARAMETER_CATALOG: Dict[str, str] = {
+    # Metals, cyanide and organics that point to industrial sources
+    'Aluminum, Total': INDUSTRIAL,
+    'Iron, Total': INDUSTRIAL,
+    'Manganese, Total': INDUSTRIAL,
+    'Chromium': INDUSTRIAL,
+    'Chromium, Hexavalent': INDUSTRIAL,
+    'Lead': INDUSTRIAL,
+    'Mercury': INDUSTRIAL,
+    'Cadmium': INDUSTRIAL,
+    'Copper': INDUSTRIAL,
+    'Zinc': INDUSTRIAL,
+    'Cyanide': INDUSTRIAL,
+    'Phenols': INDUSTRIAL,
+    'PCB': INDUSTRIAL,
+    'Benzene': INDUSTRIAL,
+    'Toluene': INDUSTRIAL,
+    # Conventional pollutants a sewage plant is permitted for
+    'Biochemical Oxygen Demand': CONVENTIONAL,
+    'Carbonaceous Biochemical Oxygen Demand': CONVENTIONAL,
+    'Total Suspended Solids': CONVENTIONAL,
+    'Fecal Coliform': CONVENTIONAL,
+    'pH': CONVENTIONAL,
+    'Oil and Grease': CONVENTIONAL,
+    'Ammonia-Nitrogen': CONVENTIONAL,
+    # Other common parameters
+    'Dissolved Oxygen': OTHER,
+    'Total Residual Chlorine': OTHER,
+    'Phosphorus, Total': OTHER,
+    'Nitrate-Nitrite as N': OTHER,
+    'Osmotic Pressure': OTHER,
+    'Flow': OTHER,
+    # Separate parameters: Fahrenheit and Centigrade values are not comparable
+    'Temperature, Water Deg. Fahrenheit': OTHER,
+    'Temperature, Water Deg. Centigrade': OTHER,
+    'E. Coli': OTHER,
+}
+
+# Spellings that differ by more than word order, case, punctuation or
+# "Total"/"Recoverable"/"as N" qualifiers (those are handled by parameter_key)
+PARAMETER_ALIASES: Dict[str, str] = {
+    'Aluminum': 'Aluminum, Total',
+    'Iron': 'Iron, Total',
+    'Manganese': 'Manganese, Total',
+    'Polychlorinated Biphenyls': 'PCB',
+    'PCBs': 'PCB',
+    'Phenolics, Total Recoverable': 'Phenols',
+    'BOD': 'Biochemical Oxygen Demand',
+    'BOD5': 'Biochemical Oxygen Demand',
+    'BOD, 5-Day (20 Deg. C)': 'Biochemical Oxygen Demand',
+    'Biochemical Oxygen Demand (BOD5)': 'Biochemical Oxygen Demand',
+    'CBOD': 'Carbonaceous Biochemical Oxygen Demand',
+    'CBOD5': 'Carbonaceous Biochemical Oxygen Demand',
+    'Carbonaceous BOD5': 'Carbonaceous Biochemical Oxygen Demand',
+    'TSS': 'Total Suspended Solids',
+    'Suspended Solids': 'Total Suspended Solids',
+    'Fecal Coliform (Geometric Mean)': 'Fecal Coliform',
+    'Coliform, Fecal General': 'Fecal Coliform',
+    'Oil & Grease': 'Oil and Grease',
+    'Ammonia': 'Ammonia-Nitrogen',
+    'Nitrogen, Ammonia': 'Ammonia-Nitrogen',
+    'Ammonia as N': 'Ammonia-Nitrogen',
+    'TRC': 'Total Residual Chlorine',
+    'Chlorine, Total Residual': 'Total Residual Chlorine',
+    'DO': 'Dissolved Oxygen',
+    'Oxygen, Dissolved': 'Dissolved Oxygen',
+    'Phosphorus': 'Phosphorus, Total',
+    'Nitrite + Nitrate': 'Nitrate-Nitrite as N',
+    'Nitrate-Nitrite': 'Nitrate-Nitrite as N',
+    'Flow, in Conduit or thru Treatment Plant': 'Flow',
+    'Escherichia coli': 'E. Coli',
+}
+
+# Reported unit -> (canonical unit, factor to multiply values by)
+UNIT_CONVERSIONS: Dict[str, Tuple[str, float]] = {
+    'mg/L': ('mg/L', 1.0),
+    'ppm': ('mg/L', 1.0),
+    'ug/L': ('mg/L', 1e-3),
+    'µg/L': ('mg/L', 1e-3),
+    'ppb': ('mg/L', 1e-3),
+    'ng/L': ('mg/L', 1e-6),
+    'g/L': ('mg/L', 1e3),
+    'lbs/day': ('lbs/day', 1.0),
+    'lb/day': ('lbs/day', 1.0),
+    'lbs/d': ('lbs/day', 1.0),
+    'kg/day': ('lbs/day', 2.20462),
+    'kg/d': ('lbs/day', 2.20462),
+    'MGD': ('MGD', 1.0),
+    'gpd': ('MGD', 1e-6),
+    'S.U.': ('S.U.', 1.0),
+    'SU': ('S.U.', 1.0),
+    'No./100 ml': ('No./100 ml', 1.0),
+    '#/100 ml': ('No./100 ml', 1.0),
+    'CFU/100 ml': ('No./100 ml', 1.0),
+    'MPN/100 ml': ('No./100 ml', 1.0),
+}
+
+# Qualifier words that do not change which parameter is meant
+IGNORED_TOKENS = {'total', 'recoverable', 'as', 'n'}
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+
+def parameter_key(name: str) -> str:
+    """
+    Spelling-insensitive key of a parameter name.
+
+    Lowercase word tokens without qualifiers, sorted, so "Aluminum, Total",
+    "Total Aluminum" and "ALUMINUM TOTAL RECOVERABLE" share a key.
+
+    Args:
+        name (str): Reported parameter name.
+
+    Returns:
+        str: The key.
+    """
+    tokens = _TOKEN.findall(str(name).lower())
+    kept = [token for token in tokens if token not in IGNORED_TOKENS] or tokens
+    return ' '.join(sorted(kept))
+
+
+def unit_key(unit: str) -> str:
+    """Case- and space-insensitive key of a unit."""
+    return re.sub(r'\s+', '', str(unit)).lower()
+
+
+class NormalizationCatalog:
+    """
+    Compiled parameter and unit lookups.
+
+    Args:
+        parameters (Dict[str, str], optional): Canonical name -> category. Defaults to PARAMETER_CATALOG.
+        aliases (Dict[str, str], optional): Alias -> canonical name. Defaults to PARAMETER_ALIASES.
+        units (Dict[str, Tuple[str, float]], optional): Unit -> (canonical unit, factor).
+                                                         Defaults to UNIT_CONVERSIONS.
+
+    Raises:
+        ValueError: If an alias points to a name that is not in the catalog.
+    """
+
+    def __init__(
+        self,
+        parameters: Optional[Dict[str, str]] = None,
+        aliases: Optional[Dict[str, str]] = None,
+        units: Optional[Dict[str, Tuple[str, float]]] = None
+    ) -> None:
+        self.parameters = dict(PARAMETER_CATALOG if parameters is None else parameters)
+        aliases = PARAMETER_ALIASES if aliases is None else aliases
+        units = UNIT_CONVERSIONS if units is None else units
+
+        self._parameter_lookup: Dict[str, str] = {parameter_key(name): name for name in self.parameters}
+        for alias, canonical in aliases.items():
+            if canonical not in self.parameters:
+                raise ValueError(f"Alias '{alias}' points to unknown parameter '{canonical}'")
+            self._parameter_lookup[parameter_key(alias)] = canonical
+        self._unit_lookup = {unit_key(unit): target for unit, target in units.items()}
+        self._cache: Dict[str, str] = {}
+
+    def canonical_parameter(self, name: str) -> str:
+        """
+        Canonical name of one reported parameter.
+
+        Args:
+            name (str): Reported name.
+
+        Returns:
+            str: Catalog name, or the reported name with whitespace cleaned up.
+        """
+        canonical = self._cache.get(name)
+        if canonical is None:
+            canonical = self._parameter_lookup.get(parameter_key(name)) or ' '.join(str(name).split())
+            self._cache[name] = canonical
+        return canonical
+
+    def category(self, name: str) -> str:
+        """Category of a canonical parameter (OTHER if it is not in the catalog)."""
+        return self.parameters.get(name, OTHER)
+
+    def canonical_unit(self, unit: str) -> Tuple[str, float]:
+        """
+        Canonical unit of one reported unit.
+
+        Args:
+            unit (str): Reported unit.
+
+        Returns:
+            Tuple[str, float]: Canonical unit and the factor that converts
+                               values to it (the unit itself and 1.0 if unknown).
+        """
+        return self._unit_lookup.get(unit_key(unit), (' '.join(str(unit).split()), 1.0))
+
+    def normalize_parameters(self, column: pd.Series) -> pd.Series:
+        """
+        Canonical parameter per row, as a categorical.
+
+        Args:
+            column (pd.Series): Reported parameter names.
+
+        Returns:
+            pd.Series: Categorical of canonical names aligned with ``column``
+                       (missing values stay missing).
+        """
+        codes, reported = pd.factorize(column)
+        canonical = [self.canonical_parameter(name) for name in reported]
+        categories, remap = np.unique(np.array(canonical, dtype=object), return_inverse=True) if canonical \
+            else (np.array([], dtype=object), np.array([], dtype=np.int64))
+        # Slot -1 (missing) stays -1
+        remap = np.append(remap, -1)
+        return pd.Series(
+            pd.Categorical.from_codes(remap[codes], categories=categories),
+            index=column.index, name=column.name
+        )
+
+    def categories(self, parameters: pd.Series) -> np.ndarray:
+        """
+        Category of each canonical parameter category code.
+
+        Args:
+            parameters (pd.Series): Output of ``normalize_parameters``.
+
+        Returns:
+            np.ndarray: Category per entry of ``parameters.cat.categories``, plus
+                        a trailing OTHER so ``result[codes]`` works for missing rows.
+        """
+        names = parameters.cat.categories
+        return np.array([self.category(name) for name in names] + [OTHER], dtype=object)
+
+    def normalize_units(self, column: pd.Series) -> Tuple[pd.Series, np.ndarray]:
+        """
+        Canonical unit and conversion factor per row.
+
+        Args:
+            column (pd.Series): Reported units.
+
+        Returns:
+            Tuple[pd.Series, np.ndarray]: Categorical of canonical units aligned
+                with ``column``, and the factor per row (1.0 where the unit is missing).
+        """
+        codes, reported = pd.factorize(column)
+        targets = [self.canonical_unit(unit) for unit in reported]
+        names = np.array([unit for unit, _ in targets], dtype=object)
+        factors = np.array([factor for _, factor in targets] + [1.0], dtype=float)
+        categories, remap = np.unique(names, return_inverse=True) if len(names) \
+            else (np.array([], dtype=object), np.array([], dtype=np.int64))
+        remap = np.append(remap, -1)
+        units = pd.Series(
+            pd.Categorical.from_codes(remap[codes], categories=categories),
+            index=column.index, name=column.name
+        )
+        return units, factors[codes]
+
+
+_default_catalog: Optional[NormalizationCatalog] = None
+_default_catalog_lock = threading.Lock()
+
+
+def get_catalog() -> NormalizationCatalog:
+    """Process-wide catalog built from the module dictionaries."""
+    global _default_catalog
+    if _default_catalog is None:
+        with _default_catalog_lock:
+            if _default_catalog is None:
+                _default_catalog = NormalizationCatalog()
+    return _default_catalog
+
+
+def parameters_in(category: str) -> List[str]:
+    """
+    Catalog parameters of one category.
+
+    Args:
+        category (str): INDUSTRIAL, CONVENTIONAL or OTHER.
+
+    Returns:
+        List[str]: Canonical names, in catalog order.
+    """
+    return [name for name, name_category in PARAMETER_CATALOG.items() if name_category == category]
+
+
+def canonical_parameters(names: Iterable[str], catalog: Optional[NormalizationCatalog] = None) -> Tuple[str, ...]:
+    """
+    Canonical names of selected parameters (e.g. filter or subscription values).
+
+    Args:
+        names (Iterable[str]): Parameter names in any spelling.
+        catalog (NormalizationCatalog, optional): Defaults to ``get_catalog()``.
+
+    Returns:
+        Tuple[str, ...]: Sorted distinct canonical names.
+    """
+    catalog = catalog or get_catalog()
+    return tuple(sorted({catalog.canonical_parameter(name) for name in names}))
+
+
+def normalize_exceedances(df: pd.DataFrame, catalog: Optional[NormalizationCatalog] = None) -> pd.DataFrame:
+    """
+    Normalize parameters and units of standardized records, in place.
+
+    PARAMETER becomes a categorical of canonical names; the reported name
+    is kept in PARAMETER_REPORTED. UNIT_OF_MEASURE, SAMPLE_VALUE and
+    PERMIT_VALUE are kept as reported, and CANONICAL_UNIT plus
+    SAMPLE_VALUE_CANONICAL / PERMIT_VALUE_CANONICAL (numbers converted to
+    the canonical unit; NaN for qualified values such as "<0.05") are added.
+
+    Args:
+        df (pd.DataFrame): Records with standardized column names.
+        catalog (NormalizationCatalog, optional): Defaults to ``get_catalog()``.
+
+    Returns:
+        pd.DataFrame: The same DataFrame, for chaining.
+    """
+    catalog = catalog or get_catalog()
+    if 'PARAMETER' in df.columns and 'PARAMETER_REPORTED' not in df.columns:
+        df['PARAMETER_REPORTED'] = df['PARAMETER'].astype('category')
+        df['PARAMETER'] = catalog.normalize_parameters(df['PARAMETER'])
+
+    if 'UNIT_OF_MEASURE' in df.columns:
+        units, factors = catalog.normalize_units(df['UNIT_OF_MEASURE'])
+        df['CANONICAL_UNIT'] = units
+        for column in ('SAMPLE_VALUE', 'PERMIT_VALUE'):
+            if column in df.columns:
+                df[f'{column}_CANONICAL'] = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float) * factors
+    return df
@@ -0,0 +1,215 @@
+"""
+Data-quality flags for the PermitMinder data layer.
+
+Each record carries one small integer whose bits mark its data-quality
+issues (no permit limit, unparseable result, missing units). The flags
+are computed with vectorized boolean operations during ingest, stored as
+a single uint8 column, filtered with an integer AND and decoded to text
+only for display.
+"""
+
+from typing import Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+NO_PERMIT_LIMIT = 1
+INVALID_RESULT = 2
+MISSING_UNITS = 4
+
+# Bit -> display label, in display order
+QUALITY_FLAGS = {
+    NO_PERMIT_LIMIT: 'No permit limit',
+    INVALID_RESULT: 'Invalid result',
+    MISSING_UNITS: 'Missing units',
+}
+
+# Column names in launch-ready extracts and in prepared (standardized) records
+LAUNCH_READY_QUALITY_COLUMN = 'Data_Quality_Flags'
+QUALITY_COLUMN = 'DATA_QUALITY_FLAGS'
+
+# Text column written by earlier extracts ("No permit limit; Missing units")
+LEGACY_QUALITY_COLUMNS = ['Data_Quality_Flag', 'DATA_QUALITY_FLAG']
+
+QUALITY_DTYPE = np.uint8
+FLAG_SEPARATOR = '; '
+
+Flags = Union[int, str, Iterable[Union[int, str]]]
+
+# Decoded text of every possible flag combination, indexed by the bitmask
+_DECODED = np.array([
+    FLAG_SEPARATOR.join(label for bit, label in QUALITY_FLAGS.items() if value & bit)
+    for value in range(2 ** len(QUALITY_FLAGS))
+], dtype=object)
+_LABEL_BITS = {label.lower(): bit for bit, label in QUALITY_FLAGS.items()}
+
+
+def compute_quality_flags(
+    permit_value: Optional[pd.Series],
+    effective_result: Optional[pd.Series],
+    unit: Optional[pd.Series],
+    n_rows: Optional[int] = None
+) -> np.ndarray:
+    """
+    Data-quality bitmask of every record.
+
+    A missing column sets its flag on every row.
+
+    Args:
+        permit_value (pd.Series, optional): PERMIT_VALUE (numbers or text); missing or 0
+                                            sets NO_PERMIT_LIMIT.
+        effective_result (pd.Series, optional): Numeric result; missing sets INVALID_RESULT.
+        unit (pd.Series, optional): UNIT_OF_MEASURE; missing or blank sets MISSING_UNITS.
+        n_rows (int, optional): Row count when every column is missing.
+
+    Returns:
+        np.ndarray: One QUALITY_DTYPE bitmask per record.
+    """
+    present = [column for column in (permit_value, effective_result, unit) if column is not None]
+    n_rows = len(present[0]) if present else (n_rows or 0)
+    flags = np.zeros(n_rows, dtype=QUALITY_DTYPE)
+
+    if permit_value is None:
+        flags |= NO_PERMIT_LIMIT
+    else:
+        no_limit = permit_value.isna().to_numpy() | (pd.to_numeric(permit_value, errors='coerce') == 0).to_numpy()
+        flags[no_limit] |= NO_PERMIT_LIMIT
+
+    if effective_result is None:
+        flags |= INVALID_RESULT
+    else:
+        flags[effective_result.isna().to_numpy()] |= INVALID_RESULT
+
+    if unit is None:
+        flags |= MISSING_UNITS
+    else:
+        # Blank check once per distinct unit string
+        codes, units = pd.factorize(unit)
+        blank = np.append(pd.Index(units).astype(str).str.strip().to_numpy() == '', True)
+        flags[blank[codes]] |= MISSING_UNITS
+
+    return flags
+
+
+def flag_mask(flags: Optional[Flags]) -> int:
+    """
+    Combined bitmask of one or more flags.
+
+    Args:
+        flags (int, str or Iterable, optional): Bits, bitmasks or display
+                                                labels (case-insensitive).
+
+    Returns:
+        int: OR of the flags (0 for none).
+
+    Raises:
+        ValueError: If a label or bit is not a known flag.
+    """
+    if flags is None:
+        return 0
+    if isinstance(flags, (int, np.integer, str)):
+        flags = [flags]
+
+    mask = 0
+    for flag in flags:
+        if isinstance(flag, str):
+            bit = _LABEL_BITS.get(flag.strip().lower())
+            if bit is None and flag.strip().isdigit():
+                bit = int(flag)
+            if bit is None:
+                raise ValueError(f"Unknown data-quality flag '{flag}'. Choose from: {', '.join(QUALITY_FLAGS.values())}")
+        else:
+            bit = int(flag)
+        if bit < 0 or bit >= len(_DECODED):
+            raise ValueError(f"Unknown data-quality bits: {bit}")
+        mask |= bit
+    return mask
+
+
+def without_flags(values: Union[pd.Series, np.ndarray], flags: Flags) -> np.ndarray:
+    """
+    Rows with none of the given flags set.
+
+    Args:
+        values (pd.Series or np.ndarray): Bitmask column.
+        flags (int, str or Iterable): Flags to exclude (see ``flag_mask``).
+
+    Returns:
+        np.ndarray: One boolean per row.
+    """
+    return (np.asarray(values) & flag_mask(flags)) == 0
+
+
+def flag_labels(value: int) -> List[str]:
+    """
+    Display labels of the flags set in one bitmask.
+
+    Args:
+        value (int): Bitmask.
+
+    Returns:
+        List[str]: Labels in display order (empty for a clean record).
+    """
+    return [label for bit, label in QUALITY_FLAGS.items() if int(value) & bit]
+
+
+def decode_quality_flags(values: Union[pd.Series, np.ndarray]) -> pd.Series:
+    """
+    Display text of a bitmask column ("No permit limit; Missing units").
+
+    Args:
+        values (pd.Series or np.ndarray): Bitmask column.
+
+    Returns:
+        pd.Series: Text per row ('' for clean records), with the input's index for a Series.
+    """
+    index = values.index if isinstance(values, pd.Series) else None
+    decoded = _DECODED[np.asarray(values, dtype=np.int64) & (len(_DECODED) - 1)]
+    return pd.Series(decoded, index=index, dtype=object)
+
+
+def encode_quality_text(text: pd.Series) -> np.ndarray:
+    """
+    Bitmask of a legacy text flag column, parsed once per distinct text.
+
+    Args:
+        text (pd.Series): Joined labels as written by earlier extracts.
+
+    Returns:
+        np.ndarray: One QUALITY_DTYPE bitmask per record.
+    """
+    codes, texts = pd.factorize(text)
+    masks = [
+        flag_mask([label for label in str(value).split(';') if label.strip().lower() in _LABEL_BITS])
+        for value in texts
+    ]
+    return np.array(masks + [0], dtype=QUALITY_DTYPE)[codes]
+
+
+def quality_flags(df: pd.DataFrame) -> np.ndarray:
+    """
+    Data-quality bitmask of a set of records, from whichever source it has.
+
+    Uses the stored bitmask column, else parses the legacy text column,
+    else computes the flags from the permit value, result and unit columns.
+
+    Args:
+        df (pd.DataFrame): Launch-ready or prepared records.
+
+    Returns:
+        np.ndarray: One QUALITY_DTYPE bitmask per record.
+    """
+    for column in (LAUNCH_READY_QUALITY_COLUMN, QUALITY_COLUMN):
+        if column in df.columns:
+            return df[column].fillna(0).to_numpy().astype(QUALITY_DTYPE)
+    for column in LEGACY_QUALITY_COLUMNS:
+        if column in df.columns:
+            return encode_quality_text(df[column])
+
+    def first(*columns: str) -> Optional[pd.Series]:
+        return next((df[column] for column in columns if column in df.columns), None)
+
+    result = first('Effective_Result', 'EFFECTIVE_RESULT')
+    if result is None and 'SAMPLE_VALUE' in df.columns:
+        result = pd.to_numeric(df['SAMPLE_VALUE'], errors='coerce')
+    return compute_quality_flags(first('PERMIT_VALUE'), result, first('UNIT_OF_MEASURE'), n_rows=len(df))
@@ -0,0 +1,501 @@
+"""
+Indexed query plans for the PermitMinder data layer.
+
+Search filters are expressed as clauses (``Condition``, ``Contains``,
+``FlagsClear``, ``DateRange`` and ``AnyOf`` groups, all combined with
+AND) and compiled into a plan over per-column indexes that are built
+once per dataset version: value -> sorted row positions for categorical
+columns and a month-bucketed date order for date columns. Every step knows how many
+rows it selects before it runs, so the plan materializes the most
+selective step from its index and only checks the other steps against
+the remaining candidates, instead of scanning every filtered column of
+every row.
+"""
+
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from permitminder.core.backends import CacheBackend, get_cache
+from permitminder.core.loading import dataset_key
+
+# Above this fraction of the rows, unions of value lists are built from a mask instead
+UNION_MASK_FRACTION = 0.125
+
+
+class ValueIndex:
+    """
+    Row positions per distinct value of one column.
+
+    Args:
+        column (pd.Series): Column values (missing values are not indexed).
+    """
+
+    def __init__(self, column: pd.Series) -> None:
+        codes, labels = pd.factorize(column, sort=False)
+        self.codes = codes.astype(np.int32, copy=False)
+        self.labels = np.asarray(labels, dtype=object)
+        self.positions = {label: code for code, label in enumerate(self.labels)}
+
+        # Slot 0 holds missing values, slot code + 1 holds each label
+        slot_counts = np.bincount(self.codes + 1, minlength=len(self.labels) + 1)
+        self.counts = slot_counts[1:]
+        self.offsets = np.concatenate(([0], np.cumsum(slot_counts)))
+        self._order: Optional[np.ndarray] = None
+        self._label_order: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @property
+    def order(self) -> np.ndarray:
+        """Row positions grouped by code (ascending within each code), sorted on first use."""
+        if self._order is None:
+            self._order = np.argsort(self.codes, kind='stable').astype(np.int32, copy=False)
+        return self._order
+
+    @property
+    def label_order(self) -> np.ndarray:
+        """Codes in ascending label order."""
+        if self._label_order is None:
+            codes = range(len(self.labels))
+            try:
+                ordered = sorted(codes, key=lambda code: self.labels[code])
+            except TypeError:
+                ordered = sorted(codes, key=lambda code: str(self.labels[code]))
+            self._label_order = np.array(ordered, dtype=np.int32)
+        return self._label_order
+
+    def value_counts(self, rows: Optional[np.ndarray] = None) -> pd.Series:
+        """
+        Number of rows per distinct value.
+
+        Args:
+            rows (np.ndarray, optional): Only count these row positions. Defaults to every row.
+
+        Returns:
+            pd.Series: Count per value (including zero counts), indexed by value in ascending order.
+        """
+        if rows is None:
+            counts = self.counts
+        else:
+            counts = np.bincount(self.codes[rows] + 1, minlength=len(self.labels) + 1)[1:]
+        order = self.label_order
+        return pd.Series(counts[order], index=pd.Index(self.labels[order], dtype=object), name='count')
+
+    def codes_for(self, values: Iterable) -> np.ndarray:
+        """Codes of the given values that occur in the column."""
+        return np.array(sorted({self.positions[value] for value in values if value in self.positions}), dtype=np.int32)
+
+    def count(self, codes: np.ndarray) -> int:
+        """Number of rows holding any of ``codes``."""
+        return int(self.counts[codes].sum())
+
+    def member(self, codes: np.ndarray) -> np.ndarray:
+        """Lookup table, indexed by code + 1, that is True for ``codes``."""
+        table = np.zeros(len(self.labels) + 1, dtype=bool)
+        table[codes + 1] = True
+        return table
+
+    def rows(self, codes: np.ndarray) -> np.ndarray:
+        """
+        Row positions holding any of ``codes``.
+
+        Args:
+            codes (np.ndarray): Value codes.
+
+        Returns:
+            np.ndarray: Sorted row positions.
+        """
+        if len(codes) == 1:
+            return self.order[self.offsets[codes[0] + 1]:self.offsets[codes[0] + 2]]
+        if self.count(codes) > len(self) * UNION_MASK_FRACTION:
+            return np.flatnonzero(self.member(codes)[self.codes + 1]).astype(np.int32, copy=False)
+        return np.sort(np.concatenate([self.order[self.offsets[code + 1]:self.offsets[code + 2]] for code in codes]))
+
+
+class DateIndex:
+    """
+    Row positions of one date column ordered by date, with a month-bucket offset table.
+
+    When the dataset itself is stored sorted by the column (as
+    ``load_exceedances`` does for NON_COMPLIANCE_DATE) the order is the
+    identity and every date range is one contiguous slice of rows.
+
+    Args:
+        column (pd.Series): Column of parsed dates. Missing dates are not indexed.
+    """
+
+    def __init__(self, column: pd.Series) -> None:
+        self.values = column.to_numpy(dtype='datetime64[ns]')
+        valid = np.flatnonzero(~np.isnat(self.values))
+        self.order = valid[np.argsort(self.values[valid], kind='stable')].astype(np.int32, copy=False)
+        self.sorted_values = self.values[self.order]
+        self.contiguous = bool(np.array_equal(self.order, np.arange(len(self.order))))
+
+        # offsets[k] is the first sorted position in month first_month + k
+        months = self.sorted_values.astype('datetime64[M]')
+        self.first_month = months[0] if len(months) else np.datetime64('1970-01', 'M')
+        n_months = int((months[-1] - self.first_month).astype(int)) + 1 if len(months) else 0
+        self.offsets = np.searchsorted(months, self.first_month + np.arange(n_months + 1))
+
+    def months(self) -> List[pd.Period]:
+        """Every month from the first to the last indexed date."""
+        return list(pd.period_range(pd.Period(self.first_month, 'M'), periods=len(self.offsets) - 1, freq='M'))
+
+    def _position(self, value: np.datetime64, side: str) -> int:
+        """Sorted position of ``value``, searched only within its month bucket."""
+        month_start = value.astype('datetime64[M]')
+        month = int((month_start - self.first_month).astype(int))
+        if month < 0:
+            return 0
+        if month >= len(self.offsets) - 1:
+            return len(self.sorted_values)
+        lo, hi = self.offsets[month], self.offsets[month + 1]
+        if side == 'left' and value == month_start:
+            return int(lo)
+        return int(lo + np.searchsorted(self.sorted_values[lo:hi], value, side=side))
+
+    def bounds(self, start: np.datetime64, end: np.datetime64) -> Tuple[int, int]:
+        """Slice of ``order`` holding dates between ``start`` and ``end`` (inclusive)."""
+        return self._position(start, 'left'), self._position(end, 'right')
+
+
+class DatasetIndex:
+    """
+    Lazily built column indexes of one dataset version.
+
+    The index does not keep the dataset itself; callers pass the frame the
+    index was created for.
+    """
+
+    def __init__(self) -> None:
+        self._value_indexes: Dict[str, ValueIndex] = {}
+        self._date_indexes: Dict[str, DateIndex] = {}
+        self._lock = threading.Lock()
+
+    def value_index(self, df: pd.DataFrame, column: str) -> ValueIndex:
+        """Value index of ``column``, built on first use."""
+        if column not in self._value_indexes:
+            with self._lock:
+                if column not in self._value_indexes:
+                    self._value_indexes[column] = ValueIndex(df[column])
+        return self._value_indexes[column]
+
+    def year_index(self, df: pd.DataFrame, column: str) -> ValueIndex:
+        """Value index of the year of a date column, built on first use."""
+        key = f'{column}:year'
+        if key not in self._value_indexes:
+            with self._lock:
+                if key not in self._value_indexes:
+                    self._value_indexes[key] = ValueIndex(df[column].dt.year.astype('Int64'))
+        return self._value_indexes[key]
+
+    def date_index(self, df: pd.DataFrame, column: str) -> DateIndex:
+        """Date index of ``column``, built on first use."""
+        if column not in self._date_indexes:
+            with self._lock:
+                if column not in self._date_indexes:
+                    self._date_indexes[column] = DateIndex(df[column])
+        return self._date_indexes[column]
+
+
+def dataset_index(df: pd.DataFrame, cache: Optional[CacheBackend] = None) -> DatasetIndex:
+    """
+    Shared indexes of a loaded dataset, kept per dataset version.
+
+    Args:
+        df (pd.DataFrame): Records. Derived frames get a fresh, unshared index.
+        cache (CacheBackend, optional): Cache for the indexes. Defaults to the process cache.
+
+    Returns:
+        DatasetIndex: Indexes for ``df``.
+    """
+    dataset = dataset_key(df)
+    if dataset is None:
+        return DatasetIndex()
+    return get_cache(cache).get_or_compute(('index', *dataset), DatasetIndex)
+
+
+class PlanStep:
+    """One filter of a compiled plan with its exact result size."""
+
+    def __init__(self, label: str, estimate: int) -> None:
+        self.label = label
+        self.estimate = estimate
+
+    def select(self) -> np.ndarray:
+        """Sorted row positions matching this step, read from its index."""
+        raise NotImplementedError
+
+    def keep(self, rows: np.ndarray) -> np.ndarray:
+        """Boolean mask of the candidate ``rows`` that match this step."""
+        raise NotImplementedError
+
+
+class ValueStep(PlanStep):
+    """Column value in (or not in) a set of codes."""
+
+    def __init__(self, label: str, index: ValueIndex, codes: np.ndarray, negate: bool = False) -> None:
+        matches = index.count(codes)
+        super().__init__(label, len(index) - matches if negate else matches)
+        self.index = index
+        self.codes = codes
+        self.negate = negate
+
+    def select(self) -> np.ndarray:
+        if not self.negate:
+            return self.index.rows(self.codes)
+        return np.flatnonzero(~self.index.member(self.codes)[self.index.codes + 1]).astype(np.int32, copy=False)
+
+    def keep(self, rows: np.ndarray) -> np.ndarray:
+        return self.index.member(self.codes)[self.index.codes[rows] + 1] != self.negate
+
+
+class RangeStep(PlanStep):
+    """Date between two bounds (inclusive); a plain row slice when the dataset is sorted by date."""
+
+    def __init__(self, label: str, index: DateIndex, start: np.datetime64, end: np.datetime64) -> None:
+        self.lo, self.hi = index.bounds(start, end)
+        super().__init__(label, max(self.hi - self.lo, 0))
+        self.index = index
+        self.start = start
+        self.end = end
+
+    def select(self) -> np.ndarray:
+        if self.index.contiguous:
+            return np.arange(self.lo, self.hi, dtype=np.int32)
+        return np.sort(self.index.order[self.lo:self.hi])
+
+    def keep(self, rows: np.ndarray) -> np.ndarray:
+        if self.index.contiguous:
+            return (rows >= self.lo) & (rows < self.hi)
+        values = self.index.values[rows]
+        return (values >= self.start) & (values <= self.end)
+
+
+class AnyStep(PlanStep):
+    """OR of several steps."""
+
+    def __init__(self, label: str, steps: List[PlanStep], n_rows: int) -> None:
+        super().__init__(label, min(sum(step.estimate for step in steps), n_rows))
+        self.steps = steps
+
+    def select(self) -> np.ndarray:
+        selected = [step.select() for step in self.steps if step.estimate]
+        if not selected:
+            return np.array([], dtype=np.int32)
+        return np.unique(np.concatenate(selected))
+
+    def keep(self, rows: np.ndarray) -> np.ndarray:
+        mask = np.zeros(len(rows), dtype=bool)
+        for step in self.steps:
+            mask |= step.keep(rows)
+        return mask
+
+
+class Condition:
+    """
+    Column value is one of ``values`` (or none of them when ``negate``).
+
+    Args:
+        column (str): Column name.
+        values (str or Iterable): Accepted value(s).
+        negate (bool, optional): Match rows whose value is not in ``values``
+                                 (including missing values). Defaults to False.
+    """
+
+    def __init__(self, column: str, values: Union[str, Iterable], negate: bool = False) -> None:
+        self.column = column
+        self.values = frozenset([values] if isinstance(values, str) else values)
+        self.negate = negate
+
+    def __invert__(self) -> 'Condition':
+        return type(self)(self.column, self.values, not self.negate)
+
+    def __repr__(self) -> str:
+        operator = 'not in' if self.negate else 'in'
+        return f"{self.column} {operator} {sorted(self.values, key=str)}"
+
+    def key(self) -> Tuple:
+        """Hashable, order-independent identity of the clause."""
+        return (type(self).__name__, self.column, self.negate, tuple(sorted(self.values, key=str)))
+
+    def step(self, df: pd.DataFrame, index: DatasetIndex) -> PlanStep:
+        """Plan step evaluating this clause on ``df``."""
+        value_index = index.value_index(df, self.column)
+        return ValueStep(repr(self), value_index, value_index.codes_for(self.values), self.negate)
+
+
+class Contains(Condition):
+    """
+    Column text contains any of ``values`` (case-insensitive, literal).
+
+    The texts are matched once per distinct value of the column, which
+    turns the clause into a value lookup.
+
+    Args:
+        column (str): Column name.
+        values (str or Iterable[str]): Substrings.
+        negate (bool, optional): Match rows containing none of the substrings. Defaults to False.
+    """
+
+    def __init__(self, column: str, values: Union[str, Iterable[str]], negate: bool = False) -> None:
+        values = [values] if isinstance(values, str) else values
+        super().__init__(column, [value.lower() for value in values], negate)
+
+    def __repr__(self) -> str:
+        operator = 'not contains' if self.negate else 'contains'
+        return f"{self.column} {operator} {sorted(self.values)}"
+
+    def step(self, df: pd.DataFrame, index: DatasetIndex) -> PlanStep:
+        value_index = index.value_index(df, self.column)
+        labels = pd.Series(value_index.labels, dtype=object).astype(str).str.lower()
+        matches = np.zeros(len(labels), dtype=bool)
+        for text in self.values:
+            matches |= labels.str.contains(text, regex=False).to_numpy()
+        return ValueStep(repr(self), value_index, np.flatnonzero(matches).astype(np.int32), self.negate)
+
+
+class FlagsClear(Condition):
+    """
+    Bitmask column has none of the bits in ``mask`` set.
+
+    The integer AND is evaluated once per distinct value of the column (a
+    handful of flag combinations), which turns the clause into a value lookup.
+
+    Args:
+        column (str): Integer bitmask column.
+        mask (int): Bits that must be clear.
+        negate (bool, optional): Match rows with any of the bits set. Defaults to False.
+    """
+
+    def __init__(self, column: str, mask: int, negate: bool = False) -> None:
+        super().__init__(column, [int(mask)], negate)
+        self.mask = int(mask)
+
+    def __invert__(self) -> 'FlagsClear':
+        return type(self)(self.column, self.mask, not self.negate)
+
+    def __repr__(self) -> str:
+        operator = '!=' if self.negate else '=='
+        return f"{self.column} & {self.mask} {operator} 0"
+
+    def step(self, df: pd.DataFrame, index: DatasetIndex) -> PlanStep:
+        value_index = index.value_index(df, self.column)
+        clear = (value_index.labels.astype(np.int64) & self.mask) == 0
+        return ValueStep(repr(self), value_index, np.flatnonzero(clear).astype(np.int32), self.negate)
+
+
+class DateRange:
+    """
+    Column value between ``start`` and ``end`` (inclusive).
+
+    Args:
+        column (str): Column of parsed dates.
+        start (datetime): First date.
+        end (datetime): Last date.
+    """
+
+    def __init__(self, column: str, start: datetime, end: datetime) -> None:
+        self.column = column
+        self.start = pd.Timestamp(start)
+        self.end = pd.Timestamp(end)
+
+    def __repr__(self) -> str:
+        return f"{self.column} between {self.start.isoformat()} and {self.end.isoformat()}"
+
+    def key(self) -> Tuple:
+        """Hashable identity of the clause."""
+        return (type(self).__name__, self.column, self.start.isoformat(), self.end.isoformat())
+
+    def step(self, df: pd.DataFrame, index: DatasetIndex) -> PlanStep:
+        """Plan step evaluating this clause on ``df``."""
+        date_index = index.date_index(df, self.column)
+        return RangeStep(repr(self), date_index, self.start.to_datetime64(), self.end.to_datetime64())
+
+
+class AnyOf:
+    """
+    Rows matching at least one of the given clauses.
+
+    Args:
+        *clauses: Condition, Contains or DateRange clauses.
+    """
+
+    def __init__(self, *clauses) -> None:
+        self.clauses = clauses
+
+    def __repr__(self) -> str:
+        return '(' + ' or '.join(repr(clause) for clause in self.clauses) + ')'
+
+    def key(self) -> Tuple:
+        """Hashable, order-independent identity of the clause."""
+        return (type(self).__name__, tuple(sorted(clause.key() for clause in self.clauses)))
+
+    def step(self, df: pd.DataFrame, index: DatasetIndex) -> PlanStep:
+        """Plan step evaluating this clause on ``df``."""
+        return AnyStep(repr(self), [clause.step(df, index) for clause in self.clauses], len(df))
+
+
+Clause = Union[Condition, DateRange, AnyOf]
+
+
+class QueryPlan:
+    """
+    Compiled AND of clauses, ordered most selective first.
+
+    Args:
+        n_rows (int): Rows in the dataset.
+        steps (List[PlanStep]): One step per clause.
+    """
+
+    def __init__(self, n_rows: int, steps: List[PlanStep]) -> None:
+        self.n_rows = n_rows
+        self.steps = sorted(steps, key=lambda step: step.estimate)
+
+    def explain(self) -> List[Tuple[str, int]]:
+        """(clause, rows it selects on its own) per step, in execution order."""
+        return [(step.label, step.estimate) for step in self.steps]
+
+    def execute(self) -> np.ndarray:
+        """
+        Run the plan.
+
+        Returns:
+            np.ndarray: Sorted row positions matching every clause.
+        """
+        if not self.steps:
+            return np.arange(self.n_rows)
+        if self.steps[0].estimate == 0:
+            return np.array([], dtype=np.int32)
+
+        rows = self.steps[0].select()
+        for step in self.steps[1:]:
+            if len(rows) == 0:
+                break
+            rows = rows[step.keep(rows)]
+        return rows
+
+
+def compile_query(
+    df: pd.DataFrame,
+    clauses: Sequence[Clause],
+    cache: Optional[CacheBackend] = None
+) -> QueryPlan:
+    """
+    Compile clauses (combined with AND) into a plan over the dataset's indexes.
+
+    Args:
+        df (pd.DataFrame): Records (a loaded dataset shares its indexes across calls).
+        clauses (Sequence[Clause]): Filters; empty selects every row.
+        cache (CacheBackend, optional): Cache for the indexes. Defaults to the process cache.
+
+    Returns:
+        QueryPlan: Plan whose ``execute`` returns the matching row positions.
+    """
+    index = dataset_index(df, cache)
+    return QueryPlan(len(df), [clause.step(df, index) for clause in clauses])
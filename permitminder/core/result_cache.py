@@ -0,0 +1,253 @@
+"""
+Filter result cache for the PermitMinder data layer.
+
+Streamlit reruns the whole page script on every widget interaction, so the
+same search is filtered again and again. Results are cached as arrays of
+row positions keyed by the dataset version and a normalized filter
+signature, so equivalent searches ("Allegheny" with "All Parameters" vs.
+no parameter, "  Acme " vs. "acme") share one entry. The cache is shared
+by every session and thread in the process and bounded by entry count and
+by the total size of the stored arrays.
+"""
+
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from permitminder.core.filtering import VALUE_FILTERS, Values, filter_row_ids, selected_values
+from permitminder.core.loading import dataset_key
+from permitminder.core.query import Clause
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+FILTER_NAMES = ('county', 'facility', 'parameter', 'start_date', 'end_date', 'severity', 'conditions')
+
+
+def normalize_filters(
+    county: Optional[Values] = None,
+    facility: Optional[Values] = None,
+    parameter: Optional[Values] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    severity: Optional[Values] = None,
+    conditions: Iterable[Clause] = ()
+) -> Dict[str, Any]:
+    """
+    Canonical form of a set of search filters.
+
+    "All ..." options and empty values are dropped, value lists are sorted
+    and deduplicated, facility texts are trimmed and lowercased (the match
+    is case-insensitive anyway), a date range only counts when both ends are
+    given and extra clauses are put in a fixed order. The normalized filters
+    are what gets applied, so equal signatures always mean equal results.
+
+    Args:
+        county (str or Sequence[str], optional): County name(s).
+        facility (str or Sequence[str], optional): Case-insensitive substring(s) of the facility name.
+        parameter (str or Sequence[str], optional): Parameter name(s).
+        start_date (datetime, optional): First date (inclusive).
+        end_date (datetime, optional): Last date (inclusive).
+        severity (str or Sequence[str], optional): Severity level(s).
+        conditions (Iterable[Clause], optional): Extra query clauses.
+
+    Returns:
+        Dict[str, Any]: Keyword filters for ``filter_row_ids`` (only the active ones).
+    """
+    filters: Dict[str, Any] = {}
+    for name, value in (('county', county), ('parameter', parameter), ('severity', severity)):
+        values = selected_values(value, VALUE_FILTERS[name][1])
+        if values:
+            filters[name] = values
+
+    texts = [facility] if isinstance(facility, str) else list(facility or [])
+    texts = selected_values([text.strip().lower() for text in texts])
+    if texts:
+        filters['facility'] = texts
+
+    if start_date and end_date:
+        filters['start_date'] = pd.Timestamp(start_date)
+        filters['end_date'] = pd.Timestamp(end_date)
+
+    clauses = sorted(conditions, key=lambda clause: clause.key())
+    if clauses:
+        filters['conditions'] = tuple(clauses)
+
+    return filters
+
+
+def filter_signature(**filters) -> Tuple:
+    """
+    Hashable signature of a set of search filters.
+
+    Args:
+        **filters: Keyword filters accepted by ``normalize_filters``.
+
+    Returns:
+        Tuple: Equal for searches that select the same rows.
+    """
+    return _signature(normalize_filters(**filters))
+
+
+def _signature(normalized: Dict[str, Any]) -> Tuple:
+    """Signature of already normalized filters."""
+    def part(value: Any) -> Hashable:
+        if isinstance(value, pd.Timestamp):
+            return value.isoformat()
+        if isinstance(value, tuple) and value and hasattr(value[0], 'key'):
+            return tuple(clause.key() for clause in value)
+        return value
+
+    return tuple(part(normalized.get(name)) for name in FILTER_NAMES)
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache of filter results (arrays of row positions).
+
+    Args:
+        max_entries (int, optional): Maximum number of cached results. Defaults to DEFAULT_MAX_ENTRIES.
+        max_bytes (int, optional): Maximum total size of the cached arrays. Defaults to DEFAULT_MAX_BYTES.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._rows: 'OrderedDict[Hashable, np.ndarray]' = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def get(self, key: Hashable) -> Optional[np.ndarray]:
+        """
+        Cached row positions for ``key``, marking the entry as recently used.
+
+        Args:
+            key (Hashable): Result key.
+
+        Returns:
+            np.ndarray: Read-only row positions, or None on a miss.
+        """
+        with self._lock:
+            rows = self._rows.get(key)
+            if rows is None:
+                self._misses += 1
+                return None
+            self._rows.move_to_end(key)
+            self._hits += 1
+            return rows
+
+    def set(self, key: Hashable, rows: np.ndarray) -> np.ndarray:
+        """
+        Store row positions, evicting least recently used entries to stay within the limits.
+
+        Args:
+            key (Hashable): Result key.
+            rows (np.ndarray): Row positions. The cache takes ownership of the array.
+
+        Returns:
+            np.ndarray: The stored (compacted, read-only) array. Results larger
+                        than ``max_bytes`` are returned without being stored.
+        """
+        rows = np.asarray(rows)
+        if len(rows) == 0 or rows.max() <= np.iinfo(np.int32).max:
+            rows = rows.astype(np.int32, copy=False)
+        rows.flags.writeable = False
+        if rows.nbytes > self.max_bytes:
+            return rows
+
+        with self._lock:
+            previous = self._rows.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.nbytes
+            self._rows[key] = rows
+            self._bytes += rows.nbytes
+            while len(self._rows) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._rows.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self._evictions += 1
+        return rows
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], np.ndarray]) -> np.ndarray:
+        """
+        Cached row positions for ``key``, computing and storing them on a miss.
+
+        Args:
+            key (Hashable): Result key.
+            compute (Callable): Zero-argument function returning row positions.
+
+        Returns:
+            np.ndarray: Read-only row positions.
+        """
+        rows = self.get(key)
+        if rows is None:
+            rows = self.set(key, compute())
+        return rows
+
+    def clear(self) -> None:
+        """Drop every cached result (the counters are kept)."""
+        with self._lock:
+            self._rows.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Cache counters.
+
+        Returns:
+            Dict[str, int]: hits, misses, evictions, entries and bytes.
+        """
+        with self._lock:
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+                'entries': len(self._rows),
+                'bytes': self._bytes,
+            }
+
+
+_default_result_cache = ResultCache()
+
+
+def get_result_cache(cache: Optional[ResultCache] = None) -> ResultCache:
+    """Return ``cache`` or the process-wide result cache."""
+    return cache if cache is not None else _default_result_cache
+
+
+def cached_filter_row_ids(
+    df: pd.DataFrame,
+    cache: Optional[ResultCache] = None,
+    dataset: Optional[Hashable] = None,
+    **filters
+) -> np.ndarray:
+    """
+    Positions of records matching the filters, cached per dataset version and filter signature.
+
+    Args:
+        df (pd.DataFrame): Prepared records from ``load_exceedances``.
+        cache (ResultCache, optional): Result cache. Defaults to the process-wide cache.
+        dataset (Hashable, optional): Identity of ``df`` for the cache key.
+                                      Defaults to ``dataset_key(df)``; results
+                                      for other frames are not cached.
+        **filters: Keyword filters accepted by ``normalize_filters``.
+
+    Returns:
+        np.ndarray: Sorted row positions into ``df`` (read-only when cached).
+    """
+    normalized = normalize_filters(**filters)
+    dataset = dataset if dataset is not None else dataset_key(df)
+    if dataset is None:
+        return filter_row_ids(df, **normalized)
+
+    key = (dataset, _signature(normalized))
+    return get_result_cache(cache).get_or_compute(key, lambda: filter_row_ids(df, **normalized))
@@ -0,0 +1,156 @@
+"""
+Exceedance record schema for the PermitMinder data layer.
+
+Column naming, required columns, date parsing and the severity
+classification shared by the app, batch jobs and the API.
+"""
+
+import hashlib
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from permitminder.core.backends import Reporter, get_reporter
+
+# Columns that should always be present after loading
+CRITICAL_COLUMNS = [
+    'PERMIT_NUMBER',
+    'PF_NAME',
+    'COUNTY_NAME',
+    'PARAMETER',
+    'NON_COMPLIANCE_DATE'
+]
+
+DATE_COLUMNS = ['NON_COMPLIANCE_DATE', 'MONITORING_PERIOD_END_DATE']
+
+SEVERITY_LEVELS = ['Critical', 'High', 'Moderate', 'Low']
+
+# Columns identifying one exceedance across daily extracts
+RECORD_KEY_COLUMNS = ['PERMIT_NUMBER', 'PARAMETER', 'NON_COMPLIANCE_DATE', 'SAMPLE_VALUE']
+
+
+def standardize_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Uppercase column names and replace spaces with underscores, in place.
+
+    Args:
+        df (pd.DataFrame): Raw exceedance records.
+
+    Returns:
+        pd.DataFrame: The same DataFrame, for chaining.
+    """
+    df.columns = [col.upper().replace(' ', '_') for col in df.columns]
+    return df
+
+
+def ensure_columns(df: pd.DataFrame, reporter: Optional[Reporter] = None) -> None:
+    """
+    Ensure critical columns exist in the DataFrame.
+
+    Args:
+        df (pd.DataFrame): Input DataFrame to check and potentially modify.
+        reporter (Reporter, optional): Receives a warning per added column.
+    """
+    reporter = get_reporter(reporter)
+    for col in CRITICAL_COLUMNS:
+        if col not in df.columns:
+            reporter.warning(f"Column {col} not found. Adding with default values.")
+            if 'DATE' in col:
+                df[col] = pd.NaT
+            else:
+                df[col] = 'Unknown'
+
+
+def parse_dates(df: pd.DataFrame, columns: List[str] = DATE_COLUMNS) -> None:
+    """
+    Parse date columns in place; unparseable values become NaT.
+
+    Args:
+        df (pd.DataFrame): Exceedance records.
+        columns (List[str], optional): Columns to parse. Defaults to DATE_COLUMNS.
+    """
+    for col in columns:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+
+
+def parse_percent(column: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Read a percent-over-limit column as numbers.
+
+    Args:
+        column (pd.Series): Numbers, or strings such as "150%".
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Float values (NaN where missing or
+                                       unreadable) and a mask of the values
+                                       that were present but unreadable.
+    """
+    unreadable = np.zeros(len(column), dtype=bool)
+
+    if column.dtype == object:
+        values = column.to_numpy()
+        is_text = np.array([isinstance(value, str) for value in values], dtype=bool)
+        percent = pd.to_numeric(column.where(~is_text), errors='coerce').to_numpy(dtype=float)
+        percent[is_text] = pd.to_numeric(column[is_text].str.rstrip('%'), errors='coerce').to_numpy(dtype=float)
+        unreadable = (is_text & np.isnan(percent)) | np.equal(values, None)
+    else:
+        percent = pd.to_numeric(column, errors='coerce').to_numpy(dtype=float)
+
+    return percent, unreadable
+
+
+def calculate_severity(df: pd.DataFrame) -> pd.Series:
+    """
+    Calculate severity based on percentage over limit.
+
+    Over 200% is Critical, over 100% High, over 50% Moderate and anything
+    else Low. Rows whose value cannot be read (and every row when the
+    PERCENT_OVER_LIMIT column is missing) are Moderate. String values such
+    as "150%" are accepted.
+
+    Args:
+        df (pd.DataFrame): Exceedance records with standardized column names.
+
+    Returns:
+        pd.Series: Severity per row, aligned with ``df``.
+    """
+    if 'PERCENT_OVER_LIMIT' not in df.columns:
+        return pd.Series('Moderate', index=df.index, dtype=object)
+
+    percent, unreadable = parse_percent(df['PERCENT_OVER_LIMIT'])
+
+    severity = np.select(
+        [percent > 200, percent > 100, percent > 50],
+        ['Critical', 'High', 'Moderate'],
+        default='Low'
+    ).astype(object)
+    severity[unreadable] = 'Moderate'
+    return pd.Series(severity, index=df.index)
+
+
+def record_keys(df: pd.DataFrame, columns: List[str] = RECORD_KEY_COLUMNS) -> pd.Series:
+    """
+    Stable identity hash per record, used to diff daily extracts.
+
+    Matches hashing ``'|'.join(str(value) for value in key columns)`` row by
+    row; missing columns contribute an empty string.
+
+    Args:
+        df (pd.DataFrame): Exceedance records (raw column names).
+        columns (List[str], optional): Key columns. Defaults to RECORD_KEY_COLUMNS.
+
+    Returns:
+        pd.Series: MD5 hex digest per row, aligned with ``df``.
+    """
+    if df.empty:
+        return pd.Series([], index=df.index, dtype=object)
+
+    parts = [
+        df[col].astype(str) if col in df.columns else pd.Series('', index=df.index)
+        for col in columns
+    ]
+    joined = parts[0].str.cat(parts[1:], sep='|')
+    digests = [hashlib.md5(key.encode()).hexdigest() for key in joined]
+    return pd.Series(digests, index=df.index, dtype=object)
@@ -0,0 +1,39 @@
+"""
+Text normalization for name matching in the PermitMinder data layer.
+
+Facility names and permit numbers are compared after uppercasing and
+collapsing punctuation, and fuzzy comparisons use padded character
+trigrams. Shared by entity resolution and the facility typeahead search.
+"""
+
+import re
+from typing import List
+
+_NON_ALNUM = re.compile(r'[^0-9A-Z]+')
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize text for matching: uppercase, punctuation collapsed to spaces.
+
+    Args:
+        text (str): Raw facility name, permit number or query.
+
+    Returns:
+        str: Normalized text.
+    """
+    return _NON_ALNUM.sub(' ', str(text).upper()).strip()
+
+
+def trigrams(text: str) -> List[str]:
+    """
+    Distinct character trigrams of a normalized string, padded at word edges.
+
+    Args:
+        text (str): Normalized text.
+
+    Returns:
+        List[str]: Trigrams of the text.
+    """
+    padded = f"  {text} "
+    return list({padded[i:i + 3] for i in range(len(padded) - 2)})
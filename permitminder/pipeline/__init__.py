@@ -0,0 +1,28 @@
+"""
+Job orchestration for the PermitMinder nightly pipeline.
+
+Runs the daily monitoring steps (scrape, then detect and alert alongside
+the facility directory and similarity index rebuilds) as a DAG with
+persisted step state, so a failed run resumes from the failed step instead
+of starting over, and runs row-wise ingest steps over county or permit
+partitions in parallel processes.
+"""
+
+from permitminder.pipeline.dag import (
+    BLOCKED,
+    DEFAULT_STATE_DIR,
+    DONE,
+    FAILED,
+    PENDING,
+    RUNNING,
+    Pipeline,
+    RunState,
+    Step,
+)
+from permitminder.pipeline.partitioned import COUNTY, PERMIT, default_workers, map_partitions, partition_rows
+
+__all__ = [
+    'BLOCKED', 'DEFAULT_STATE_DIR', 'DONE', 'FAILED', 'PENDING', 'RUNNING',
+    'Pipeline', 'RunState', 'Step',
+    'COUNTY', 'PERMIT', 'default_workers', 'map_partitions', 'partition_rows',
+]
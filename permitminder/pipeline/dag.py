@@ -0,0 +1,326 @@
+"""
+Local DAG runner for the nightly monitoring jobs.
+
+A ``Pipeline`` is a set of named ``Step`` functions with dependencies. Each
+run has an id (the nightly jobs use the date), and the state of every step
+(status, output, attempts, timing) is persisted to a JSON file after each
+change. Running the same id again resumes the run: steps that already
+finished are skipped and their saved outputs are handed to downstream
+steps. A failed step is retried with backoff and then marks its downstream
+steps as blocked. Independent steps keep running in parallel.
+
+Steps must be idempotent: a step that crashed mid-way is run again from the
+start on the next attempt.
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from permitminder.core.backends import Reporter, get_reporter
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+BLOCKED = 'blocked'
+
+DEFAULT_STATE_DIR = os.path.join('data', 'pipeline_runs')
+DEFAULT_MAX_WORKERS = 4
+
+# A step receives the outputs of the steps it requires, by step name
+StepFunction = Callable[[Dict[str, Any]], Any]
+
+
+class Step:
+    """
+    One unit of work in a pipeline.
+
+    Args:
+        name (str): Unique step name.
+        func (StepFunction): Called with ``{required step: its output}``. The
+                             return value is saved as the step's output and
+                             must be JSON-serializable.
+        requires (Iterable[str], optional): Steps that must finish first.
+        retries (int, optional): Extra attempts after a failure. Defaults to 0.
+        retry_delay (float, optional): Seconds before the first retry, doubled
+                                       for each further retry. Defaults to 5.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: StepFunction,
+        requires: Iterable[str] = (),
+        retries: int = 0,
+        retry_delay: float = 5.0
+    ) -> None:
+        self.name = name
+        self.func = func
+        self.requires = list(requires)
+        self.retries = retries
+        self.retry_delay = retry_delay
+
+    def __repr__(self) -> str:
+        return f"Step({self.name!r}, requires={self.requires!r})"
+
+
+class RunState:
+    """
+    Persisted state of one pipeline run.
+
+    Args:
+        path (str): JSON file holding the state.
+        run_id (str): Run identifier.
+        steps (Iterable[str]): Step names in the pipeline.
+    """
+
+    def __init__(self, path: str, run_id: str, steps: Iterable[str]) -> None:
+        self.path = path
+        self.run_id = run_id
+        self._lock = threading.Lock()
+        self.steps: Dict[str, Dict[str, Any]] = {}
+
+        saved: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                saved = json.load(f).get('steps', {})
+        for name in steps:
+            record = saved.get(name, {})
+            # A step left running by a crashed process starts over
+            if record.get('status') != DONE:
+                record = {**record, 'status': PENDING, 'error': record.get('error')}
+            record.setdefault('attempts', 0)
+            self.steps[name] = record
+
+    def status(self, name: str) -> str:
+        """Current status of a step."""
+        return self.steps[name]['status']
+
+    def output(self, name: str) -> Any:
+        """Saved output of a finished step."""
+        return self.steps[name].get('output')
+
+    def update(self, name: str, **fields: Any) -> None:
+        """
+        Change a step's record and save the state.
+
+        Args:
+            name (str): Step name.
+            **fields: Record fields to set.
+        """
+        with self._lock:
+            self.steps[name].update(fields)
+            self._save()
+
+    def _save(self) -> None:
+        """Write the state atomically (a crash never leaves a partial file)."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'run_id': self.run_id, 'steps': self.steps}, f, indent=2, default=str)
+        os.replace(tmp_path, self.path)
+
+    @property
+    def succeeded(self) -> bool:
+        """Whether every step finished."""
+        return all(record['status'] == DONE for record in self.steps.values())
+
+    def metrics(self) -> List[Dict[str, Any]]:
+        """
+        Per-step status and timing.
+
+        Returns:
+            List[Dict[str, Any]]: One dict per step with step, status, attempts,
+                                  seconds, started_at and error.
+        """
+        return [
+            {
+                'step': name,
+                'status': record['status'],
+                'attempts': record.get('attempts', 0),
+                'seconds': record.get('seconds'),
+                'started_at': record.get('started_at'),
+                'error': record.get('error'),
+            }
+            for name, record in self.steps.items()
+        ]
+
+    def summary(self) -> str:
+        """Printable table of per-step status and timing."""
+        lines = [f"Run {self.run_id}:"]
+        for row in self.metrics():
+            seconds = f"{row['seconds']:.1f}s" if row['seconds'] is not None else '-'
+            line = f"  {row['step']:<24} {row['status']:<8} {seconds:>9}  attempts={row['attempts']}"
+            if row['status'] in (FAILED, BLOCKED) and row['error']:
+                line += f"  ({row['error']})"
+            lines.append(line)
+        return '\n'.join(lines)
+
+
+class Pipeline:
+    """
+    Steps with dependencies, run in dependency order.
+
+    Args:
+        steps (Iterable[Step]): The steps.
+        name (str, optional): Pipeline name (prefix of state files). Defaults to 'pipeline'.
+        state_dir (str, optional): Directory for run state. Defaults to DEFAULT_STATE_DIR.
+        reporter (Reporter, optional): Receives progress messages. Defaults to the core reporter.
+
+    Raises:
+        ValueError: On duplicate step names, unknown dependencies or cycles.
+    """
+
+    def __init__(
+        self,
+        steps: Iterable[Step],
+        name: str = 'pipeline',
+        state_dir: str = DEFAULT_STATE_DIR,
+        reporter: Optional[Reporter] = None
+    ) -> None:
+        self.name = name
+        self.state_dir = state_dir
+        self.reporter = get_reporter(reporter)
+        self.steps: Dict[str, Step] = {}
+        for step in steps:
+            if step.name in self.steps:
+                raise ValueError(f"Duplicate step name: {step.name}")
+            self.steps[step.name] = step
+
+        for step in self.steps.values():
+            unknown = [dep for dep in step.requires if dep not in self.steps]
+            if unknown:
+                raise ValueError(f"Step {step.name} requires unknown steps: {', '.join(unknown)}")
+        self.order = self._topological_order()
+
+    def _topological_order(self) -> List[str]:
+        """Step names with every step after its dependencies."""
+        remaining = {name: set(step.requires) for name, step in self.steps.items()}
+        order: List[str] = []
+        while remaining:
+            ready = [name for name, deps in remaining.items() if not deps]
+            if not ready:
+                raise ValueError(f"Dependency cycle among steps: {', '.join(sorted(remaining))}")
+            for name in ready:
+                del remaining[name]
+                order.append(name)
+            for deps in remaining.values():
+                deps.difference_update(ready)
+        return order
+
+    def downstream(self, names: Iterable[str]) -> Set[str]:
+        """
+        Steps that depend on any of ``names``, directly or indirectly.
+
+        Args:
+            names (Iterable[str]): Step names.
+
+        Returns:
+            Set[str]: The dependent step names (not including ``names``).
+        """
+        found: Set[str] = set()
+        frontier = set(names)
+        while frontier:
+            frontier = {
+                name for name, step in self.steps.items()
+                if name not in found and frontier.intersection(step.requires)
+            }
+            found |= frontier
+        return found
+
+    def state_path(self, run_id: str) -> str:
+        """State file of a run."""
+        return os.path.join(self.state_dir, f"{self.name}_{run_id}.json")
+
+    def _run_step(self, step: Step, state: RunState) -> Any:
+        """Run one step with retries, recording attempts and timing."""
+        inputs = {dep: state.output(dep) for dep in step.requires}
+        attempt = 0
+        while True:
+            attempt += 1
+            started = time.perf_counter()
+            state.update(
+                step.name, status=RUNNING, attempts=state.steps[step.name]['attempts'] + 1,
+                started_at=datetime.now().isoformat(timespec='seconds'), error=None
+            )
+            try:
+                output = step.func(inputs)
+            except Exception as e:
+                seconds = time.perf_counter() - started
+                if attempt > step.retries:
+                    state.update(step.name, status=FAILED, seconds=seconds, error=f"{type(e).__name__}: {e}")
+                    raise
+                delay = step.retry_delay * 2 ** (attempt - 1)
+                self.reporter.warning(f"Step {step.name} failed ({e}); retrying in {delay:.0f}s")
+                state.update(step.name, status=PENDING, seconds=seconds, error=f"{type(e).__name__}: {e}")
+                time.sleep(delay)
+                continue
+            state.update(step.name, status=DONE, output=output, seconds=time.perf_counter() - started,
+                         finished_at=datetime.now().isoformat(timespec='seconds'))
+            return output
+
+    def run(
+        self,
+        run_id: Optional[str] = None,
+        rerun: Iterable[str] = (),
+        max_workers: int = DEFAULT_MAX_WORKERS
+    ) -> RunState:
+        """
+        Run (or resume) the pipeline.
+
+        Steps already finished in an earlier attempt of the same run are
+        skipped, unless they are listed in ``rerun`` or depend on a step that is.
+
+        Args:
+            run_id (str, optional): Run identifier. Defaults to today's date.
+            rerun (Iterable[str], optional): Finished steps to run again.
+            max_workers (int, optional): Steps run at the same time. Defaults to DEFAULT_MAX_WORKERS.
+
+        Returns:
+            RunState: Final state; check ``succeeded``.
+
+        Raises:
+            ValueError: If ``rerun`` names an unknown step.
+        """
+        run_id = run_id or datetime.now().strftime('%Y-%m-%d')
+        rerun = set(rerun)
+        unknown = rerun.difference(self.steps)
+        if unknown:
+            raise ValueError(f"Unknown steps: {', '.join(sorted(unknown))}")
+
+        state = RunState(self.state_path(run_id), run_id, self.order)
+        for name in rerun | self.downstream(rerun):
+            state.update(name, status=PENDING)
+        skipped = [name for name in self.order if state.status(name) == DONE]
+        if skipped:
+            self.reporter.info(f"Resuming run {run_id}; already done: {', '.join(skipped)}")
+
+        running: Dict[Future, str] = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while True:
+                for name in self.order:
+                    step = self.steps[name]
+                    if (state.status(name) == PENDING and name not in running.values()
+                            and all(state.status(dep) == DONE for dep in step.requires)):
+                        running[executor.submit(self._run_step, step, state)] = name
+                if not running:
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    error = future.exception()
+                    if error is None:
+                        continue
+                    self.reporter.error(f"Step {name} failed: {error}")
+                    for blocked in self.downstream([name]):
+                        state.update(blocked, status=BLOCKED, error=f"requires {name}")
+
+        return state
@@ -0,0 +1,158 @@
+"""
+Partitioned, multi-process execution of row-wise ingest steps.
+
+The raw extract is split into partitions (by county, or by a hash of the
+permit number), each partition is processed in a ``ProcessPoolExecutor``
+worker, and the results are merged back into the original row order, so
+the output does not depend on the worker count or on which worker
+finished first. Partitions are handed to and from workers as Arrow IPC
+buffers, which serialize much faster than pickled object columns; frames
+Arrow cannot represent (mixed-type object columns) fall back to pickle.
+
+Only steps whose output for a row depends on that row alone (or, with
+permit partitioning, on that row's permit) can be run this way.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+COUNTY = 'county'
+PERMIT = 'permit'
+PARTITION_MODES = [COUNTY, PERMIT]
+
+# Partitions per worker, so uneven partitions still keep every worker busy
+PARTITIONS_PER_WORKER = 4
+
+# A frame on its way to or from a worker: Arrow IPC bytes, or the frame itself
+Payload = Union[bytes, pd.DataFrame]
+
+
+def default_workers() -> int:
+    """Worker count when none is given: the PERMITMINDER_WORKERS variable, else the CPU count."""
+    configured = os.environ.get('PERMITMINDER_WORKERS')
+    if configured:
+        return max(1, int(configured))
+    return os.cpu_count() or 1
+
+
+def partition_rows(df: pd.DataFrame, by: str = COUNTY, n_partitions: int = 16) -> List[np.ndarray]:
+    """
+    Split row positions into partitions.
+
+    County partitions keep each county whole and are packed into
+    ``n_partitions`` bins of similar size (largest county first). Permit
+    partitions keep each permit whole and assign it by a stable hash of the
+    permit number. Both are deterministic for a given input.
+
+    Args:
+        df (pd.DataFrame): Raw records.
+        by (str, optional): COUNTY or PERMIT. Defaults to COUNTY.
+        n_partitions (int, optional): Number of partitions. Defaults to 16.
+
+    Returns:
+        List[np.ndarray]: Ascending row positions per non-empty partition.
+
+    Raises:
+        ValueError: If ``by`` is not a partition mode.
+    """
+    if by not in PARTITION_MODES:
+        raise ValueError(f"Unknown partition mode '{by}'. Choose from: {', '.join(PARTITION_MODES)}")
+    n_partitions = max(1, min(n_partitions, len(df)))
+
+    if by == PERMIT:
+        permits = df['PERMIT_NUMBER'].astype(str)
+        bins = pd.util.hash_pandas_object(permits, index=False).to_numpy() % np.uint64(n_partitions)
+        bins = bins.astype(np.int64)
+    else:
+        counties = df['COUNTY_NAME'].astype(str).to_numpy()
+        names, codes, sizes = np.unique(counties, return_inverse=True, return_counts=True)
+        # Longest-processing-time packing: biggest county into the lightest bin
+        load = np.zeros(n_partitions, dtype=np.int64)
+        county_bin = np.empty(len(names), dtype=np.int64)
+        for county in np.argsort(-sizes, kind='stable'):
+            target = int(np.argmin(load))
+            county_bin[county] = target
+            load[target] += sizes[county]
+        bins = county_bin[codes]
+
+    order = np.argsort(bins, kind='stable')
+    boundaries = np.flatnonzero(np.diff(bins[order])) + 1
+    return [part for part in np.split(order, boundaries) if len(part)]
+
+
+def _pack(df: pd.DataFrame) -> Payload:
+    """Frame as Arrow IPC bytes, or the frame itself if Arrow cannot represent it."""
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+    except pa.ArrowException:
+        return df
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _unpack(payload: Payload) -> pd.DataFrame:
+    """Inverse of ``_pack``."""
+    if isinstance(payload, pd.DataFrame):
+        return payload
+    return pa.ipc.open_stream(payload).read_all().to_pandas()
+
+
+def _run_partition(func: Callable[[pd.DataFrame], pd.DataFrame], payload: Payload) -> Payload:
+    """Worker entry point: unpack a partition, process it, pack the result."""
+    return _pack(func(_unpack(payload)))
+
+
+def map_partitions(
+    df: pd.DataFrame,
+    func: Callable[[pd.DataFrame], pd.DataFrame],
+    by: str = COUNTY,
+    workers: Optional[int] = None,
+    n_partitions: Optional[int] = None
+) -> pd.DataFrame:
+    """
+    Apply a row-wise step to partitions of ``df`` in parallel processes.
+
+    With one worker (or a single partition) ``func`` runs in this process
+    on the whole frame.
+
+    Args:
+        df (pd.DataFrame): Raw records.
+        func (Callable): Module-level function (or ``functools.partial`` of
+                         one) taking and returning a frame with the same rows.
+        by (str, optional): COUNTY or PERMIT. Defaults to COUNTY.
+        workers (int, optional): Worker processes. Defaults to ``default_workers()``.
+        n_partitions (int, optional): Partitions. Defaults to PARTITIONS_PER_WORKER per worker.
+
+    Returns:
+        pd.DataFrame: ``func``'s output for every row, in the original row
+                      order and with the original index.
+
+    Raises:
+        ValueError: If ``func`` returns a different number of rows for a partition.
+    """
+    workers = workers or default_workers()
+    partitions = partition_rows(df, by, n_partitions or workers * PARTITIONS_PER_WORKER) if len(df) else []
+    if workers <= 1 or len(partitions) <= 1:
+        return func(df)
+
+    payloads = [_pack(df.iloc[rows].reset_index(drop=True)) for rows in partitions]
+    with ProcessPoolExecutor(max_workers=min(workers, len(partitions))) as executor:
+        results = [_unpack(result) for result in executor.map(_run_partition, [func] * len(payloads), payloads)]
+
+    for rows, result in zip(partitions, results):
+        if len(result) != len(rows):
+            raise ValueError(f"Partition step returned {len(result)} rows for {len(rows)} input rows")
+
+    # Concatenate in partition order, then put every row back where it came from
+    merged = pd.concat(results, ignore_index=True)
+    positions = np.concatenate(partitions)
+    merged = merged.iloc[np.argsort(positions, kind='stable')]
+    merged.index = df.index
+    return merged
@@ -0,0 +1,30 @@
+"""
+Shared fixtures for the PermitMinder test suite.
+
+Tests run on small synthetic eDMR extracts (``utils.synthetic_data``), so
+they need no data files.
+"""
+
+import os
+import sys
+
+import pytest
+
+# Add the project root directory to the Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from permitminder.core.loading import prepare_exceedances
+from utils.synthetic_data import generate_exceedances
+
+
+@pytest.fixture(scope='session')
+def raw_records():
+    """Raw eDMR extract (no launch-ready columns). Tests must copy before modifying."""
+    return generate_exceedances(4000, seed=7, launch_ready=False)
+
+
+@pytest.fixture(scope='session')
+def prepared_records():
+    """Launch-ready extract prepared for querying. Tests must not modify it."""
+    return prepare_exceedances(generate_exceedances(6000, seed=11, launch_ready=True))
@@ -0,0 +1,82 @@
+"""
+Tests for rendering alert emails from cached per-permit sections.
+"""
+
+import pandas as pd
+import pytest
+
+from utils.alert_rendering import AlertRenderer
+
+
+def exceedances(*rows):
+    """Exceedance records from (permit, facility, severity, hash) tuples."""
+    return pd.DataFrame([
+        {'PERMIT_NUMBER': permit, 'PF_NAME': facility, 'COUNTY_NAME': 'Erie',
+         'NON_COMPLIANCE_DATE': '2024-05-01', 'PARAMETER': 'Zinc', 'SAMPLE_VALUE': 2.5, 'PERMIT_VALUE': 1.0,
+         'UNIT_OF_MEASURE': 'mg/L', 'Percent_Over_Limit': 150.0, 'Severity': severity, 'exceedance_hash': key}
+        for permit, facility, severity, key in rows
+    ])
+
+
+def test_render_subject_and_bodies():
+    records = exceedances(('PA0002', 'Beta Plant', 'Low', 'b1'), ('PA0001', 'Alpha & Sons', 'Critical', 'a1'),
+                          ('PA0001', 'Alpha & Sons', 'High', 'a2'))
+
+    rendered = AlertRenderer().render('user@example.com', records)
+
+    assert rendered.subject == 'PermitMinder alert: 3 new exceedances at 2 facilities'
+    assert 'Alpha &amp; Sons' in rendered.html
+    assert 'Alpha & Sons' in rendered.text
+    assert '2024-05-01  Zinc: 2.5 mg/L (limit 1.0, 150.0 over) [Critical]' in rendered.text
+    # Sections are in permit order
+    assert rendered.text.index('Alpha') < rendered.text.index('Beta Plant')
+    assert 'user@example.com subscribed' in rendered.text
+
+
+def test_summary_lists_severities_in_order():
+    records = exceedances(('PA0001', 'Alpha', 'Low', 'a1'), ('PA0001', 'Alpha', 'Critical', 'a2'),
+                          ('PA0001', 'Alpha', None, 'a3'))
+    renderer = AlertRenderer()
+
+    text = renderer.render('user@example.com', records).text
+    assert 'Summary:\n  Critical: 1\n  Low: 1\n  Unknown: 1\n' in text
+    assert 'Summary:' not in renderer.render('user@example.com', records, include_summary=False).text
+
+
+def test_sections_are_shared_between_subscribers():
+    renderer = AlertRenderer()
+    alpha = exceedances(('PA0001', 'Alpha', 'High', 'a1'))
+    beta = exceedances(('PA0002', 'Beta', 'High', 'b1'))
+
+    renderer.render('one@example.com', pd.concat([alpha, beta], ignore_index=True))
+    second = renderer.render('two@example.com', alpha)
+    assert renderer.stats() == {'rendered': 2, 'reused': 1, 'cached': 2}
+    assert 'one@example.com' not in second.html
+
+    # New rows for the permit are a different section
+    renderer.render('two@example.com', exceedances(('PA0001', 'Alpha', 'High', 'a9')))
+    assert renderer.stats()['rendered'] == 3
+
+
+def test_cache_is_bounded():
+    renderer = AlertRenderer(max_sections=2)
+    for key in ['a1', 'a2', 'a3']:
+        renderer.render('user@example.com', exceedances(('PA0001', 'Alpha', 'High', key)))
+    assert len(renderer) == 2
+
+
+def test_render_requires_exceedance_hash():
+    records = exceedances(('PA0001', 'Alpha', 'High', 'a1')).drop(columns='exceedance_hash')
+
+    with pytest.raises(ValueError):
+        AlertRenderer().render('user@example.com', records)
+
+
+def test_missing_values_render_as_na():
+    records = exceedances(('PA0001', None, 'High', 'a1'))
+    records['SAMPLE_VALUE'] = None
+    records['COUNTY_NAME'] = None
+
+    text = AlertRenderer().render('user@example.com', records).text
+    assert 'PA0001\nPermit PA0001 - Unknown County - 1 exceedance\n' in text
+    assert 'Zinc: N/A mg/L' in text
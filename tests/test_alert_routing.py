@@ -0,0 +1,105 @@
+"""
+Tests for routing new exceedances to subscriptions and building CSV attachments.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.alert_routing import ATTACHMENT_COLUMNS, CsvAttachments, RoutingColumns, route_exceedances, rule_key
+
+
+def exceedances():
+    return pd.DataFrame({
+        'PERMIT_NUMBER': ['PA0001', 'PA0001', 'PA0001', 'PA0002', 'PA0003'],
+        'PF_NAME': ['Alpha', 'Alpha', 'Alpha', 'Beta', 'Gamma'],
+        'PARAMETER': ['Zinc', 'Copper', 'Zinc', 'Zinc', 'Lead'],
+        'Percent_Over_Limit': ['250%', '30%', '80%', '600%', None],
+        'exceedance_hash': ['a1', 'a2', 'a3', 'b1', 'c1'],
+    })
+
+
+def subscriptions(*rows):
+    """Active subscriptions from (subscription_id, permit, severities, parameters, min_percent)."""
+    return pd.DataFrame(rows, columns=['subscription_id', 'permit_number', 'severities', 'parameters', 'min_percent'])
+
+
+def deliveries(routed):
+    return sorted(zip(routed['subscription_id'].tolist(), routed['row'].tolist()))
+
+
+def test_rule_key_normalizes_missing_options():
+    assert rule_key(None, None, None) == (frozenset(), frozenset(), None)
+    assert rule_key('', None, float('nan')) == (frozenset(), frozenset(), None)
+    assert rule_key('High|Critical', 'Zinc', 50) == (frozenset({'High', 'Critical'}), frozenset({'Zinc'}), 50.0)
+    assert rule_key('Critical|High', None, None) == rule_key('High|Critical', None, None)
+
+
+def test_routing_columns_mask():
+    columns = RoutingColumns(exceedances())
+
+    assert columns.mask(None, rule_key(None, None, None)).all()
+    assert columns.mask(None, rule_key(None, 'Zinc', None)).tolist() == [True, False, True, True, False]
+    # The unreadable percent fails any minimum
+    assert columns.mask(None, rule_key(None, None, 80)).tolist() == [True, False, True, True, False]
+    assert columns.mask(np.array([0, 1]), rule_key(None, None, 100)).tolist() == [True, False]
+
+
+def test_routing_columns_derive_severity():
+    columns = RoutingColumns(exceedances())
+    # 250% and 600% are Critical; the unreadable percent counts as Moderate
+    assert columns.mask(None, rule_key('Critical', None, None)).tolist() == [True, False, False, True, False]
+    assert columns.mask(None, rule_key('Moderate|Low', None, None)).tolist() == [False, True, True, False, True]
+
+
+def test_route_exceedances_applies_each_subscriptions_options():
+    routed = route_exceedances(exceedances(), subscriptions(
+        (1, 'PA0001', None, None, None),
+        (2, 'PA0001', None, 'Zinc', 100.0),
+        (3, 'PA0002', None, None, None),
+        (4, 'PA0009', None, None, None),
+    ))
+
+    assert deliveries(routed) == [(1, 0), (1, 1), (1, 2), (2, 0), (3, 3)]
+    assert routed['row'].dtype == np.int64
+
+
+def test_route_exceedances_shares_options_across_subscribers():
+    routed = route_exceedances(exceedances(), subscriptions(
+        (1, 'PA0001', None, 'Zinc', None),
+        (2, 'PA0001', None, 'Zinc', None),
+    ))
+
+    assert deliveries(routed) == [(1, 0), (1, 2), (2, 0), (2, 2)]
+
+
+def test_route_exceedances_empty_inputs():
+    empty_subscriptions = subscriptions()
+
+    assert route_exceedances(exceedances(), empty_subscriptions).empty
+    assert route_exceedances(exceedances().iloc[:0], subscriptions((1, 'PA0001', None, None, None))).empty
+    assert route_exceedances(exceedances(), subscriptions((1, 'PA0009', None, None, None))).empty
+    assert route_exceedances(exceedances(), subscriptions((1, 'PA0003', None, None, 10.0))).empty
+
+
+def test_csv_attachments_reuse_permit_fragments():
+    attachments = CsvAttachments()
+    records = exceedances()
+
+    first = attachments.build(records.iloc[[0, 2, 3]])
+    second = attachments.build(records.iloc[[0, 2]])
+
+    lines = first.decode().splitlines()
+    assert lines[0] == ','.join(ATTACHMENT_COLUMNS)
+    assert len(lines) == 4
+    assert second.decode().splitlines()[1:] == lines[1:3]
+    assert len(attachments) == 2
+
+
+def test_csv_attachments_header_only_when_empty():
+    assert CsvAttachments(['PERMIT_NUMBER']).build(exceedances().iloc[:0]) == b'PERMIT_NUMBER\n'
+
+
+def test_csv_attachments_require_row_keys():
+    with pytest.raises(ValueError):
+        CsvAttachments().build(exceedances().drop(columns='exceedance_hash'))
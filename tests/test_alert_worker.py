@@ -0,0 +1,129 @@
+"""
+Tests for the alert worker: event log to digest queue to email.
+"""
+
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from utils.alert_worker import AlertWorker, Outbox
+from utils.digest_queue import DigestQueue, delivery_key
+from utils.event_log import EventLog
+
+NOW = datetime(2024, 5, 16, 8, 0)
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return DigestQueue(str(tmp_path / 'subscriptions.db'))
+
+
+@pytest.fixture
+def events(queue):
+    return EventLog(queue.path)
+
+
+def exceedances(*keys, permit='PA0001'):
+    return pd.DataFrame([
+        {'PERMIT_NUMBER': permit, 'PF_NAME': 'Alpha', 'COUNTY_NAME': 'Erie', 'NON_COMPLIANCE_DATE': '2024-05-01',
+         'PARAMETER': 'Zinc', 'Percent_Over_Limit': 150.0, 'Severity': 'High', 'exceedance_hash': key}
+        for key in keys
+    ])
+
+
+class FlakySender:
+    """Fails the first ``failures`` sends, then delivers; records every attempt."""
+
+    def __init__(self, failures: int = 0) -> None:
+        self.failures = failures
+        self.attempts = []
+
+    def __call__(self, email, exceedances, attachment=None, idempotency_key='', include_summary=True):
+        self.attempts.append((email, list(exceedances['exceedance_hash']), idempotency_key))
+        if len(self.attempts) <= self.failures:
+            raise OSError('relay unavailable')
+        return True
+
+
+def test_immediate_alerts_are_sent_once(queue, events):
+    queue.add_subscription('a@example.com', ['PA0001'], 'Immediate (when violations occur)', include_csv=True)
+    queue.add_subscription('b@example.com', ['PA0002'], 'Immediate (when violations occur)')
+    outbox = Outbox()
+    worker = AlertWorker(outbox, queue=queue, events=events)
+
+    events.emit(exceedances('h1', 'h2'), now=NOW)
+    assert worker.run_once(NOW) == {'consumed': 2, 'pruned': 0, 'sent': 1}
+    assert worker.run_once(NOW) == {'consumed': 0, 'pruned': 0, 'sent': 0}
+
+    message, = outbox.messages.values()
+    assert message['email'] == 'a@example.com'
+    assert [row['exceedance_hash'] for row in message['exceedances']] == ['h1', 'h2']
+    assert message['attachment'].decode().count('PA0001') == 2
+    assert message['include_summary'] is True
+    assert queue.position('alert_worker') == 2
+
+
+def test_failed_send_is_retried_with_the_same_key(queue, events):
+    queue.add_subscription('a@example.com', ['PA0001'], 'Immediate (when violations occur)')
+    sender = FlakySender(failures=1)
+    worker = AlertWorker(sender, queue=queue, events=events)
+
+    events.emit(exceedances('h1'), now=NOW)
+    assert worker.run_once(NOW)['sent'] == 0
+    assert worker.run_once(NOW)['sent'] == 1
+    assert worker.run_once(NOW)['sent'] == 0
+
+    first, second = sender.attempts
+    assert first == second
+    assert queue.delivered(first[2])
+
+
+def test_delivered_digests_are_skipped_by_other_workers(queue, events, monkeypatch):
+    queue.add_subscription('a@example.com', ['PA0001'], 'Immediate (when violations occur)')
+    events.emit(exceedances('h1'), now=NOW)
+    poller = FlakySender()
+    AlertWorker(poller, queue=queue, events=events).consume(NOW)
+
+    # The nightly job reads the digests just before the poller sends them
+    stale = queue.due_digests(NOW)
+    AlertWorker(poller, queue=queue, events=events).flush(NOW)
+    assert queue.delivered(delivery_key(stale))
+
+    monkeypatch.setattr(queue, 'due_digests', lambda now=None: stale)
+    nightly = FlakySender()
+    assert AlertWorker(nightly, queue=queue, events=events, consumer='nightly').flush(NOW) == 0
+    assert nightly.attempts == []
+
+
+def test_daily_digest_waits_for_its_window(queue, events):
+    queue.add_subscription('a@example.com', ['PA0001'], 'Daily Digest')
+    sender = FlakySender()
+    worker = AlertWorker(sender, queue=queue, events=events)
+
+    events.emit(exceedances('h1'), now=NOW)
+    assert worker.run_once(NOW)['sent'] == 1
+    events.emit(exceedances('h2'), now=NOW)
+    assert worker.run_once(datetime(2024, 5, 16, 20, 0))['sent'] == 0
+    assert worker.run_once(datetime(2024, 5, 17, 8, 0))['sent'] == 1
+    assert [hashes for _, hashes, _ in sender.attempts] == [['h1'], ['h2']]
+
+
+def test_run_once_prunes_old_consumed_events(queue, events):
+    queue.add_subscription('a@example.com', ['PA0001'], 'Immediate (when violations occur)')
+    events.emit(exceedances('h1', 'h2'), now=datetime(2024, 1, 1))
+    worker = AlertWorker(FlakySender(), queue=queue, events=events)
+
+    assert worker.run_once(NOW) == {'consumed': 2, 'pruned': 2, 'sent': 1}
+    assert events.read().empty
+    assert worker.run_once(NOW) == {'consumed': 0, 'pruned': 0, 'sent': 0}
+
+
+def test_lagging_consumer_holds_back_pruning(queue, events):
+    events.emit(exceedances('h1', 'h2'), now=datetime(2024, 1, 1))
+    AlertWorker(FlakySender(), queue=queue, events=events, consumer='nightly').consume(NOW)
+    events.emit(exceedances('h3'), now=datetime(2024, 1, 1))
+
+    worker = AlertWorker(FlakySender(), queue=queue, events=events)
+    assert worker.run_once(NOW)['pruned'] == 2
+    assert list(events.read()['exceedance_hash']) == ['h3']
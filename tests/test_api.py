@@ -0,0 +1,120 @@
+"""
+Tests for the PermitMinder query API, called through its ASGI interface.
+"""
+
+import asyncio
+import json
+from urllib.parse import urlencode
+
+import pytest
+
+from permitminder.api.app import create_app
+
+
+def get(app, path, params=None, headers=None):
+    """Send one GET request to an ASGI app; returns (status, headers, body)."""
+    scope = {
+        'type': 'http',
+        'method': 'GET',
+        'path': path,
+        'query_string': urlencode(params or {}, doseq=True).encode(),
+        'headers': [(name.encode(), value.encode()) for name, value in (headers or {}).items()],
+        'client': ('127.0.0.1', 0),
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    start = messages[0]
+    body = b''.join(message.get('body', b'') for message in messages[1:])
+    return start['status'], {name.decode(): value.decode() for name, value in start['headers']}, body
+
+
+@pytest.fixture(scope='module')
+def dataset(prepared_records):
+    df = prepared_records.copy()
+    df.attrs['dataset_version'] = 'v1'
+    return df
+
+
+@pytest.fixture
+def app(dataset):
+    return create_app(df=dataset, rate=1e6, burst=1_000_000)
+
+
+@pytest.fixture(scope='module')
+def county(dataset):
+    """A county with a few hundred records."""
+    counts = dataset['COUNTY_NAME'].value_counts()
+    return counts[(counts > 100) & (counts < 1000)].index[0]
+
+
+def test_pages_cover_every_record_once(app, county):
+    status, _, body = get(app, '/v1/exceedances', {'county': county, 'limit': 1000})
+    assert status == 200
+    everything = json.loads(body)
+    assert everything['next_cursor'] is None
+    assert everything['count'] == everything['total']
+
+    records, params = [], {'county': county, 'limit': 37}
+    while True:
+        status, _, body = get(app, '/v1/exceedances', params)
+        assert status == 200
+        page = json.loads(body)
+        assert page['total'] == everything['total']
+        assert page['count'] <= 37
+        records.extend(page['data'])
+        if page['next_cursor'] is None:
+            break
+        params['cursor'] = page['next_cursor']
+
+    assert records == everything['data']
+
+
+def test_cursor_from_other_version_is_rejected(dataset, county):
+    first = create_app(df=dataset)
+    _, _, body = get(first, '/v1/exceedances', {'county': county, 'limit': 10})
+    cursor = json.loads(body)['next_cursor']
+
+    updated = dataset.copy()
+    updated.attrs['dataset_version'] = 'v2'
+    status, _, _ = get(create_app(df=updated), '/v1/exceedances', {'county': county, 'limit': 10, 'cursor': cursor})
+    assert status == 410
+
+    status, _, _ = get(first, '/v1/exceedances', {'cursor': '!!not-a-cursor'})
+    assert status == 400
+
+
+def test_etag_revalidation(app, county):
+    params = {'county': county, 'limit': 20}
+    status, headers, body = get(app, '/v1/exceedances', params)
+    assert status == 200 and body
+    etag = headers['etag']
+
+    status, headers, body = get(app, '/v1/exceedances', params, {'if-none-match': etag})
+    assert status == 304
+    assert body == b''
+    assert headers['etag'] == etag
+
+    # Another query or another representation gets another tag
+    _, other, _ = get(app, '/v1/exceedances', {'county': county, 'limit': 21})
+    assert other['etag'] != etag
+    status, gzipped, _ = get(app, '/v1/exceedances', params, {'accept-encoding': 'gzip', 'if-none-match': etag})
+    assert status == 200
+    assert gzipped['etag'] != etag
+
+
+def test_etag_changes_with_dataset_version(dataset):
+    status, headers, _ = get(create_app(df=dataset), '/v1/aggregates', {'group_by': 'county'})
+    assert status == 200
+    updated = dataset.copy()
+    updated.attrs['dataset_version'] = 'v2'
+    status, updated_headers, _ = get(create_app(df=updated), '/v1/aggregates', {'group_by': 'county'},
+                                     {'if-none-match': headers['etag']})
+    assert status == 200
+    assert updated_headers['etag'] != headers['etag']
@@ -0,0 +1,92 @@
+"""
+Tests for the precomputed dashboard data layer.
+"""
+
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from utils.dashboard_data import DashboardData, parse_facility_label
+
+
+@pytest.fixture
+def data():
+    rows = [
+        ('PA0001', 'Alpha STP', 'Erie', 'Chlorine', 'Minor', '2024-06-01'),
+        ('PA0001', 'Alpha STP', 'Erie', 'Ammonia', 'Major', '2024-06-10'),
+        ('PA0001', 'Alpha STP', 'Erie', 'Lead', 'Critical', '2024-03-01'),
+        ('PA0002', 'Beta Works', 'Allegheny', 'Zinc', 'Moderate', '2024-06-09'),
+        ('PA0002', 'Beta Works', 'Allegheny', 'Zinc', 'Moderate', 'not a date'),
+        ('PA0003', 'Gamma Plant', 'Berks', 'pH', 'Minor', '2023-01-01'),
+    ]
+    columns = ['PERMIT_NUMBER', 'PF_NAME', 'COUNTY_NAME', 'PARAMETER', 'SEVERITY',
+               'NON_COMPLIANCE_DATE']
+    return DashboardData(pd.DataFrame(rows, columns=columns))
+
+
+def test_parse_facility_label():
+    assert parse_facility_label('Alpha STP - PA0001 (Erie)') == 'PA0001'
+    assert parse_facility_label('Sewer Auth - North - PA0009 (Erie County)') == 'PA0009'
+    assert parse_facility_label(' PA0002 ') == 'PA0002'
+    assert parse_facility_label('  ') is None
+
+
+def test_resolve_permits_drops_unknown_and_duplicates(data):
+    ids = data.resolve_permits(['Alpha STP - PA0001 (Erie)', 'PA0001', 'PA0002', 'PA9999'])
+
+    assert list(data.permits[ids]) == ['PA0001', 'PA0002']
+
+
+def test_window_counts(data):
+    counts = data.window_counts(7, today=date(2024, 6, 12))
+    assert dict(zip(data.permits, counts)) == {'PA0001': 1, 'PA0002': 1, 'PA0003': 0}
+
+    counts = data.window_counts(365, today=date(2024, 6, 12))
+    assert dict(zip(data.permits, counts)) == {'PA0001': 3, 'PA0002': 1, 'PA0003': 0}
+
+
+def test_recent_exceedances_newest_first(data):
+    ids = data.resolve_permits(['PA0001', 'PA0002'])
+
+    recent = data.recent_exceedances(ids, n=3)
+
+    assert list(recent['Date'].dt.strftime('%Y-%m-%d')) == ['2024-06-10', '2024-06-09', '2024-06-01']
+
+
+def test_exceedances_for_and_facilities(data):
+    ids = data.resolve_permits(['PA0002', 'PA0003'])
+
+    records = data.exceedances_for(ids)
+    assert sorted(records['PERMIT_NUMBER']) == ['PA0002', 'PA0002', 'PA0003']
+
+    facilities = data.facilities(ids)
+    assert facilities.drop(columns='FACILITY_ID').to_dict('list') == {
+        'PERMIT_NUMBER': ['PA0002', 'PA0003'],
+        'PF_NAME': ['Beta Works', 'Gamma Plant'],
+        'COUNTY_NAME': ['Allegheny', 'Berks'],
+    }
+
+
+def test_no_permits_selected(data):
+    ids = data.resolve_permits([])
+
+    assert data.recent_count(ids, 30) == 0
+    assert data.recent_exceedances(ids).empty
+    assert data.exceedances_for(ids).empty
+
+
+
+def test_facility_permits_include_sibling_permits():
+    rows = [
+        ('PA0001', 'Mill Creek Twp Muni Auth', 'Erie', '2024-06-01'),
+        ('PA0002', 'Mill Creek Township Municipal Authority', 'Erie', '2024-06-02'),
+        ('PA0003', 'Beta Works', 'Erie', '2024-06-03'),
+    ]
+    data = DashboardData(pd.DataFrame(rows, columns=['PERMIT_NUMBER', 'PF_NAME', 'COUNTY_NAME',
+                                                     'NON_COMPLIANCE_DATE']))
+    ids = data.resolve_permits(['PA0001'])
+
+    assert list(data.permits[data.facility_permits(ids)]) == ['PA0001', 'PA0002']
+    assert data.facility_count(data.resolve_permits(['PA0001', 'PA0002', 'PA0003'])) == 2
+    assert len(data.facility_permits(data.resolve_permits([]))) == 0
@@ -0,0 +1,111 @@
+"""
+Tests for the per-subscription digest queue.
+"""
+
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from utils.digest_queue import DAILY, IMMEDIATE, MONTHLY, WEEKLY, DigestQueue, cadence, is_due, window_start
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return DigestQueue(str(tmp_path / 'subscriptions.db'))
+
+
+def exceedances(*rows):
+    """Exceedance records from (permit, date, severity, hash) tuples."""
+    return pd.DataFrame([
+        {'PERMIT_NUMBER': permit, 'PF_NAME': f'Facility {permit}', 'COUNTY_NAME': 'Erie',
+         'NON_COMPLIANCE_DATE': date, 'PARAMETER': 'Zinc', 'SAMPLE_VALUE': 2.0, 'PERMIT_VALUE': 1.0,
+         'UNIT_OF_MEASURE': 'mg/L', 'Percent_Over_Limit': 100.0, 'Severity': severity,
+         'exceedance_hash': key}
+        for permit, date, severity, key in rows
+    ])
+
+
+def test_cadence_labels():
+    assert cadence('Immediate (when violations occur)') == IMMEDIATE
+    assert cadence('Daily Digest') == DAILY
+    assert cadence('Weekly Summary') == WEEKLY
+    assert cadence('Monthly Report') == MONTHLY
+    assert cadence('') == DAILY
+
+
+def test_cadence_windows():
+    now = datetime(2024, 5, 16, 14, 30)  # a Thursday
+
+    assert window_start('Daily', now) == datetime(2024, 5, 16)
+    assert window_start('Weekly', now) == datetime(2024, 5, 13)
+    assert window_start('Monthly', now) == datetime(2024, 5, 1)
+
+    assert is_due('Daily', None, now)
+    assert is_due('Immediate', now, now)
+    assert not is_due('Daily', datetime(2024, 5, 16, 6, 0), now)
+    assert is_due('Daily', datetime(2024, 5, 15, 23, 0), now)
+    assert not is_due('Weekly', datetime(2024, 5, 13, 8, 0), now)
+    assert is_due('Weekly', datetime(2024, 5, 12, 8, 0), now)
+    assert not is_due('Monthly', datetime(2024, 5, 2), now)
+
+
+def test_enqueue_routes_and_deduplicates(queue):
+    first = queue.add_subscription('a@example.com', ['PA0001'], 'Daily')
+    queue.add_subscription('b@example.com', ['PA0001', 'PA0002'], 'Weekly')
+
+    records = exceedances(('PA0001', '2024-05-01', 'High', 'h1'), ('PA0002', '2024-05-02', 'Low', 'h2'),
+                          ('PA0003', '2024-05-03', 'Low', 'h3'))
+    assert queue.enqueue(records) == 3
+    assert queue.enqueue(records) == 0
+    assert queue.stats() == {'pending': 3, 'subscriptions': 2}
+
+    digest = queue.digest(first)
+    assert digest.email == 'a@example.com'
+    assert list(digest.exceedances['PERMIT_NUMBER']) == ['PA0001']
+
+
+def test_trigger_keeps_running_totals(queue):
+    subscription = queue.add_subscription('a@example.com', ['PA0001'], 'Daily')
+    queue.enqueue(exceedances(('PA0001', '2024-05-03', 'High', 'h1'), ('PA0001', '2024-05-01', 'High', 'h2')))
+    queue.enqueue(exceedances(('PA0001', '2024-05-09', 'High', 'h3'), ('PA0001', '2024-05-02', None, 'h4')))
+
+    totals = queue.digest(subscription).totals
+    assert totals.to_dict('records') == [
+        {'permit_number': 'PA0001', 'severity': 'High', 'exceedances': 3,
+         'first_date': '2024-05-01', 'last_date': '2024-05-09'},
+        {'permit_number': 'PA0001', 'severity': 'Unknown', 'exceedances': 1,
+         'first_date': '2024-05-02', 'last_date': '2024-05-02'},
+    ]
+
+
+def test_acknowledge_keeps_rows_queued_after_the_read(queue):
+    subscription = queue.add_subscription('a@example.com', ['PA0001'], 'Daily')
+    queue.enqueue(exceedances(('PA0001', '2024-05-01', 'High', 'h1')))
+    digest = queue.digest(subscription)
+    queue.enqueue(exceedances(('PA0001', '2024-05-02', 'Low', 'h2')))
+
+    queue.acknowledge(digest, now=datetime(2024, 5, 16, 8, 0))
+
+    remaining = queue.digest(subscription)
+    assert list(remaining.exceedances['Severity']) == ['Low']
+    assert remaining.totals[['severity', 'exceedances']].to_dict('records') == [
+        {'severity': 'Low', 'exceedances': 1},
+    ]
+
+
+def test_due_follows_each_subscriptions_cadence(queue):
+    daily = queue.add_subscription('a@example.com', ['PA0001'], 'Daily')
+    weekly = queue.add_subscription('b@example.com', ['PA0001'], 'Weekly')
+    paused = queue.add_subscription('c@example.com', ['PA0001'], 'Immediate')
+
+    monday = datetime(2024, 5, 13, 8, 0)
+    queue.enqueue(exceedances(('PA0001', '2024-05-10', 'High', 'h1')), now=monday)
+    queue.set_status(paused, 'paused')
+    for digest in queue.due_digests(monday):
+        queue.acknowledge(digest, now=monday)
+
+    queue.enqueue(exceedances(('PA0001', '2024-05-11', 'High', 'h2')))
+    assert list(queue.due(datetime(2024, 5, 13, 20, 0))['subscription_id']) == []
+    assert list(queue.due(datetime(2024, 5, 14, 8, 0))['subscription_id']) == [daily]
+    assert sorted(queue.due(datetime(2024, 5, 20, 8, 0))['subscription_id']) == [daily, weekly]
@@ -0,0 +1,89 @@
+"""
+Tests for resolving facilities across PF_NAME variants and permits.
+"""
+
+import numpy as np
+import pandas as pd
+
+from permitminder.core.entity_resolution import (
+    FACILITY_ID_COLUMN,
+    assign_facility_ids,
+    name_similarity,
+    name_tokens,
+    resolve_facilities,
+)
+
+
+def records(*rows):
+    """Records from (permit, name, county) tuples."""
+    return pd.DataFrame(rows, columns=['PERMIT_NUMBER', 'PF_NAME', 'COUNTY_NAME'])
+
+
+def test_name_tokens_expand_abbreviations_and_drop_suffixes():
+    assert name_tokens('Mill Creek Twp Muni Auth') == name_tokens('MILL CREEK TOWNSHIP MUNICIPAL AUTHORITY')
+    assert name_tokens('Acme Steel, Inc.') == ('ACME', 'STEEL')
+    assert name_tokens('Alpha Sewage Treatment Plant') == name_tokens('Alpha STP')
+    assert name_tokens(None) == ()
+    assert name_tokens(float('nan')) == ()
+
+
+def test_name_similarity_tolerates_misspellings_but_not_numbers():
+    weights = {token: 1.0 for token in ['ALPHA', 'ALPHAA', 'WWTP', 'PLANT', '1', '2']}
+
+    assert name_similarity(('ALPHA', 'WWTP'), ('ALPHA', 'WWTP'), weights) == 1.0
+    assert name_similarity(('ALPHA', 'WWTP'), ('ALPHAA', 'WWTP'), weights) > 0.8
+    assert name_similarity(('1', 'PLANT'), ('2', 'PLANT'), weights) == 0.0
+
+
+def test_name_variants_in_one_county_are_merged():
+    ids = resolve_facilities(records(
+        ('PA0001', 'Mill Creek Twp Muni Auth', 'Erie'),
+        ('PA0002', 'Mill Creek Township Municipal Authority', 'Erie'),
+        ('PA0003', 'Beta Works', 'Erie'),
+    ))
+
+    assert ids[0] == ids[1]
+    assert ids[2] != ids[0]
+
+
+def test_same_name_in_other_county_stays_separate():
+    ids = resolve_facilities(records(
+        ('PA0001', 'Alpha STP', 'Erie'),
+        ('PA0002', 'Alpha STP', 'Berks'),
+    ))
+
+    assert ids[0] != ids[1]
+
+
+def test_permits_and_names_merge_transitively():
+    ids = resolve_facilities(records(
+        ('PA0001', 'Alpha Works', 'Erie'),
+        ('PA0001', 'Gamma Holdings', 'Erie'),
+        ('PA0002', 'Gamma Holdings', 'Erie'),
+        ('PA0003', 'Delta Plant', 'Erie'),
+    ))
+
+    assert ids[0] == ids[1] == ids[2]
+    assert ids[3] != ids[0]
+
+
+def test_ids_follow_smallest_permit_number():
+    ids = resolve_facilities(records(
+        ('PA0009', 'Zeta Works', 'Erie'),
+        ('PA0001', 'Alpha Works', 'Erie'),
+        (None, 'Name Only Plant', 'Erie'),
+        (None, None, 'Erie'),
+    ))
+
+    assert ids.tolist() == [1, 0, 2, -1]
+    assert ids.dtype == np.int64
+
+
+def test_assign_facility_ids_adds_column():
+    df = assign_facility_ids(records(('PA0001', 'Alpha Works', 'Erie'), ('PA0001', 'Alpha Works', 'Erie')))
+
+    assert df[FACILITY_ID_COLUMN].tolist() == [0, 0]
+
+
+def test_empty_records():
+    assert len(resolve_facilities(records())) == 0
@@ -0,0 +1,60 @@
+"""
+Tests for the append-only exceedance event log.
+"""
+
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from utils.event_log import EventLog
+
+
+@pytest.fixture
+def log(tmp_path):
+    return EventLog(str(tmp_path / 'subscriptions.db'))
+
+
+def exceedances(*keys, permit='PA0001'):
+    return pd.DataFrame([
+        {'PERMIT_NUMBER': permit, 'PF_NAME': 'Alpha', 'NON_COMPLIANCE_DATE': '2024-05-01',
+         'PARAMETER': 'Zinc', 'Percent_Over_Limit': 150.0, 'exceedance_hash': key}
+        for key in keys
+    ])
+
+
+def test_emit_is_idempotent(log):
+    assert log.emit(exceedances('h1', 'h2'), source='extract.csv') == 2
+    assert log.emit(exceedances('h2', 'h3')) == 1
+    assert log.emit(exceedances()) == 0
+    assert list(log.read()['exceedance_hash']) == ['h1', 'h2', 'h3']
+    assert log.last_position() == log.read()['position'].iloc[-1]
+
+
+def test_read_from_position(log):
+    log.emit(exceedances('h1', 'h2', 'h3'), now=datetime(2024, 5, 16, 8, 0))
+
+    events = log.read(after=1)
+    assert list(events['exceedance_hash']) == ['h2', 'h3']
+    assert list(events['position']) == [2, 3]
+    assert list(events['PERMIT_NUMBER']) == ['PA0001', 'PA0001']
+    assert events['PARAMETER'].iloc[0] == 'Zinc'
+    assert events['emitted_at'].iloc[0] == pd.Timestamp('2024-05-16 08:00')
+
+    assert list(log.read(after=0, limit=1)['exceedance_hash']) == ['h1']
+    assert log.read(after=3).empty
+
+
+def test_permit_numbers_keep_leading_zeros(log):
+    log.emit(exceedances('h1', permit='0012345'))
+    assert log.read()['PERMIT_NUMBER'].iloc[0] == '0012345'
+
+
+def test_prune_keeps_unread_and_recent_events(log):
+    log.emit(exceedances('h1', 'h2'), now=datetime(2024, 1, 1))
+    log.emit(exceedances('h3'), now=datetime(2024, 5, 1))
+
+    now = datetime(2024, 5, 16)
+    assert log.prune(consumed=1, now=now) == 1
+    assert log.prune(consumed=3, now=now) == 1
+    assert list(log.read()['exceedance_hash']) == ['h3']
@@ -0,0 +1,73 @@
+"""
+Tests for the facility typeahead index.
+"""
+
+import pandas as pd
+import pytest
+
+from utils.facility_search import FacilitySearchIndex, normalize_text, trigrams
+
+
+@pytest.fixture
+def index():
+    facilities = pd.DataFrame([
+        ('Springfield Sewer Authority', 'PA0012345', 'Erie'),
+        ('Springfield Water Co', 'PA0099999', 'Berks'),
+        ('North Springfield STP', 'PA0012399', 'Erie'),
+        ('Allegheny Steel', 'PA0123450', 'Allegheny'),
+        ('Zeta Chemical', 'PAS123456', 'Berks'),
+        ('Delta Mill', 'PA00123450', 'Berks'),
+    ], columns=['PF_NAME', 'PERMIT_NUMBER', 'COUNTY_NAME'])
+    return FacilitySearchIndex(facilities)
+
+
+def test_normalize_text_and_trigrams():
+    assert normalize_text(" St. Mary's Plant ") == 'ST MARY S PLANT'
+    assert normalize_text('pa-001/2') == 'PA 001 2'
+    assert sorted(trigrams('AB')) == ['  A', ' AB', 'AB ']
+
+
+def test_exact_permit_ranks_first(index):
+    results = index.search('pa0012345')
+
+    assert list(results['PERMIT_NUMBER']) == ['PA0012345', 'PA00123450']
+    assert results['score'].iloc[0] > results['score'].iloc[1]
+    assert results['display'].iloc[0] == 'Springfield Sewer Authority - PA0012345 (Erie)'
+
+
+def test_permit_prefix_ties_sort_alphabetically(index):
+    results = index.search('PA00123')
+
+    assert list(results['PF_NAME']) == ['Delta Mill', 'North Springfield STP', 'Springfield Sewer Authority']
+
+
+def test_name_prefix_beats_token_prefix(index):
+    results = index.search('springfield')
+
+    assert set(results['PF_NAME'][:2]) == {'Springfield Sewer Authority', 'Springfield Water Co'}
+    assert results['PF_NAME'].iloc[2] == 'North Springfield STP'
+
+
+def test_fuzzy_match_tolerates_typos(index):
+    results = index.search('Alegheny Stel')
+
+    assert results['PF_NAME'].iloc[0] == 'Allegheny Steel'
+
+
+def test_county_filter_and_limit(index):
+    results = index.search('springfield', county='Erie')
+    assert set(results['COUNTY_NAME']) == {'Erie'}
+
+    assert len(index.search('', limit=2)) == 2
+    assert list(index.search('', county='All Counties')['PF_NAME']) == [
+        'Allegheny Steel',
+        'Delta Mill',
+        'North Springfield STP',
+        'Springfield Sewer Authority',
+        'Springfield Water Co',
+        'Zeta Chemical',
+    ]
+
+
+def test_no_match(index):
+    assert index.search('xyzzy').empty
@@ -0,0 +1,132 @@
+"""
+Tests for the permit-level chemical-laundering features.
+"""
+
+import numpy as np
+import pandas as pd
+
+from launch_ready_columns import add_chemical_laundering_flags
+from utils.laundering_features import (
+    CANDIDATE_COLUMNS,
+    INDUSTRIAL_PARAMETERS,
+    build_candidate_features,
+    load_candidates,
+    parameter_classes,
+    save_candidates,
+)
+
+
+def records():
+    rows = [
+        # permit, facility, county, parameter, date, violation
+        ('P1', 'Alpha', 'Erie', 'Zinc', '2024-01-05', True),
+        ('P1', 'Alpha', 'Erie', 'Biochemical Oxygen Demand', '2024-01-20', True),
+        ('P1', 'Alpha', 'Erie', 'Lead', '2024-02-03', True),
+        ('P1', 'Alpha', 'Erie', 'pH', '2024-03-01', False),
+        ('P2', 'Beta', 'Erie', 'Copper', '2024-01-11', True),
+        ('P3', 'Gamma', 'Erie', 'Biochemical Oxygen Demand', '2024-01-11', True),
+        ('P4', 'Delta', 'Kent', 'Zinc', '2024-01-11', False),
+        (None, 'Unknown', 'Erie', 'Zinc', '2024-01-11', True),
+    ]
+    return pd.DataFrame(rows, columns=['PERMIT_NUMBER', 'PF_NAME', 'COUNTY_NAME', 'PARAMETER',
+                                       'NON_COMPLIANCE_DATE', 'Is_Violation'])
+
+
+def test_parameter_classes():
+    codes, industrial, conventional = parameter_classes(pd.Series(['Zinc', 'pH', None, 'Flow', 'Zinc']))
+
+    assert codes[0] == codes[4] and len({codes[0], codes[1], codes[3]}) == 3
+    assert codes[2] == -1
+    assert industrial[codes].tolist() == [True, False, False, False, True]
+    assert conventional[codes].tolist() == [False, True, False, False, False]
+
+
+def test_parameter_classes_resolve_aliases():
+    codes, industrial, conventional = parameter_classes(pd.Series(['Total Zinc', 'Zinc', 'BOD5', 'Chromium, Hexavalent']))
+
+    assert codes[0] == codes[1]
+    assert industrial[codes].tolist() == [True, True, False, True]
+    assert conventional[codes].tolist() == [False, False, True, False]
+
+
+def test_features_and_ranking():
+    candidates = build_candidate_features(records())
+
+    assert list(candidates.columns) == CANDIDATE_COLUMNS
+    assert candidates['PERMIT_NUMBER'].tolist() == ['P1', 'P2']
+    assert candidates['Rank'].tolist() == [1, 2]
+
+    alpha = candidates.iloc[0]
+    assert alpha['PF_NAME'] == 'Alpha'
+    assert alpha['Parameters'] == 4
+    assert alpha['Industrial_Parameters'] == 2
+    assert alpha['Industrial_Share'] == 0.5
+    assert alpha['Industrial_Exceedances'] == 2
+    assert alpha['Conventional_Exceedances'] == 1
+    assert alpha['Industrial_Months'] == 2
+    assert alpha['Co_Occurrence_Months'] == 1
+    assert alpha['Co_Occurrence_Rate'] == 0.5
+    assert alpha['County_Paired_Facilities'] == 1
+
+    beta = candidates.iloc[1]
+    assert beta['Industrial_Share'] == 1.0
+    assert beta['Co_Occurrence_Rate'] == 0.0
+    assert beta['County_Paired_Facilities'] == 1
+
+
+def test_non_violating_rows_count_when_asked():
+    candidates = build_candidate_features(records(), violations_only=False)
+
+    assert set(candidates['PERMIT_NUMBER']) == {'P1', 'P2', 'P4'}
+    delta = candidates.set_index('PERMIT_NUMBER').loc['P4']
+    # Kent has no other industrial exceedances
+    assert delta['County_Paired_Facilities'] == 0
+
+
+def test_empty_and_unpermitted_input():
+    assert list(build_candidate_features(records().iloc[:0]).columns) == CANDIDATE_COLUMNS
+    assert build_candidate_features(records().iloc[[-1]]).empty
+
+
+def test_counts_match_groupby(raw_records):
+    candidates = build_candidate_features(raw_records, violations_only=False).set_index('PERMIT_NUMBER')
+
+    records = raw_records[raw_records['PERMIT_NUMBER'].notna() & raw_records['PARAMETER'].notna()]
+    permits = records['PERMIT_NUMBER'].astype(str)
+    expected_industrial = records['PARAMETER'].isin(INDUSTRIAL_PARAMETERS).groupby(permits).sum()
+    expected_parameters = records.groupby(permits)['PARAMETER'].nunique()
+
+    expected_industrial = expected_industrial[expected_industrial > 0]
+    assert sorted(candidates.index) == sorted(expected_industrial.index)
+    np.testing.assert_array_equal(
+        candidates.loc[expected_industrial.index, 'Industrial_Exceedances'], expected_industrial
+    )
+    np.testing.assert_array_equal(
+        candidates.loc[expected_industrial.index, 'Parameters'], expected_parameters[expected_industrial.index]
+    )
+
+
+def test_candidates_round_trip(tmp_path):
+    path = str(tmp_path / 'candidates.parquet')
+    candidates = build_candidate_features(records())
+
+    save_candidates(candidates, path)
+
+    pd.testing.assert_frame_equal(load_candidates(path), candidates)
+
+
+def test_candidates_built_from_csv_when_artifact_is_missing(tmp_path):
+    data_path = str(tmp_path / 'launch_ready.csv')
+    records().to_csv(data_path, index=False)
+
+    candidates = load_candidates(path=str(tmp_path / 'missing.parquet'), data_path=data_path)
+
+    assert candidates['PERMIT_NUMBER'].tolist() == ['P1', 'P2']
+
+
+def test_laundering_flags_per_permit():
+    flagged = add_chemical_laundering_flags(records())
+
+    assert flagged['Has_Industrial_Parameters'].tolist() == [True, False, True, False, True, False, True, True]
+    # Every row of a permit with an industrial parameter; never rows without a permit
+    assert flagged['Chemical_Laundering_Candidate'].tolist() == [True, True, True, True, True, False, True, False]
@@ -0,0 +1,62 @@
+"""
+Tests for building and sending alert emails.
+"""
+
+from utils import mailer
+
+
+def test_build_message_with_attachment():
+    message = mailer.build_message(
+        'alerts@example.com', 'user@example.com', 'New exceedances', '<p>Two new</p>',
+        [('exceedances_2024-05-16.csv', b'PERMIT_NUMBER\nPA0001\n')]
+    )
+
+    assert message['To'] == 'user@example.com'
+    assert message['Subject'] == 'New exceedances'
+    parts = list(message.iter_parts())
+    assert parts[0].get_content_type() == 'text/html'
+    assert '<p>Two new</p>' in parts[0].get_content()
+    assert parts[1].get_content_type() == 'text/csv'
+    assert parts[1].get_filename() == 'exceedances_2024-05-16.csv'
+    assert 'PA0001' in parts[1].get_content()
+
+
+def test_text_and_html_are_sent_as_alternatives():
+    message = mailer.build_message(
+        'alerts@example.com', 'user@example.com', 'New exceedances', '<p>Two new</p>',
+        [('exceedances_2024-05-16.csv', b'PERMIT_NUMBER\nPA0001\n')], text='Two new'
+    )
+
+    assert message.get_content_type() == 'multipart/mixed'
+    body, attachment = message.iter_parts()
+    assert body.get_content_type() == 'multipart/alternative'
+    assert [part.get_content_type() for part in body.iter_parts()] == ['text/plain', 'text/html']
+    assert message.get_body(('plain',)).get_content().strip() == 'Two new'
+    assert attachment.get_filename() == 'exceedances_2024-05-16.csv'
+
+
+def test_send_email_requires_credentials(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError('no SMTP connection expected')
+
+    monkeypatch.setattr(mailer.smtplib, 'SMTP_SSL', fail)
+
+    assert mailer.send_email('', '', 'user@example.com', 'Subject', '<p>Body</p>') is False
+
+
+def test_send_email_reports_smtp_failure(monkeypatch):
+    def refuse(*args, **kwargs):
+        raise OSError('connection refused')
+
+    monkeypatch.setattr(mailer.smtplib, 'SMTP_SSL', refuse)
+
+    assert mailer.send_email('alerts@example.com', 'secret', 'user@example.com', 'Subject', '<p>Body</p>') is False
+
+
+def test_idempotency_key_becomes_message_id():
+    message = mailer.build_message('alerts@example.com', 'user@example.com', 'Subject', '<p>Body</p>',
+                                   message_id='3f2a9c')
+    assert message['Message-ID'] == '<3f2a9c@permitminder>'
+
+    untracked = mailer.build_message('alerts@example.com', 'user@example.com', 'Subject', '<p>Body</p>')
+    assert 'Message-ID' not in untracked
@@ -0,0 +1,128 @@
+"""
+Tests for the parameter and unit normalization catalog.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from permitminder.core import filter_exceedances
+from permitminder.core.directory import build_facility_directory
+from permitminder.core.normalization import (
+    CONVENTIONAL,
+    INDUSTRIAL,
+    OTHER,
+    NormalizationCatalog,
+    canonical_parameters,
+    get_catalog,
+    normalize_exceedances,
+    parameter_key,
+    parameters_in,
+)
+
+
+def test_parameter_key_ignores_order_case_and_qualifiers():
+    assert parameter_key('Aluminum, Total') == parameter_key('Total Aluminum')
+    assert parameter_key('ALUMINUM TOTAL RECOVERABLE') == 'aluminum'
+    assert parameter_key('Total') == 'total'
+
+
+@pytest.mark.parametrize('reported, canonical', [
+    ('Total Aluminum', 'Aluminum, Total'),
+    ('ALUMINUM TOTAL RECOVERABLE', 'Aluminum, Total'),
+    ('BOD5', 'Biochemical Oxygen Demand'),
+    ('bod, 5-day (20 deg. c)', 'Biochemical Oxygen Demand'),
+    ('Nitrogen, Ammonia', 'Ammonia-Nitrogen'),
+    ('Chromium, Total', 'Chromium'),
+    ('Mystery  Compound ', 'Mystery Compound'),
+])
+def test_canonical_parameter(reported, canonical):
+    assert get_catalog().canonical_parameter(reported) == canonical
+
+
+def test_distinct_analytes_stay_separate():
+    catalog = get_catalog()
+
+    assert catalog.canonical_parameter('Chromium, Hexavalent') == 'Chromium, Hexavalent'
+    assert catalog.category('Chromium, Hexavalent') == INDUSTRIAL
+    # Fahrenheit and Centigrade readings must not be compared as one parameter
+    fahrenheit = catalog.canonical_parameter('TEMPERATURE, WATER DEG. FAHRENHEIT')
+    centigrade = catalog.canonical_parameter('Temperature, Water Deg. Centigrade')
+    assert fahrenheit == 'Temperature, Water Deg. Fahrenheit'
+    assert centigrade == 'Temperature, Water Deg. Centigrade'
+    assert catalog.category(fahrenheit) == catalog.category(centigrade) == OTHER
+
+
+def test_categories():
+    assert 'Zinc' in parameters_in(INDUSTRIAL)
+    assert 'pH' in parameters_in(CONVENTIONAL)
+    assert get_catalog().category('Mystery Compound') == OTHER
+
+
+def test_unknown_alias_target_is_rejected():
+    with pytest.raises(ValueError):
+        NormalizationCatalog(parameters={'Zinc': INDUSTRIAL}, aliases={'Zn': 'Zinc, Total Recoverable'})
+
+
+def test_normalize_parameters_is_categorical_and_keeps_missing():
+    column = pd.Series(['Total Aluminum', None, 'Aluminum, Total', 'BOD5'], index=[10, 11, 12, 13])
+
+    normalized = get_catalog().normalize_parameters(column)
+
+    assert normalized.dtype == 'category'
+    assert list(normalized.index) == [10, 11, 12, 13]
+    assert normalized.tolist()[0] == normalized.tolist()[2] == 'Aluminum, Total'
+    assert pd.isna(normalized.iloc[1])
+    assert list(normalized.cat.categories) == ['Aluminum, Total', 'Biochemical Oxygen Demand']
+
+
+def test_units_are_converted():
+    units, factors = get_catalog().normalize_units(pd.Series(['ug/L', 'MG/L', 'kg/day', None, 'furlongs']))
+
+    assert units.tolist()[:3] == ['mg/L', 'mg/L', 'lbs/day']
+    assert pd.isna(units.iloc[3])
+    assert units.iloc[4] == 'furlongs'
+    np.testing.assert_allclose(factors, [1e-3, 1.0, 2.20462, 1.0, 1.0])
+
+
+def test_normalize_exceedances():
+    records = pd.DataFrame({
+        'PARAMETER': ['Total Zinc', 'Zinc'],
+        'UNIT_OF_MEASURE': ['ug/L', 'mg/L'],
+        'SAMPLE_VALUE': ['250', '<0.05'],
+        'PERMIT_VALUE': [100.0, 0.1],
+    })
+
+    normalize_exceedances(records)
+
+    assert records['PARAMETER'].tolist() == ['Zinc', 'Zinc']
+    assert records['PARAMETER_REPORTED'].tolist() == ['Total Zinc', 'Zinc']
+    assert records['CANONICAL_UNIT'].tolist() == ['mg/L', 'mg/L']
+    np.testing.assert_allclose(records['SAMPLE_VALUE_CANONICAL'], [0.25, np.nan])
+    np.testing.assert_allclose(records['PERMIT_VALUE_CANONICAL'], [0.1, 0.1])
+    # Running it again does not re-normalize
+    normalize_exceedances(records)
+    assert records['PARAMETER_REPORTED'].tolist() == ['Total Zinc', 'Zinc']
+
+
+def test_filters_accept_any_spelling(prepared_records):
+    parameter = prepared_records['PARAMETER'].cat.categories[0]
+    expected = filter_exceedances(prepared_records, parameter=parameter)
+
+    assert canonical_parameters([parameter.upper(), parameter]) == (parameter,)
+    assert len(expected) > 0
+    pd.testing.assert_frame_equal(filter_exceedances(prepared_records, parameter=parameter.upper()), expected)
+
+
+def test_directory_lists_canonical_parameters():
+    records = pd.DataFrame({
+        'PERMIT_NUMBER': ['PA0001'] * 3,
+        'PF_NAME': ['Alpha'] * 3,
+        'COUNTY_NAME': ['Erie'] * 3,
+        'PARAMETER': ['Total Aluminum', 'Aluminum, Total', 'BOD5'],
+        'NON_COMPLIANCE_DATE': ['2024-01-01', '2024-02-01', '2024-03-01'],
+    })
+
+    directory = build_facility_directory(records)
+
+    assert directory['PARAMETERS'].iloc[0] == 'Aluminum, Total|Biochemical Oxygen Demand'
@@ -0,0 +1,46 @@
+"""
+Tests for the partitioned launch-ready preparation.
+
+Preparing an extract over partitions in worker processes must give the
+same frame as preparing it in one piece.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from launch_ready_columns import prepare_launch_ready_dmr, prepare_launch_ready_partitioned
+from permitminder.pipeline.partitioned import PARTITION_MODES, partition_rows
+
+
+@pytest.mark.parametrize('partition_by', PARTITION_MODES)
+def test_partitioned_matches_serial(raw_records, partition_by):
+    serial = prepare_launch_ready_dmr(raw_records.copy(), ingested_at='2024-01-01T00:00:00')
+    partitioned = prepare_launch_ready_partitioned(raw_records.copy(), workers=2, partition_by=partition_by)
+
+    assert partitioned['Ingested_At'].nunique() == 1
+    pd.testing.assert_frame_equal(
+        partitioned.drop(columns='Ingested_At'),
+        serial.drop(columns='Ingested_At'),
+    )
+
+
+@pytest.mark.parametrize('partition_by', PARTITION_MODES)
+def test_partitions_cover_every_row_once(raw_records, partition_by):
+    partitions = partition_rows(raw_records, by=partition_by, n_partitions=8)
+    rows = np.sort(np.concatenate(partitions))
+    np.testing.assert_array_equal(rows, np.arange(len(raw_records)))
+
+
+@pytest.mark.parametrize('partition_by, column', [('county', 'COUNTY_NAME'), ('permit', 'PERMIT_NUMBER')])
+def test_partitions_keep_groups_whole(raw_records, partition_by, column):
+    partitions = partition_rows(raw_records, by=partition_by, n_partitions=8)
+    owner = {}
+    for number, rows in enumerate(partitions):
+        for value in raw_records[column].iloc[rows].unique():
+            assert owner.setdefault(value, number) == number
+
+
+def test_unknown_partition_mode(raw_records):
+    with pytest.raises(ValueError):
+        partition_rows(raw_records, by='facility')
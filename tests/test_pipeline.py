@@ -0,0 +1,136 @@
+"""
+Tests for the resumable DAG runner.
+"""
+
+import json
+import threading
+
+import pytest
+
+from permitminder.pipeline import BLOCKED, DONE, FAILED, Pipeline, Step
+
+
+class Calls:
+    """Step functions that record their calls (thread-safe) and can be told to fail."""
+
+    def __init__(self) -> None:
+        self.names = []
+        self.failing = {}
+        self._lock = threading.Lock()
+
+    def step(self, name, output=None):
+        def run(inputs):
+            with self._lock:
+                self.names.append(name)
+                if self.failing.get(name, 0) > 0:
+                    self.failing[name] -= 1
+                    raise RuntimeError(f'{name} broke')
+            return output if output is not None else {'name': name, 'inputs': inputs}
+        return run
+
+
+def fan_out(calls, tmp_path, **alert_options):
+    """scrape -> (detect -> alert, rebuild)."""
+    return Pipeline([
+        Step('scrape', calls.step('scrape', 'data/today.csv')),
+        Step('detect', calls.step('detect'), requires=['scrape']),
+        Step('alert', calls.step('alert'), requires=['detect'], **alert_options),
+        Step('rebuild', calls.step('rebuild'), requires=['scrape']),
+    ], name='test', state_dir=str(tmp_path))
+
+
+def test_steps_run_in_dependency_order_with_inputs(tmp_path):
+    calls = Calls()
+    pipeline = fan_out(calls, tmp_path)
+
+    state = pipeline.run('r1')
+
+    assert state.succeeded
+    assert calls.names[0] == 'scrape'
+    assert calls.names.index('detect') < calls.names.index('alert')
+    assert state.output('detect') == {'name': 'detect', 'inputs': {'scrape': 'data/today.csv'}}
+    with open(pipeline.state_path('r1')) as f:
+        assert json.load(f)['steps']['alert']['status'] == DONE
+
+
+def test_failure_blocks_dependents_but_not_other_branches(tmp_path):
+    calls = Calls()
+    calls.failing['detect'] = 1
+
+    state = fan_out(calls, tmp_path).run('r1')
+
+    assert not state.succeeded
+    assert state.status('detect') == FAILED
+    assert state.status('alert') == BLOCKED
+    assert state.status('rebuild') == DONE
+    assert 'RuntimeError: detect broke' in state.summary()
+
+
+def test_resume_skips_finished_steps(tmp_path):
+    calls = Calls()
+    calls.failing['alert'] = 1
+    assert not fan_out(calls, tmp_path).run('r1').succeeded
+
+    resumed = Calls()
+    state = fan_out(resumed, tmp_path).run('r1')
+
+    assert state.succeeded
+    assert resumed.names == ['alert']
+    assert state.steps['alert']['attempts'] == 2
+
+
+def test_rerun_forces_a_step_and_its_dependents(tmp_path):
+    fan_out(Calls(), tmp_path).run('r1')
+
+    calls = Calls()
+    fan_out(calls, tmp_path).run('r1', rerun=['detect'])
+
+    assert sorted(calls.names) == ['alert', 'detect']
+    with pytest.raises(ValueError):
+        fan_out(calls, tmp_path).run('r1', rerun=['publish'])
+
+
+def test_failed_step_is_retried(tmp_path):
+    calls = Calls()
+    calls.failing['alert'] = 2
+
+    state = fan_out(calls, tmp_path, retries=2, retry_delay=0).run('r1')
+
+    assert state.succeeded
+    assert calls.names.count('alert') == 3
+    assert state.steps['alert']['attempts'] == 3
+
+
+def test_invalid_pipelines_are_rejected():
+    noop = Calls().step('noop')
+    with pytest.raises(ValueError):
+        Pipeline([Step('a', noop), Step('a', noop)])
+    with pytest.raises(ValueError):
+        Pipeline([Step('a', noop, requires=['missing'])])
+    with pytest.raises(ValueError):
+        Pipeline([Step('a', noop, requires=['b']), Step('b', noop, requires=['a'])])
+
+
+def test_interrupted_step_starts_over(tmp_path):
+    pipeline = fan_out(Calls(), tmp_path)
+    pipeline.run('r1')
+    with open(pipeline.state_path('r1')) as f:
+        saved = json.load(f)
+    saved['steps']['alert']['status'] = 'running'
+    with open(pipeline.state_path('r1'), 'w') as f:
+        json.dump(saved, f)
+
+    calls = Calls()
+    pipeline = fan_out(calls, tmp_path)
+    assert pipeline.run('r1').succeeded
+    assert calls.names == ['alert']
+
+
+def test_daily_monitoring_fans_out_from_the_scrape(tmp_path):
+    from daily_exceedances_monitor import build_pipeline
+
+    pipeline = build_pipeline(str(tmp_path))
+
+    assert pipeline.downstream(['scrape']) == {'detect', 'alert', 'directory', 'similarity'}
+    assert pipeline.downstream(['detect']) == {'alert'}
+    assert pipeline.downstream(['directory']) == set()
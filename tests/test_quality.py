@@ -0,0 +1,70 @@
+"""
+Tests for the data-quality bitmask in permitminder.core.quality.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from permitminder.core.quality import (
+    INVALID_RESULT,
+    MISSING_UNITS,
+    NO_PERMIT_LIMIT,
+    QUALITY_FLAGS,
+    compute_quality_flags,
+    decode_quality_flags,
+    encode_quality_text,
+    flag_labels,
+    flag_mask,
+    without_flags,
+)
+
+ALL_MASKS = np.arange(2 ** len(QUALITY_FLAGS), dtype=np.uint8)
+
+
+def test_decode_encode_round_trip():
+    decoded = decode_quality_flags(ALL_MASKS)
+    np.testing.assert_array_equal(encode_quality_text(decoded), ALL_MASKS)
+
+
+def test_decode_matches_labels():
+    decoded = decode_quality_flags(pd.Series(ALL_MASKS, index=ALL_MASKS + 10))
+    assert list(decoded.index) == list(ALL_MASKS + 10)
+    assert decoded.iloc[0] == ''
+    for mask, text in zip(ALL_MASKS, decoded):
+        assert text == '; '.join(flag_labels(mask))
+
+
+def test_encode_ignores_unknown_labels_and_missing_text():
+    text = pd.Series(['No permit limit; Typo', None, 'missing units;NO PERMIT LIMIT'])
+    np.testing.assert_array_equal(encode_quality_text(text), [NO_PERMIT_LIMIT, 0, NO_PERMIT_LIMIT | MISSING_UNITS])
+
+
+def test_compute_quality_flags():
+    flags = compute_quality_flags(
+        pd.Series([10, 0, None, 5]),
+        pd.Series([1.0, 2.0, 3.0, None]),
+        pd.Series(['mg/L', ' ', 'mg/L', None]),
+    )
+    expected = [0, NO_PERMIT_LIMIT | MISSING_UNITS, NO_PERMIT_LIMIT, INVALID_RESULT | MISSING_UNITS]
+    np.testing.assert_array_equal(flags, expected)
+
+
+def test_compute_round_trips_through_text():
+    rng = np.random.default_rng(3)
+    flags = compute_quality_flags(
+        pd.Series(rng.choice([0, 1, None], size=500)),
+        pd.Series(rng.choice([1.0, None], size=500)),
+        pd.Series(rng.choice(['mg/L', '', None], size=500)),
+    )
+    np.testing.assert_array_equal(encode_quality_text(decode_quality_flags(flags)), flags)
+
+
+def test_flag_mask_and_filtering():
+    assert flag_mask(['No permit limit', MISSING_UNITS]) == NO_PERMIT_LIMIT | MISSING_UNITS
+    assert flag_mask(None) == 0
+    with pytest.raises(ValueError):
+        flag_mask('Not a flag')
+
+    kept = without_flags(ALL_MASKS, 'Invalid result')
+    np.testing.assert_array_equal(ALL_MASKS[kept], [mask for mask in ALL_MASKS if not mask & INVALID_RESULT])
@@ -0,0 +1,80 @@
+"""
+Tests for the indexed query plans in permitminder.core.query.
+
+Every compiled plan must select exactly the rows a plain pandas mask
+selects, whichever step the planner runs first.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from permitminder.core.quality import MISSING_UNITS, NO_PERMIT_LIMIT, QUALITY_COLUMN
+from permitminder.core.query import AnyOf, Condition, Contains, DateRange, FlagsClear, compile_query
+
+
+def naive_mask(df, clause):
+    """Boolean mask of one clause, computed by scanning the column."""
+    if isinstance(clause, AnyOf):
+        mask = np.zeros(len(df), dtype=bool)
+        for member in clause.clauses:
+            mask |= naive_mask(df, member)
+        return mask
+    if isinstance(clause, DateRange):
+        dates = df[clause.column]
+        return ((dates >= clause.start) & (dates <= clause.end)).to_numpy()
+    if isinstance(clause, FlagsClear):
+        matched = (df[clause.column].to_numpy().astype(np.int64) & clause.mask) == 0
+    elif isinstance(clause, Contains):
+        text = df[clause.column].astype(object).str.lower()
+        matched = np.zeros(len(df), dtype=bool)
+        for value in clause.values:
+            matched |= text.str.contains(value, regex=False).fillna(False).to_numpy(dtype=bool)
+    else:
+        matched = df[clause.column].isin(clause.values).to_numpy()
+    return ~matched if clause.negate else matched
+
+
+def random_clause(df, rng):
+    """One random clause over the prepared columns."""
+    kind = rng.integers(6)
+    if kind < 3:
+        column = ['COUNTY_NAME', 'PARAMETER', 'SEVERITY'][kind]
+        values = df[column].dropna().astype(object).unique()
+        picked = rng.choice(values, size=rng.integers(1, 4), replace=False)
+        return Condition(column, list(picked), negate=bool(rng.integers(2)))
+    if kind == 3:
+        names = df['PF_NAME'].dropna().unique()
+        word = str(rng.choice(names)).split()[0]
+        return Contains('PF_NAME', word, negate=bool(rng.integers(2)))
+    if kind == 4:
+        mask = int(rng.choice([NO_PERMIT_LIMIT, MISSING_UNITS, NO_PERMIT_LIMIT | MISSING_UNITS]))
+        return FlagsClear(QUALITY_COLUMN, mask, negate=bool(rng.integers(2)))
+    dates = df['NON_COMPLIANCE_DATE'].dropna()
+    start, end = sorted(rng.choice(dates.to_numpy(), size=2))
+    return DateRange('NON_COMPLIANCE_DATE', pd.Timestamp(start), pd.Timestamp(end))
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_plan_matches_naive_mask(prepared_records, seed):
+    rng = np.random.default_rng(seed)
+    clauses = [random_clause(prepared_records, rng) for _ in range(rng.integers(1, 4))]
+    if rng.integers(3) == 0:
+        clauses.append(AnyOf(random_clause(prepared_records, rng), random_clause(prepared_records, rng)))
+
+    expected = np.ones(len(prepared_records), dtype=bool)
+    for clause in clauses:
+        expected &= naive_mask(prepared_records, clause)
+
+    rows = compile_query(prepared_records, clauses).execute()
+    np.testing.assert_array_equal(rows, np.flatnonzero(expected))
+
+
+def test_empty_query_selects_every_row(prepared_records):
+    rows = compile_query(prepared_records, []).execute()
+    np.testing.assert_array_equal(rows, np.arange(len(prepared_records)))
+
+
+def test_unknown_value_selects_nothing(prepared_records):
+    clauses = [Condition('COUNTY_NAME', 'Nowhere'), Condition('SEVERITY', ['High', 'Critical'])]
+    assert len(compile_query(prepared_records, clauses).execute()) == 0
@@ -0,0 +1,72 @@
+"""
+Tests for the filter result cache.
+"""
+
+import numpy as np
+import pytest
+
+from permitminder.core.filtering import filter_row_ids
+from permitminder.core.loading import tag_dataset
+from permitminder.core.result_cache import ResultCache, cached_filter_row_ids, filter_signature
+
+
+@pytest.fixture(scope='module')
+def tagged(prepared_records):
+    """Prepared records tagged as one loaded dataset version."""
+    return tag_dataset(prepared_records.copy(), 'extract.csv', 'v1')
+
+
+def test_equivalent_filters_share_a_signature():
+    assert filter_signature(county='Erie', parameter='All Parameters') == filter_signature(county='Erie')
+    assert filter_signature(facility='  Acme ') == filter_signature(facility='acme')
+    assert filter_signature(county='All Counties') == filter_signature()
+    # A date range only applies when both ends are given
+    assert filter_signature(start_date='2024-01-01') == filter_signature()
+    assert filter_signature(county='Erie') != filter_signature(county='Berks')
+
+
+def test_lru_eviction_by_entries_and_bytes():
+    cache = ResultCache(max_entries=2, max_bytes=100)
+    cache.set('a', np.arange(5))
+    cache.set('b', np.arange(5))
+    cache.get('a')
+    cache.set('c', np.arange(5))
+
+    assert cache.get('b') is None
+    assert cache.get('a') is not None
+    assert cache.stats()['evictions'] == 1
+
+    # 30 int32 positions are 120 bytes, more than the whole budget
+    big = cache.set('d', np.arange(30))
+    assert len(big) == 30
+    assert cache.get('d') is None
+
+
+def test_stored_rows_are_compact_and_read_only():
+    rows = ResultCache().set('a', np.arange(10, dtype=np.int64))
+
+    assert rows.dtype == np.int32
+    with pytest.raises(ValueError):
+        rows[0] = 1
+
+
+def test_cached_filter_row_ids_matches_uncached(tagged):
+    county = tagged['COUNTY_NAME'].value_counts().index[0]
+    cache = ResultCache()
+
+    first = cached_filter_row_ids(tagged, cache=cache, county=county, parameter='All Parameters')
+    second = cached_filter_row_ids(tagged, cache=cache, county=county)
+
+    np.testing.assert_array_equal(first, filter_row_ids(tagged, county=county))
+    assert second is first
+    assert cache.stats()['hits'] == 1
+
+
+def test_untagged_frames_are_not_cached(tagged):
+    cache = ResultCache()
+    subset = tagged.iloc[:100]
+
+    rows = cached_filter_row_ids(subset, cache=cache, severity='Critical')
+
+    np.testing.assert_array_equal(rows, filter_row_ids(subset, severity='Critical'))
+    assert len(cache) == 0
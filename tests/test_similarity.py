@@ -0,0 +1,69 @@
+"""
+Tests for the facility similarity index.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.similarity import FacilitySimilarityIndex
+
+
+@pytest.fixture
+def records():
+    """Small exceedance extract: two chlorine dischargers and one metals plant."""
+    rows = [
+        ('PA0001', 'Alpha STP', 'Erie', 'Chlorine', 'Moderate', '2024-01-15'),
+        ('PA0001', 'Alpha STP', 'Erie', 'Chlorine', 'Moderate', '2024-02-15'),
+        ('PA0001', 'Alpha STP', 'Erie', 'Ammonia', 'Minor', '2024-03-15'),
+        ('PA0002', 'Beta STP', 'Erie', 'Chlorine', 'Moderate', '2024-01-20'),
+        ('PA0002', 'Beta STP', 'Erie', 'Ammonia', 'Minor', '2024-02-20'),
+        ('PA0003', 'Gamma Metals', 'Allegheny', 'Lead', 'Critical', '2024-05-01'),
+        ('PA0003', 'Gamma Metals', 'Allegheny', 'Zinc', 'Critical', '2024-05-02'),
+        ('PA0004', 'Delta Works', 'Allegheny', 'Lead', 'Major', '2024-06-01'),
+    ]
+    columns = ['PERMIT_NUMBER', 'PF_NAME', 'COUNTY_NAME', 'PARAMETER', 'SEVERITY',
+               'NON_COMPLIANCE_DATE']
+    return pd.DataFrame(rows, columns=columns)
+
+
+def test_build_covers_every_permit(records):
+    index = FacilitySimilarityIndex.build(records)
+
+    assert len(index) == 4
+    assert list(index.permits) == ['PA0001', 'PA0002', 'PA0003', 'PA0004']
+    assert np.all(np.isfinite(index.vectors))
+    np.testing.assert_allclose(np.linalg.norm(index.vectors, axis=1), 1.0, rtol=1e-5)
+
+
+def test_query_ranks_similar_facilities_first(records):
+    index = FacilitySimilarityIndex.build(records)
+
+    neighbours = index.query('PA0001', k=3)
+
+    assert len(neighbours) == 3
+    assert 'PA0001' not in set(neighbours['PERMIT_NUMBER'])
+    assert neighbours['PERMIT_NUMBER'].iloc[0] == 'PA0002'
+    assert neighbours['SIMILARITY'].is_monotonic_decreasing
+
+
+def test_save_and_load_round_trip(records, tmp_path):
+    index = FacilitySimilarityIndex.build(records)
+    index.save(str(tmp_path))
+
+    loaded = FacilitySimilarityIndex.load(str(tmp_path))
+
+    pd.testing.assert_frame_equal(loaded.query('PA0003', k=2), index.query('PA0003', k=2))
+
+
+def test_build_on_normalized_categorical_parameters(records, prepared_records):
+    categorical = records.copy()
+    categorical['PARAMETER'] = categorical['PARAMETER'].astype('category')
+    categorical.loc[7, 'PARAMETER'] = np.nan
+
+    index = FacilitySimilarityIndex.build(categorical)
+    assert len(index) == 4
+    assert np.all(np.isfinite(index.vectors))
+
+    # The loaded extract stores PARAMETER as a categorical of canonical names
+    assert len(FacilitySimilarityIndex.build(prepared_records)) == prepared_records['PERMIT_NUMBER'].nunique()
@@ -0,0 +1,150 @@
+"""
+Tests for the SQLite subscription store.
+"""
+
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from utils.subscription_store import (
+    CSV_COLUMNS,
+    OPTION_COLUMNS,
+    SubscriptionStore,
+    format_facility_label,
+    get_subscription_store,
+    split_facility_label,
+)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SubscriptionStore(str(tmp_path / 'subscriptions.db'))
+
+
+def test_split_and_format_facility_label():
+    assert split_facility_label('Sewer Auth - North - PA0009 (Erie)') == ('Sewer Auth - North', 'PA0009', 'Erie')
+    assert split_facility_label('PA0009') == (None, 'PA0009', None)
+    assert format_facility_label('Sewer Auth - North', 'PA0009', 'Erie') == 'Sewer Auth - North - PA0009 (Erie)'
+    assert format_facility_label(None, 'PA0009', None) == 'PA0009'
+
+
+def test_add_subscription_and_active_permits(store):
+    assert store.is_empty()
+
+    first = store.add_subscription('a@example.com', ['Alpha - PA0001 (Erie)', 'PA0002', 'PA0002'], 'Daily')
+    store.add_subscription(' A@example.com ', ['PA0003'], 'Weekly')
+
+    assert not store.is_empty()
+    assert store.active_subscription_count() == 2
+
+    subscriptions = store.get_subscriptions('a@example.com')
+    assert list(subscriptions['facility_count']) == [2, 1]
+
+    store.set_status(first, 'paused')
+    active = store.active_permits()[['email', 'subscription_id', 'frequency', 'permit_number']]
+    assert active.to_dict('records') == [
+        {'email': 'a@example.com', 'subscription_id': 2, 'frequency': 'Weekly', 'permit_number': 'PA0003'},
+    ]
+
+    store.delete_subscription(first)
+    assert store.active_subscription_count() == 1
+    assert len(store.get_subscriptions('a@example.com')) == 1
+
+
+def test_csv_round_trip(store, tmp_path):
+    legacy = pd.DataFrame([
+        {'email': 'a@example.com', 'facilities': 'Alpha - PA0001 (Erie)|PA0002', 'frequency': 'Daily',
+         'created_date': '2024-01-01 08:00:00', 'status': 'active'},
+        {'email': 'b@example.com', 'facilities': 'Beta - PA0003 (Berks)', 'frequency': 'Weekly',
+         'created_date': '2024-02-01 08:00:00', 'status': 'paused'},
+    ], columns=CSV_COLUMNS)
+    legacy.to_csv(tmp_path / 'legacy.csv', index=False)
+
+    assert store.import_csv(str(tmp_path / 'legacy.csv')) == 2
+    assert store.import_csv(str(tmp_path / 'legacy.csv'), only_if_empty=True) == 0
+
+    assert store.export_csv(str(tmp_path / 'exported.csv')) == 2
+    exported = pd.read_csv(tmp_path / 'exported.csv', dtype=str)
+    pd.testing.assert_frame_equal(exported, legacy)
+
+
+def test_get_subscription_store_imports_legacy_csv_once(tmp_path):
+    legacy = tmp_path / 'email_subscriptions.csv'
+    pd.DataFrame([{'email': 'a@example.com', 'facilities': 'PA0001', 'frequency': 'Daily',
+                   'created_date': '2024-01-01 08:00:00', 'status': 'active'}]).to_csv(legacy, index=False)
+    db_path = str(tmp_path / 'subscriptions.db')
+
+    assert get_subscription_store(db_path, str(legacy)).active_subscription_count() == 1
+    assert get_subscription_store(db_path, str(legacy)).active_subscription_count() == 1
+
+
+def test_concurrent_writers_do_not_lose_subscriptions(store):
+    def subscribe(worker):
+        for i in range(10):
+            store.add_subscription(f'user{worker}@example.com', [f'PA{worker:02d}{i:02d}'], 'Daily')
+
+    threads = [threading.Thread(target=subscribe, args=(worker,)) for worker in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert store.active_subscription_count() == 40
+    assert store.active_permits()['permit_number'].nunique() == 40
+
+
+def test_alert_options_round_trip(store):
+    store.add_subscription('a@example.com', ['PA0001'], 'Daily', severities=['High', 'Critical'],
+                           parameters=['Zinc'], min_percent=50, include_csv=True)
+
+    row = store.active_permits().iloc[0]
+    assert row['severities'] == 'Critical|High'
+    assert row['parameters'] == 'Zinc'
+    assert row['min_percent'] == 50
+    assert (row['include_summary'], row['include_csv']) == (1, 1)
+
+
+def test_option_columns_are_added_to_old_databases(tmp_path):
+    path = str(tmp_path / 'subscriptions.db')
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        'CREATE TABLE subscriptions (id INTEGER PRIMARY KEY, subscriber_id INTEGER NOT NULL, '
+        "frequency TEXT NOT NULL, status TEXT NOT NULL DEFAULT 'active', created_date TEXT NOT NULL);"
+    )
+    conn.close()
+
+    # Several processes opening the old database at once must not add a column twice
+    errors = []
+
+    def open_store():
+        try:
+            SubscriptionStore(path)
+        except sqlite3.Error as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=open_store) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+    conn = sqlite3.connect(path)
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(subscriptions)')}
+    conn.close()
+    assert set(OPTION_COLUMNS) <= columns
+
+
+def test_opening_a_current_database_takes_no_write_lock(store):
+    writer = sqlite3.connect(store.path, isolation_level=None)
+    writer.execute('BEGIN IMMEDIATE')
+    try:
+        started = time.monotonic()
+        SubscriptionStore(store.path)
+        assert time.monotonic() - started < 5
+    finally:
+        writer.execute('ROLLBACK')
+        writer.close()
@@ -0,0 +1,305 @@
+"""
+Alert email rendering for PermitMinder.
+
+Alert emails are assembled from per-permit sections. Each section (HTML
+and plain text) is rendered once from precompiled templates and cached
+under the permit and the exceedances it lists, so a permit watched by many
+subscribers is rendered once per run and every email that includes it
+reuses the cached fragment. Only the short per-email parts (greeting,
+summary) are rendered for each subscriber.
+"""
+
+import html
+import threading
+from collections import OrderedDict
+from string import Template
+from typing import Dict, Hashable, Iterable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from permitminder.core.schema import SEVERITY_LEVELS
+
+DEFAULT_MAX_SECTIONS = 4096
+
+# Columns shown per exceedance: (record column, heading)
+ROW_COLUMNS = [
+    ('NON_COMPLIANCE_DATE', 'Date'),
+    ('PARAMETER', 'Parameter'),
+    ('SAMPLE_VALUE', 'Sample'),
+    ('PERMIT_VALUE', 'Limit'),
+    ('UNIT_OF_MEASURE', 'Unit'),
+    ('Percent_Over_Limit', '% Over'),
+    ('Severity', 'Severity'),
+]
+
+SEVERITY_COLORS = {
+    'Critical': '#c0392b',
+    'High': '#e67e22',
+    'Moderate': '#f1c40f',
+    'Low': '#27ae60',
+}
+
+SUBJECT = Template('PermitMinder alert: $count new exceedance$plural at $facilities facilit$facility_plural')
+
+EMAIL_HTML = Template("""\
+<html>
+<body style="font-family: Arial, sans-serif; color: #2c3e50;">
+<div style="background-color: #2c3e50; color: white; padding: 16px;">
+<h2 style="margin: 0;">PermitMinder Exceedance Alert</h2>
+</div>
+<p>$count new permit exceedance$plural at the facilities you monitor.</p>
+$summary$sections<p style="color: #666; font-size: 12px;">Data sourced from Pennsylvania DEP eDMR Public Records.
+You are receiving this email because $email subscribed to PermitMinder alerts.</p>
+</body>
+</html>
+""")
+
+EMAIL_TEXT = Template("""\
+PermitMinder Exceedance Alert
+
+$count new permit exceedance$plural at the facilities you monitor.
+
+$summary$sections--
+Data sourced from Pennsylvania DEP eDMR Public Records.
+You are receiving this email because $email subscribed to PermitMinder alerts.
+""")
+
+SUMMARY_HTML = Template("""\
+<table style="border-collapse: collapse; margin-bottom: 16px;">
+<tr><th style="text-align: left; padding: 4px 12px;">Severity</th><th style="padding: 4px 12px;">Exceedances</th></tr>
+$rows</table>
+""")
+SUMMARY_ROW_HTML = Template(
+    '<tr><td style="padding: 4px 12px; color: $color;">$severity</td>'
+    '<td style="padding: 4px 12px; text-align: right;">$count</td></tr>\n'
+)
+SUMMARY_TEXT = Template('Summary:\n$rows\n')
+SUMMARY_ROW_TEXT = Template('  $severity: $count\n')
+
+SECTION_HTML = Template("""\
+<h3 style="margin-bottom: 4px;">$facility</h3>
+<p style="margin-top: 0; color: #666;">Permit $permit &middot; $county County &middot; $count exceedance$plural</p>
+<table style="border-collapse: collapse; margin-bottom: 16px;">
+<tr>$headings</tr>
+$rows</table>
+""")
+SECTION_TEXT = Template("""\
+$facility
+Permit $permit - $county County - $count exceedance$plural
+$rows
+""")
+ROW_HTML = Template('<tr>$cells</tr>\n')
+CELL_HTML = Template('<td style="padding: 4px 8px; border-top: 1px solid #ddd;">$value</td>')
+HEADING_HTML = Template('<th style="text-align: left; padding: 4px 8px;">$value</th>')
+ROW_TEXT = Template('  $NON_COMPLIANCE_DATE  $PARAMETER: $SAMPLE_VALUE $UNIT_OF_MEASURE '
+                    '(limit $PERMIT_VALUE, $Percent_Over_Limit over) [$Severity]\n')
+
+HEADINGS_HTML = ''.join(HEADING_HTML.substitute(value=html.escape(heading)) for _, heading in ROW_COLUMNS)
+
+
+def _plural(count: int, singular: str = '', plural: str = 's') -> str:
+    """Suffix for ``count`` items."""
+    return singular if count == 1 else plural
+
+
+def _display_values(rows: pd.DataFrame) -> pd.DataFrame:
+    """ROW_COLUMNS of ``rows`` as display strings ('N/A' where missing, parsed dates as YYYY-MM-DD)."""
+    values = rows.reindex(columns=[col for col, _ in ROW_COLUMNS])
+    dates = values['NON_COMPLIANCE_DATE']
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        values['NON_COMPLIANCE_DATE'] = dates.dt.strftime('%Y-%m-%d')
+    return values.astype(object).where(values.notna(), 'N/A').astype(str)
+
+
+class AlertEmail:
+    """
+    A rendered alert email.
+
+    Args:
+        subject (str): Subject line.
+        text (str): Plain-text body.
+        html (str): HTML body.
+    """
+
+    def __init__(self, subject: str, text: str, html: str) -> None:
+        self.subject = subject
+        self.text = text
+        self.html = html
+
+
+class AlertRenderer:
+    """
+    Renders alert emails from cached per-permit sections.
+
+    Thread-safe; one renderer is shared by every email a sender renders, so
+    a long-running worker keeps sections across polls (bounded by
+    ``max_sections``).
+
+    Args:
+        max_sections (int, optional): Cached sections kept (least recently used
+                                      are dropped). Defaults to DEFAULT_MAX_SECTIONS.
+    """
+
+    def __init__(self, max_sections: int = DEFAULT_MAX_SECTIONS) -> None:
+        self.max_sections = max_sections
+        self._sections: 'OrderedDict[Hashable, Tuple[str, str]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.rendered = 0
+        self.reused = 0
+
+    def __len__(self) -> int:
+        return len(self._sections)
+
+    def _render_section(self, permit: str, rows: pd.DataFrame) -> Tuple[str, str]:
+        """HTML and text section for one permit's exceedances."""
+        values = _display_values(rows)
+        records = values.to_dict('records')
+        first = rows.iloc[0]
+        count = len(rows)
+        fields = {
+            'permit': permit,
+            'count': count,
+            'plural': _plural(count),
+        }
+        facility = str(first.get('PF_NAME', permit)) if pd.notna(first.get('PF_NAME')) else permit
+        county = str(first.get('COUNTY_NAME')) if pd.notna(first.get('COUNTY_NAME')) else 'Unknown'
+
+        html_rows = ''.join(
+            ROW_HTML.substitute(cells=''.join(CELL_HTML.substitute(value=html.escape(value)) for value in record.values()))
+            for record in records
+        )
+        text_rows = ''.join(ROW_TEXT.substitute(record) for record in records)
+        section_html = SECTION_HTML.substitute(
+            fields, facility=html.escape(facility), county=html.escape(county),
+            permit=html.escape(permit), headings=HEADINGS_HTML, rows=html_rows
+        )
+        section_text = SECTION_TEXT.substitute(fields, facility=facility, county=county, rows=text_rows)
+        return section_html, section_text
+
+    def section(
+        self,
+        permit: str,
+        exceedances: pd.DataFrame,
+        positions: np.ndarray,
+        key: Iterable[Hashable]
+    ) -> Tuple[str, str]:
+        """
+        Cached HTML and text section for one permit.
+
+        The rows are only sliced out of ``exceedances`` when the section is
+        not cached yet.
+
+        Args:
+            permit (str): Permit number.
+            exceedances (pd.DataFrame): The email's exceedances.
+            positions (np.ndarray): Positions of the permit's rows in ``exceedances``.
+            key (Iterable[Hashable]): Identity of the rows, e.g. their exceedance hashes.
+
+        Returns:
+            Tuple[str, str]: HTML and plain-text fragments.
+        """
+        cache_key = (permit, tuple(key))
+        with self._lock:
+            cached = self._sections.get(cache_key)
+            if cached is not None:
+                self._sections.move_to_end(cache_key)
+                self.reused += 1
+                return cached
+
+        fragments = self._render_section(permit, exceedances.iloc[positions])
+        with self._lock:
+            self._sections[cache_key] = fragments
+            self.rendered += 1
+            while len(self._sections) > self.max_sections:
+                self._sections.popitem(last=False)
+        return fragments
+
+    @staticmethod
+    def summary(exceedances: pd.DataFrame) -> Tuple[str, str]:
+        """
+        Severity counts for one email, as HTML and text.
+
+        Args:
+            exceedances (pd.DataFrame): The email's exceedances.
+
+        Returns:
+            Tuple[str, str]: HTML and plain-text summary.
+        """
+        severity = (exceedances['Severity'].fillna('Unknown').astype(str).to_numpy() if 'Severity' in exceedances.columns
+                    else np.full(len(exceedances), 'Unknown', dtype=object))
+        levels, level_counts = np.unique(severity, return_counts=True)
+        counts = dict(zip(levels.tolist(), level_counts.tolist()))
+        order = [level for level in SEVERITY_LEVELS if level in counts]
+        order += [level for level in levels.tolist() if level not in order]
+        html_rows = ''.join(
+            SUMMARY_ROW_HTML.substitute(
+                severity=html.escape(str(level)), count=counts[level], color=SEVERITY_COLORS.get(level, '#2c3e50')
+            )
+            for level in order
+        )
+        text_rows = ''.join(SUMMARY_ROW_TEXT.substitute(severity=level, count=counts[level]) for level in order)
+        return SUMMARY_HTML.substitute(rows=html_rows), SUMMARY_TEXT.substitute(rows=text_rows)
+
+    def render(
+        self,
+        email: str,
+        exceedances: pd.DataFrame,
+        include_summary: bool = True,
+        key_column: str = 'exceedance_hash'
+    ) -> AlertEmail:
+        """
+        Alert email for one subscriber.
+
+        Args:
+            email (str): Recipient address.
+            exceedances (pd.DataFrame): Exceedances to include.
+            include_summary (bool, optional): Add the severity summary. Defaults to True.
+            key_column (str, optional): Column identifying each row. Defaults to 'exceedance_hash'.
+
+        Returns:
+            AlertEmail: Subject, plain-text and HTML bodies.
+
+        Raises:
+            ValueError: If ``key_column`` is missing.
+        """
+        if key_column not in exceedances.columns:
+            # Sections are cached by these keys; positions would collide between emails
+            raise ValueError(f"Alert exceedances need a '{key_column}' column")
+
+        html_sections: List[str] = []
+        text_sections: List[str] = []
+        permits = exceedances['PERMIT_NUMBER'].astype(str).to_numpy()
+        keys = exceedances[key_column].to_numpy()
+        # Row positions per permit, in permit order
+        order = np.argsort(permits, kind='stable')
+        boundaries = np.flatnonzero(permits[order][1:] != permits[order][:-1]) + 1
+        for positions in (np.split(order, boundaries) if len(order) else []):
+            permit = permits[positions[0]]
+            section_html, section_text = self.section(permit, exceedances, positions, keys[positions])
+            html_sections.append(section_html)
+            text_sections.append(section_text)
+
+        count = len(exceedances)
+        facilities = len(html_sections)
+        fields = {'count': count, 'plural': _plural(count)}
+        summary_html, summary_text = self.summary(exceedances) if include_summary else ('', '')
+
+        return AlertEmail(
+            subject=SUBJECT.substitute(fields, facilities=facilities, facility_plural=_plural(facilities, 'y', 'ies')),
+            text=EMAIL_TEXT.substitute(fields, email=email, summary=summary_text, sections=''.join(text_sections)),
+            html=EMAIL_HTML.substitute(
+                fields, email=html.escape(email), summary=summary_html, sections=''.join(html_sections)
+            ),
+        )
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Section cache counters.
+
+        Returns:
+            Dict[str, int]: Sections rendered, sections reused and sections cached.
+        """
+        with self._lock:
+            return {'rendered': self.rendered, 'reused': self.reused, 'cached': len(self._sections)}
+
@@ -0,0 +1,223 @@
+"""
+Alert routing for PermitMinder email alerts.
+
+Decides which subscriptions receive which new exceedances. Exceedances are
+grouped by permit once; within each permit group every distinct set of
+subscription options (severities, parameters, minimum percent over the
+limit) is evaluated as one vectorized mask and the result shared by all
+subscriptions with those options. CSV attachments are built the same way:
+one fragment per permit group, reused by every email that includes it.
+"""
+
+from typing import Dict, FrozenSet, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from permitminder.core import calculate_severity, canonical_parameters, get_catalog, parse_percent
+from utils.subscription_store import split_values
+
+# Subscription options evaluated when routing
+RuleKey = Tuple[FrozenSet[str], FrozenSet[str], Optional[float]]
+
+# Columns written to CSV attachments, in order (missing ones are left blank)
+ATTACHMENT_COLUMNS = [
+    'PERMIT_NUMBER', 'PF_NAME', 'COUNTY_NAME', 'NON_COMPLIANCE_DATE', 'PARAMETER',
+    'SAMPLE_VALUE', 'PERMIT_VALUE', 'UNIT_OF_MEASURE', 'Percent_Over_Limit', 'Severity'
+]
+
+
+def _column(df: pd.DataFrame, name: str) -> Optional[pd.Series]:
+    """Column by name, ignoring case and spaces vs. underscores (raw extracts vary)."""
+    wanted = name.upper().replace(' ', '_')
+    for col in df.columns:
+        if str(col).upper().replace(' ', '_') == wanted:
+            return df[col]
+    return None
+
+
+def rule_key(severities: Optional[str], parameters: Optional[str], min_percent: Optional[float]) -> RuleKey:
+    """
+    Hashable form of a subscription's alert options.
+
+    Args:
+        severities (str, optional): Stored severity list (None for all).
+        parameters (str, optional): Stored parameter list (None for all).
+        min_percent (float, optional): Minimum percent over the limit (None or NaN for no minimum).
+
+    Returns:
+        RuleKey: (severities, canonical parameters, min_percent); empty sets mean no restriction.
+    """
+    minimum = None if min_percent is None or pd.isna(min_percent) else float(min_percent)
+    return frozenset(split_values(severities)), frozenset(canonical_parameters(split_values(parameters))), minimum
+
+
+class RoutingColumns:
+    """
+    The exceedance columns the alert options test, extracted once per batch.
+
+    Args:
+        exceedances (pd.DataFrame): New exceedance records (raw or standardized column names).
+    """
+
+    def __init__(self, exceedances: pd.DataFrame) -> None:
+        severity = _column(exceedances, 'SEVERITY')
+        percent = _column(exceedances, 'PERCENT_OVER_LIMIT')
+        parameter = _column(exceedances, 'PARAMETER')
+
+        if severity is None:
+            standardized = pd.DataFrame({'PERCENT_OVER_LIMIT': percent}) if percent is not None else exceedances.iloc[:, :0]
+            severity = calculate_severity(standardized)
+        self.severity = severity.astype(object).to_numpy()
+        if parameter is not None:
+            # Canonical names, so a subscription matches every spelling of its parameters
+            self.parameter = get_catalog().normalize_parameters(parameter).astype(object).to_numpy()
+        else:
+            self.parameter = np.full(len(exceedances), None, dtype=object)
+        self.percent = (parse_percent(percent)[0] if percent is not None
+                        else np.full(len(exceedances), np.nan))
+
+    def mask(self, rows: Optional[np.ndarray], rule: RuleKey) -> np.ndarray:
+        """
+        Which of ``rows`` pass a subscription's options.
+
+        Args:
+            rows (np.ndarray, optional): Row positions (one permit group); None for every row.
+            rule (RuleKey): Options from ``rule_key``.
+
+        Returns:
+            np.ndarray: Boolean mask aligned with ``rows``. Rows without a
+                        readable percent fail any minimum.
+        """
+        rows = slice(None) if rows is None else rows
+        severities, parameters, minimum = rule
+        keep = np.ones(len(self.severity[rows]), dtype=bool)
+        if severities:
+            keep &= np.isin(self.severity[rows], list(severities))
+        if parameters:
+            keep &= np.isin(self.parameter[rows], list(parameters))
+        if minimum is not None:
+            with np.errstate(invalid='ignore'):
+                keep &= self.percent[rows] >= minimum
+        return keep
+
+
+def route_exceedances(exceedances: pd.DataFrame, subscriptions: pd.DataFrame) -> pd.DataFrame:
+    """
+    Match new exceedances to the subscriptions that should be alerted.
+
+    Args:
+        exceedances (pd.DataFrame): New exceedance records.
+        subscriptions (pd.DataFrame): ``SubscriptionStore.active_permits()``.
+
+    Returns:
+        pd.DataFrame: ``row`` (position in ``exceedances``) and ``subscription_id``
+                      for every delivery, ordered by permit group.
+    """
+    empty = pd.DataFrame({'row': np.array([], dtype=np.int64), 'subscription_id': np.array([], dtype=np.int64)})
+    if exceedances.empty or subscriptions.empty:
+        return empty
+
+    permits = _column(exceedances, 'PERMIT_NUMBER').astype(str)
+    groups = permits.groupby(permits.to_numpy(), sort=False).indices
+
+    subscribers = subscriptions[subscriptions['permit_number'].isin(list(groups))]
+    if subscribers.empty:
+        return empty
+
+    columns = RoutingColumns(exceedances)
+    rules = [
+        rule_key(severities, parameters, min_percent)
+        for severities, parameters, min_percent in zip(
+            subscribers['severities'] if 'severities' in subscribers else [None] * len(subscribers),
+            subscribers['parameters'] if 'parameters' in subscribers else [None] * len(subscribers),
+            subscribers['min_percent'] if 'min_percent' in subscribers else [None] * len(subscribers),
+        )
+    ]
+
+    # permit -> rule -> subscriptions sharing it
+    by_permit: Dict[str, Dict[RuleKey, List[int]]] = {}
+    for permit, subscription_id, rule in zip(subscribers['permit_number'], subscribers['subscription_id'], rules):
+        by_permit.setdefault(permit, {}).setdefault(rule, []).append(int(subscription_id))
+
+    row_parts = []
+    subscription_parts = []
+    for permit, permit_rules in by_permit.items():
+        rows = groups[permit]
+        for rule, subscription_ids in permit_rules.items():
+            matched = rows[columns.mask(rows, rule)]
+            if len(matched):
+                row_parts.append(np.tile(matched, len(subscription_ids)))
+                subscription_parts.append(np.repeat(subscription_ids, len(matched)))
+
+    if not row_parts:
+        return empty
+    return pd.DataFrame({
+        'row': np.concatenate(row_parts).astype(np.int64),
+        'subscription_id': np.concatenate(subscription_parts).astype(np.int64),
+    })
+
+
+class CsvAttachments:
+    """
+    CSV attachments assembled from per-permit fragments.
+
+    Each permit group's rows are rendered to CSV once and reused by every
+    email that includes exactly those rows, so attachment work grows with
+    the number of permit groups rather than with subscribers.
+
+    Args:
+        columns (List[str], optional): Attachment columns. Defaults to ATTACHMENT_COLUMNS.
+    """
+
+    def __init__(self, columns: Optional[List[str]] = None) -> None:
+        self.columns = columns or ATTACHMENT_COLUMNS
+        self._fragments: Dict[Hashable, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._fragments)
+
+    def fragment(self, permit: str, rows: pd.DataFrame, key: Iterable[Hashable]) -> str:
+        """
+        CSV lines (without header) for one permit group.
+
+        Args:
+            permit (str): Permit number.
+            rows (pd.DataFrame): The group's exceedances.
+            key (Iterable[Hashable]): Identity of the rows, e.g. their exceedance hashes.
+
+        Returns:
+            str: The rendered rows.
+        """
+        cache_key = (permit, tuple(key))
+        fragment = self._fragments.get(cache_key)
+        if fragment is None:
+            fragment = rows.reindex(columns=self.columns).to_csv(index=False, header=False)
+            self._fragments[cache_key] = fragment
+        return fragment
+
+    def build(self, exceedances: pd.DataFrame, key_column: str = 'exceedance_hash') -> bytes:
+        """
+        CSV attachment for one email.
+
+        Args:
+            exceedances (pd.DataFrame): The email's exceedances, with ``key_column``.
+            key_column (str, optional): Column identifying each row. Defaults to 'exceedance_hash'.
+
+        Returns:
+            bytes: UTF-8 CSV with a header row and one block per permit.
+
+        Raises:
+            ValueError: If ``key_column`` is missing.
+        """
+        if key_column not in exceedances.columns:
+            # Fragments are cached by these keys; positions would collide between emails
+            raise ValueError(f"Attachment exceedances need a '{key_column}' column")
+
+        header = ','.join(self.columns) + '\n'
+        if exceedances.empty:
+            return header.encode()
+        parts = [header]
+        for permit, rows in exceedances.groupby('PERMIT_NUMBER', sort=True):
+            parts.append(self.fragment(str(permit), rows, rows[key_column]))
+        return ''.join(parts).encode()
@@ -0,0 +1,230 @@
+"""
+Alert worker for PermitMinder email alerts.
+
+Consumes the exceedance event log continuously. New events are routed
+through each subscription's alert options into the digest queue, and the
+worker's log position is saved in the same transaction. Then every digest
+that is due is sent. Immediate subscriptions are due on every poll, so their
+alerts go out within one poll interval of an extract landing; daily, weekly
+and monthly digests go out when their window rolls over.
+
+Delivery is at-least-once. Digests are acknowledged only after a successful
+send. Each email carries an idempotency key that is passed to the sender
+and logged with the acknowledgement. If a send is retried, the key is the
+same, so a mail relay (or the ``Outbox`` stand-in) can drop the copy, and
+other workers skip digests that were already delivered.
+
+Run ``python -m utils.alert_worker`` alongside the nightly job. The
+``--outbox DIR`` option writes emails to a directory instead of sending
+them, as a local stand-in for SMTP.
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+from utils.alert_routing import CsvAttachments, route_exceedances
+from utils.digest_queue import Digest, DigestQueue, delivery_key, get_digest_queue
+from utils.event_log import EventLog, get_event_log
+
+DEFAULT_CONSUMER = 'alert_worker'
+DEFAULT_POLL_SECONDS = 60
+DEFAULT_BATCH_SIZE = 10_000
+
+# Sends one alert email: (email, exceedances, CSV attachment or None, idempotency key) -> sent?
+# Also called with include_summary=<bool> (whether to add the severity summary).
+Sender = Callable[..., bool]
+
+
+class Outbox:
+    """
+    Sender that keeps emails instead of sending them (a local stand-in for SMTP).
+
+    Emails are stored by idempotency key, so a redelivered email replaces
+    the earlier copy, as a deduplicating mail relay would.
+
+    Args:
+        directory (str, optional): Also write each email as JSON (and its CSV) here.
+    """
+
+    def __init__(self, directory: Optional[str] = None) -> None:
+        self.directory = directory
+        self.messages: Dict[str, Dict] = {}
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def __call__(
+        self,
+        email: str,
+        exceedances: pd.DataFrame,
+        attachment: Optional[bytes] = None,
+        idempotency_key: str = '',
+        include_summary: bool = True
+    ) -> bool:
+        message = {
+            'email': email,
+            'idempotency_key': idempotency_key,
+            'include_summary': include_summary,
+            'sent_at': datetime.now().isoformat(timespec='seconds'),
+            'exceedances': json.loads(exceedances.to_json(orient='records', date_format='iso')),
+        }
+        self.messages[idempotency_key or str(len(self.messages))] = {**message, 'attachment': attachment}
+        if self.directory:
+            name = idempotency_key or f"{len(self.messages):06d}"
+            with open(os.path.join(self.directory, f'{name}.json'), 'w') as f:
+                json.dump(message, f, indent=2)
+            if attachment is not None:
+                with open(os.path.join(self.directory, f'{name}.csv'), 'wb') as f:
+                    f.write(attachment)
+        return True
+
+
+class AlertWorker:
+    """
+    Moves events from the event log to the digest queue and sends due digests.
+
+    Args:
+        send (Sender): Sends one email; returns True once it is delivered.
+        queue (DigestQueue, optional): Digest queue. Defaults to the shared database.
+        events (EventLog, optional): Event log. Defaults to the shared database.
+        consumer (str, optional): Name the log position is saved under. Defaults to DEFAULT_CONSUMER.
+        batch_size (int, optional): Events routed per transaction. Defaults to DEFAULT_BATCH_SIZE.
+    """
+
+    def __init__(
+        self,
+        send: Sender,
+        queue: Optional[DigestQueue] = None,
+        events: Optional[EventLog] = None,
+        consumer: str = DEFAULT_CONSUMER,
+        batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> None:
+        self.send = send
+        self.queue = queue or get_digest_queue()
+        self.events = events or get_event_log(self.queue.path)
+        self.consumer = consumer
+        self.batch_size = batch_size
+
+    def consume(self, now: Optional[datetime] = None) -> int:
+        """
+        Route every unread event into the digest queue.
+
+        Args:
+            now (datetime, optional): Queue time. Defaults to the current time.
+
+        Returns:
+            int: Number of events read.
+        """
+        read = 0
+        position = self.queue.position(self.consumer)
+        while True:
+            events = self.events.read(after=position, limit=self.batch_size)
+            if events.empty:
+                return read
+            position = int(events['position'].iloc[-1])
+            routes = route_exceedances(events, self.queue.active_permits())
+            self.queue.enqueue(events, routes, now, checkpoint=(self.consumer, position))
+            read += len(events)
+
+    def flush(self, now: Optional[datetime] = None) -> int:
+        """
+        Send every digest that is due, one email per address.
+
+        Args:
+            now (datetime, optional): Current time. Defaults to the current time.
+
+        Returns:
+            int: Number of emails sent.
+        """
+        by_email: Dict[str, List[Digest]] = {}
+        for digest in self.queue.due_digests(now):
+            by_email.setdefault(digest.email.lower(), []).append(digest)
+
+        # CSV rows are rendered once per permit group and shared between emails
+        attachments = CsvAttachments()
+        sent = 0
+        for digests in by_email.values():
+            key = delivery_key(digests)
+            if self.queue.delivered(key):
+                # Another worker (e.g. the nightly job) sent these meanwhile
+                continue
+
+            exceedances = pd.concat([digest.exceedances for digest in digests], ignore_index=True)
+            exceedances = exceedances.drop_duplicates('exceedance_hash')
+            attachment = attachments.build(exceedances) if any(digest.include_csv for digest in digests) else None
+            include_summary = any(digest.include_summary for digest in digests)
+
+            try:
+                delivered = self.send(digests[0].email, exceedances, attachment, key, include_summary=include_summary)
+            except Exception as e:
+                print(f"Error sending alert to {digests[0].email}: {e}")
+                delivered = False
+
+            # Failed sends stay queued and are retried on the next poll
+            if delivered:
+                self.queue.record_delivery(digests, key, now)
+                sent += 1
+        return sent
+
+    def run_once(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Consume new events, prune old consumed ones, then send due digests.
+
+        Args:
+            now (datetime, optional): Current time. Defaults to the current time.
+
+        Returns:
+            Dict[str, int]: Events consumed, events pruned and emails sent.
+        """
+        consumed = self.consume(now)
+        # Positions are checkpointed, so events every consumer has queued can go once they are old
+        pruned = self.events.prune(self.queue.consumed_position(), now)
+        sent = self.flush(now)
+        return {'consumed': consumed, 'pruned': pruned, 'sent': sent}
+
+    def run_forever(self, poll_seconds: float = DEFAULT_POLL_SECONDS, stop: Optional[threading.Event] = None) -> None:
+        """
+        Poll the event log until ``stop`` is set.
+
+        Args:
+            poll_seconds (float, optional): Seconds between polls. Defaults to DEFAULT_POLL_SECONDS.
+            stop (threading.Event, optional): Set to stop the loop after the current poll.
+        """
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            started = time.monotonic()
+            result = self.run_once()
+            if result['consumed'] or result['sent']:
+                print(f"{datetime.now():%Y-%m-%d %H:%M:%S} consumed {result['consumed']} events, sent {result['sent']} emails")
+            stop.wait(max(0.0, poll_seconds - (time.monotonic() - started)))
+
+
+def main() -> None:
+    """Run the alert worker from the command line."""
+    parser = argparse.ArgumentParser(description='PermitMinder alert worker')
+    parser.add_argument('--once', action='store_true', help='Poll once and exit')
+    parser.add_argument('--interval', type=float, default=DEFAULT_POLL_SECONDS, help='Seconds between polls')
+    parser.add_argument('--outbox', help='Write emails to this directory instead of sending them')
+    args = parser.parse_args()
+
+    if args.outbox:
+        send = Outbox(args.outbox)
+    else:
+        from check_new_exceedances import DailyAlertSystem
+        send = DailyAlertSystem(os.environ.get('GMAIL_EMAIL'), os.environ.get('GMAIL_PASSWORD')).send_exceedance_alert
+
+    worker = AlertWorker(send)
+    if args.once:
+        print(worker.run_once())
+    else:
+        worker.run_forever(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -44,7 +44,8 @@ class PermitCharts:
         """
         # Prepare data for trend analysis
         df['MONTH'] = pd.to_datetime(df['NON_COMPLIANCE_DATE']).dt.to_period('M')
-        grouped = df.groupby(['MONTH', 'PARAMETER'])['PERCENT_OVER_LIMIT'].mean().reset_index()
+        # PARAMETER holds canonical category codes, so spelling variants share a line
+        grouped = df.groupby(['MONTH', 'PARAMETER'], observed=True)['PERCENT_OVER_LIMIT'].mean().reset_index()
         grouped['MONTH'] = grouped['MONTH'].astype(str)
 
         fig = px.line(
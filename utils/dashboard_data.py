@@ -0,0 +1,234 @@
+"""
+Dashboard data layer for PermitMinder application.
+
+Precomputes per-permit, day-bucketed exceedance counts and each permit's most
+recent records once per dataset, so the monitoring dashboard only touches the
+permits a user actually watches. Permits are grouped into resolved facilities
+(FACILITY_ID), so watching one permit of a facility covers all of its permits.
+"""
+
+from datetime import date
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.entity_resolution import FACILITY_ID_COLUMN, resolve_facilities
+from utils.subscription_store import FACILITY_LABEL_PATTERN
+
+# Number of most recent records kept per permit for the "Recent Exceedances" list
+RECENT_PER_PERMIT = 10
+
+
+def parse_facility_label(label: str) -> Optional[str]:
+    """
+    Extract the permit number from a "NAME - PERMIT (COUNTY)" facility label.
+
+    Args:
+        label (str): Facility display label, or a bare permit number.
+
+    Returns:
+        Optional[str]: Permit number, or None if the label is empty.
+    """
+    label = str(label).strip()
+    if not label:
+        return None
+
+    match = FACILITY_LABEL_PATTERN.search(label)
+    return match.group('permit') if match else label
+
+
+def _first_column(df: pd.DataFrame, *candidates: str) -> Optional[str]:
+    """Return the first candidate column present in the DataFrame."""
+    for column in candidates:
+        if column in df.columns:
+            return column
+    return None
+
+
+class DashboardData:
+    """
+    Per-permit exceedance buckets built once per dataset.
+
+    Permits are addressed by integer ids (positions in ``permits``); the
+    dashboard resolves subscriptions to ids once and then only reads the
+    precomputed arrays for those ids.
+    """
+
+    def __init__(self, df: pd.DataFrame) -> None:
+        self.df = df.reset_index(drop=True)
+        self.severity_column = _first_column(self.df, 'SEVERITY', 'Severity')
+        self.percent_column = _first_column(self.df, 'PERCENT_OVER_LIMIT', 'Percent_Over_Limit')
+
+        codes, permits = pd.factorize(self.df['PERMIT_NUMBER'].astype(str))
+        self.permits = np.asarray(permits, dtype=object)
+        self.permit_ids: Dict[str, int] = {permit: i for i, permit in enumerate(self.permits)}
+        n_permits = len(self.permits)
+
+        # Parse dates once; NaT sorts as the oldest possible day
+        days = pd.to_datetime(self.df['NON_COMPLIANCE_DATE'], errors='coerce').to_numpy(dtype='datetime64[D]')
+        self.dates = days
+        day_numbers = days.astype(np.int64)
+        day_numbers[np.isnat(days)] = np.iinfo(np.int64).min + 1
+
+        # Day buckets: (day, permit) -> count, sorted by day
+        valid = ~np.isnat(days)
+        buckets = pd.DataFrame({'day': day_numbers[valid], 'permit': codes[valid]}).groupby(['day', 'permit']).size()
+        self._bucket_days = buckets.index.get_level_values('day').to_numpy()
+        self._bucket_permits = buckets.index.get_level_values('permit').to_numpy()
+        self._bucket_counts = buckets.to_numpy()
+        self._window_cache: Dict[Tuple[int, date], np.ndarray] = {}
+
+        # Rows grouped by permit, newest first within each permit
+        self._order = np.lexsort((-day_numbers, codes))
+        sorted_codes = codes[self._order]
+        self._starts = np.searchsorted(sorted_codes, np.arange(n_permits), side='left')
+        self._ends = np.searchsorted(sorted_codes, np.arange(n_permits), side='right')
+
+        first_rows = self._order[self._starts] if n_permits else np.array([], dtype=np.int64)
+        self.facility_names = self.df['PF_NAME'].to_numpy()[first_rows]
+        self.counties = self.df['COUNTY_NAME'].to_numpy()[first_rows]
+
+        # Resolved facility of every permit, and the permits of every facility
+        facility_ids = (self.df[FACILITY_ID_COLUMN].to_numpy() if FACILITY_ID_COLUMN in self.df.columns
+                        else resolve_facilities(self.df))
+        self.permit_facilities = facility_ids[first_rows].astype(np.int64)
+        self._facility_order = np.argsort(self.permit_facilities, kind='stable')
+        self._facility_sorted = self.permit_facilities[self._facility_order]
+
+    def resolve_permits(self, labels: Iterable[str]) -> np.ndarray:
+        """
+        Map facility labels or permit numbers to permit ids.
+
+        Args:
+            labels (Iterable[str]): "NAME - PERMIT (COUNTY)" labels or permit numbers.
+
+        Returns:
+            np.ndarray: Sorted unique permit ids; unknown permits are dropped.
+        """
+        ids = {
+            self.permit_ids[permit]
+            for permit in (parse_facility_label(label) for label in labels)
+            if permit in self.permit_ids
+        }
+        return np.array(sorted(ids), dtype=np.int64)
+
+    def facility_permits(self, permit_ids: np.ndarray) -> np.ndarray:
+        """
+        Expand permit ids to every permit of the same resolved facilities.
+
+        Args:
+            permit_ids (np.ndarray): Permit ids from ``resolve_permits``.
+
+        Returns:
+            np.ndarray: Sorted unique permit ids, including sibling permits.
+        """
+        facilities = np.unique(self.permit_facilities[permit_ids])
+        starts = np.searchsorted(self._facility_sorted, facilities, side='left')
+        ends = np.searchsorted(self._facility_sorted, facilities, side='right')
+        slices = [self._facility_order[start:end] for start, end in zip(starts, ends)]
+        return np.unique(np.concatenate(slices)) if slices else np.array([], dtype=np.int64)
+
+    def facility_count(self, permit_ids: np.ndarray) -> int:
+        """
+        Number of distinct resolved facilities among a set of permits.
+
+        Args:
+            permit_ids (np.ndarray): Permit ids from ``resolve_permits``.
+
+        Returns:
+            int: Number of facilities.
+        """
+        return len(np.unique(self.permit_facilities[permit_ids]))
+
+    def window_counts(self, days: int, today: Optional[date] = None) -> np.ndarray:
+        """
+        Exceedance counts per permit for the last ``days`` days.
+
+        Args:
+            days (int): Window length in days.
+            today (date, optional): End of the window. Defaults to today.
+
+        Returns:
+            np.ndarray: Count for every permit id.
+        """
+        today = today or date.today()
+        key = (days, today)
+        if key not in self._window_cache:
+            cutoff = (np.datetime64(today, 'D') - np.timedelta64(days, 'D')).astype(np.int64)
+            start = np.searchsorted(self._bucket_days, cutoff, side='left')
+            self._window_cache[key] = np.bincount(
+                self._bucket_permits[start:],
+                weights=self._bucket_counts[start:],
+                minlength=len(self.permits)
+            ).astype(np.int64)
+        return self._window_cache[key]
+
+    def recent_count(self, permit_ids: np.ndarray, days: int) -> int:
+        """
+        Total exceedances for a set of permits in the last ``days`` days.
+
+        Args:
+            permit_ids (np.ndarray): Permit ids from ``resolve_permits``.
+            days (int): Window length in days.
+
+        Returns:
+            int: Number of exceedances in the window.
+        """
+        return int(self.window_counts(days)[permit_ids].sum())
+
+    def _rows_for(self, permit_ids: np.ndarray, limit: Optional[int] = None) -> np.ndarray:
+        """Row positions for the given permits, optionally the newest ``limit`` per permit."""
+        slices = [
+            self._order[start:end if limit is None else min(end, start + limit)]
+            for start, end in zip(self._starts[permit_ids], self._ends[permit_ids])
+        ]
+        return np.concatenate(slices) if slices else np.array([], dtype=np.int64)
+
+    def recent_exceedances(self, permit_ids: np.ndarray, n: int = RECENT_PER_PERMIT) -> pd.DataFrame:
+        """
+        Most recent exceedance records across a set of permits.
+
+        Args:
+            permit_ids (np.ndarray): Permit ids from ``resolve_permits``.
+            n (int, optional): Number of records. Defaults to RECENT_PER_PERMIT.
+
+        Returns:
+            pd.DataFrame: Up to ``n`` records, newest first, with a parsed 'Date' column.
+        """
+        candidates = self._rows_for(permit_ids, limit=n)
+        candidates = candidates[~np.isnat(self.dates[candidates])]
+        newest = candidates[np.argsort(self.dates[candidates])[::-1][:n]]
+
+        recent = self.df.iloc[newest].copy()
+        recent['Date'] = pd.to_datetime(self.dates[newest])
+        return recent
+
+    def exceedances_for(self, permit_ids: np.ndarray) -> pd.DataFrame:
+        """
+        All exceedance records for a set of permits.
+
+        Args:
+            permit_ids (np.ndarray): Permit ids from ``resolve_permits``.
+
+        Returns:
+            pd.DataFrame: Matching records, grouped by permit.
+        """
+        return self.df.iloc[self._rows_for(permit_ids)]
+
+    def facilities(self, permit_ids: np.ndarray) -> pd.DataFrame:
+        """
+        Facility id, name and county for a set of permits.
+
+        Args:
+            permit_ids (np.ndarray): Permit ids from ``resolve_permits``.
+
+        Returns:
+            pd.DataFrame: PERMIT_NUMBER, FACILITY_ID, PF_NAME and COUNTY_NAME per permit.
+        """
+        return pd.DataFrame({
+            'PERMIT_NUMBER': self.permits[permit_ids],
+            FACILITY_ID_COLUMN: self.permit_facilities[permit_ids],
+            'PF_NAME': self.facility_names[permit_ids],
+            'COUNTY_NAME': self.counties[permit_ids],
+        })
@@ -9,6 +9,8 @@ import pandas as pd
 from st_aggrid import AgGrid, GridOptionsBuilder, JsCode
 from typing import Optional, List, Dict, Any
 
+from permitminder.core import arrow
+
 class PermitDataTables:
     @staticmethod
     def interactive_permit_table(
@@ -101,7 +103,7 @@ class PermitDataTables:
         # Export format selection
         export_format = st.sidebar.selectbox(
             "Select Export Format", 
-            ["CSV", "Excel", "JSON"]
+            ["CSV", "Excel", "JSON", "Parquet", "Arrow"]
         )
         
         # Export filters
@@ -126,6 +128,22 @@ class PermitDataTables:
                         file_name="permit_exceedances.csv",
                         mime="text/csv"
                     )
+                elif export_format in ("Parquet", "Arrow"):
+                    # Binary formats are sliced from the shared Arrow table, no text conversion
+                    schema = arrow.result_schema(df, export_columns)
+                    batches = arrow.result_batches(df, columns=export_columns)
+                    if export_format == "Parquet":
+                        data = arrow.parquet_bytes(batches, schema)
+                        file_name, mime = "permit_exceedances.parquet", arrow.PARQUET_TYPE
+                    else:
+                        data = arrow.ipc_bytes(batches, schema)
+                        file_name, mime = "permit_exceedances.arrows", arrow.ARROW_STREAM_TYPE
+                    st.download_button(
+                        label=f"Download {export_format}",
+                        data=data,
+                        file_name=file_name,
+                        mime=mime
+                    )
                 elif export_format == "Excel":
                     excel = export_df.to_excel(index=False)
                     st.download_button(
@@ -1,14 +1,22 @@
 """
 Database utility functions for PermitMinder application.
 
-Handles data loading, processing, and basic query operations for permit exceedance records.
+Streamlit adapters over the ``permitminder.core`` data layer: cached data
+loading, filtering and query helpers for the app pages, with problems
+reported through ``st.error`` / ``st.warning``.
 """
 
 import os
 import streamlit as st
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
+from datetime import datetime
+from typing import Iterable, Optional, List
+
+from permitminder.core import aggregation, loading, result_cache
+from permitminder.core.backends import LoggingReporter, NullCache, Reporter
+from permitminder.core.filtering import Values
+from permitminder.core.query import Clause
 
 def find_csv_files(base_dir: Optional[str] = None) -> List[str]:
     """
@@ -50,6 +58,28 @@ def find_csv_files(base_dir: Optional[str] = None) -> List[str]:
 
     return matching_files
 
+class StreamlitReporter(Reporter):
+    """Reporter that shows core data layer problems in the Streamlit page."""
+
+    def __init__(self) -> None:
+        self._log = LoggingReporter()
+
+    def info(self, message: str) -> None:
+        self._log.info(message)
+
+    def warning(self, message: str) -> None:
+        st.warning(message)
+
+    def error(self, message: str) -> None:
+        st.error(message)
+
+@st.cache_data
+def _cached_load_data(path: str, version: str) -> pd.DataFrame:
+    """
+    Load one data file; cached per path and file version.
+    """
+    return loading.load_exceedances(path, cache=NullCache(), reporter=StreamlitReporter())
+
 def load_data(
     primary_file: Optional[str] = None,
     backup_file: Optional[str] = None
@@ -64,189 +94,63 @@ def load_data(
     Returns:
         pd.DataFrame: Loaded and processed DataFrame of permit exceedances.
     """
-    @st.cache_data
-    def _cached_load_data(path: str) -> pd.DataFrame:
-        """
-        Internal cached function to load data with additional processing.
-        """
-        try:
-            # Load the raw data
-            df = pd.read_csv(path)
-
-            # Standardize column names
-            df.columns = [col.upper().replace(' ', '_') for col in df.columns]
-
-            # Ensure key columns exist
-            _ensure_columns(df)
+    path = loading.find_data_file([primary_file, backup_file])
 
-            # Date parsing with error handling
-            date_columns = ['NON_COMPLIANCE_DATE', 'MONITORING_PERIOD_END_DATE']
-            for col in date_columns:
-                if col in df.columns:
-                    df[col] = pd.to_datetime(df[col], errors='coerce')
+    if path is None:
+        st.error("Could not find pa_exceedances_launch_ready.csv in any expected location!")
+        st.error(f"Searched in: {loading.candidate_paths([primary_file, backup_file])}")
+        return pd.DataFrame()
 
-            # Calculate severity
-            df['SEVERITY'] = _calculate_severity(df)
+    print(f"Loading data from: {path}")
+    return _cached_load_data(path, loading.dataset_version(path))
 
-            return df
-
-        except Exception as e:
-            st.error(f"Error loading data from {path}: {e}")
-            return pd.DataFrame()
-
-    # SIMPLIFIED PATH LOGIC FOR DEPLOYMENT
-    possible_paths = [
-        'pa_exceedances_launch_ready.csv',  # Root directory
-        'archive_2025_09_06_before_refactor/pa_exceedances_launch_ready.csv',  # Archive folder
-        'Launch_Ready/pa_exceedances_launch_ready.csv',  # Launch_Ready folder
-        primary_file,  # Custom path if provided
-        backup_file  # Backup path if provided
-    ]
-    
-    # Try each path
-    for path in possible_paths:
-        if path and os.path.exists(path):
-            print(f"Loading data from: {path}")
-            return _cached_load_data(path)
-    
-    # If no file found, show error
-    st.error("Could not find pa_exceedances_launch_ready.csv in any expected location!")
-    st.error(f"Searched in: {possible_paths}")
-    return pd.DataFrame()
-
-def _ensure_columns(df: pd.DataFrame) -> None:
+def filter_row_ids(df: pd.DataFrame, **filters) -> np.ndarray:
     """
-    Ensure critical columns exist in the DataFrame.
+    Row positions of records matching the search filters.
 
     Args:
-        df (pd.DataFrame): Input DataFrame to check and potentially modify.
-    """
-    # List of columns that should always be present
-    critical_columns = [
-        'PERMIT_NUMBER', 
-        'PF_NAME', 
-        'COUNTY_NAME', 
-        'PARAMETER', 
-        'NON_COMPLIANCE_DATE'
-    ]
-
-    # Add missing columns with default values
-    for col in critical_columns:
-        if col not in df.columns:
-            st.warning(f"Column {col} not found. Adding with default values.")
-            if 'DATE' in col:
-                df[col] = pd.NaT
-            else:
-                df[col] = 'Unknown'
-
-def _calculate_severity(df: pd.DataFrame) -> pd.Series:
-    """
-    Calculate severity based on percentage over limit.
-
-    Args:
-        df (pd.DataFrame): Input DataFrame with exceedance data.
+        df (pd.DataFrame): Exceedance records from ``load_data``.
+        **filters: Keyword filters accepted by ``filter_exceedances``.
 
     Returns:
-        pd.Series: Series of severity classifications.
+        np.ndarray: Sorted row positions into ``df``, shared through the
+                    result cache so the results table and the facet panel
+                    use one filter pass.
     """
-    def determine_severity(row: pd.Series) -> str:
-        """
-        Determine severity for a single row.
-
-        Args:
-            row (pd.Series): Single row of exceedance data.
-
-        Returns:
-            str: Severity level (Critical, High, Moderate, Low)
-        """
-        try:
-            # Attempt to get percentage over limit
-            if 'PERCENT_OVER_LIMIT' not in row.index:
-                return 'Moderate'
-
-            percent_over = row.get('PERCENT_OVER_LIMIT', 0)
-
-            # Handle string percentages
-            if isinstance(percent_over, str):
-                try:
-                    percent_over = float(percent_over.rstrip('%'))
-                except (ValueError, TypeError):
-                    return 'Moderate'
-
-            # Severity calculation
-            if percent_over > 200:
-                return 'Critical'
-            elif percent_over > 100:
-                return 'High'
-            elif percent_over > 50:
-                return 'Moderate'
-            else:
-                return 'Low'
-
-        except Exception:
-            return 'Moderate'  # Default to moderate if any calculation fails
-
-    return df.apply(determine_severity, axis=1)
+    return result_cache.cached_filter_row_ids(df, **filters)
 
 def filter_exceedances(
     df: pd.DataFrame, 
-    county: Optional[str] = None,
-    facility: Optional[str] = None,
-    parameter: Optional[str] = None,
+    county: Optional[Values] = None,
+    facility: Optional[Values] = None,
+    parameter: Optional[Values] = None,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
-    severity: Optional[str] = None
+    severity: Optional[Values] = None,
+    conditions: Iterable[Clause] = ()
 ) -> pd.DataFrame:
     """
-    Apply advanced filtering to exceedance records with detailed logging.
-    """
-    # Initial DataFrame size
-    initial_size = len(df)
-    
-    # Detailed logging of input parameters
-    st.write("Filtering Parameters:")
-    st.write(f"Total initial records: {initial_size}")
-    st.write(f"County filter: {county}")
-    st.write(f"Facility filter: {facility}")
-    st.write(f"Parameter filter: {parameter}")
-    st.write(f"Start Date: {start_date}")
-    st.write(f"End Date: {end_date}")
-    st.write(f"Severity filter: {severity}")
-
-    # Create a copy of the DataFrame
-    filtered_df = df.copy()
+    Apply the search filters to exceedance records.
 
-    # County filter
-    if county and county != 'All County Names':
-        filtered_df = filtered_df[filtered_df['COUNTY_NAME'] == county]
-        st.write(f"Records after county filter: {len(filtered_df)}")
-
-    # Facility name filter
-    if facility:
-        filtered_df = filtered_df[
-            filtered_df['PF_NAME'].str.contains(facility, case=False, na=False)
-        ]
-        st.write(f"Records after facility filter: {len(filtered_df)}")
-
-    # Parameter filter
-    if parameter and parameter != 'All Parameters':
-        filtered_df = filtered_df[filtered_df['PARAMETER'] == parameter]
-        st.write(f"Records after parameter filter: {len(filtered_df)}")
-
-    # Date range filter
-    if start_date and end_date:
-        filtered_df = filtered_df[
-            (filtered_df['NON_COMPLIANCE_DATE'] >= start_date) & 
-            (filtered_df['NON_COMPLIANCE_DATE'] <= end_date)
-        ]
-        st.write(f"Records after date filter: {len(filtered_df)}")
-
-    # Severity filter
-    if severity and severity != 'All Severities':
-        filtered_df = filtered_df[filtered_df['SEVERITY'] == severity]
-        st.write(f"Records after severity filter: {len(filtered_df)}")
+    Args:
+        df (pd.DataFrame): Exceedance records from ``load_data``.
+        county (str or List[str], optional): County name(s).
+        facility (str or List[str], optional): Case-insensitive substring(s) of the facility name.
+        parameter (str or List[str], optional): Parameter name(s).
+        start_date (datetime, optional): First date (inclusive).
+        end_date (datetime, optional): Last date (inclusive).
+        severity (str or List[str], optional): Severity level(s).
+        conditions (Iterable[Clause], optional): Extra query clauses, e.g. exclusions.
 
-    return filtered_df
+    Returns:
+        pd.DataFrame: Matching records. Reruns with an equivalent search reuse
+                      the cached row positions instead of filtering again.
+    """
+    rows = result_cache.cached_filter_row_ids(
+        df, county=county, facility=facility, parameter=parameter,
+        start_date=start_date, end_date=end_date, severity=severity, conditions=conditions
+    )
+    return df.take(rows)
 
 def get_unique_values(
     df: pd.DataFrame, 
@@ -264,16 +168,4 @@ def get_unique_values(
     Returns:
         List[str]: List of unique values, optionally including 'All' option.
     """
-    # Ensure column exists
-    if column not in df.columns:
-        st.warning(f"Column {column} not found in DataFrame")
-        return ['All Columns']
-
-    unique_values = df[column].dropna().unique().tolist()
-    unique_values.sort()
-
-    if include_all:
-        all_prefix = 'All ' + column.replace('_', ' ').title()
-        unique_values.insert(0, all_prefix)
-
-    return unique_values
\ No newline at end of file
+    return aggregation.unique_values(df, column, include_all=include_all, reporter=StreamlitReporter())
@@ -0,0 +1,559 @@
+"""
+Digest queue for PermitMinder email alerts.
+
+New exceedances are queued per subscription as they are detected and each
+subscription is flushed once per cadence window: every run for immediate
+alerts, once per calendar day, ISO week or month for digests. Queued rows
+are keyed by the exceedance hash, so re-detecting an exceedance never
+queues it twice, and a trigger keeps running per-permit totals as rows are
+queued. A digest is read from the queue and the totals alone; the daily
+extracts are never rescanned.
+
+The queue lives in the subscription database (same WAL settings and
+transaction helpers as ``SubscriptionStore``), so deleting a subscription
+also drops its pending rows.
+"""
+
+import hashlib
+import json
+import sqlite3
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from permitminder.core import record_keys
+from utils.alert_routing import route_exceedances
+from utils.subscription_store import DEFAULT_DB_PATH, SubscriptionStore
+
+IMMEDIATE = 'immediate'
+DAILY = 'daily'
+WEEKLY = 'weekly'
+MONTHLY = 'monthly'
+
+# Leading word of the frequency labels offered by the subscription forms
+CADENCES = {
+    'immediate': IMMEDIATE,
+    'daily': DAILY,
+    'weekly': WEEKLY,
+    'monthly': MONTHLY,
+}
+
+# Columns of an exceedance kept in the queue (the alert email uses these)
+QUEUED_COLUMNS = [
+    'PERMIT_NUMBER', 'PF_NAME', 'COUNTY_NAME', 'NON_COMPLIANCE_DATE', 'PARAMETER',
+    'SAMPLE_VALUE', 'PERMIT_VALUE', 'UNIT_OF_MEASURE', 'Percent_Over_Limit', 'Severity'
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS digest_pending (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    subscription_id INTEGER NOT NULL REFERENCES subscriptions(id) ON DELETE CASCADE,
+    exceedance_hash TEXT NOT NULL,
+    permit_number TEXT NOT NULL,
+    severity TEXT,
+    non_compliance_date TEXT,
+    record TEXT NOT NULL,
+    queued_at TEXT NOT NULL,
+    UNIQUE (subscription_id, exceedance_hash)
+);
+
+CREATE TABLE IF NOT EXISTS digest_totals (
+    subscription_id INTEGER NOT NULL REFERENCES subscriptions(id) ON DELETE CASCADE,
+    permit_number TEXT NOT NULL,
+    severity TEXT NOT NULL,
+    exceedances INTEGER NOT NULL,
+    first_date TEXT,
+    last_date TEXT,
+    PRIMARY KEY (subscription_id, permit_number, severity)
+);
+
+CREATE TABLE IF NOT EXISTS digest_schedule (
+    subscription_id INTEGER PRIMARY KEY REFERENCES subscriptions(id) ON DELETE CASCADE,
+    last_flushed TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS consumer_positions (
+    consumer TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    updated_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS alert_deliveries (
+    idempotency_key TEXT PRIMARY KEY,
+    email TEXT NOT NULL,
+    subscriptions INTEGER NOT NULL,
+    exceedances INTEGER NOT NULL,
+    queued_since TEXT,
+    sent_at TEXT NOT NULL
+);
+
+CREATE TRIGGER IF NOT EXISTS digest_pending_totals AFTER INSERT ON digest_pending
+BEGIN
+    INSERT INTO digest_totals (subscription_id, permit_number, severity, exceedances, first_date, last_date)
+    VALUES (NEW.subscription_id, NEW.permit_number, COALESCE(NEW.severity, 'Unknown'), 1,
+            NEW.non_compliance_date, NEW.non_compliance_date)
+    ON CONFLICT (subscription_id, permit_number, severity) DO UPDATE SET
+        exceedances = exceedances + 1,
+        first_date = MIN(COALESCE(first_date, excluded.first_date), COALESCE(excluded.first_date, first_date)),
+        last_date = MAX(COALESCE(last_date, excluded.last_date), COALESCE(excluded.last_date, last_date));
+END;
+"""
+
+
+def cadence(frequency: str) -> str:
+    """
+    Cadence of a subscription frequency label.
+
+    Args:
+        frequency (str): Stored frequency, e.g. "Weekly Summary" or "Immediate (when violations occur)".
+
+    Returns:
+        str: IMMEDIATE, DAILY, WEEKLY or MONTHLY. Unknown labels are treated as DAILY,
+             the schedule every subscriber received before digests existed.
+    """
+    words = str(frequency).strip().lower().split()
+    return CADENCES.get(words[0] if words else '', DAILY)
+
+
+def window_start(frequency: str, now: datetime) -> datetime:
+    """
+    Start of the cadence window that contains ``now``.
+
+    Args:
+        frequency (str): Stored frequency label.
+        now (datetime): Current time.
+
+    Returns:
+        datetime: Midnight of the day, of the Monday of the ISO week or of the
+                  first of the month; ``now`` itself for immediate alerts.
+    """
+    kind = cadence(frequency)
+    if kind == IMMEDIATE:
+        return now
+    day = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    if kind == WEEKLY:
+        return day - pd.Timedelta(days=day.weekday())
+    if kind == MONTHLY:
+        return day.replace(day=1)
+    return day
+
+
+def is_due(frequency: str, last_flushed: Optional[datetime], now: datetime) -> bool:
+    """
+    Whether a subscription should be flushed.
+
+    Args:
+        frequency (str): Stored frequency label.
+        last_flushed (datetime, optional): When the subscription was last flushed;
+                                           None if never (the first digest goes out right away).
+        now (datetime): Current time.
+
+    Returns:
+        bool: True once the current cadence window started after ``last_flushed``.
+    """
+    if last_flushed is None or cadence(frequency) == IMMEDIATE:
+        return True
+    return last_flushed < window_start(frequency, now)
+
+
+class Digest:
+    """
+    Pending exceedances of one subscription.
+
+    Args:
+        subscription_id (int): Subscription the digest belongs to.
+        email (str): Subscriber email address.
+        frequency (str): Stored frequency label.
+        exceedances (pd.DataFrame): Queued records (QUEUED_COLUMNS plus exceedance_hash) in queue order.
+        totals (pd.DataFrame): Per permit and severity: exceedances, first_date and last_date.
+        through_id (int): Last queue id included; pass the digest to ``DigestQueue.acknowledge``.
+        include_summary (bool, optional): Subscriber wants a summary in the email. Defaults to True.
+        include_csv (bool, optional): Subscriber wants a CSV attachment. Defaults to False.
+        queued_since (datetime, optional): When the oldest queued row entered the queue.
+    """
+
+    def __init__(
+        self,
+        subscription_id: int,
+        email: str,
+        frequency: str,
+        exceedances: pd.DataFrame,
+        totals: pd.DataFrame,
+        through_id: int,
+        include_summary: bool = True,
+        include_csv: bool = False,
+        queued_since: Optional[datetime] = None
+    ) -> None:
+        self.subscription_id = subscription_id
+        self.email = email
+        self.frequency = frequency
+        self.exceedances = exceedances
+        self.totals = totals
+        self.through_id = through_id
+        self.include_summary = include_summary
+        self.include_csv = include_csv
+        self.queued_since = queued_since
+
+    def __len__(self) -> int:
+        return len(self.exceedances)
+
+    @property
+    def key(self) -> str:
+        """Identity of this digest: the subscription and the last queued row it covers."""
+        return f"{self.subscription_id}-{self.through_id}"
+
+
+def delivery_key(digests: List[Digest]) -> str:
+    """
+    Idempotency key of one email built from ``digests``.
+
+    Args:
+        digests (List[Digest]): Digests sent together.
+
+    Returns:
+        str: The same key whenever the same queued rows are sent again, so a
+             retried send can be recognised as already delivered.
+    """
+    keys = ','.join(sorted(digest.key for digest in digests))
+    return hashlib.sha1(keys.encode()).hexdigest()
+
+
+class DigestQueue(SubscriptionStore):
+    """
+    Durable per-subscription queue of exceedances waiting to be emailed.
+
+    Delivery is at-least-once: a digest stays queued until it is
+    acknowledged, so a failed send is retried on the next run. Consumers of
+    the event log save their position in the same transaction as the rows
+    they queue, and sent emails are logged under an idempotency key.
+
+    Args:
+        path (str, optional): SQLite database path. Defaults to DEFAULT_DB_PATH.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH) -> None:
+        super().__init__(path)
+        self._apply_schema(SCHEMA)
+
+    def enqueue(
+        self,
+        exceedances: pd.DataFrame,
+        routes: Optional[pd.DataFrame] = None,
+        now: Optional[datetime] = None,
+        checkpoint: Optional[Tuple[str, int]] = None
+    ) -> int:
+        """
+        Queue new exceedances for the subscriptions they are routed to.
+
+        Args:
+            exceedances (pd.DataFrame): New exceedance records (raw column names).
+            routes (pd.DataFrame, optional): ``row``/``subscription_id`` pairs from
+                                             ``route_exceedances``. Defaults to routing
+                                             against the active subscriptions.
+            now (datetime, optional): Queue time. Defaults to the current time.
+            checkpoint (Tuple[str, int], optional): (consumer, position) saved in the
+                                                    same transaction as the queued rows.
+
+        Returns:
+            int: Number of rows queued (already queued exceedances are skipped).
+        """
+        now = now or datetime.now()
+        if not exceedances.empty and routes is None:
+            routes = route_exceedances(exceedances, self.active_permits())
+        if exceedances.empty or routes.empty:
+            if checkpoint is not None:
+                with self._transaction() as conn:
+                    self._save_position(conn, checkpoint, now)
+            return 0
+
+        # Serialize each routed exceedance once, however many subscriptions receive it
+        positions = routes['row'].to_numpy()
+        needed = np.unique(positions)
+        lookup = np.searchsorted(needed, positions)
+
+        records = exceedances.iloc[needed].reindex(columns=QUEUED_COLUMNS)
+        records['PERMIT_NUMBER'] = records['PERMIT_NUMBER'].astype(str)
+        hashes = (
+            exceedances['exceedance_hash'].iloc[needed] if 'exceedance_hash' in exceedances.columns
+            else record_keys(exceedances.iloc[needed])
+        ).to_numpy()
+        dates = pd.to_datetime(records['NON_COMPLIANCE_DATE'], errors='coerce').dt.strftime('%Y-%m-%d')
+        severities = records['Severity'].astype(object).where(records['Severity'].notna(), None).to_numpy()
+        lines = np.array(records.to_json(orient='records', lines=True, date_format='iso').splitlines(), dtype=object)
+
+        queued_at = now.strftime('%Y-%m-%d %H:%M:%S')
+        rows = list(zip(
+            routes['subscription_id'].astype(int).tolist(),
+            hashes[lookup].tolist(),
+            records['PERMIT_NUMBER'].to_numpy()[lookup].tolist(),
+            severities[lookup].tolist(),
+            dates.astype(object).where(dates.notna(), None).to_numpy()[lookup].tolist(),
+            lines[lookup].tolist(),
+            [queued_at] * len(routes),
+        ))
+        with self._transaction() as conn:
+            queued = conn.executemany(
+                'INSERT OR IGNORE INTO digest_pending '
+                '(subscription_id, exceedance_hash, permit_number, severity, non_compliance_date, record, queued_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                rows
+            ).rowcount
+            if checkpoint is not None:
+                self._save_position(conn, checkpoint, now)
+        return queued
+
+    @staticmethod
+    def _save_position(conn: sqlite3.Connection, checkpoint: Tuple[str, int], now: datetime) -> None:
+        """Store a consumer's position inside an open transaction."""
+        consumer, position = checkpoint
+        conn.execute(
+            'INSERT INTO consumer_positions (consumer, position, updated_at) VALUES (?, ?, ?) '
+            'ON CONFLICT (consumer) DO UPDATE SET position = excluded.position, updated_at = excluded.updated_at',
+            (consumer, int(position), now.strftime('%Y-%m-%d %H:%M:%S'))
+        )
+
+    def position(self, consumer: str) -> int:
+        """
+        Last event log position a consumer has queued.
+
+        Args:
+            consumer (str): Consumer name.
+
+        Returns:
+            int: The saved position, or 0 if the consumer has not run yet.
+        """
+        conn = self._connect()
+        try:
+            row = conn.execute('SELECT position FROM consumer_positions WHERE consumer = ?', (consumer,)).fetchone()
+            return row['position'] if row else 0
+        finally:
+            conn.close()
+
+    def consumed_position(self) -> int:
+        """
+        Lowest event log position saved by any consumer.
+
+        Returns:
+            int: Position every consumer has queued through (0 if none has run yet).
+        """
+        conn = self._connect()
+        try:
+            return conn.execute('SELECT COALESCE(MIN(position), 0) FROM consumer_positions').fetchone()[0]
+        finally:
+            conn.close()
+
+    def pending_counts(self) -> pd.DataFrame:
+        """
+        Subscriptions with queued exceedances.
+
+        Returns:
+            pd.DataFrame: subscription_id, email, frequency, status, last_flushed and pending.
+        """
+        return self._query(
+            'SELECT s.id AS subscription_id, u.email, s.frequency, s.status, d.last_flushed, '
+            '       (SELECT COUNT(*) FROM digest_pending q WHERE q.subscription_id = s.id) AS pending '
+            'FROM subscriptions s '
+            'JOIN subscribers u ON u.id = s.subscriber_id '
+            'LEFT JOIN digest_schedule d ON d.subscription_id = s.id '
+            'WHERE EXISTS (SELECT 1 FROM digest_pending q WHERE q.subscription_id = s.id)'
+        )
+
+    def due(self, now: Optional[datetime] = None) -> pd.DataFrame:
+        """
+        Active subscriptions whose digest should be sent now.
+
+        Args:
+            now (datetime, optional): Current time. Defaults to the current time.
+
+        Returns:
+            pd.DataFrame: Rows of ``pending_counts`` that are due.
+        """
+        now = now or datetime.now()
+        pending = self.pending_counts()
+        pending = pending[pending['status'] == 'active']
+        last_flushed = pd.to_datetime(pending['last_flushed'], errors='coerce')
+        due = np.array([
+            is_due(frequency, None if pd.isna(flushed) else flushed.to_pydatetime(), now)
+            for frequency, flushed in zip(pending['frequency'], last_flushed)
+        ], dtype=bool)
+        return pending[due].reset_index(drop=True)
+
+    def digest(self, subscription_id: int) -> Digest:
+        """
+        Everything queued for a subscription, without removing it.
+
+        Args:
+            subscription_id (int): Subscription to read.
+
+        Returns:
+            Digest: Queued records and their running totals.
+        """
+        subscription_id = int(subscription_id)
+        info = self._query(
+            'SELECT u.email, s.frequency, s.include_summary, s.include_csv FROM subscriptions s '
+            'JOIN subscribers u ON u.id = s.subscriber_id WHERE s.id = ?',
+            (subscription_id,)
+        )
+        pending = self._query(
+            'SELECT id, exceedance_hash, record, queued_at FROM digest_pending WHERE subscription_id = ? ORDER BY id',
+            (subscription_id,)
+        )
+        totals = self._query(
+            'SELECT permit_number, severity, exceedances, first_date, last_date FROM digest_totals '
+            'WHERE subscription_id = ? ORDER BY permit_number, severity',
+            (subscription_id,)
+        )
+        records = pd.DataFrame([json.loads(record) for record in pending['record']], columns=QUEUED_COLUMNS)
+        records['exceedance_hash'] = pending['exceedance_hash'].to_numpy()
+        found = not info.empty
+        return Digest(
+            subscription_id=subscription_id,
+            email=info['email'].iloc[0] if found else '',
+            frequency=info['frequency'].iloc[0] if found else '',
+            exceedances=records,
+            totals=totals,
+            through_id=int(pending['id'].max()) if not pending.empty else 0,
+            include_summary=bool(info['include_summary'].iloc[0]) if found else True,
+            include_csv=bool(info['include_csv'].iloc[0]) if found else False,
+            queued_since=pd.to_datetime(pending['queued_at']).min().to_pydatetime() if not pending.empty else None,
+        )
+
+    def acknowledge(self, digest: Digest, now: Optional[datetime] = None) -> None:
+        """
+        Remove a sent digest from the queue and start the subscription's next window.
+
+        Rows queued after the digest was read stay queued, and their totals
+        are rebuilt from what is left.
+
+        Args:
+            digest (Digest): Digest returned by ``digest`` and successfully sent.
+            now (datetime, optional): Flush time. Defaults to the current time.
+        """
+        now = now or datetime.now()
+        with self._transaction() as conn:
+            self._acknowledge(conn, digest, now)
+
+    @staticmethod
+    def _acknowledge(conn: sqlite3.Connection, digest: Digest, now: datetime) -> None:
+        """Acknowledge a digest inside an open transaction."""
+        conn.execute(
+            'DELETE FROM digest_pending WHERE subscription_id = ? AND id <= ?',
+            (digest.subscription_id, digest.through_id)
+        )
+        conn.execute('DELETE FROM digest_totals WHERE subscription_id = ?', (digest.subscription_id,))
+        conn.execute(
+            "INSERT INTO digest_totals (subscription_id, permit_number, severity, exceedances, first_date, last_date) "
+            "SELECT subscription_id, permit_number, COALESCE(severity, 'Unknown'), COUNT(*), "
+            '       MIN(non_compliance_date), MAX(non_compliance_date) '
+            'FROM digest_pending WHERE subscription_id = ? '
+            "GROUP BY subscription_id, permit_number, COALESCE(severity, 'Unknown')",
+            (digest.subscription_id,)
+        )
+        conn.execute(
+            'INSERT INTO digest_schedule (subscription_id, last_flushed) VALUES (?, ?) '
+            'ON CONFLICT (subscription_id) DO UPDATE SET last_flushed = excluded.last_flushed',
+            (digest.subscription_id, now.strftime('%Y-%m-%d %H:%M:%S'))
+        )
+
+    def delivered(self, idempotency_key: str) -> bool:
+        """
+        Whether an email with this idempotency key was already sent.
+
+        Args:
+            idempotency_key (str): Key from ``delivery_key``.
+
+        Returns:
+            bool: True if the delivery was recorded.
+        """
+        conn = self._connect()
+        try:
+            return conn.execute(
+                'SELECT 1 FROM alert_deliveries WHERE idempotency_key = ?', (idempotency_key,)
+            ).fetchone() is not None
+        finally:
+            conn.close()
+
+    def record_delivery(self, digests: List[Digest], idempotency_key: str, now: Optional[datetime] = None) -> None:
+        """
+        Log a sent email and acknowledge the digests it contained, atomically.
+
+        Args:
+            digests (List[Digest]): Digests sent in the email.
+            idempotency_key (str): Key from ``delivery_key``.
+            now (datetime, optional): Send time. Defaults to the current time.
+        """
+        now = now or datetime.now()
+        queued = [digest.queued_since for digest in digests if digest.queued_since is not None]
+        with self._transaction() as conn:
+            conn.execute(
+                'INSERT OR IGNORE INTO alert_deliveries '
+                '(idempotency_key, email, subscriptions, exceedances, queued_since, sent_at) VALUES (?, ?, ?, ?, ?, ?)',
+                (
+                    idempotency_key, digests[0].email, len(digests), sum(len(digest) for digest in digests),
+                    min(queued).strftime('%Y-%m-%d %H:%M:%S') if queued else None,
+                    now.strftime('%Y-%m-%d %H:%M:%S')
+                )
+            )
+            for digest in digests:
+                self._acknowledge(conn, digest, now)
+
+    def delivery_latency(self, since: Optional[datetime] = None) -> pd.Series:
+        """
+        Seconds from queueing to sending for logged deliveries.
+
+        Args:
+            since (datetime, optional): Only deliveries sent at or after this time.
+
+        Returns:
+            pd.Series: Latency per delivery, indexed by idempotency key.
+        """
+        deliveries = self._query(
+            'SELECT idempotency_key, queued_since, sent_at FROM alert_deliveries '
+            'WHERE queued_since IS NOT NULL AND sent_at >= ?',
+            (since.strftime('%Y-%m-%d %H:%M:%S') if since else '',)
+        )
+        latency = pd.to_datetime(deliveries['sent_at']) - pd.to_datetime(deliveries['queued_since'])
+        return pd.Series(latency.dt.total_seconds().to_numpy(), index=deliveries['idempotency_key'], name='latency')
+
+    def due_digests(self, now: Optional[datetime] = None) -> List[Digest]:
+        """
+        Digests of every subscription that is due.
+
+        Args:
+            now (datetime, optional): Current time. Defaults to the current time.
+
+        Returns:
+            List[Digest]: One digest per due subscription, oldest subscription first.
+        """
+        return [self.digest(subscription_id) for subscription_id in sorted(self.due(now)['subscription_id'])]
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Queue size.
+
+        Returns:
+            Dict[str, int]: Queued rows and subscriptions with something queued.
+        """
+        conn = self._connect()
+        try:
+            rows, subscriptions = conn.execute(
+                'SELECT COUNT(*), COUNT(DISTINCT subscription_id) FROM digest_pending'
+            ).fetchone()
+            return {'pending': rows, 'subscriptions': subscriptions}
+        finally:
+            conn.close()
+
+
+def get_digest_queue(path: str = DEFAULT_DB_PATH) -> DigestQueue:
+    """
+    Open the digest queue in the subscription database.
+
+    Args:
+        path (str, optional): SQLite database path. Defaults to DEFAULT_DB_PATH.
+
+    Returns:
+        DigestQueue: The opened queue.
+    """
+    return DigestQueue(path)
@@ -0,0 +1,20 @@
+"""
+Facility entity resolution for PermitMinder application.
+
+Re-exports ``permitminder.core.entity_resolution``, where facility ids are
+resolved during ingest, for the app and batch scripts.
+"""
+
+from permitminder.core.entity_resolution import (
+    FACILITY_ID_COLUMN,
+    MATCH_THRESHOLD,
+    assign_facility_ids,
+    name_similarity,
+    name_tokens,
+    resolve_facilities,
+)
+
+__all__ = [
+    'FACILITY_ID_COLUMN', 'MATCH_THRESHOLD',
+    'assign_facility_ids', 'name_similarity', 'name_tokens', 'resolve_facilities',
+]
@@ -0,0 +1,145 @@
+"""
+Exceedance event log for PermitMinder alerts.
+
+Ingest appends one event per new exceedance to an append-only SQLite log
+as soon as an extract lands; the alert worker (``utils/alert_worker.py``)
+reads the log from its saved position. Events are keyed by the exceedance
+hash, so emitting the same extract twice adds nothing, and each event gets
+an increasing position that consumers use as their offset.
+"""
+
+import json
+from datetime import datetime, timedelta
+from typing import Optional
+
+import pandas as pd
+
+from permitminder.core import record_keys
+from utils.digest_queue import QUEUED_COLUMNS
+from utils.subscription_store import DEFAULT_DB_PATH, SQLiteStore
+
+# Consumed events older than this are pruned (longer than the detector's
+# 30-day recent window, so a pruned exceedance is not emitted again)
+EVENT_RETENTION_DAYS = 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS exceedance_events (
+    position INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_key TEXT NOT NULL UNIQUE,
+    permit_number TEXT NOT NULL,
+    record TEXT NOT NULL,
+    source TEXT,
+    emitted_at TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_exceedance_events_emitted ON exceedance_events(emitted_at);
+"""
+
+
+class EventLog(SQLiteStore):
+    """
+    Append-only log of new-exceedance events.
+
+    Args:
+        path (str, optional): SQLite database path. Defaults to DEFAULT_DB_PATH.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH) -> None:
+        super().__init__(path)
+        self._apply_schema(SCHEMA)
+
+    def emit(self, exceedances: pd.DataFrame, source: Optional[str] = None, now: Optional[datetime] = None) -> int:
+        """
+        Append an event per exceedance not already in the log.
+
+        Args:
+            exceedances (pd.DataFrame): New exceedance records (raw column names).
+            source (str, optional): Where they came from, e.g. the extract path.
+            now (datetime, optional): Emit time. Defaults to the current time.
+
+        Returns:
+            int: Number of events appended.
+        """
+        if exceedances.empty:
+            return 0
+        now = now or datetime.now()
+
+        keys = (
+            exceedances['exceedance_hash'] if 'exceedance_hash' in exceedances.columns
+            else record_keys(exceedances)
+        )
+        records = exceedances.reindex(columns=QUEUED_COLUMNS)
+        records['PERMIT_NUMBER'] = records['PERMIT_NUMBER'].astype(str)
+        lines = records.to_json(orient='records', lines=True, date_format='iso').splitlines()
+        emitted_at = now.strftime('%Y-%m-%d %H:%M:%S')
+
+        with self._transaction() as conn:
+            return conn.executemany(
+                'INSERT OR IGNORE INTO exceedance_events (event_key, permit_number, record, source, emitted_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                zip(keys.tolist(), records['PERMIT_NUMBER'].tolist(), lines,
+                    [source] * len(lines), [emitted_at] * len(lines))
+            ).rowcount
+
+    def read(self, after: int = 0, limit: int = 10_000) -> pd.DataFrame:
+        """
+        Events after a position, oldest first.
+
+        Args:
+            after (int, optional): Last position already consumed. Defaults to 0.
+            limit (int, optional): Maximum number of events. Defaults to 10,000.
+
+        Returns:
+            pd.DataFrame: QUEUED_COLUMNS plus exceedance_hash, position and emitted_at.
+        """
+        events = self._query(
+            'SELECT position, event_key, record, emitted_at FROM exceedance_events '
+            'WHERE position > ? ORDER BY position LIMIT ?',
+            (int(after), int(limit))
+        )
+        records = pd.DataFrame([json.loads(record) for record in events['record']], columns=QUEUED_COLUMNS)
+        records['exceedance_hash'] = events['event_key'].to_numpy()
+        records['position'] = events['position'].to_numpy()
+        records['emitted_at'] = pd.to_datetime(events['emitted_at']).to_numpy()
+        return records
+
+    def last_position(self) -> int:
+        """Position of the newest event (0 for an empty log)."""
+        conn = self._connect()
+        try:
+            return conn.execute('SELECT COALESCE(MAX(position), 0) FROM exceedance_events').fetchone()[0]
+        finally:
+            conn.close()
+
+    def prune(self, consumed: int, now: Optional[datetime] = None, keep_days: int = EVENT_RETENTION_DAYS) -> int:
+        """
+        Delete old events every consumer has read.
+
+        Args:
+            consumed (int): Lowest position saved by any consumer.
+            now (datetime, optional): Current time. Defaults to the current time.
+            keep_days (int, optional): Keep events emitted within this many days.
+                                       Defaults to EVENT_RETENTION_DAYS.
+
+        Returns:
+            int: Number of events deleted.
+        """
+        cutoff = ((now or datetime.now()) - timedelta(days=keep_days)).strftime('%Y-%m-%d %H:%M:%S')
+        with self._transaction() as conn:
+            return conn.execute(
+                'DELETE FROM exceedance_events WHERE position <= ? AND emitted_at < ?',
+                (int(consumed), cutoff)
+            ).rowcount
+
+
+def get_event_log(path: str = DEFAULT_DB_PATH) -> EventLog:
+    """
+    Open the event log in the subscription database.
+
+    Args:
+        path (str, optional): SQLite database path. Defaults to DEFAULT_DB_PATH.
+
+    Returns:
+        EventLog: The opened log.
+    """
+    return EventLog(path)
@@ -0,0 +1,143 @@
+"""
+Facility directory for PermitMinder application.
+
+One row per permit (resolved facility id, name, county, municipality,
+monitored parameters and first/last exceedance dates), generated during
+ingest and stored as Parquet. Permits of the same facility share a
+FACILITY_ID (see permitminder.core.entity_resolution). The directory
+itself is built by ``permitminder.core.directory``.
+Pages and batch jobs share a single lazily loaded copy instead of each
+re-reading the exceedance CSV and grouping it.
+
+Rebuild the artifact from an exceedance CSV with:
+
+    python -m utils.facility_directory [csv_path] [output_path]
+"""
+
+import os
+import sys
+import threading
+from typing import List, Optional
+
+import pandas as pd
+
+from permitminder.core.directory import DIRECTORY_COLUMNS, SOURCE_COLUMNS, build_facility_directory
+from permitminder.core.entity_resolution import FACILITY_ID_COLUMN
+
+DEFAULT_DIRECTORY_PATH = 'facility_directory.parquet'
+DEFAULT_DATA_PATH = 'pa_exceedances_launch_ready.csv'
+
+_directory: Optional[pd.DataFrame] = None
+_directory_lock = threading.Lock()
+
+
+def save_facility_directory(directory: pd.DataFrame, path: str = DEFAULT_DIRECTORY_PATH) -> None:
+    """
+    Write the facility directory artifact.
+
+    Args:
+        directory (pd.DataFrame): Directory from ``build_facility_directory``.
+        path (str, optional): Output Parquet path. Defaults to DEFAULT_DIRECTORY_PATH.
+    """
+    directory.to_parquet(path, index=False, compression='zstd')
+
+
+def load_facility_directory(
+    path: str = DEFAULT_DIRECTORY_PATH,
+    data_path: str = DEFAULT_DATA_PATH
+) -> pd.DataFrame:
+    """
+    Read the directory artifact, building it from the exceedance CSV if it is missing.
+
+    Args:
+        path (str, optional): Parquet artifact path. Defaults to DEFAULT_DIRECTORY_PATH.
+        data_path (str, optional): Exceedance CSV used when no artifact exists.
+                                   Defaults to DEFAULT_DATA_PATH.
+
+    Returns:
+        pd.DataFrame: The facility directory (empty if neither file exists).
+    """
+    if os.path.exists(path):
+        directory = pd.read_parquet(path)
+        # Artifacts written before facility resolution are rebuilt when the CSV is available
+        if FACILITY_ID_COLUMN in directory.columns or not os.path.exists(data_path):
+            return directory
+
+    if os.path.exists(data_path):
+        records = pd.read_csv(
+            data_path,
+            usecols=lambda column: column in SOURCE_COLUMNS,
+            dtype={'PERMIT_NUMBER': str}
+        )
+        return build_facility_directory(records)
+
+    return pd.DataFrame(columns=DIRECTORY_COLUMNS)
+
+
+def get_facility_directory() -> pd.DataFrame:
+    """
+    Shared facility directory, loaded on first use.
+
+    Returns:
+        pd.DataFrame: The facility directory. Callers must not modify it in place.
+    """
+    global _directory
+    if _directory is None:
+        with _directory_lock:
+            if _directory is None:
+                _directory = load_facility_directory()
+    return _directory
+
+
+def get_facility_list() -> pd.DataFrame:
+    """
+    Facilities for pickers and lookups, sorted by name.
+
+    Returns:
+        pd.DataFrame: PF_NAME, PERMIT_NUMBER and COUNTY_NAME for every permit.
+    """
+    directory = get_facility_directory()
+    facilities = directory[['PF_NAME', 'PERMIT_NUMBER', 'COUNTY_NAME']].copy()
+    facilities['COUNTY_NAME'] = facilities['COUNTY_NAME'].astype(str)
+    return facilities
+
+
+def permit_parameters(directory: pd.DataFrame, permit_number: str) -> List[str]:
+    """
+    Parameters with exceedances for one permit.
+
+    Args:
+        directory (pd.DataFrame): The facility directory.
+        permit_number (str): Permit to look up.
+
+    Returns:
+        List[str]: Parameter names (empty if the permit is unknown).
+    """
+    match = directory.loc[directory['PERMIT_NUMBER'] == permit_number, 'PARAMETERS']
+    if match.empty or not match.iloc[0]:
+        return []
+    return match.iloc[0].split('|')
+
+
+def facility_permits(directory: pd.DataFrame, facility_id: int) -> List[str]:
+    """
+    Permits held by one resolved facility.
+
+    Args:
+        directory (pd.DataFrame): The facility directory.
+        facility_id (int): FACILITY_ID to look up.
+
+    Returns:
+        List[str]: Permit numbers, sorted (empty if the id is unknown).
+    """
+    match = directory.loc[directory[FACILITY_ID_COLUMN] == facility_id, 'PERMIT_NUMBER']
+    return sorted(match.tolist())
+
+
+if __name__ == "__main__":
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_DATA_PATH
+    output_path = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_DIRECTORY_PATH
+
+    directory = load_facility_directory(path='', data_path=csv_path)
+    save_facility_directory(directory, output_path)
+    print(f"Saved facility directory for {len(directory)} permits to {output_path}")
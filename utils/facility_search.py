@@ -0,0 +1,144 @@
+"""
+Facility typeahead search for PermitMinder application.
+
+Builds a prefix + trigram index over facility names and permit numbers once,
+then answers ranked lookups for the subscription facility picker:
+exact permit matches first, then prefix matches, then fuzzy matches.
+"""
+
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from permitminder.core.text import normalize_text, trigrams
+
+# Rank tiers; higher tiers always sort ahead of lower ones (tiers are 1 apart,
+# fuzzy similarity adds at most 0.5 within a tier)
+EXACT_PERMIT = 4.0
+PERMIT_PREFIX = 3.0
+NAME_PREFIX = 2.0
+TOKEN_PREFIX = 1.0
+
+# Minimum trigram similarity (Dice coefficient) for a fuzzy match
+FUZZY_THRESHOLD = 0.3
+
+
+class FacilitySearchIndex:
+    """
+    Ranked facility lookup built once from the facility list.
+
+    Args:
+        facilities (pd.DataFrame): One row per facility with PF_NAME,
+                                   PERMIT_NUMBER and COUNTY_NAME.
+    """
+
+    def __init__(self, facilities: pd.DataFrame) -> None:
+        self.facilities = facilities[['PF_NAME', 'PERMIT_NUMBER', 'COUNTY_NAME']].astype(str).reset_index(drop=True)
+        self.facilities['display'] = (
+            self.facilities['PF_NAME'] + ' - ' +
+            self.facilities['PERMIT_NUMBER'] + ' (' +
+            self.facilities['COUNTY_NAME'] + ')'
+        )
+        self.labels = self.facilities['display'].to_numpy()
+        self.counties = self.facilities['COUNTY_NAME'].to_numpy()
+
+        names = [normalize_text(name) for name in self.facilities['PF_NAME']]
+        permits = [normalize_text(permit).replace(' ', '') for permit in self.facilities['PERMIT_NUMBER']]
+
+        # Alphabetical order for empty queries and tie-breaking
+        self._alpha_rank = np.empty(len(names), dtype=np.int64)
+        self._alpha_rank[np.argsort(np.array(names, dtype=object), kind='stable')] = np.arange(len(names))
+
+        self._permit_exact: Dict[str, List[int]] = defaultdict(list)
+        for position, permit in enumerate(permits):
+            self._permit_exact[permit].append(position)
+
+        # Sorted keys with parallel position arrays for prefix range lookups
+        self._permit_keys = self._sorted_keys((permit, i) for i, permit in enumerate(permits))
+        self._name_keys = self._sorted_keys((name, i) for i, name in enumerate(names))
+        self._token_keys = self._sorted_keys(
+            {(token, i) for i, name in enumerate(names) for token in name.split()}
+        )
+
+        postings: Dict[str, List[int]] = defaultdict(list)
+        self._trigram_counts = np.zeros(len(names), dtype=np.float32)
+        for position, name in enumerate(names):
+            grams = trigrams(name)
+            self._trigram_counts[position] = len(grams)
+            for gram in grams:
+                postings[gram].append(position)
+        self._postings = {gram: np.array(rows, dtype=np.int64) for gram, rows in postings.items()}
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    @staticmethod
+    def _sorted_keys(pairs) -> Tuple[List[str], np.ndarray]:
+        """Sort (key, position) pairs into a key list and a position array."""
+        ordered = sorted(pairs)
+        return [key for key, _ in ordered], np.array([position for _, position in ordered], dtype=np.int64)
+
+    @staticmethod
+    def _prefix_positions(keys: Tuple[List[str], np.ndarray], prefix: str) -> np.ndarray:
+        """Positions whose key starts with ``prefix``, found with two bisections."""
+        words, positions = keys
+        start = bisect_left(words, prefix)
+        end = bisect_left(words, prefix + '\uffff', lo=start)
+        return positions[start:end]
+
+    def _fuzzy_scores(self, query: str) -> np.ndarray:
+        """Dice similarity between the query and every facility name."""
+        scores = np.zeros(len(self), dtype=np.float32)
+        grams = trigrams(query)
+        hits = [self._postings[gram] for gram in grams if gram in self._postings]
+        if not hits:
+            return scores
+
+        shared = np.bincount(np.concatenate(hits), minlength=len(self)).astype(np.float32)
+        return 2 * shared / (len(grams) + self._trigram_counts)
+
+    def search(self, query: str, county: Optional[str] = None, limit: int = 25) -> pd.DataFrame:
+        """
+        Find facilities matching a typed query.
+
+        Args:
+            query (str): Facility name fragment or permit number.
+            county (str, optional): Only return facilities in this county.
+            limit (int, optional): Maximum number of results. Defaults to 25.
+
+        Returns:
+            pd.DataFrame: Matching facilities (PF_NAME, PERMIT_NUMBER, COUNTY_NAME,
+                          display, score), best match first.
+        """
+        normalized = normalize_text(query)
+        scores = np.zeros(len(self), dtype=np.float32)
+
+        if normalized:
+            fuzzy = self._fuzzy_scores(normalized)
+
+            # Highest matching tier per facility; fuzzy similarity breaks ties within a tier
+            compact = normalized.replace(' ', '')
+            tiers = np.zeros(len(self), dtype=np.float32)
+            tiers[self._prefix_positions(self._token_keys, normalized.split()[0])] = TOKEN_PREFIX
+            tiers[self._prefix_positions(self._name_keys, normalized)] = NAME_PREFIX
+            tiers[self._prefix_positions(self._permit_keys, compact)] = PERMIT_PREFIX
+            tiers[self._permit_exact.get(compact, [])] = EXACT_PERMIT
+
+            scores = np.where(tiers > 0, tiers + fuzzy / 2, np.where(fuzzy >= FUZZY_THRESHOLD, fuzzy, 0))
+            candidates = np.flatnonzero(scores > 0)
+        else:
+            candidates = np.arange(len(self))
+
+        if county and county != 'All Counties':
+            candidates = candidates[self.counties[candidates] == county]
+
+        # Best score first, alphabetical within a score
+        order = np.lexsort((self._alpha_rank[candidates], -scores[candidates]))
+        top = candidates[order[:limit]]
+
+        results = self.facilities.iloc[top].copy()
+        results['score'] = scores[top]
+        return results
@@ -0,0 +1,240 @@
+"""
+Chemical-laundering candidate features for PermitMinder application.
+
+Chemical laundering is industrial wastewater routed through a facility
+(typically a sewage plant) that is permitted for conventional pollutants.
+This module computes permit-level signals once per ingest and ranks the
+permits that report industrial parameters:
+
+- share of the permit's monitored parameters that are industrial
+- industrial and conventional exceedance counts
+- months in which industrial and conventional exceedances co-occur
+- other facilities in the same county with industrial exceedances in the
+  same months (the extract has no stream network, so county and month
+  stand in for upstream/downstream pairs)
+
+Everything is computed from integer codes: parameters and permits are
+factorized once, and the permit x parameter matrices are kept sparse as
+coordinate (row, column, count) arrays, so the cost does not grow with
+the number of permit/parameter combinations that never occur.
+
+Rebuild the ranked table from a launch-ready CSV with:
+
+    python -m utils.laundering_features [csv_path] [output_path]
+"""
+
+import os
+import sys
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from permitminder.core.normalization import CONVENTIONAL, INDUSTRIAL, get_catalog, parameters_in
+
+DEFAULT_CANDIDATES_PATH = 'laundering_candidates.parquet'
+DEFAULT_DATA_PATH = 'pa_violations_launch_ready.csv'
+
+# Parameters that point to industrial sources, and conventional pollutants
+# a sewage plant is permitted for (canonical names; aliases resolve to these)
+INDUSTRIAL_PARAMETERS = set(parameters_in(INDUSTRIAL))
+CONVENTIONAL_PARAMETERS = set(parameters_in(CONVENTIONAL))
+
+CANDIDATE_COLUMNS = [
+    'Rank', 'PERMIT_NUMBER', 'PF_NAME', 'COUNTY_NAME', 'Laundering_Score',
+    'Parameters', 'Industrial_Parameters', 'Industrial_Share',
+    'Industrial_Exceedances', 'Conventional_Exceedances',
+    'Industrial_Months', 'Co_Occurrence_Months', 'Co_Occurrence_Rate',
+    'County_Paired_Facilities'
+]
+
+# Source columns needed to compute the features
+SOURCE_COLUMNS = {
+    'PERMIT_NUMBER', 'PF_NAME', 'COUNTY_NAME', 'PARAMETER', 'NON_COMPLIANCE_DATE',
+    'MONITORING_PERIOD_BEGIN_DATE', 'Is_Violation'
+}
+
+
+def parameter_classes(parameters: pd.Series) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Canonical parameter codes, with each distinct parameter classified once.
+
+    Args:
+        parameters (pd.Series): PARAMETER column (any spelling, or already canonical).
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: Canonical parameter code per
+            row (-1 for missing), and industrial / conventional flags per code.
+            The flag arrays end with an extra False entry, so ``flags[codes]``
+            is False for missing parameters.
+    """
+    catalog = get_catalog()
+    canonical = catalog.normalize_parameters(parameters)
+    categories = catalog.categories(canonical)
+    return canonical.cat.codes.to_numpy(), categories == INDUSTRIAL, categories == CONVENTIONAL
+
+
+def _sparse_counts(rows: np.ndarray, cols: np.ndarray, n_cols: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Coordinate form (row, col, count) of a count matrix, one entry per occurring pair."""
+    pairs, counts = np.unique(rows.astype(np.int64) * n_cols + cols, return_counts=True)
+    return pairs // n_cols, pairs % n_cols, counts
+
+
+def _months(df: pd.DataFrame) -> np.ndarray:
+    """Month number (year * 12 + month) of each record; -1 where no date parses."""
+    column = 'NON_COMPLIANCE_DATE' if 'NON_COMPLIANCE_DATE' in df.columns else 'MONITORING_PERIOD_BEGIN_DATE'
+    if column not in df.columns:
+        return np.full(len(df), -1, dtype=np.int64)
+    dates = pd.to_datetime(df[column], errors='coerce')
+    months = (dates.dt.year * 12 + dates.dt.month - 1).to_numpy(dtype=float, na_value=np.nan)
+    return np.where(np.isnan(months), -1, months).astype(np.int64)
+
+
+def _county_pairs(permits: np.ndarray, counties: np.ndarray, months: np.ndarray, n_permits: int) -> np.ndarray:
+    """Per permit: other permits in its county with industrial exceedances in a shared month."""
+    paired = np.zeros(n_permits, dtype=np.int64)
+    events = pd.DataFrame({'permit': permits, 'county': counties, 'month': months}).drop_duplicates()
+    events = events[events['month'] >= 0]
+    if events.empty:
+        return paired
+    pairs = events.merge(events, on=['county', 'month'], suffixes=('', '_other'))
+    pairs = pairs.loc[pairs['permit'] != pairs['permit_other'], ['permit', 'permit_other']].drop_duplicates()
+    np.add.at(paired, pairs['permit'].to_numpy(), 1)
+    return paired
+
+
+def build_candidate_features(df: pd.DataFrame, violations_only: bool = True) -> pd.DataFrame:
+    """
+    Permit-level laundering features, ranked.
+
+    Args:
+        df (pd.DataFrame): Launch-ready DMR records or exceedance records.
+        violations_only (bool, optional): With an Is_Violation column, count only
+                                          violating rows as exceedances. Defaults to True.
+
+    Returns:
+        pd.DataFrame: CANDIDATE_COLUMNS for every permit with an industrial
+                      exceedance, best candidate first.
+    """
+    records = df[df['PERMIT_NUMBER'].notna()]
+    if records.empty:
+        return pd.DataFrame(columns=CANDIDATE_COLUMNS)
+
+    permit_codes, permit_names = pd.factorize(records['PERMIT_NUMBER'].astype(str))
+    n_permits = len(permit_names)
+    parameter_codes, industrial, conventional = parameter_classes(records['PARAMETER'])
+    n_parameters = len(industrial)
+    has_parameter = parameter_codes >= 0
+
+    # Monitored parameters: permit x parameter matrix over every reported row
+    permit_idx, param_idx, _ = _sparse_counts(permit_codes[has_parameter], parameter_codes[has_parameter], n_parameters)
+    monitored = np.bincount(permit_idx, minlength=n_permits)
+    monitored_industrial = np.bincount(permit_idx, weights=industrial[param_idx], minlength=n_permits)
+
+    # Exceedances: the same matrix over violating rows
+    exceeded = has_parameter.copy()
+    if violations_only and 'Is_Violation' in records.columns:
+        exceeded &= records['Is_Violation'].fillna(False).astype(bool).to_numpy()
+    ex_permit, ex_param, ex_counts = _sparse_counts(permit_codes[exceeded], parameter_codes[exceeded], n_parameters)
+    industrial_exceedances = np.bincount(ex_permit, weights=ex_counts * industrial[ex_param], minlength=n_permits)
+    conventional_exceedances = np.bincount(ex_permit, weights=ex_counts * conventional[ex_param], minlength=n_permits)
+
+    # Co-occurrence: permit x month matrices of industrial and conventional exceedances
+    months = _months(records)
+    dated = exceeded & (months >= 0)
+    month_base = months[dated].min() if dated.any() else 0
+    n_months = int(months[dated].max() - month_base + 1) if dated.any() else 1
+    row_industrial = dated & industrial[parameter_codes]
+    row_conventional = dated & conventional[parameter_codes]
+    ind_permit, ind_month, _ = _sparse_counts(permit_codes[row_industrial], months[row_industrial] - month_base, n_months)
+    conv_permit, conv_month, _ = _sparse_counts(
+        permit_codes[row_conventional], months[row_conventional] - month_base, n_months
+    )
+    industrial_months = np.bincount(ind_permit, minlength=n_permits)
+    shared = np.isin(ind_permit * n_months + ind_month, conv_permit * n_months + conv_month)
+    co_months = np.bincount(ind_permit[shared], minlength=n_permits)
+
+    counties = records['COUNTY_NAME'].astype(str).to_numpy() if 'COUNTY_NAME' in records.columns \
+        else np.full(len(records), '', dtype=object)
+    paired = _county_pairs(permit_codes[row_industrial], counties[row_industrial], months[row_industrial], n_permits)
+
+    features = pd.DataFrame({
+        'PERMIT_NUMBER': permit_names,
+        'Parameters': monitored,
+        'Industrial_Parameters': monitored_industrial.astype(np.int64),
+        'Industrial_Exceedances': industrial_exceedances.astype(np.int64),
+        'Conventional_Exceedances': conventional_exceedances.astype(np.int64),
+        'Industrial_Months': industrial_months,
+        'Co_Occurrence_Months': co_months,
+        'County_Paired_Facilities': paired,
+    })
+    with np.errstate(invalid='ignore', divide='ignore'):
+        features['Industrial_Share'] = np.where(monitored > 0, monitored_industrial / monitored, 0.0)
+        features['Co_Occurrence_Rate'] = np.where(industrial_months > 0, co_months / industrial_months, 0.0)
+
+    # Industrial share x volume of industrial exceedances, boosted by
+    # co-occurrence with conventional exceedances and by county neighbours
+    features['Laundering_Score'] = (
+        features['Industrial_Share']
+        * np.log1p(features['Industrial_Exceedances'])
+        * (1 + features['Co_Occurrence_Rate'])
+        * (1 + 0.25 * np.log1p(features['County_Paired_Facilities']))
+    ).round(4)
+
+    first_rows = pd.Series(np.arange(len(records))).groupby(permit_codes).first().to_numpy()
+    for column in ('PF_NAME', 'COUNTY_NAME'):
+        features[column] = records[column].to_numpy()[first_rows] if column in records.columns else ''
+
+    candidates = features[features['Industrial_Exceedances'] > 0].sort_values(
+        ['Laundering_Score', 'Industrial_Exceedances', 'PERMIT_NUMBER'],
+        ascending=[False, False, True], ignore_index=True
+    )
+    candidates['Rank'] = np.arange(1, len(candidates) + 1)
+    return candidates[CANDIDATE_COLUMNS]
+
+
+def save_candidates(candidates: pd.DataFrame, path: str = DEFAULT_CANDIDATES_PATH) -> None:
+    """
+    Write the ranked candidate table.
+
+    Args:
+        candidates (pd.DataFrame): Table from ``build_candidate_features``.
+        path (str, optional): Output Parquet path. Defaults to DEFAULT_CANDIDATES_PATH.
+    """
+    candidates.to_parquet(path, index=False, compression='zstd')
+
+
+def load_candidates(path: str = DEFAULT_CANDIDATES_PATH, data_path: Optional[str] = None) -> pd.DataFrame:
+    """
+    Read the ranked candidate table, building it from a CSV if it is missing.
+
+    Args:
+        path (str, optional): Parquet artifact path. Defaults to DEFAULT_CANDIDATES_PATH.
+        data_path (str, optional): Launch-ready CSV used when no artifact exists.
+                                   Defaults to DEFAULT_DATA_PATH.
+
+    Returns:
+        pd.DataFrame: The candidates (empty if neither file exists).
+    """
+    if path and os.path.exists(path):
+        return pd.read_parquet(path)
+
+    data_path = data_path or DEFAULT_DATA_PATH
+    if os.path.exists(data_path):
+        records = pd.read_csv(
+            data_path,
+            usecols=lambda column: column in SOURCE_COLUMNS,
+            dtype={'PERMIT_NUMBER': str}
+        )
+        return build_candidate_features(records)
+
+    return pd.DataFrame(columns=CANDIDATE_COLUMNS)
+
+
+if __name__ == "__main__":
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_DATA_PATH
+    output_path = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_CANDIDATES_PATH
+
+    candidates = load_candidates(path='', data_path=csv_path)
+    save_candidates(candidates, output_path)
+    print(f"Saved {len(candidates)} ranked laundering candidates to {output_path}")
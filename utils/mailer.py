@@ -0,0 +1,123 @@
+"""
+Alert email delivery for PermitMinder.
+
+Builds alert messages (an HTML body with an optional plain-text
+alternative, plus optional CSV attachments) and sends them through Gmail
+SMTP with the GMAIL_EMAIL / GMAIL_PASSWORD credentials the nightly jobs
+already use. Delivery lives here rather than in the external alert
+systems, so the message features the alert jobs rely on do not depend on
+that package's ``send_email`` signature.
+
+An alert's idempotency key becomes its Message-ID, so a retried send
+carries the same Message-ID as the first attempt and a relay or mail
+client can drop the duplicate.
+"""
+
+import smtplib
+from email.message import EmailMessage
+from typing import Iterable, Optional, Tuple
+
+SMTP_HOST = 'smtp.gmail.com'
+SMTP_PORT = 465
+
+# Seconds to wait for the SMTP server before giving up on a send
+SMTP_TIMEOUT = 60
+
+# Domain part of the Message-IDs built from idempotency keys
+MESSAGE_ID_DOMAIN = 'permitminder'
+
+
+def build_message(
+    sender: str,
+    recipient: str,
+    subject: str,
+    html: str,
+    attachments: Iterable[Tuple[str, bytes]] = (),
+    message_id: Optional[str] = None,
+    text: Optional[str] = None
+) -> EmailMessage:
+    """
+    Build one alert email.
+
+    Args:
+        sender (str): From address.
+        recipient (str): To address.
+        subject (str): Subject line.
+        html (str): HTML body.
+        attachments (Iterable[Tuple[str, bytes]], optional): (filename, UTF-8 CSV) pairs.
+        message_id (str, optional): Idempotency key used as the Message-ID.
+        text (str, optional): Plain-text body, sent as multipart/alternative with ``html``.
+
+    Returns:
+        EmailMessage: The message, ready for ``send_message``.
+    """
+    message = EmailMessage()
+    message['From'] = sender
+    message['To'] = recipient
+    message['Subject'] = subject
+    if message_id:
+        message['Message-ID'] = f'<{message_id}@{MESSAGE_ID_DOMAIN}>'
+    if text is None:
+        message.set_content(html, subtype='html')
+    else:
+        message.set_content(text)
+        message.add_alternative(html, subtype='html')
+    for filename, content in attachments:
+        message.add_attachment(content, maintype='text', subtype='csv', filename=filename)
+    return message
+
+
+def send_message(message: EmailMessage, username: str, password: str) -> bool:
+    """
+    Send a message through Gmail SMTP.
+
+    Args:
+        message (EmailMessage): Message from ``build_message``.
+        username (str): Gmail account.
+        password (str): Gmail app password.
+
+    Returns:
+        bool: True if the server accepted the message; errors are printed.
+    """
+    try:
+        with smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT) as server:
+            server.login(username, password)
+            server.send_message(message)
+        return True
+    except (smtplib.SMTPException, OSError) as e:
+        print(f"Error sending email to {message['To']}: {e}")
+        return False
+
+
+def send_email(
+    username: str,
+    password: str,
+    recipient: str,
+    subject: str,
+    html: str,
+    attachments: Iterable[Tuple[str, bytes]] = (),
+    message_id: Optional[str] = None,
+    text: Optional[str] = None
+) -> bool:
+    """
+    Build and send one alert email from the Gmail account.
+
+    Args:
+        username (str): Gmail account, also used as the From address.
+        password (str): Gmail app password.
+        recipient (str): To address.
+        subject (str): Subject line.
+        html (str): HTML body.
+        attachments (Iterable[Tuple[str, bytes]], optional): (filename, UTF-8 CSV) pairs.
+        message_id (str, optional): Idempotency key used as the Message-ID.
+        text (str, optional): Plain-text alternative of ``html``.
+
+    Returns:
+        bool: True if the email was sent.
+    """
+    if not username or not password:
+        print(f"Gmail credentials not set - email to {recipient} not sent")
+        return False
+
+    message = build_message(username, recipient, subject, html, attachments, message_id, text)
+    return send_message(message, username, password)
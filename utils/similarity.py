@@ -0,0 +1,235 @@
+"""
+Facility similarity index for PermitMinder application.
+
+Represents every permit as a feature vector (parameter mix, county, severity
+distribution and exceedance frequency) and answers top-k nearest-neighbour
+queries for the "Similar Facilities" panel on the permit details page.
+
+The index is built offline and saved as plain ``.npy`` files so the app can
+load it memory-mapped:
+
+    python -m utils.similarity [csv_path] [output_dir]
+"""
+
+import json
+import os
+import sys
+from datetime import datetime
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_INDEX_DIR = 'similarity_index'
+
+# Relative weight of each feature block in the cosine similarity
+BLOCK_WEIGHTS = {
+    'parameters': 1.0,
+    'county': 0.5,
+    'severity': 0.75,
+    'frequency': 0.5,
+}
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """
+    Scale each row of a matrix to unit L2 norm in place.
+
+    Args:
+        matrix (np.ndarray): 2-D float matrix.
+
+    Returns:
+        np.ndarray: The same matrix with unit-length rows (zero rows stay zero).
+    """
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+
+def _share_block(permit_codes: np.ndarray, n_permits: int, values: pd.Series) -> np.ndarray:
+    """
+    Build a permit x category matrix of row shares for one categorical column.
+
+    Args:
+        permit_codes (np.ndarray): Permit code for every exceedance row.
+        n_permits (int): Number of distinct permits.
+        values (pd.Series): Categorical column aligned with ``permit_codes`` (plain
+                            or pandas Categorical, as for the normalized PARAMETER).
+
+    Returns:
+        np.ndarray: Matrix where each row sums to 1 across the categories.
+    """
+    # As object first: fillna cannot add 'Unknown' to a Categorical's categories
+    value_codes, uniques = pd.factorize(values.astype(object).fillna('Unknown').astype(str), sort=True)
+    n_values = max(len(uniques), 1)
+    counts = np.bincount(
+        permit_codes * n_values + value_codes,
+        minlength=n_permits * n_values
+    ).reshape(n_permits, n_values).astype(np.float32)
+    totals = counts.sum(axis=1, keepdims=True)
+    totals[totals == 0] = 1.0
+    return counts / totals
+
+
+class FacilitySimilarityIndex:
+    """
+    Nearest-neighbour index over permit feature vectors.
+
+    Vectors are stored as one float32 matrix with unit-length rows, so cosine
+    similarity is a single matrix-vector product.
+    """
+
+    def __init__(
+        self,
+        permits: np.ndarray,
+        vectors: np.ndarray,
+        facility_names: np.ndarray,
+        counties: np.ndarray
+    ) -> None:
+        self.permits = permits
+        self.vectors = vectors
+        self.facility_names = facility_names
+        self.counties = counties
+        self._positions: Dict[str, int] = {
+            str(permit): i for i, permit in enumerate(permits)
+        }
+
+    def __len__(self) -> int:
+        return len(self.permits)
+
+    @classmethod
+    def build(cls, df: pd.DataFrame) -> 'FacilitySimilarityIndex':
+        """
+        Compute feature vectors for every permit in an exceedance DataFrame.
+
+        Args:
+            df (pd.DataFrame): Exceedance records as returned by ``load_data``.
+
+        Returns:
+            FacilitySimilarityIndex: Index covering every permit in ``df``.
+        """
+        df = df[df['PERMIT_NUMBER'].notna()]
+        permit_codes, permits = pd.factorize(df['PERMIT_NUMBER'].astype(str), sort=True)
+        n_permits = len(permits)
+
+        blocks = {
+            'parameters': _share_block(permit_codes, n_permits, df['PARAMETER']),
+            'county': _share_block(permit_codes, n_permits, df['COUNTY_NAME']),
+            'severity': _share_block(permit_codes, n_permits, df['SEVERITY']),
+        }
+
+        # Exceedance frequency: overall volume and how many months were active
+        counts = np.bincount(permit_codes, minlength=n_permits).astype(np.float32)
+        months = pd.to_datetime(df['NON_COMPLIANCE_DATE'], errors='coerce').dt.to_period('M')
+        month_codes = pd.factorize(months)[0]
+        valid = month_codes >= 0
+        active_months = pd.Series(month_codes[valid]).groupby(permit_codes[valid]).nunique()
+        active = np.zeros(n_permits, dtype=np.float32)
+        active[active_months.index.to_numpy()] = active_months.to_numpy()
+        frequency = np.column_stack([np.log1p(counts), np.log1p(active)])
+        frequency /= np.maximum(frequency.max(axis=0, keepdims=True), 1e-9)
+        blocks['frequency'] = frequency.astype(np.float32)
+
+        weighted = [
+            _normalize_rows(block) * np.float32(np.sqrt(BLOCK_WEIGHTS[name]))
+            for name, block in blocks.items()
+        ]
+        vectors = _normalize_rows(np.hstack(weighted).astype(np.float32))
+
+        firsts = df.groupby(permit_codes)[['PF_NAME', 'COUNTY_NAME']].first()
+        return cls(
+            permits=np.asarray(permits, dtype=str),
+            vectors=np.ascontiguousarray(vectors),
+            facility_names=firsts['PF_NAME'].fillna('Unknown').astype(str).to_numpy(dtype=str),
+            counties=firsts['COUNTY_NAME'].fillna('Unknown').astype(str).to_numpy(dtype=str),
+        )
+
+    def save(self, directory: str = DEFAULT_INDEX_DIR) -> None:
+        """
+        Write the index to a directory of ``.npy`` files.
+
+        Args:
+            directory (str, optional): Output directory. Defaults to DEFAULT_INDEX_DIR.
+        """
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, 'vectors.npy'), self.vectors)
+        np.save(os.path.join(directory, 'permits.npy'), self.permits)
+        np.save(os.path.join(directory, 'facility_names.npy'), self.facility_names)
+        np.save(os.path.join(directory, 'counties.npy'), self.counties)
+
+        with open(os.path.join(directory, 'metadata.json'), 'w') as f:
+            json.dump({
+                'built_at': datetime.now().isoformat(),
+                'permits': len(self.permits),
+                'dimensions': int(self.vectors.shape[1]),
+                'block_weights': BLOCK_WEIGHTS,
+            }, f, indent=2)
+
+    @classmethod
+    def load(cls, directory: str = DEFAULT_INDEX_DIR, mmap: bool = True) -> 'FacilitySimilarityIndex':
+        """
+        Load a saved index, memory-mapping the vector matrix by default.
+
+        Args:
+            directory (str, optional): Index directory. Defaults to DEFAULT_INDEX_DIR.
+            mmap (bool, optional): Memory-map the vectors instead of reading them. Defaults to True.
+
+        Returns:
+            FacilitySimilarityIndex: The loaded index.
+        """
+        mmap_mode = 'r' if mmap else None
+        return cls(
+            permits=np.load(os.path.join(directory, 'permits.npy')),
+            vectors=np.load(os.path.join(directory, 'vectors.npy'), mmap_mode=mmap_mode),
+            facility_names=np.load(os.path.join(directory, 'facility_names.npy')),
+            counties=np.load(os.path.join(directory, 'counties.npy')),
+        )
+
+    def query(self, permit_number: str, k: int = 5) -> pd.DataFrame:
+        """
+        Find the permits most similar to a given permit.
+
+        Args:
+            permit_number (str): Permit to find neighbours for.
+            k (int, optional): Number of neighbours to return. Defaults to 5.
+
+        Returns:
+            pd.DataFrame: Neighbours with PERMIT_NUMBER, PF_NAME, COUNTY_NAME and
+                          SIMILARITY (0-1), most similar first. Empty if the
+                          permit is not in the index.
+        """
+        position = self._positions.get(str(permit_number))
+        if position is None or len(self) < 2:
+            return pd.DataFrame(columns=['PERMIT_NUMBER', 'PF_NAME', 'COUNTY_NAME', 'SIMILARITY'])
+
+        scores = self.vectors @ self.vectors[position]
+        scores[position] = -np.inf
+
+        k = min(k, len(self) - 1)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        return pd.DataFrame({
+            'PERMIT_NUMBER': self.permits[top],
+            'PF_NAME': self.facility_names[top],
+            'COUNTY_NAME': self.counties[top],
+            'SIMILARITY': np.clip(scores[top], 0, 1),
+        })
+
+
+if __name__ == "__main__":
+    from permitminder.core import load_data, load_exceedances
+
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else None
+    output_dir = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_INDEX_DIR
+
+    # An explicit path wins over PERMITMINDER_DATA_FILE and the default files
+    data = load_exceedances(csv_path) if csv_path else load_data()
+    if data.empty:
+        print("No data loaded - similarity index not built")
+        sys.exit(1)
+
+    index = FacilitySimilarityIndex.build(data)
+    index.save(output_dir)
+    print(f"Saved similarity index for {len(index)} permits to {output_dir}")
@@ -0,0 +1,458 @@
+"""
+Subscription store for PermitMinder email alerts.
+
+Keeps subscribers, their subscriptions and the permits each subscription
+monitors in SQLite (WAL mode), replacing the rewrite-the-whole-file
+``email_subscriptions.csv``. The CSV format is still supported for import
+and export.
+"""
+
+import os
+import re
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+DEFAULT_DB_PATH = 'subscriptions.db'
+LEGACY_CSV_PATH = 'email_subscriptions.csv'
+CSV_COLUMNS = ['email', 'facilities', 'frequency', 'created_date', 'status']
+
+# Facility labels are stored as "NAME - PERMIT (COUNTY)"
+FACILITY_LABEL_PATTERN = re.compile(r' - (?P<permit>[^\s()]+) \((?P<county>[^()]*)\)$')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS subscribers (
+    id INTEGER PRIMARY KEY,
+    email TEXT NOT NULL UNIQUE COLLATE NOCASE,
+    created_date TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS subscriptions (
+    id INTEGER PRIMARY KEY,
+    subscriber_id INTEGER NOT NULL REFERENCES subscribers(id) ON DELETE CASCADE,
+    frequency TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'active',
+    created_date TEXT NOT NULL,
+    severities TEXT,
+    parameters TEXT,
+    min_percent REAL,
+    include_summary INTEGER NOT NULL DEFAULT 1,
+    include_csv INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS subscription_permits (
+    subscription_id INTEGER NOT NULL REFERENCES subscriptions(id) ON DELETE CASCADE,
+    permit_number TEXT NOT NULL,
+    facility_name TEXT,
+    county_name TEXT,
+    PRIMARY KEY (subscription_id, permit_number)
+);
+
+CREATE INDEX IF NOT EXISTS idx_subscribers_email ON subscribers(email);
+CREATE INDEX IF NOT EXISTS idx_subscriptions_subscriber ON subscriptions(subscriber_id, status);
+CREATE INDEX IF NOT EXISTS idx_subscription_permits_permit ON subscription_permits(permit_number);
+"""
+
+# Alert options added after the first release; ALTERed into older databases
+OPTION_COLUMNS = {
+    'severities': 'TEXT',
+    'parameters': 'TEXT',
+    'min_percent': 'REAL',
+    'include_summary': 'INTEGER NOT NULL DEFAULT 1',
+    'include_csv': 'INTEGER NOT NULL DEFAULT 0',
+}
+
+# Separator of the severity and parameter lists (as in the CSV facilities column)
+LIST_SEPARATOR = '|'
+
+
+def split_facility_label(label: str) -> Tuple[Optional[str], str, Optional[str]]:
+    """
+    Split a "NAME - PERMIT (COUNTY)" label into its parts.
+
+    Args:
+        label (str): Facility display label, or a bare permit number.
+
+    Returns:
+        Tuple[Optional[str], str, Optional[str]]: Facility name, permit number and county.
+    """
+    label = str(label).strip()
+    match = FACILITY_LABEL_PATTERN.search(label)
+    if not match:
+        return None, label, None
+    return label[:match.start()], match.group('permit'), match.group('county')
+
+
+def format_facility_label(name: Optional[str], permit: str, county: Optional[str]) -> str:
+    """
+    Build the "NAME - PERMIT (COUNTY)" label used by the subscription forms.
+
+    Args:
+        name (str, optional): Facility name.
+        permit (str): Permit number.
+        county (str, optional): County name.
+
+    Returns:
+        str: Display label, or the bare permit number if name/county are unknown.
+    """
+    if name is None or county is None:
+        return permit
+    return f"{name} - {permit} ({county})"
+
+
+def join_values(values: Optional[Iterable[str]]) -> Optional[str]:
+    """
+    Store a list of option values as one column.
+
+    Args:
+        values (Iterable[str], optional): Selected values.
+
+    Returns:
+        str: Sorted values joined with LIST_SEPARATOR, or None for no restriction.
+    """
+    values = sorted({str(value).strip() for value in values or [] if str(value).strip()})
+    return LIST_SEPARATOR.join(values) if values else None
+
+
+def split_values(stored: Optional[str]) -> List[str]:
+    """
+    Read a list of option values stored by ``join_values``.
+
+    Args:
+        stored (str, optional): Stored column value.
+
+    Returns:
+        List[str]: The values (empty for no restriction).
+    """
+    if not isinstance(stored, str) or not stored:
+        return []
+    return stored.split(LIST_SEPARATOR)
+
+
+class SQLiteStore:
+    """
+    Base for the alert databases: short-lived WAL connections and write transactions.
+
+    Each operation opens its own connection, so one store can be shared by
+    every Streamlit session thread and worker. Writes run in ``BEGIN IMMEDIATE``
+    transactions and WAL mode lets readers continue while a write is in flight.
+
+    Args:
+        path (str, optional): SQLite database path. Defaults to DEFAULT_DB_PATH.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH) -> None:
+        self.path = path
+
+    def _apply_schema(self, schema: str) -> None:
+        """Create tables, indexes and triggers that do not exist yet."""
+        conn = self._connect()
+        try:
+            conn.executescript(schema)
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection with WAL, foreign keys and a busy timeout."""
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA foreign_keys=ON')
+        conn.execute('PRAGMA busy_timeout=30000')
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run a block in a write transaction, rolling back on error."""
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            yield conn
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    def _query(self, sql: str, params: tuple = ()) -> pd.DataFrame:
+        """Run a read-only query and return the rows as a DataFrame."""
+        conn = self._connect()
+        try:
+            return pd.read_sql_query(sql, conn, params=params)
+        finally:
+            conn.close()
+
+
+class SubscriptionStore(SQLiteStore):
+    """
+    SQLite-backed subscription storage.
+
+    Args:
+        path (str, optional): SQLite database path. Defaults to DEFAULT_DB_PATH.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH) -> None:
+        super().__init__(path)
+        self._apply_schema(SCHEMA)
+        conn = self._connect()
+        try:
+            missing = self._missing_option_columns(conn)
+        finally:
+            conn.close()
+
+        if missing:
+            # Re-check under the write lock, so concurrent openers cannot both add a column
+            with self._transaction() as conn:
+                for column in self._missing_option_columns(conn):
+                    conn.execute(f'ALTER TABLE subscriptions ADD COLUMN {column} {OPTION_COLUMNS[column]}')
+
+    @staticmethod
+    def _missing_option_columns(conn: sqlite3.Connection) -> List[str]:
+        """OPTION_COLUMNS not yet present in the subscriptions table."""
+        existing = {row['name'] for row in conn.execute('PRAGMA table_info(subscriptions)')}
+        return [column for column in OPTION_COLUMNS if column not in existing]
+
+    def _insert_subscription(
+        self,
+        conn: sqlite3.Connection,
+        email: str,
+        facilities: Iterable[str],
+        frequency: str,
+        created_date: str,
+        status: str,
+        severities: Optional[Iterable[str]] = None,
+        parameters: Optional[Iterable[str]] = None,
+        min_percent: Optional[float] = None,
+        include_summary: bool = True,
+        include_csv: bool = False
+    ) -> int:
+        """Insert one subscription and its permits inside an open transaction."""
+        conn.execute(
+            'INSERT OR IGNORE INTO subscribers (email, created_date) VALUES (?, ?)',
+            (email, created_date)
+        )
+        subscriber_id = conn.execute(
+            'SELECT id FROM subscribers WHERE email = ?', (email,)
+        ).fetchone()['id']
+
+        cursor = conn.execute(
+            'INSERT INTO subscriptions (subscriber_id, frequency, status, created_date, '
+            '                           severities, parameters, min_percent, include_summary, include_csv) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (
+                subscriber_id, frequency, status, created_date,
+                join_values(severities), join_values(parameters),
+                float(min_percent) if min_percent else None, int(include_summary), int(include_csv)
+            )
+        )
+        subscription_id = cursor.lastrowid
+
+        permits = {}
+        for label in facilities:
+            name, permit, county = split_facility_label(label)
+            if permit:
+                permits[permit] = (subscription_id, permit, name, county)
+
+        conn.executemany(
+            'INSERT INTO subscription_permits (subscription_id, permit_number, facility_name, county_name) '
+            'VALUES (?, ?, ?, ?)',
+            list(permits.values())
+        )
+        return subscription_id
+
+    def add_subscription(
+        self,
+        email: str,
+        facilities: Iterable[str],
+        frequency: str,
+        severities: Optional[Iterable[str]] = None,
+        parameters: Optional[Iterable[str]] = None,
+        min_percent: Optional[float] = None,
+        include_summary: bool = True,
+        include_csv: bool = False
+    ) -> int:
+        """
+        Create a subscription for an email address.
+
+        Args:
+            email (str): Subscriber email address.
+            facilities (Iterable[str]): Facility labels or permit numbers to monitor.
+            frequency (str): Notification frequency.
+            severities (Iterable[str], optional): Only alert on these severity levels. Defaults to all.
+            parameters (Iterable[str], optional): Only alert on these parameters. Defaults to all.
+            min_percent (float, optional): Only alert at or above this percent over the limit.
+            include_summary (bool, optional): Include a summary in alert emails. Defaults to True.
+            include_csv (bool, optional): Attach a CSV of the exceedances. Defaults to False.
+
+        Returns:
+            int: Id of the new subscription.
+        """
+        created_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        with self._transaction() as conn:
+            return self._insert_subscription(
+                conn, email.strip(), facilities, frequency, created_date, 'active',
+                severities, parameters, min_percent, include_summary, include_csv
+            )
+
+    def set_status(self, subscription_id: int, status: str) -> None:
+        """
+        Change a subscription's status (e.g. 'active' or 'paused').
+
+        Args:
+            subscription_id (int): Subscription to update.
+            status (str): New status.
+        """
+        with self._transaction() as conn:
+            conn.execute('UPDATE subscriptions SET status = ? WHERE id = ?', (status, int(subscription_id)))
+
+    def delete_subscription(self, subscription_id: int) -> None:
+        """
+        Delete a subscription and its monitored permits.
+
+        Args:
+            subscription_id (int): Subscription to delete.
+        """
+        with self._transaction() as conn:
+            conn.execute('DELETE FROM subscriptions WHERE id = ?', (int(subscription_id),))
+
+    def get_subscriptions(self, email: str) -> pd.DataFrame:
+        """
+        List the subscriptions belonging to an email address.
+
+        Args:
+            email (str): Subscriber email address.
+
+        Returns:
+            pd.DataFrame: One row per subscription with id, frequency, status,
+                          created_date, facility_count and the alert options.
+        """
+        return self._query(
+            'SELECT s.id, s.frequency, s.status, s.created_date, '
+            '       s.severities, s.parameters, s.min_percent, s.include_summary, s.include_csv, '
+            '       (SELECT COUNT(*) FROM subscription_permits p WHERE p.subscription_id = s.id) AS facility_count '
+            'FROM subscriptions s JOIN subscribers u ON u.id = s.subscriber_id '
+            'WHERE u.email = ? ORDER BY s.created_date',
+            (email.strip(),)
+        )
+
+    def active_permits(self) -> pd.DataFrame:
+        """
+        Permits monitored by active subscriptions.
+
+        Returns:
+            pd.DataFrame: One row per (subscription, permit) with email,
+                          subscription_id, frequency, permit_number and the
+                          alert options (severities, parameters, min_percent,
+                          include_summary, include_csv).
+        """
+        return self._query(
+            'SELECT u.email, s.id AS subscription_id, s.frequency, p.permit_number, '
+            '       s.severities, s.parameters, s.min_percent, s.include_summary, s.include_csv '
+            'FROM subscriptions s '
+            'JOIN subscribers u ON u.id = s.subscriber_id '
+            'JOIN subscription_permits p ON p.subscription_id = s.id '
+            "WHERE s.status = 'active'"
+        )
+
+    def active_subscription_count(self) -> int:
+        """
+        Number of active subscriptions.
+
+        Returns:
+            int: Count of subscriptions with status 'active'.
+        """
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM subscriptions WHERE status = 'active'").fetchone()[0]
+        finally:
+            conn.close()
+
+    def is_empty(self) -> bool:
+        """Return True if no subscriptions have been stored."""
+        conn = self._connect()
+        try:
+            return conn.execute('SELECT 1 FROM subscriptions LIMIT 1').fetchone() is None
+        finally:
+            conn.close()
+
+    def import_csv(self, path: str = LEGACY_CSV_PATH, only_if_empty: bool = False) -> int:
+        """
+        Import subscriptions from the legacy ``email_subscriptions.csv`` format.
+
+        Args:
+            path (str, optional): CSV path. Defaults to LEGACY_CSV_PATH.
+            only_if_empty (bool, optional): Skip the import if the store already
+                                            holds subscriptions. Defaults to False.
+
+        Returns:
+            int: Number of subscriptions imported.
+        """
+        legacy = pd.read_csv(path, dtype=str).fillna('')
+        with self._transaction() as conn:
+            if only_if_empty and conn.execute('SELECT 1 FROM subscriptions LIMIT 1').fetchone():
+                return 0
+            for row in legacy.itertuples(index=False):
+                self._insert_subscription(
+                    conn,
+                    row.email.strip(),
+                    [label for label in row.facilities.split('|') if label],
+                    row.frequency,
+                    row.created_date or datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                    row.status or 'active'
+                )
+        return len(legacy)
+
+    def export_csv(self, path: str = LEGACY_CSV_PATH) -> int:
+        """
+        Export all subscriptions in the legacy ``email_subscriptions.csv`` format.
+
+        Args:
+            path (str, optional): CSV path. Defaults to LEGACY_CSV_PATH.
+
+        Returns:
+            int: Number of subscriptions exported.
+        """
+        rows = self._query(
+            'SELECT s.id, u.email, s.frequency, s.created_date, s.status, '
+            '       p.permit_number, p.facility_name, p.county_name '
+            'FROM subscriptions s '
+            'JOIN subscribers u ON u.id = s.subscriber_id '
+            'LEFT JOIN subscription_permits p ON p.subscription_id = s.id '
+            'ORDER BY s.id'
+        )
+        rows['label'] = [
+            format_facility_label(name, permit, county) if permit else ''
+            for name, permit, county in zip(rows['facility_name'], rows['permit_number'], rows['county_name'])
+        ]
+        exported = rows.groupby('id', sort=True).agg(
+            email=('email', 'first'),
+            facilities=('label', lambda labels: '|'.join(label for label in labels if label)),
+            frequency=('frequency', 'first'),
+            created_date=('created_date', 'first'),
+            status=('status', 'first'),
+        )
+        exported[CSV_COLUMNS].to_csv(path, index=False)
+        return len(exported)
+
+
+def get_subscription_store(path: str = DEFAULT_DB_PATH, legacy_csv: str = LEGACY_CSV_PATH) -> SubscriptionStore:
+    """
+    Open the subscription store, importing the legacy CSV on first use.
+
+    Args:
+        path (str, optional): SQLite database path. Defaults to DEFAULT_DB_PATH.
+        legacy_csv (str, optional): Legacy CSV to import into a new store.
+                                    Defaults to LEGACY_CSV_PATH.
+
+    Returns:
+        SubscriptionStore: The opened store.
+    """
+    is_new = not os.path.exists(path)
+    store = SubscriptionStore(path)
+    if is_new and legacy_csv and os.path.exists(legacy_csv):
+        store.import_csv(legacy_csv, only_if_empty=True)
+    return store
@@ -0,0 +1,533 @@
+"""
+Synthetic eDMR data generator for PermitMinder application.
+
+Produces realistic exceedance extracts for load and scale testing without
+touching production data: skewed facility, county and parameter
+distributions, monthly monitoring periods over configurable years,
+``<``/``>``/ND sample values and optional launch-ready columns matching
+``launch_ready_columns.prepare_launch_ready_dmr``.
+
+Rows are generated and written in chunks, so datasets of 10M+ rows never
+sit in memory. Write a dataset with:
+
+    python -m utils.synthetic_data out.csv --rows 1000000
+    python -m utils.synthetic_data out.parquet --rows 10000000 --years 2015-2024 --states PA OH WV
+    python -m utils.synthetic_data raw_dmr.csv --rows 100000 --raw
+
+Point the app at a generated file with the PERMITMINDER_DATA_FILE
+environment variable.
+"""
+
+import argparse
+import os
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from permitminder.core.quality import LAUNCH_READY_QUALITY_COLUMN, compute_quality_flags
+
+# Counties per state; the first counties in each list are the most active
+STATE_COUNTIES: Dict[str, List[str]] = {
+    'PA': [
+        'Allegheny', 'Westmoreland', 'Washington', 'Beaver', 'Butler', 'Erie',
+        'Lancaster', 'York', 'Berks', 'Chester', 'Montgomery', 'Bucks',
+        'Luzerne', 'Lackawanna', 'Dauphin', 'Cumberland', 'Centre', 'Cambria',
+        'Indiana', 'Fayette', 'Greene', 'Schuylkill', 'Northampton', 'Lehigh',
+        'Clearfield', 'Armstrong', 'Somerset', 'Jefferson', 'Clarion', 'Venango'
+    ],
+    'OH': [
+        'Cuyahoga', 'Franklin', 'Hamilton', 'Summit', 'Montgomery', 'Lucas',
+        'Stark', 'Butler', 'Lorain', 'Mahoning', 'Trumbull', 'Belmont',
+        'Jefferson', 'Columbiana', 'Muskingum', 'Washington'
+    ],
+    'WV': [
+        'Kanawha', 'Monongalia', 'Marion', 'Harrison', 'Raleigh', 'Boone',
+        'Logan', 'Mingo', 'Wyoming', 'McDowell', 'Ohio', 'Marshall', 'Wetzel'
+    ],
+    'NY': [
+        'Erie', 'Monroe', 'Onondaga', 'Albany', 'Westchester', 'Suffolk',
+        'Nassau', 'Broome', 'Chautauqua', 'Niagara', 'Oneida', 'Steuben'
+    ],
+}
+
+# Parameter name -> (parameter code, unit, typical permit limit)
+PARAMETERS: Dict[str, Tuple[str, str, float]] = {
+    'Total Suspended Solids': ('00530', 'mg/L', 30.0),
+    'pH': ('00400', 'S.U.', 9.0),
+    'Fecal Coliform': ('74055', 'No./100 ml', 200.0),
+    'Ammonia-Nitrogen': ('00610', 'mg/L', 3.0),
+    'Biochemical Oxygen Demand': ('00310', 'mg/L', 25.0),
+    'Dissolved Oxygen': ('00300', 'mg/L', 5.0),
+    'Iron, Total': ('01045', 'mg/L', 3.0),
+    'Manganese, Total': ('01055', 'mg/L', 2.0),
+    'Aluminum, Total': ('01105', 'mg/L', 0.75),
+    'Total Residual Chlorine': ('50060', 'mg/L', 0.5),
+    'Oil and Grease': ('00556', 'mg/L', 15.0),
+    'Phosphorus, Total': ('00665', 'mg/L', 2.0),
+    'Copper': ('01042', 'ug/L', 20.0),
+    'Zinc': ('01092', 'ug/L', 120.0),
+    'Lead': ('01051', 'ug/L', 5.0),
+    'Osmotic Pressure': ('82046', 'mOs/kg', 50.0),
+    'Nitrate-Nitrite as N': ('00630', 'mg/L', 10.0),
+    'Chromium': ('01034', 'ug/L', 50.0),
+    'Cadmium': ('01027', 'ug/L', 1.0),
+    'Mercury': ('71900', 'ug/L', 0.05),
+    'Cyanide': ('00720', 'ug/L', 10.0),
+    'Phenols': ('32730', 'ug/L', 15.0),
+}
+
+# Must match the industrial parameters in permitminder/core/normalization.py
+INDUSTRIAL_PARAMETERS = {
+    'Aluminum, Total', 'Iron, Total', 'Manganese, Total',
+    'Chromium', 'Lead', 'Mercury', 'Cadmium', 'Copper', 'Zinc',
+    'Cyanide', 'Phenols', 'PCB', 'Benzene', 'Toluene'
+}
+
+FACILITY_STEMS = [
+    'MILL CREEK', 'RIVERSIDE', 'OAK HILL', 'GREEN VALLEY', 'BEAR RUN',
+    'LAUREL RIDGE', 'CEDAR', 'MAPLE GROVE', 'STONY POINT', 'PINE HOLLOW',
+    'BLACK LICK', 'CLEAR FORK', 'SUGAR CREEK', 'IRON BRIDGE', 'FOX CHAPEL',
+    'WILLOW', 'HICKORY', 'ELK', 'SALT SPRINGS', 'TWIN LAKES'
+]
+FACILITY_TYPES = [
+    'STP', 'WWTP', 'MUNICIPAL AUTHORITY', 'MINE', 'POWER STATION',
+    'CONCRETE', 'LANDFILL', 'STEEL WORKS', 'WATER TREATMENT PLANT', 'QUARRY'
+]
+MUNICIPALITY_TYPES = ['Twp', 'Boro', 'City']
+
+# Raw eDMR extract columns (input to prepare_launch_ready_dmr)
+RAW_COLUMNS = [
+    'PERMIT_NUMBER', 'PF_NAME', 'COUNTY_NAME', 'MUNICIPALITY_NAME',
+    'OUTFALL_NUMBER', 'PARAMETER', 'Parameter_Code',
+    'MONITORING_PERIOD_BEGIN_DATE', 'MONITORING_PERIOD_END_DATE',
+    'NON_COMPLIANCE_DATE', 'SAMPLE_VALUE', 'VIOLATION_CONDITION',
+    'Reporting_Limit', 'PERMIT_VALUE', 'UNIT_OF_MEASURE'
+]
+
+# Columns added by prepare_launch_ready_dmr and add_chemical_laundering_flags
+LAUNCH_READY_COLUMNS = [
+    'Effective_Result', 'Is_Violation', 'Permit_Limit_Clean', 'Exceedance_Delta',
+    'Percent_of_Limit', 'Percent_Over_Limit', 'Severity', 'Data_Quality_Flags',
+    'Sample_Date', 'Month_Bucket', 'Compliance_Period_Key', 'Source_File',
+    'Ingested_At', 'Row_Hash', 'Has_Industrial_Parameters',
+    'Chemical_Laundering_Candidate'
+]
+
+# Share of rows with qualified or missing values
+LESS_THAN_RATE = 0.03
+GREATER_THAN_RATE = 0.01
+NON_DETECT_RATE = 0.02
+MISSING_LIMIT_RATE = 0.005
+MISSING_UNIT_RATE = 0.005
+
+MAX_PARAMETERS_PER_FACILITY = 8
+DEFAULT_CHUNK_SIZE = 250_000
+
+
+def _zipf_weights(n_choices: int, skew: float) -> np.ndarray:
+    """Selection probabilities skewed toward low indices."""
+    weights = 1.0 / np.arange(1, n_choices + 1) ** skew
+    return weights / weights.sum()
+
+
+def parse_years(years: str) -> Tuple[int, int]:
+    """
+    Parse a year range such as "2020-2024" or a single year.
+
+    Args:
+        years (str): Year range.
+
+    Returns:
+        Tuple[int, int]: First and last year (inclusive).
+    """
+    first, _, last = years.partition('-')
+    start, end = int(first), int(last or first)
+    if end < start:
+        raise ValueError(f"Invalid year range: {years}")
+    return start, end
+
+
+def default_facility_count(n_rows: int) -> int:
+    """Roughly one facility per 100 records, between 50 and 50,000."""
+    return int(min(max(n_rows // 100, 50), 50_000))
+
+
+class SyntheticEDMR:
+    """
+    Generator of synthetic eDMR exceedance records.
+
+    The facility population (permits, names, locations and monitored
+    parameters) is fixed by the seed; records are then drawn chunk by chunk.
+
+    Args:
+        n_facilities (int): Number of distinct permits.
+        years (Tuple[int, int], optional): First and last year of records. Defaults to 2020-2024.
+        states (List[str], optional): State codes from STATE_COUNTIES. Defaults to ['PA'].
+        seed (int, optional): Random seed. Defaults to 42.
+    """
+
+    def __init__(
+        self,
+        n_facilities: int,
+        years: Tuple[int, int] = (2020, 2024),
+        states: Optional[List[str]] = None,
+        seed: int = 42
+    ) -> None:
+        states = states or ['PA']
+        unknown = [state for state in states if state not in STATE_COUNTIES]
+        if unknown:
+            raise ValueError(f"Unknown states: {unknown}. Available: {sorted(STATE_COUNTIES)}")
+
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self.n_facilities = n_facilities
+        self._build_calendar(*years)
+        self._build_facilities(n_facilities, states)
+
+    def _build_calendar(self, first_year: int, last_year: int) -> None:
+        """Precompute date strings so chunks only index into them."""
+        months = pd.period_range(f'{first_year}-01', f'{last_year}-12', freq='M')
+        self.month_begin = months.start_time.strftime('%m/%d/%Y').to_numpy()
+        self.month_end = months.end_time.strftime('%m/%d/%Y').to_numpy()
+        self.month_bucket = months.strftime('%Y-%m').to_numpy()
+        self.month_first_day = (months.start_time - months.start_time[0]).days.to_numpy()
+        self.month_days = months.days_in_month.to_numpy()
+
+        days = pd.date_range(f'{first_year}-01-01', f'{last_year}-12-31', freq='D')
+        self.day_strings = days.strftime('%m/%d/%Y').to_numpy()
+
+    def _build_facilities(self, n_facilities: int, states: List[str]) -> None:
+        """Draw the fixed facility population."""
+        rng = self.rng
+
+        # States share facilities in proportion to their county counts
+        county_names = []
+        county_weights = []
+        permit_prefixes = []
+        for state in states:
+            counties = STATE_COUNTIES[state]
+            county_names.extend(counties)
+            county_weights.extend(_zipf_weights(len(counties), 0.9) * len(counties))
+            permit_prefixes.extend([state] * len(counties))
+        county_weights = np.array(county_weights) / np.sum(county_weights)
+
+        county_codes = rng.choice(len(county_names), n_facilities, p=county_weights)
+        self.facility_county = np.array(county_names, dtype=object)[county_codes]
+
+        prefixes = np.array(permit_prefixes, dtype=object)[county_codes]
+        # General permits (PAG...) for a share of facilities, like the real extract
+        general = rng.random(n_facilities) < 0.2
+        serials = rng.choice(1_000_000, n_facilities, replace=False)
+        self.facility_permit = np.array([
+            f"{prefix}G{serial:06d}" if is_general else f"{prefix}{serial:07d}"
+            for prefix, is_general, serial in zip(prefixes, general, serials)
+        ], dtype=object)
+
+        stems = rng.integers(0, len(FACILITY_STEMS), n_facilities)
+        types = rng.choice(len(FACILITY_TYPES), n_facilities, p=_zipf_weights(len(FACILITY_TYPES), 0.7))
+        self.facility_name = np.array([
+            f"{FACILITY_STEMS[stem]} {FACILITY_TYPES[kind]} {i}"
+            for i, (stem, kind) in enumerate(zip(stems, types))
+        ], dtype=object)
+
+        municipality_types = rng.integers(0, len(MUNICIPALITY_TYPES), n_facilities)
+        self.facility_municipality = np.array([
+            f"{FACILITY_STEMS[stem].title()} {MUNICIPALITY_TYPES[kind]}"
+            for stem, kind in zip(stems, municipality_types)
+        ], dtype=object)
+
+        self.facility_outfalls = rng.integers(1, 5, n_facilities)
+        self.facility_limit_scale = np.round(rng.lognormal(0, 0.4, n_facilities), 2)
+
+        # Monitored parameters per facility, common parameters more likely
+        self.parameter_names = np.array(list(PARAMETERS), dtype=object)
+        parameter_weights = _zipf_weights(len(self.parameter_names), 1.0)
+        self.parameter_codes = np.array([PARAMETERS[name][0] for name in self.parameter_names], dtype=object)
+        self.parameter_units = np.array([PARAMETERS[name][1] for name in self.parameter_names], dtype=object)
+        self.parameter_limits = np.array([PARAMETERS[name][2] for name in self.parameter_names])
+
+        self.facility_parameter_count = rng.integers(2, MAX_PARAMETERS_PER_FACILITY + 1, n_facilities)
+        self.facility_parameters = np.stack([
+            rng.choice(len(self.parameter_names), MAX_PARAMETERS_PER_FACILITY, replace=False, p=parameter_weights)
+            for _ in range(n_facilities)
+        ])
+
+        # A permit is a laundering candidate if it monitors any industrial parameter
+        industrial = np.isin(self.parameter_names, list(INDUSTRIAL_PARAMETERS))
+        slots = np.arange(MAX_PARAMETERS_PER_FACILITY) < self.facility_parameter_count[:, None]
+        self.facility_industrial = (industrial[self.facility_parameters] & slots).any(axis=1)
+
+        # Record volume per facility is heavily skewed
+        self.facility_weights = rng.permutation(_zipf_weights(n_facilities, 0.8))
+
+    def facilities(self) -> pd.DataFrame:
+        """
+        The generated facility population.
+
+        Returns:
+            pd.DataFrame: PERMIT_NUMBER, PF_NAME, COUNTY_NAME and MUNICIPALITY_NAME per facility.
+        """
+        return pd.DataFrame({
+            'PERMIT_NUMBER': self.facility_permit,
+            'PF_NAME': self.facility_name,
+            'COUNTY_NAME': self.facility_county,
+            'MUNICIPALITY_NAME': self.facility_municipality,
+        })
+
+    def generate_chunk(self, n_rows: int, launch_ready: bool = True) -> pd.DataFrame:
+        """
+        Draw one chunk of exceedance records.
+
+        Args:
+            n_rows (int): Number of records.
+            launch_ready (bool, optional): Add LAUNCH_READY_COLUMNS. Defaults to True.
+
+        Returns:
+            pd.DataFrame: RAW_COLUMNS (plus launch-ready columns if requested).
+        """
+        rng = self.rng
+        facility = rng.choice(self.n_facilities, n_rows, p=self.facility_weights)
+        slot = (rng.random(n_rows) * self.facility_parameter_count[facility]).astype(np.int64)
+        parameter = self.facility_parameters[facility, slot]
+        outfall = (rng.random(n_rows) * self.facility_outfalls[facility]).astype(np.int64) + 1
+
+        # Later months have somewhat more records, as reporting coverage grew
+        month_weights = np.linspace(1.0, 1.5, len(self.month_begin))
+        month = rng.choice(len(self.month_begin), n_rows, p=month_weights / month_weights.sum())
+        day = self.month_first_day[month] + (rng.random(n_rows) * self.month_days[month]).astype(np.int64)
+
+        limit = np.round(self.parameter_limits[parameter] * self.facility_limit_scale[facility], 3)
+        percent_over = rng.gamma(1.2, 80, n_rows)
+        sample = np.round(limit * (1 + percent_over / 100), 3)
+
+        sample_text = pd.Series(sample).astype(str).to_numpy(dtype=object)
+        condition = np.full(n_rows, '=', dtype=object)
+        reporting_limit = np.full(n_rows, np.nan)
+
+        qualifier = rng.random(n_rows)
+        less_than = qualifier < LESS_THAN_RATE
+        greater_than = (qualifier >= LESS_THAN_RATE) & (qualifier < LESS_THAN_RATE + GREATER_THAN_RATE)
+        non_detect = (
+            (qualifier >= LESS_THAN_RATE + GREATER_THAN_RATE) &
+            (qualifier < LESS_THAN_RATE + GREATER_THAN_RATE + NON_DETECT_RATE)
+        )
+
+        detection_limit = np.round(limit * rng.uniform(0.05, 3.0, n_rows), 3)
+        sample_text[less_than] = '<' + pd.Series(detection_limit[less_than]).astype(str).to_numpy(dtype=object)
+        sample_text[greater_than] = '>' + pd.Series(sample[greater_than]).astype(str).to_numpy(dtype=object)
+        sample_text[non_detect] = 'ND'
+        condition[less_than] = '<'
+        condition[greater_than] = '>'
+        condition[non_detect] = 'ND'
+        reporting_limit[less_than | non_detect] = detection_limit[less_than | non_detect]
+
+        permit_value = limit.copy()
+        permit_value[rng.random(n_rows) < MISSING_LIMIT_RATE] = np.nan
+        unit = self.parameter_units[parameter].copy()
+        unit[rng.random(n_rows) < MISSING_UNIT_RATE] = None
+
+        chunk = pd.DataFrame({
+            'PERMIT_NUMBER': self.facility_permit[facility],
+            'PF_NAME': self.facility_name[facility],
+            'COUNTY_NAME': self.facility_county[facility],
+            'MUNICIPALITY_NAME': self.facility_municipality[facility],
+            'OUTFALL_NUMBER': np.char.zfill(outfall.astype(str), 3).astype(object),
+            'PARAMETER': self.parameter_names[parameter],
+            'Parameter_Code': self.parameter_codes[parameter],
+            'MONITORING_PERIOD_BEGIN_DATE': self.month_begin[month],
+            'MONITORING_PERIOD_END_DATE': self.month_end[month],
+            'NON_COMPLIANCE_DATE': self.day_strings[day],
+            'SAMPLE_VALUE': sample_text,
+            'VIOLATION_CONDITION': condition,
+            'Reporting_Limit': reporting_limit,
+            'PERMIT_VALUE': permit_value,
+            'UNIT_OF_MEASURE': unit,
+        })
+
+        if launch_ready:
+            self._add_launch_ready_columns(chunk, sample, detection_limit, less_than, non_detect, month, facility)
+        return chunk
+
+    def _add_launch_ready_columns(
+        self,
+        chunk: pd.DataFrame,
+        sample: np.ndarray,
+        detection_limit: np.ndarray,
+        less_than: np.ndarray,
+        non_detect: np.ndarray,
+        month: np.ndarray,
+        facility: np.ndarray
+    ) -> None:
+        """Vectorized equivalent of prepare_launch_ready_dmr for generated rows."""
+        effective = sample.copy()
+        effective[less_than | non_detect] = detection_limit[less_than | non_detect] / 2
+
+        limit = chunk['PERMIT_VALUE'].to_numpy()
+        has_limit = ~np.isnan(limit) & (limit > 0)
+        is_violation = has_limit & (effective > limit)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            percent_of_limit = np.where(has_limit, effective / limit * 100, np.nan)
+        delta = np.where(has_limit, effective - limit, np.nan)
+        percent_over = np.where(is_violation, percent_of_limit - 100, 0.0)
+
+        severity = np.where(
+            percent_of_limit >= 500, 'Critical', np.where(percent_of_limit >= 200, 'High', 'Moderate')
+        ).astype(object)
+        severity[~is_violation] = 'Compliant'
+
+        quality = compute_quality_flags(chunk['PERMIT_VALUE'], pd.Series(effective), chunk['UNIT_OF_MEASURE'])
+
+        chunk['Effective_Result'] = effective
+        chunk['Is_Violation'] = is_violation
+        chunk['Permit_Limit_Clean'] = limit
+        chunk['Exceedance_Delta'] = delta
+        chunk['Percent_of_Limit'] = percent_of_limit
+        chunk['Percent_Over_Limit'] = percent_over
+        chunk['Severity'] = severity
+        chunk[LAUNCH_READY_QUALITY_COLUMN] = quality
+        chunk['Sample_Date'] = pd.to_datetime(chunk['MONITORING_PERIOD_BEGIN_DATE'], format='%m/%d/%Y')
+        chunk['Month_Bucket'] = self.month_bucket[month]
+        chunk['Compliance_Period_Key'] = (
+            chunk['Month_Bucket'] + '-' + chunk['OUTFALL_NUMBER'] + '-' + chunk['Parameter_Code']
+        )
+        chunk['Source_File'] = 'Synthetic_eDMR'
+        chunk['Ingested_At'] = datetime.now().isoformat()
+        chunk['Row_Hash'] = pd.util.hash_pandas_object(chunk[RAW_COLUMNS], index=False).to_numpy()
+        chunk['Has_Industrial_Parameters'] = chunk['PARAMETER'].isin(INDUSTRIAL_PARAMETERS)
+        chunk['Chemical_Laundering_Candidate'] = self.facility_industrial[facility]
+
+    def iter_chunks(
+        self,
+        n_rows: int,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        launch_ready: bool = True
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Yield records chunk by chunk.
+
+        Args:
+            n_rows (int): Total number of records.
+            chunk_size (int, optional): Records per chunk. Defaults to DEFAULT_CHUNK_SIZE.
+            launch_ready (bool, optional): Add LAUNCH_READY_COLUMNS. Defaults to True.
+
+        Yields:
+            pd.DataFrame: Chunks of at most ``chunk_size`` records.
+        """
+        for start in range(0, n_rows, chunk_size):
+            yield self.generate_chunk(min(chunk_size, n_rows - start), launch_ready=launch_ready)
+
+
+def generate_exceedances(
+    n_rows: int,
+    n_facilities: int = 0,
+    years: Tuple[int, int] = (2020, 2024),
+    states: Optional[List[str]] = None,
+    seed: int = 42,
+    launch_ready: bool = True
+) -> pd.DataFrame:
+    """
+    Generate a synthetic exceedance dataset in memory.
+
+    Args:
+        n_rows (int): Number of records.
+        n_facilities (int, optional): Number of permits. Defaults to default_facility_count(n_rows).
+        years (Tuple[int, int], optional): First and last year. Defaults to 2020-2024.
+        states (List[str], optional): State codes. Defaults to ['PA'].
+        seed (int, optional): Random seed. Defaults to 42.
+        launch_ready (bool, optional): Add LAUNCH_READY_COLUMNS. Defaults to True.
+
+    Returns:
+        pd.DataFrame: The generated records.
+    """
+    generator = SyntheticEDMR(n_facilities or default_facility_count(n_rows), years, states, seed)
+    chunks = list(generator.iter_chunks(n_rows, launch_ready=launch_ready))
+    return pd.concat(chunks, ignore_index=True) if chunks else generator.generate_chunk(0, launch_ready)
+
+
+def write_synthetic_dataset(
+    path: str,
+    n_rows: int,
+    n_facilities: int = 0,
+    years: Tuple[int, int] = (2020, 2024),
+    states: Optional[List[str]] = None,
+    seed: int = 42,
+    launch_ready: bool = True,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> int:
+    """
+    Stream a synthetic dataset to CSV or Parquet, one chunk at a time.
+
+    The format follows the file extension (.parquet or .csv; .csv.gz etc. are
+    compressed by pandas).
+
+    Args:
+        path (str): Output file path.
+        n_rows (int): Number of records.
+        n_facilities (int, optional): Number of permits. Defaults to default_facility_count(n_rows).
+        years (Tuple[int, int], optional): First and last year. Defaults to 2020-2024.
+        states (List[str], optional): State codes. Defaults to ['PA'].
+        seed (int, optional): Random seed. Defaults to 42.
+        launch_ready (bool, optional): Add LAUNCH_READY_COLUMNS. Defaults to True.
+        chunk_size (int, optional): Records generated per chunk. Defaults to DEFAULT_CHUNK_SIZE.
+
+    Returns:
+        int: Number of records written.
+    """
+    generator = SyntheticEDMR(n_facilities or default_facility_count(n_rows), years, states, seed)
+    chunks = generator.iter_chunks(n_rows, chunk_size=chunk_size, launch_ready=launch_ready)
+    written = 0
+
+    if path.endswith('.parquet'):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer = None
+        try:
+            for chunk in chunks:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema, compression='zstd')
+                writer.write_table(table.cast(writer.schema))
+                written += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+    else:
+        for chunk in chunks:
+            chunk.to_csv(path, mode='w' if written == 0 else 'a', header=written == 0, index=False)
+            written += len(chunk)
+
+    return written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write a synthetic eDMR exceedance dataset")
+    parser.add_argument('path', help="Output file (.csv, .csv.gz or .parquet)")
+    parser.add_argument('--rows', type=int, default=100_000, help="Number of records")
+    parser.add_argument('--facilities', type=int, default=0, help="Number of permits (default: rows / 100)")
+    parser.add_argument('--years', default='2020-2024', help="Year range, e.g. 2015-2024")
+    parser.add_argument('--states', nargs='+', default=['PA'], choices=sorted(STATE_COUNTIES))
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--raw', action='store_true',
+                        help="Only write raw eDMR columns (input for launch_ready_columns.py)")
+    args = parser.parse_args()
+
+    written = write_synthetic_dataset(
+        args.path, args.rows,
+        n_facilities=args.facilities,
+        years=parse_years(args.years),
+        states=args.states,
+        seed=args.seed,
+        launch_ready=not args.raw,
+        chunk_size=args.chunk_size
+    )
+    size_mb = os.path.getsize(args.path) / 1024 ** 2
+    print(f"Wrote {written:,} records to {args.path} ({size_mb:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()